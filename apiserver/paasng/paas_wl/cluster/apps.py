@@ -21,3 +21,6 @@ from django.apps import AppConfig
 
 class KubeClusterConfig(AppConfig):
     name = 'paas_wl.cluster'
+
+    def ready(self):
+        from . import handlers  # noqa
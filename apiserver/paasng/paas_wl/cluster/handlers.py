@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from paas_wl.cluster.models import APIServer, Cluster
+from paas_wl.resources.base.base import kube_client_registry
+from paas_wl.resources.kube_res.base import gvk_config_registry
+
+
+@receiver(post_save, sender=Cluster)
+@receiver(post_delete, sender=Cluster)
+def on_cluster_changed(sender, instance: Cluster, *args, **kwargs):
+    """Invalidate the shared kubernetes clients and GVK configs when cluster has been changed"""
+    kube_client_registry.invalidate(instance.name)
+    gvk_config_registry.invalidate(instance.name)
+
+
+@receiver(post_save, sender=APIServer)
+@receiver(post_delete, sender=APIServer)
+def on_api_server_changed(sender, instance: APIServer, *args, **kwargs):
+    """Invalidate the shared kubernetes clients when cluster's api servers have been changed"""
+    # The related cluster might have been deleted already(cascade deletion), invalidate all clusters instead
+    kube_client_registry.invalidate()
+    gvk_config_registry.invalidate()
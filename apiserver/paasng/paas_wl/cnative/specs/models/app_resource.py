@@ -143,6 +143,18 @@ class AppModelDeployQuerySet(models.QuerySet):
         """Check if there are any successful deploys in given env"""
         return self.filter_by_env(env).filter_succeeded().exists()
 
+    def filter_successful_envs(self, envs: List[ModuleEnvironment]) -> List[ModuleEnvironment]:
+        """Return the envs which have any successful deploys, the bulk version of `any_successful`"""
+        keys = (
+            self.filter(module_id__in={env.module_id for env in envs})
+            .filter_succeeded()
+            .order_by()
+            .values_list('module_id', 'environment_name')
+            .distinct()
+        )
+        successful_keys = {(str(module_id), env_name) for module_id, env_name in keys}
+        return [env for env in envs if (str(env.module_id), env.environment) in successful_keys]
+
 
 class AppModelDeploy(TimestampedModel):
     """Cloud-native App's deployments
@@ -265,4 +277,10 @@ def _get_env_is_running(env):
     return AppModelDeploy.objects.any_successful(env) and not env.is_offlined
 
 
+def _get_envs_is_running(envs):
+    """The bulk version of `_get_env_is_running`"""
+    return [env.id for env in AppModelDeploy.objects.filter_successful_envs(envs) if not env.is_offlined]
+
+
 EnvIsRunningHub.register_func(ApplicationType.CLOUD_NATIVE, _get_env_is_running)
+EnvIsRunningHub.register_bulk_func(ApplicationType.CLOUD_NATIVE, _get_envs_is_running)
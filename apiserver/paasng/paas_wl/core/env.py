@@ -15,24 +15,56 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
-from typing import Callable, Dict
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List
 
+from paas_wl.platform.applications.identity import get_wl_apps
 from paas_wl.platform.applications.models.release import Release
 from paasng.platform.applications.constants import ApplicationType
 from paasng.platform.applications.models import ModuleEnvironment
 
 EnvIsRunningFunc = Callable[[ModuleEnvironment], bool]
+# Return the ids of running envs among given envs
+BulkEnvIsRunningFunc = Callable[[List[ModuleEnvironment]], Iterable[int]]
 
 
 class EnvIsRunningHub:
     """Get "is_running" property of env by different application type."""
 
     _map: Dict[str, EnvIsRunningFunc] = {}
+    _bulk_map: Dict[str, BulkEnvIsRunningFunc] = {}
+
+    # The attribute name for storing prefetched status on env objects
+    prefetched_attr = '_prefetched_is_running'
 
     @classmethod
     def register_func(cls, type: ApplicationType, func: EnvIsRunningFunc):
         cls._map[type.value] = func
 
+    @classmethod
+    def register_bulk_func(cls, type: ApplicationType, func: BulkEnvIsRunningFunc):
+        cls._bulk_map[type.value] = func
+
+    @classmethod
+    def prefetch(cls, envs: Iterable[ModuleEnvironment]):
+        """Query "is_running" status of many envs in bulk and store the results on the env
+        objects, later calls of `get` on these objects return the stored status directly.
+        Only use it on short-lived objects, such as those loaded for a single request.
+
+        :param envs: The environment objects, envs of types which have no bulk impl are skipped
+        """
+        envs_by_type: Dict[str, List[ModuleEnvironment]] = defaultdict(list)
+        for env in envs:
+            envs_by_type[env.application.type].append(env)
+
+        for app_type, typed_envs in envs_by_type.items():
+            func = cls._bulk_map.get(app_type)
+            if not func:
+                continue
+            running_ids = set(func(typed_envs))
+            for env in typed_envs:
+                setattr(env, cls.prefetched_attr, env.id in running_ids)
+
     @classmethod
     def get(cls, env: ModuleEnvironment) -> bool:
         """Check if an env is running, which mean a successful deployment is available
@@ -42,6 +74,10 @@ class EnvIsRunningHub:
         :param env: The environment object
         :return: Whether current env is running
         """
+        prefetched = getattr(env, cls.prefetched_attr, None)
+        if prefetched is not None:
+            return prefetched
+
         app_type = env.application.type
         func = cls._map.get(app_type)
         if not func:
@@ -60,6 +96,21 @@ def _get_env_is_running(env: ModuleEnvironment) -> bool:
     return Release.objects.any_successful(wl_app) and not env.is_offlined
 
 
+def _get_envs_is_running(envs: List[ModuleEnvironment]) -> List[int]:
+    """The bulk version of `_get_env_is_running`"""
+    keys = [(env.engine_app.region, env.engine_app.name) for env in envs]
+    wl_apps = get_wl_apps(keys)
+    successful_ids = Release.objects.filter_successful_app_ids(wl_apps.values())
+    return [
+        env.id
+        for env, key in zip(envs, keys)
+        if key in wl_apps and wl_apps[key].pk in successful_ids and not env.is_offlined
+    ]
+
+
 EnvIsRunningHub.register_func(ApplicationType.DEFAULT, _get_env_is_running)
 EnvIsRunningHub.register_func(ApplicationType.ENGINELESS_APP, _get_env_is_running)
 EnvIsRunningHub.register_func(ApplicationType.BK_PLUGIN, _get_env_is_running)
+EnvIsRunningHub.register_bulk_func(ApplicationType.DEFAULT, _get_envs_is_running)
+EnvIsRunningHub.register_bulk_func(ApplicationType.ENGINELESS_APP, _get_envs_is_running)
+EnvIsRunningHub.register_bulk_func(ApplicationType.BK_PLUGIN, _get_envs_is_running)
@@ -78,6 +78,7 @@ class AppCommandExecutor:
             ):
                 line = ensure_text(line)
                 self.stream.write_message(line)
+            self.stream.flush()
             self.wait_for_succeeded()
         except ResourceDuplicate as e:
             # 上一个 Pre-Release Hook 仍未退出
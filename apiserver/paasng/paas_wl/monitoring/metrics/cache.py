@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+"""An in-process cache for metrics range queries
+
+Range queries are aligned to step boundaries and split into fixed-size buckets. Buckets which
+are already closed (their data won't change anymore) are cached, so a repeated query only
+requests the trailing partial bucket from the metrics backend.
+"""
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from paas_wl.utils.basic import get_time_delta
+from paasng.metrics import METRICS_RANGE_CACHE_COUNTER
+
+logger = logging.getLogger(__name__)
+
+# The results of a range query, the key is the name of series(such as instance name), the value is
+# a list of [timestamp, value] points
+SeriesValues = Dict[str, List]
+RangeFetcher = Callable[[int, int], SeriesValues]
+
+
+class MetricsRangeCache:
+    """LRU cache for closed buckets of range queries
+
+    :param bucket_steps: how many steps are in one bucket
+    :param max_entries: max number of cached buckets, the least recently used ones are evicted
+    :param ttl: seconds a cached bucket stays valid
+    :param settle_seconds: a bucket is considered closed only after it ends for this long, because
+        the metrics backend may receive data points late
+    """
+
+    def __init__(self, bucket_steps: int = 60, max_entries: int = 2048, ttl: int = 3600, settle_seconds: int = 120):
+        self.bucket_steps = bucket_steps
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.settle_seconds = settle_seconds
+
+        self._entries: 'OrderedDict[Tuple, Tuple[float, SeriesValues]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def query(self, namespace: str, promql: str, start: str, end: str, step: str, fetch: RangeFetcher) -> SeriesValues:
+        """Query range data, use the cached buckets if possible
+
+        :param namespace: identity of the metrics backend
+        :param start: unix timestamp string
+        :param end: unix timestamp string
+        :param step: step string, such as "15s", "1m"
+        :param fetch: function to fetch data between (start, end) from backend, timestamps are aligned to step
+        """
+        step_seconds = int(get_time_delta(step).total_seconds())
+        if step_seconds <= 0:
+            return fetch(int(start), int(end))
+
+        aligned_start = int(start) // step_seconds * step_seconds
+        aligned_end = int(end) // step_seconds * step_seconds
+        bucket_seconds = step_seconds * self.bucket_steps
+        closed_before = time.time() - self.settle_seconds
+        key_prefix = (namespace, normalize_promql(promql), step_seconds)
+
+        # Use cached buckets from the beginning, stop at the first bucket which is not cached
+        results: SeriesValues = {}
+        bucket_start = aligned_start // bucket_seconds * bucket_seconds
+        fetch_start = aligned_start
+        while bucket_start <= aligned_end:
+            bucket_end = bucket_start + bucket_seconds
+            if bucket_end > closed_before:
+                break
+
+            cached = self._get(key_prefix + (bucket_start,))
+            if cached is None:
+                METRICS_RANGE_CACHE_COUNTER.labels(result='miss').inc()
+                # Fetch the whole bucket so it can be cached
+                fetch_start = bucket_start
+                break
+
+            METRICS_RANGE_CACHE_COUNTER.labels(result='hit').inc()
+            _extend_series(results, cached, aligned_start, aligned_end)
+            bucket_start = bucket_end
+            fetch_start = bucket_start
+        else:
+            return results
+
+        fetched = fetch(fetch_start, aligned_end)
+        for b_start, values in self._split_buckets(fetched, bucket_seconds).items():
+            b_end = b_start + bucket_seconds
+            # Only cache the closed buckets which were fetched completely
+            if b_start >= fetch_start and b_end - step_seconds <= aligned_end and b_end <= closed_before:
+                self._set(key_prefix + (b_start,), values)
+
+        _extend_series(results, fetched, aligned_start, aligned_end)
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, key: Tuple) -> Optional[SeriesValues]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+
+            expires_at, values = item
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return values
+
+    def _set(self, key: Tuple, values: SeriesValues):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _split_buckets(values: SeriesValues, bucket_seconds: int) -> Dict[int, SeriesValues]:
+        buckets: Dict[int, SeriesValues] = {}
+        for name, points in values.items():
+            for point in points:
+                b_start = int(float(point[0])) // bucket_seconds * bucket_seconds
+                buckets.setdefault(b_start, {}).setdefault(name, []).append(point)
+        return buckets
+
+
+def _extend_series(results: SeriesValues, values: SeriesValues, start: int, end: int):
+    """Append points between [start, end] to results"""
+    for name, points in values.items():
+        results.setdefault(name, []).extend(p for p in points if start <= float(p[0]) <= end)
+
+
+def normalize_promql(promql: str) -> str:
+    """Remove redundant whitespaces, so the same query written differently shares the cache"""
+    return re.sub(r'\s+', ' ', promql.strip())
+
+
+metrics_range_cache = MetricsRangeCache()
@@ -17,7 +17,7 @@ We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
 from dataclasses import dataclass
-from typing import Generator, List, Optional, Protocol, Union
+from typing import Dict, Generator, List, Optional, Protocol, Union
 
 from paas_wl.monitoring.metrics.constants import MetricsResourceType, MetricsSeriesType
 from paas_wl.monitoring.metrics.utils import MetricSmartTimeRange
@@ -35,6 +35,20 @@ class MetricClient(Protocol):
         """subclass may raise keyError if not given query_tmpl_config"""
         raise NotImplementedError
 
+    def batch_query(self, query: 'MetricQuery', container_name: str) -> Dict[str, List]:
+        """query metrics of multiple instances at once, results are grouped by instance name"""
+        raise NotImplementedError
+
+    def get_batch_query_promql(
+        self,
+        resource_type: MetricsResourceType,
+        series_type: MetricsSeriesType,
+        instance_names: List[str],
+        cluster_id: str,
+    ) -> str:
+        """subclass may raise keyError if not given batch_query_tmpl_config"""
+        raise NotImplementedError
+
 
 @dataclass
 class MetricQuery:
@@ -61,3 +75,10 @@ class MetricSeriesResult:
 
     def __len__(self):
         return len(self.results)
+
+
+def make_instances_regex(instance_names: List[str]) -> str:
+    """Make the regex which matches any of given instances, the result was used in PromQL string"""
+    # Instance names only contain [a-z0-9.-], "." must be escaped, the backslash was doubled because
+    # it's also an escape character in PromQL string
+    return '|'.join(name.replace('.', '\\\\.') for name in instance_names)
@@ -21,8 +21,14 @@ from typing import Dict, Generator, List, Optional
 
 from attrs import Factory, define
 
-from paas_wl.monitoring.metrics.clients.base import MetricQuery, MetricSeriesResult
-from paas_wl.monitoring.metrics.constants import BKMONITOR_PROMQL_TMPL, MetricsResourceType, MetricsSeriesType
+from paas_wl.monitoring.metrics.cache import metrics_range_cache
+from paas_wl.monitoring.metrics.clients.base import MetricQuery, MetricSeriesResult, make_instances_regex
+from paas_wl.monitoring.metrics.constants import (
+    BKMONITOR_PROMQL_BATCH_TMPL,
+    BKMONITOR_PROMQL_TMPL,
+    MetricsResourceType,
+    MetricsSeriesType,
+)
 from paas_wl.monitoring.metrics.exceptions import RequestMetricBackendError
 from paasng.accessories.bkmonitorv3.client import make_bk_monitor_client
 from paasng.accessories.bkmonitorv3.exceptions import BkMonitorGatewayServiceError
@@ -32,6 +38,7 @@ logger = logging.getLogger(__name__)
 
 class BkMonitorMetricClient:
     query_tmpl_config = BKMONITOR_PROMQL_TMPL
+    batch_query_tmpl_config = BKMONITOR_PROMQL_BATCH_TMPL
 
     def __init__(self, bk_biz_id: str):
         self.bk_biz_id = bk_biz_id
@@ -59,7 +66,52 @@ class BkMonitorMetricClient:
         tmpl = self.query_tmpl_config[resource_type][series_type]
         return tmpl.format(instance_name=instance_name, cluster_id=cluster_id, bk_biz_id=self.bk_biz_id)
 
+    def batch_query(self, query: MetricQuery, container_name: str) -> Dict[str, List]:
+        """查询多个实例的指标数据，结果按实例名称分组"""
+        try:
+            if not query.is_ranged or not query.time_range:
+                raise ValueError('query metric in bkmonitor without time range is unsupported!')
+
+            return self._query_range_by_instances(
+                query.query, container_name=container_name, **query.time_range.to_dict()
+            )
+        except Exception as e:
+            logger.exception("fetch metrics failed, query: %s, reason: %s", query.query, e)
+            # 某些 metrics 如果失败，不影响其他数据
+            return {}
+
+    def get_batch_query_promql(
+        self,
+        resource_type: MetricsResourceType,
+        series_type: MetricsSeriesType,
+        instance_names: List[str],
+        cluster_id: str,
+    ) -> str:
+        tmpl = self.batch_query_tmpl_config[resource_type][series_type]
+        return tmpl.format(
+            instance_names=make_instances_regex(instance_names), cluster_id=cluster_id, bk_biz_id=self.bk_biz_id
+        )
+
     def _query_range(self, promql: str, start: str, end: str, step: str, container_name: str = "") -> List:
+        """范围请求API，已结束的时间段的数据会被缓存
+
+        :param promql: 具体请求QL
+        :param start: 开始时间
+        :param end: 结束时间
+        :param step: 步长
+        :param container_name: 请求容器名
+        """
+        values = metrics_range_cache.query(
+            f'bkmonitor:{self.bk_biz_id}:{container_name}',
+            promql,
+            start,
+            end,
+            step,
+            fetch=lambda s, e: {'': self._fetch_range(promql, str(s), str(e), step, container_name)},
+        )
+        return values.get('', [])
+
+    def _fetch_range(self, promql: str, start: str, end: str, step: str, container_name: str = "") -> List:
         """范围请求API
 
         :param promql: 具体请求QL
@@ -79,6 +131,40 @@ class BkMonitorMetricClient:
 
         return []
 
+    def _query_range_by_instances(
+        self, promql: str, start: str, end: str, step: str, container_name: str = ""
+    ) -> Dict[str, List]:
+        """范围请求API，结果中包含多个实例的数据，已结束的时间段的数据会被缓存
+
+        :param promql: 具体请求QL，结果中需包含 "pod_name" 或 "pod" 维度
+        :return: 以实例名称为 key 的指标数据
+        """
+        return metrics_range_cache.query(
+            f'bkmonitor:{self.bk_biz_id}:{container_name}:by_instances',
+            promql,
+            start,
+            end,
+            step,
+            fetch=lambda s, e: self._fetch_range_by_instances(promql, str(s), str(e), step, container_name),
+        )
+
+    def _fetch_range_by_instances(
+        self, promql: str, start: str, end: str, step: str, container_name: str = ""
+    ) -> Dict[str, List]:
+        """范围请求API，结果中包含多个实例的数据
+
+        :param promql: 具体请求QL，结果中需包含 "pod_name" 或 "pod" 维度
+        :return: 以实例名称为 key 的指标数据
+        """
+        logger.info('prometheus query_range promql: %s, start: %s, end: %s, step: %s', promql, start, end, step)
+        try:
+            series = self._request(promql, start, end, step)
+            raws = BkPromResult.from_series(series).get_raws_by_instance(container_name)
+        except Exception as e:
+            logger.warning("failed to get metric results: %s", e)
+            return {}
+        return {instance_name: raw.get("values", []) for instance_name, raw in raws.items()}
+
     def _request(self, promql: str, start: str, end: str, step: str) -> List:
         """请求蓝鲸监控时序数据 API，若成功则返回 Series 数据(list)，否则抛出异常"""
 
@@ -98,10 +184,12 @@ class BkPromRangeSingleMetric:
 
     class MetricResult:
         container_name: str
+        instance_name: str
 
         def __init__(self, *args, **kwargs):
             _name = kwargs.get('container_name') or kwargs.get('container')
             self.container_name = str(_name)
+            self.instance_name = str(kwargs.get('pod_name') or kwargs.get('pod') or '')
 
         def to_raw(self):
             return dict(container_name=self.container_name)
@@ -164,3 +252,14 @@ class BkPromResult:
                 return i.to_raw()
 
         return None
+
+    def get_raws_by_instance(self, container_name: str = "") -> Dict[str, Dict]:
+        """通过 container name 获取各个实例的结果"""
+        raws: Dict[str, Dict] = {}
+        for i in self.results:
+            # 与 get_raw_by_container_name 保持一致，未指定 container name 时使用每个实例的首个结果
+            if container_name and i.container_name != container_name:
+                continue
+            if i.metric.instance_name not in raws:
+                raws[i.metric.instance_name] = i.to_raw()
+        return raws
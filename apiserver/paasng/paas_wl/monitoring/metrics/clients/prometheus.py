@@ -18,21 +18,43 @@ to the current version of the project delivered to anyone in the future.
 """
 import logging
 from dataclasses import dataclass, field
-from typing import Generator, List, Optional, Tuple
+from typing import Dict, Generator, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 from requests.status_codes import codes
 
-from paas_wl.monitoring.metrics.clients.base import MetricQuery, MetricSeriesResult
-from paas_wl.monitoring.metrics.constants import RAW_PROMQL_TMPL, MetricsResourceType, MetricsSeriesType
+from paas_wl.monitoring.metrics.cache import metrics_range_cache
+from paas_wl.monitoring.metrics.clients.base import MetricQuery, MetricSeriesResult, make_instances_regex
+from paas_wl.monitoring.metrics.constants import (
+    RAW_PROMQL_BATCH_TMPL,
+    RAW_PROMQL_TMPL,
+    MetricsResourceType,
+    MetricsSeriesType,
+)
 from paas_wl.monitoring.metrics.exceptions import RequestMetricBackendError
 
 logger = logging.getLogger(__name__)
 
+_session: Optional[requests.Session] = None
+
+
+def get_session() -> requests.Session:
+    """Get the session shared by all clients, so the connections to prometheus can be reused"""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _session = session
+    return _session
+
 
 class PrometheusMetricClient:
     query_tmpl_config = RAW_PROMQL_TMPL
+    batch_query_tmpl_config = RAW_PROMQL_BATCH_TMPL
 
     def __init__(self, basic_auth: Tuple[str, str], host: str):
         self.basic_auth = basic_auth
@@ -61,7 +83,50 @@ class PrometheusMetricClient:
         tmpl = self.query_tmpl_config[resource_type][series_type]
         return tmpl.format(instance_name=instance_name, cluster_id=cluster_id)
 
+    def batch_query(self, query: MetricQuery, container_name: str) -> Dict[str, List]:
+        """查询多个实例的指标数据，结果按实例名称分组"""
+        try:
+            if not query.is_ranged or not query.time_range:
+                raise ValueError("for security reasons, query metric without time range isn't allowed!")
+
+            return self._query_range_by_instances(
+                query.query, container_name=container_name, **query.time_range.to_dict()
+            )
+        except Exception as e:
+            logger.exception("fetch metrics failed, query: %s, reason: %s", query.query, e)
+            # 某些 metrics 如果失败，不影响其他数据
+            return {}
+
+    def get_batch_query_promql(
+        self,
+        resource_type: MetricsResourceType,
+        series_type: MetricsSeriesType,
+        instance_names: List[str],
+        cluster_id: str,
+    ) -> str:
+        tmpl = self.batch_query_tmpl_config[resource_type][series_type]
+        return tmpl.format(instance_names=make_instances_regex(instance_names), cluster_id=cluster_id)
+
     def _query_range(self, query, start, end, step, container_name: str = "") -> List:
+        """范围请求API，已结束的时间段的数据会被缓存
+
+        :param query: 具体请求的 PromQL
+        :param start: 开始时间
+        :param end: 结束时间
+        :param step: 步长
+        :param container_name: 容器名称
+        """
+        values = metrics_range_cache.query(
+            f'prometheus:{self.host}:{container_name}',
+            query,
+            start,
+            end,
+            step,
+            fetch=lambda s, e: {'': self._fetch_range(query, s, e, step, container_name)},
+        )
+        return values.get('', [])
+
+    def _fetch_range(self, query, start, end, step, container_name: str = "") -> List:
         """范围请求API
 
         :param query: 具体请求的 PromQL
@@ -87,6 +152,38 @@ class PrometheusMetricClient:
             logger.exception("failed to get metrics results")
             return []
 
+    def _query_range_by_instances(self, query, start, end, step, container_name: str = "") -> Dict[str, List]:
+        """范围请求API，结果中包含多个实例的数据，已结束的时间段的数据会被缓存
+
+        :param query: 具体请求的 PromQL，结果中需包含 "pod_name" 或 "pod" 标签
+        :return: 以实例名称为 key 的指标数据
+        """
+        return metrics_range_cache.query(
+            f'prometheus:{self.host}:{container_name}:by_instances',
+            query,
+            start,
+            end,
+            step,
+            fetch=lambda s, e: self._fetch_range_by_instances(query, s, e, step, container_name),
+        )
+
+    def _fetch_range_by_instances(self, query, start, end, step, container_name: str = "") -> Dict[str, List]:
+        """范围请求API，结果中包含多个实例的数据
+
+        :param query: 具体请求的 PromQL，结果中需包含 "pod_name" 或 "pod" 标签
+        :return: 以实例名称为 key 的指标数据
+        """
+        path = 'api/v1/query_range'
+        params = {'query': query, 'start': start, 'end': end, 'step': step}
+        logger.info('prometheus query_range: %s', params)
+        result = self._request(method='GET', path=path, params=params, timeout=30)
+        try:
+            raws = PromResult.from_resp(result).get_raws_by_instance(container_name)
+        except ValueError as e:
+            logger.warning("failed to get metric results, for %s", e)
+            return {}
+        return {instance_name: raw.get("values", []) for instance_name, raw in raws.items()}
+
     def _request(self, method, path, desired_code=codes.ok, **kwargs):
         """Wrap request.request to provide a universal requests for prometheus
         return value has been formatted as json
@@ -98,7 +195,7 @@ class PrometheusMetricClient:
             kwargs["auth"] = HTTPBasicAuth(*self.basic_auth)
 
         # long time range may cause timeout
-        resp = requests.request(method, url, **kwargs)
+        resp = get_session().request(method, url, **kwargs)
 
         if not resp.status_code == desired_code:
             logger.warning("fetch<%s> metrics failed", url)
@@ -116,10 +213,12 @@ class PrometheusMetricClient:
 class PromRangeSingleMetric:
     class MetricResult:
         container_name: str
+        instance_name: str
 
         def __init__(self, *args, **kwargs):
             _name = kwargs.get('container_name') or kwargs.get('container')
             self.container_name = str(_name)
+            self.instance_name = str(kwargs.get('pod_name') or kwargs.get('pod') or '')
 
         def to_raw(self):
             return dict(container_name=self.container_name)
@@ -181,3 +280,14 @@ class PromResult:
                 return i.to_raw()
 
         return None
+
+    def get_raws_by_instance(self, container_name: str = "") -> Dict[str, dict]:
+        """通过 container name 获取各个实例的结果"""
+        raws: Dict[str, dict] = {}
+        for i in self.results:
+            # 与 get_raw_by_container_name 保持一致，未指定 container name 时使用每个实例的首个结果
+            if container_name and i.container_name != container_name:
+                continue
+            if i.metric.instance_name not in raws:
+                raws[i.metric.instance_name] = i.to_raw()
+        return raws
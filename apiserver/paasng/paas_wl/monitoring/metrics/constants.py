@@ -16,6 +16,8 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
+from typing import Dict
+
 from blue_krill.data_types.enum import EnumField, StructuredEnum
 
 
@@ -82,3 +84,24 @@ BKMONITOR_PROMQL_TMPL = {
         'pod="{instance_name}",bcs_cluster_id="{cluster_id}",bk_biz_id="{bk_biz_id}"}}',
     },
 }
+
+
+def _make_batch_promql_tmpl(tmpl_config: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+    """Make templates which query multiple instances at once, results of different instances
+    are distinguished by the "pod_name"(or "pod") label.
+    """
+    batch_config: Dict[str, Dict[str, str]] = {}
+    for resource_type, tmpls in tmpl_config.items():
+        batch_config[resource_type] = {}
+        for series_type, tmpl in tmpls.items():
+            tmpl = tmpl.replace('pod_name="{instance_name}"', 'pod_name=~"{instance_names}"')
+            tmpl = tmpl.replace('pod="{instance_name}"', 'pod=~"{instance_names}"')
+            tmpl = tmpl.replace('sum by(container_name)', 'sum by(pod_name, container_name)')
+            tmpl = tmpl.replace('sum by (container_name)', 'sum by(pod_name, container_name)')
+            batch_config[resource_type][series_type] = tmpl
+    return batch_config
+
+
+RAW_PROMQL_BATCH_TMPL = _make_batch_promql_tmpl(RAW_PROMQL_TMPL)
+
+BKMONITOR_PROMQL_BATCH_TMPL = _make_batch_promql_tmpl(BKMONITOR_PROMQL_TMPL)
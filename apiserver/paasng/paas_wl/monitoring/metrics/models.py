@@ -17,8 +17,9 @@ We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Generator, List, Optional
+from typing import TYPE_CHECKING, Dict, Generator, List, Optional, Tuple
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
@@ -43,6 +44,11 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# 批量查询时，每条 PromQL 最多包含的实例数，避免语句过长
+BATCH_QUERY_MAX_INSTANCES = 20
+# 并发查询指标数据的最大线程数
+QUERY_MAX_WORKERS = 8
+
 
 @dataclass
 class MetricsResourceResult:
@@ -132,20 +138,87 @@ class ResourceMetricManager:
         time_range: MetricSmartTimeRange,
         series_type: Optional[MetricsSeriesType] = None,
     ) -> List[MetricsInstanceResult]:
-        all_instances_metrics = []
-        for instance in self.process.instances:
-            all_instances_metrics.append(
-                MetricsInstanceResult(
-                    instance_name=instance.name,
-                    results=self.get_instance_metrics(
-                        resource_types=resource_types,
-                        instance_name=instance.name,
-                        time_range=time_range,
-                        series_type=series_type,
-                    ),
-                )
-            )
+        """query metrics of all instances, the queries of different instances are merged into
+        a few batch queries, which are executed concurrently.
+        """
+        instance_names = [instance.name for instance in self.process.instances]
+        # not expose request series
+        series_types = [series_type] if series_type else [MetricsSeriesType.CURRENT, MetricsSeriesType.LIMIT]
+
+        planned = self._plan_batch_queries(
+            instance_names, resource_types, series_types, time_range, strict=series_type is not None
+        )
+        values = self._run_batch_queries(planned)
+        return self._fan_out_results(values, instance_names, resource_types, series_types)
+
+    def _plan_batch_queries(
+        self,
+        instance_names: List[str],
+        resource_types: List[MetricsResourceType],
+        series_types: List[MetricsSeriesType],
+        time_range: MetricSmartTimeRange,
+        strict: bool,
+    ) -> List[Tuple[MetricsResourceType, MetricsSeriesType, MetricQuery]]:
+        """make batch queries, each query contains at most `BATCH_QUERY_MAX_INSTANCES` instances
+
+        :param strict: whether to raise error when the series type not exist in query tmpl, otherwise skip it
+        """
+        planned = []
+        for resource_type in resource_types:
+            for s_type in series_types:
+                for i in range(0, len(instance_names), BATCH_QUERY_MAX_INSTANCES):
+                    names = instance_names[i : i + BATCH_QUERY_MAX_INSTANCES]
+                    try:
+                        promql = self.metric_client.get_batch_query_promql(
+                            resource_type, s_type, names, self.bcs_cluster_id
+                        )
+                    except KeyError:
+                        if strict:
+                            raise
+                        logger.info("%s type not exist in query tmpl", s_type)
+                        break
+                    planned.append((resource_type, s_type, MetricQuery(s_type, promql, time_range)))
+        return planned
+
+    def _run_batch_queries(
+        self, planned: List[Tuple[MetricsResourceType, MetricsSeriesType, MetricQuery]]
+    ) -> Dict[Tuple[MetricsResourceType, MetricsSeriesType], Dict[str, List]]:
+        """execute batch queries concurrently, return the values grouped by (resource type, series type)
+        and instance name
+        """
+        values: Dict[Tuple[MetricsResourceType, MetricsSeriesType], Dict[str, List]] = {}
+        if not planned:
+            return values
 
+        with ThreadPoolExecutor(max_workers=min(QUERY_MAX_WORKERS, len(planned))) as executor:
+            futures = [
+                executor.submit(self.metric_client.batch_query, query, self.process.main_container_name)
+                for _, _, query in planned
+            ]
+            for (resource_type, s_type, _), future in zip(planned, futures):
+                values.setdefault((resource_type, s_type), {}).update(future.result())
+        return values
+
+    @staticmethod
+    def _fan_out_results(
+        values: Dict[Tuple[MetricsResourceType, MetricsSeriesType], Dict[str, List]],
+        instance_names: List[str],
+        resource_types: List[MetricsResourceType],
+        series_types: List[MetricsSeriesType],
+    ) -> List[MetricsInstanceResult]:
+        """split the values of batch queries into results of each instance"""
+        all_instances_metrics = []
+        for instance_name in instance_names:
+            resource_results = []
+            for resource_type in resource_types:
+                results = []
+                for s_type in series_types:
+                    if (resource_type, s_type) not in values:
+                        continue
+                    series_values = values[(resource_type, s_type)].get(instance_name, [])
+                    results.append(MetricSeriesResult(type_name=s_type, results=series_values))
+                resource_results.append(MetricsResourceResult(type_name=resource_type, results=results))
+            all_instances_metrics.append(MetricsInstanceResult(instance_name=instance_name, results=resource_results))
         return all_instances_metrics
 
 
@@ -35,3 +35,10 @@ class ArtifactType(str, StructuredEnum):
     SLUG = EnumField('slug')
     IMAGE = EnumField('image')
     NONE = EnumField('none')
+
+
+class OutputStreamArchiveStorage(str, StructuredEnum):
+    """where the archived chunks of output stream were stored"""
+
+    DB = EnumField('db', label='数据库')
+    BLOB = EnumField('blob', label='对象存储')
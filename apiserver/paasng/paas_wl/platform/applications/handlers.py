@@ -16,12 +16,20 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
-from django.db.models.signals import post_save
+import logging
+
+from celery.signals import task_postrun, task_prerun
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from paas_wl.deploy.app_res.generation import get_latest_mapper_version
-from paas_wl.platform.applications.models import Config, WlApp
+from paas_wl.platform.applications.constants import OutputStreamArchiveStorage
+from paas_wl.platform.applications.identity import activate_identity_map, deactivate_identity_map, discard_wl_app
+from paas_wl.platform.applications.models import Config, OutputStreamChunk, WlApp
 from paas_wl.platform.applications.models.managers.app_res_ver import AppResVerManager
+from paas_wl.platform.applications.models.misc import get_archive_blob_store
+
+logger = logging.getLogger(__name__)
 
 
 @receiver(post_save, sender=WlApp)
@@ -32,6 +40,26 @@ def on_app_created(sender, instance, created, *args, **kwargs):
         set_res_ver(instance)
 
 
+@receiver(post_save, sender=WlApp)
+@receiver(post_delete, sender=WlApp)
+def on_app_changed(sender, instance: WlApp, *args, **kwargs):
+    """Remove the changed app from the identity map, so it will be reloaded when accessed again"""
+    discard_wl_app(instance.region, instance.name)
+
+
+@task_prerun.connect(weak=False)
+def on_task_prerun(sender=None, task=None, *args, **kwargs):
+    """Every celery task has its own identity map, eager tasks share the map with the caller"""
+    if task is not None and not task.request.is_eager:
+        activate_identity_map()
+
+
+@task_postrun.connect(weak=False)
+def on_task_postrun(sender=None, task=None, *args, **kwargs):
+    if task is not None and not task.request.is_eager:
+        deactivate_identity_map()
+
+
 def create_initial_config(app: WlApp):
     """Make sure the initial Config was created"""
     try:
@@ -44,3 +72,15 @@ def set_res_ver(app: WlApp):
     # mapper version 概念应该只在 engine 中消化，当前在应用新建后更新
     latest_version = get_latest_mapper_version().version
     AppResVerManager(app).update(latest_version)
+
+
+@receiver(post_delete, sender=OutputStreamChunk)
+def on_output_stream_chunk_deleted(sender, instance: OutputStreamChunk, *args, **kwargs):
+    """Remove the chunk content from blob store"""
+    if instance.storage != OutputStreamArchiveStorage.BLOB or not instance.blob_key:
+        return
+    try:
+        get_archive_blob_store().delete_file(instance.blob_key)
+    except Exception:
+        # cleaning should not influence main process
+        logger.exception('failed to delete archived chunk: %s', instance.blob_key)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+"""An identity map of WlApp objects, so lookups by (region, name) in the same request or task hit
+the "workloads" database only once.
+
+The map only works in an active scope, see `wl_app_identity_scope`. Outside of any scope, every
+lookup queries the database as usual.
+"""
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from werkzeug.local import Local, release_local
+
+from paas_wl.platform.applications.models import WlApp
+
+WlAppKey = Tuple[str, str]
+
+_local = Local()
+
+
+class WlAppIdentityMap:
+    """Memoize WlApp objects by (region, name)"""
+
+    def __init__(self):
+        self._apps: Dict[WlAppKey, WlApp] = {}
+
+    def get(self, region: str, name: str) -> WlApp:
+        """Get a WlApp object, query the database when it's missing
+
+        :raise: WlApp.DoesNotExist when no object can be found
+        """
+        key = (region, name)
+        if key not in self._apps:
+            self._apps[key] = WlApp.objects.get(region=region, name=name)
+        return self._apps[key]
+
+    def get_many(self, keys: Iterable[WlAppKey]) -> Dict[WlAppKey, WlApp]:
+        """Get many WlApp objects, all missing objects are queried in one query, keys which have no
+        object are excluded from the result.
+        """
+        keys = set(keys)
+        missing_names = {name for region, name in keys if (region, name) not in self._apps}
+        if missing_names:
+            for wl_app in WlApp.objects.filter(name__in=missing_names):
+                self._apps.setdefault((wl_app.region, wl_app.name), wl_app)
+        return {key: self._apps[key] for key in keys if key in self._apps}
+
+    def discard(self, region: str, name: str):
+        self._apps.pop((region, name), None)
+
+
+def get_current_identity_map() -> Optional[WlAppIdentityMap]:
+    """Get the identity map of current scope, return None if no scope is active"""
+    return getattr(_local, 'identity_map', None)
+
+
+def activate_identity_map() -> bool:
+    """Activate a new identity map if no one is active
+
+    :return: Whether a new identity map was activated
+    """
+    if get_current_identity_map() is not None:
+        return False
+    _local.identity_map = WlAppIdentityMap()
+    return True
+
+
+def deactivate_identity_map():
+    """Deactivate the identity map of current scope"""
+    release_local(_local)
+
+
+@contextmanager
+def wl_app_identity_scope() -> Iterator[WlAppIdentityMap]:
+    """Activate a WlApp identity map in the block, such as a request or a task. Nested scopes
+    share the outermost map.
+    """
+    activated = activate_identity_map()
+    identity_map = get_current_identity_map()
+    assert identity_map is not None
+    try:
+        yield identity_map
+    finally:
+        if activated:
+            deactivate_identity_map()
+
+
+def get_wl_app(region: str, name: str) -> WlApp:
+    """Get a WlApp object by region and name, memoized when a scope is active
+
+    :raise: WlApp.DoesNotExist when no object can be found
+    """
+    identity_map = get_current_identity_map()
+    if identity_map is None:
+        return WlApp.objects.get(region=region, name=name)
+    return identity_map.get(region, name)
+
+
+def get_wl_apps(keys: Iterable[WlAppKey]) -> Dict[WlAppKey, WlApp]:
+    """Get many WlApp objects by (region, name) in one query, memoized when a scope is active"""
+    identity_map = get_current_identity_map()
+    if identity_map is not None:
+        return identity_map.get_many(keys)
+
+    keys = set(keys)
+    wl_apps = WlApp.objects.filter(name__in={name for _, name in keys})
+    return {(wl_app.region, wl_app.name): wl_app for wl_app in wl_apps if (wl_app.region, wl_app.name) in keys}
+
+
+def discard_wl_app(region: str, name: str):
+    """Remove a WlApp object from the identity map of current scope, called when it's changed"""
+    identity_map = get_current_identity_map()
+    if identity_map is not None:
+        identity_map.discard(region, name)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+import datetime
+import logging
+from typing import Set
+from uuid import UUID
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from paas_wl.platform.applications.constants import OutputStreamArchiveStorage
+from paas_wl.platform.applications.models import OutputStream
+from paas_wl.platform.applications.output_archive import archive_output_stream
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Archive lines of old output streams into compressed chunks, in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            dest="days",
+            type=int,
+            default=30,
+            help="Only archive output streams created before this number of days, default is 30.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=100,
+            help="How many output streams will be archived in each batch, default is 100.",
+        )
+        parser.add_argument(
+            "--max-batches",
+            dest="max_batches",
+            type=int,
+            default=None,
+            help="Stop after this number of batches, default is no limit.",
+        )
+        parser.add_argument(
+            "--storage",
+            dest="storage",
+            choices=OutputStreamArchiveStorage.get_values(),
+            default=None,
+            help="Where to store the chunks, default is settings.OUTPUT_STREAM_ARCHIVE_STORAGE.",
+        )
+        parser.add_argument(
+            "-d",
+            "--dry-run",
+            dest="dry_run",
+            action="store_true",
+            help="Just show how many output streams would be archived; don't actually archive them.",
+        )
+
+    def handle(self, days, batch_size, max_batches, storage, dry_run, *args, **options):
+        deadline = timezone.now() - datetime.timedelta(days=days)
+        qs = OutputStream.objects.filter(archived_at__isnull=True, created__lt=deadline).order_by('created')
+        if dry_run:
+            self.stdout.write(f'{qs.count()} output streams would be archived')
+            return
+
+        archived_streams, archived_lines, batches = 0, 0, 0
+        # Streams failed to be archived will be skipped in current run
+        failed_pks: Set[UUID] = set()
+        while max_batches is None or batches < max_batches:
+            streams = list(qs.exclude(pk__in=failed_pks)[:batch_size])
+            if not streams:
+                break
+
+            for output_stream in streams:
+                try:
+                    archived_lines += archive_output_stream(output_stream, storage=storage)
+                except Exception:
+                    logger.exception('failed to archive output stream: %s', output_stream.pk)
+                    failed_pks.add(output_stream.pk)
+                else:
+                    archived_streams += 1
+            batches += 1
+            self.stdout.write(f'batch {batches} done, {archived_streams} output streams archived')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\nSuccessfully archived {archived_streams} output streams, total {archived_lines} lines, '
+                f'{len(failed_pks)} failed'
+            )
+        )
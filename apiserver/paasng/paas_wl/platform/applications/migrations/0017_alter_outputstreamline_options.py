@@ -16,19 +16,20 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
-import pytest
+# Generated by Django 3.2.12 on 2026-10-18 10:21
 
-from paas_wl.workloads.processes.watch import ParallelChainedGenerator, WatchEvent
+from django.db import migrations
 
-pytestmark = pytest.mark.django_db
 
+class Migration(migrations.Migration):
 
-class TestParallelChainedGenerators:
-    def test_normal(self):
-        def lazy_range():
-            yield from [WatchEvent(type='ERROR', error_message="") for _ in range(5)]
+    dependencies = [
+        ('api', '0016_auto_20230717_1958'),
+    ]
 
-        gen = ParallelChainedGenerator([lazy_range(), lazy_range()])
-        gen.start()
-        results = list(gen.iter_results())
-        assert len(results) == 10
+    operations = [
+        migrations.AlterModelOptions(
+            name='outputstreamline',
+            options={'ordering': ['created', 'id']},
+        ),
+    ]
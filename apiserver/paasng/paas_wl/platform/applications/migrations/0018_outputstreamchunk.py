@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+# Generated by Django 3.2.12 on 2026-10-18 14:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_alter_outputstreamline_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outputstream',
+            name='archived_at',
+            field=models.DateTimeField(help_text='日志行被归档为压缩分块的时间', null=True),
+        ),
+        migrations.CreateModel(
+            name='OutputStreamChunk',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_line', models.PositiveIntegerField(help_text='分块首行在整个日志中的序号，从 0 开始')),
+                ('line_count', models.PositiveIntegerField(help_text='分块包含的行数')),
+                ('storage', models.CharField(choices=[('db', '数据库'), ('blob', '对象存储')], max_length=16)),
+                ('content', models.BinaryField(help_text='压缩后的分块内容，仅存储方式为 db 时有值', null=True)),
+                ('blob_key', models.CharField(help_text='分块在对象存储中的 key', max_length=255, null=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                (
+                    'output_stream',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='api.outputstream'
+                    ),
+                ),
+            ],
+            options={
+                'ordering': ['start_line'],
+                'unique_together': {('output_stream', 'start_line')},
+            },
+        ),
+    ]
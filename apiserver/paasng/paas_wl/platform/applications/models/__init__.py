@@ -21,7 +21,7 @@ from paas_wl.utils.models import AuditedModel, UuidAuditedModel
 from .app import WlApp
 from .build import DEFAULT_SLUG_RUNNER_ENTRYPOINT, Build, BuildProcess
 from .config import Config
-from .misc import OneOffCommand, OutputStream, OutputStreamLine
+from .misc import OneOffCommand, OutputStream, OutputStreamChunk, OutputStreamLine
 from .release import Release
 
 __all__ = [
@@ -35,5 +35,6 @@ __all__ = [
     'Release',
     'OutputStream',
     'OutputStreamLine',
+    'OutputStreamChunk',
     'OneOffCommand',
 ]
@@ -16,18 +16,87 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
-
+import datetime
+import io
+import json
+import zlib
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+from django.conf import settings
 from django.db import models
+from django.db.models import F, Sum
+from django.utils.dateparse import parse_datetime
 
+from paas_wl.platform.applications.constants import OutputStreamArchiveStorage
 from paas_wl.platform.applications.models import UuidAuditedModel
+from paas_wl.utils.blobstore import make_blob_store
+
+
+@dataclass
+class ArchivedLine:
+    """A line restored from archived chunks, it has the same attributes as `OutputStreamLine`"""
+
+    stream: str
+    line: str
+    created: datetime.datetime
 
 
 class OutputStream(UuidAuditedModel):
+    archived_at = models.DateTimeField(null=True, help_text='日志行被归档为压缩分块的时间')
+
     def write(self, line, stream='STDOUT'):
         if not line.endswith('\n'):
             line += '\n'
         OutputStreamLine.objects.create(output_stream=self, line=line, stream=stream)
 
+    def write_lines(self, lines: Iterable[Tuple[str, str]]):
+        """Write multiple lines with one query, the order of lines is preserved
+
+        :param lines: list of (line, stream) pairs
+        """
+        objs = []
+        for line, stream in lines:
+            if not line.endswith('\n'):
+                line += '\n'
+            objs.append(OutputStreamLine(output_stream=self, line=line, stream=stream))
+        OutputStreamLine.objects.bulk_create(objs)
+
+    def get_lines(
+        self, offset: int = 0, limit: Optional[int] = None
+    ) -> Sequence[Union['OutputStreamLine', ArchivedLine]]:
+        """Get lines in order, no matter whether the stream was archived or not
+
+        :param offset: index of the first line
+        :param limit: max number of lines, default to all lines
+        """
+        if self.archived_at is None:
+            qs = self.lines.all()
+            return qs[offset : offset + limit] if limit is not None else qs[offset:]
+
+        # Only load the chunks which overlap with the range by using the line offset index
+        chunks = self.chunks.annotate(end_line=F('start_line') + F('line_count')).filter(end_line__gt=offset)
+        if limit is not None:
+            chunks = chunks.filter(start_line__lt=offset + limit)
+
+        lines: List[ArchivedLine] = []
+        first_line = None
+        for chunk in chunks:
+            if first_line is None:
+                first_line = chunk.start_line
+            lines.extend(chunk.load_lines())
+
+        if first_line is None:
+            return []
+        start = offset - first_line
+        return lines[start : start + limit] if limit is not None else lines[start:]
+
+    def count_lines(self) -> int:
+        """Count the lines, the chunks of an archived stream will not be loaded"""
+        if self.archived_at is None:
+            return self.lines.count()
+        return self.chunks.aggregate(total=Sum('line_count'))['total'] or 0
+
 
 class OutputStreamLine(models.Model):
     output_stream = models.ForeignKey('OutputStream', related_name='lines', on_delete=models.CASCADE)
@@ -37,12 +106,62 @@ class OutputStreamLine(models.Model):
     updated = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ['created']
+        # Lines written in one batch may share the same "created" value, use "id" to keep the order
+        ordering = ['created', 'id']
 
     def __str__(self):
         return '%s-%s' % (self.id, self.line)
 
 
+class OutputStreamChunk(models.Model):
+    """A compressed chunk of archived lines, the content was stored in database or blob store
+
+    Content format: zlib compressed JSON list, each item is `[stream, line, created]`.
+    """
+
+    output_stream = models.ForeignKey('OutputStream', related_name='chunks', on_delete=models.CASCADE)
+    start_line = models.PositiveIntegerField(help_text='分块首行在整个日志中的序号，从 0 开始')
+    line_count = models.PositiveIntegerField(help_text='分块包含的行数')
+    storage = models.CharField(max_length=16, choices=OutputStreamArchiveStorage.get_choices())
+    content = models.BinaryField(null=True, help_text='压缩后的分块内容，仅存储方式为 db 时有值')
+    blob_key = models.CharField(max_length=255, null=True, help_text='分块在对象存储中的 key')
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['start_line']
+        unique_together = ('output_stream', 'start_line')
+
+    def load_lines(self) -> List[ArchivedLine]:
+        if self.storage == OutputStreamArchiveStorage.BLOB:
+            fh = io.BytesIO()
+            get_archive_blob_store().download_fileobj(key=self.blob_key, fh=fh)
+            data = fh.getvalue()
+        else:
+            data = bytes(self.content)
+        return self.decode_lines(data)
+
+    @staticmethod
+    def encode_lines(lines: Iterable[Tuple[str, str, datetime.datetime]]) -> bytes:
+        """Encode lines to chunk content
+
+        :param lines: list of (stream, line, created)
+        """
+        items = [[stream, line, created.isoformat()] for stream, line, created in lines]
+        return zlib.compress(json.dumps(items).encode())
+
+    @staticmethod
+    def decode_lines(data: bytes) -> List[ArchivedLine]:
+        items = json.loads(zlib.decompress(data))
+        return [
+            ArchivedLine(stream=stream, line=line, created=parse_datetime(created)) for stream, line, created in items
+        ]
+
+
+def get_archive_blob_store():
+    bucket = settings.OUTPUT_STREAM_ARCHIVE_BUCKET or settings.BLOBSTORE_BUCKET_APP_SOURCE
+    return make_blob_store(bucket)
+
+
 class OneOffCommand(UuidAuditedModel):
     """这个类是没用的不要再看了"""
 
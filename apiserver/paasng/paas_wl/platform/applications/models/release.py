@@ -16,7 +16,7 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
-from typing import TYPE_CHECKING, Dict, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Set
 
 from django.db import models
 from jsonfield import JSONField
@@ -85,6 +85,13 @@ class ReleaseManager(models.Manager):
         qs = self.get_queryset().exclude(version=1, build=None)
         return qs.filter(app=app, failed=False).exists()
 
+    def filter_successful_app_ids(self, apps: Iterable['WlApp']) -> Set:
+        """Return the ids of engine apps which have any successful releases, the bulk version
+        of `any_successful`"""
+        qs = self.get_queryset().exclude(version=1, build=None)
+        qs = qs.filter(app__in=list(apps), failed=False).order_by()
+        return set(qs.values_list('app_id', flat=True).distinct())
+
     def get_latest(self, app: 'WlApp', ignore_failed: bool = False) -> 'Release':
         """获取最后一次发布对象(不管是否成功或失败), 如果不存在, 则根据 allow_null 返回 None 或抛异常.
 
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+"""Archive lines of finished output streams into compressed chunks"""
+import datetime
+import io
+import logging
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from paas_wl.platform.applications.constants import OutputStreamArchiveStorage
+from paas_wl.platform.applications.models import OutputStream, OutputStreamChunk, OutputStreamLine
+from paas_wl.platform.applications.models.misc import get_archive_blob_store
+
+logger = logging.getLogger(__name__)
+
+
+def archive_output_stream(
+    output_stream: OutputStream, storage: Optional[str] = None, chunk_lines: Optional[int] = None
+) -> int:
+    """Pack all lines of the output stream into compressed chunks, the original rows will be deleted.
+
+    Only finished streams should be archived, lines written after archiving can not be read anymore.
+    The chunk rows are saved first, then the blobs are uploaded, the stream will be marked as archived
+    only after all contents were saved, so a failed archiving never loses any lines.
+
+    :param storage: "db" or "blob", default to settings.OUTPUT_STREAM_ARCHIVE_STORAGE
+    :param chunk_lines: max number of lines in each chunk
+    :return: number of archived lines
+    """
+    if output_stream.archived_at is not None:
+        return 0
+
+    storage = OutputStreamArchiveStorage(storage or settings.OUTPUT_STREAM_ARCHIVE_STORAGE)
+    chunk_lines = chunk_lines or settings.OUTPUT_STREAM_ARCHIVE_CHUNK_LINES
+
+    rows = output_stream.lines.order_by('created', 'id').values_list('id', 'stream', 'line', 'created')
+    chunks: List[Tuple[OutputStreamChunk, bytes]] = []
+    max_id: Optional[int] = None
+    buffer: List[Tuple[str, str, datetime.datetime]] = []
+    line_no = 0
+    for id_, stream, line, created in rows.iterator(chunk_size=chunk_lines):
+        max_id = id_ if max_id is None else max(max_id, id_)
+        buffer.append((stream, line, created))
+        if len(buffer) >= chunk_lines:
+            chunks.append(_make_chunk(output_stream, storage, line_no, buffer))
+            line_no += len(buffer)
+            buffer = []
+    if buffer:
+        chunks.append(_make_chunk(output_stream, storage, line_no, buffer))
+        line_no += len(buffer)
+
+    with transaction.atomic(using="workloads"):
+        # Remove the chunks left by previous failed archiving
+        output_stream.chunks.all().delete()
+        OutputStreamChunk.objects.bulk_create([chunk for chunk, _ in chunks])
+
+    try:
+        _upload_blobs(chunks)
+    except Exception:
+        output_stream.chunks.all().delete()
+        raise
+
+    with transaction.atomic(using="workloads"):
+        if max_id is not None:
+            OutputStreamLine.objects.filter(output_stream=output_stream, id__lte=max_id).delete()
+        output_stream.archived_at = timezone.now()
+        output_stream.save(update_fields=['archived_at', 'updated'])
+
+    logger.info('archived %s lines of output stream %s into %s chunks', line_no, output_stream.pk, len(chunks))
+    return line_no
+
+
+def _make_chunk(
+    output_stream: OutputStream, storage: OutputStreamArchiveStorage, start_line: int, lines: List
+) -> Tuple[OutputStreamChunk, bytes]:
+    """Make a chunk object and its encoded content, the content of blob chunks should be uploaded later"""
+    data = OutputStreamChunk.encode_lines(lines)
+    chunk = OutputStreamChunk(
+        output_stream=output_stream, start_line=start_line, line_count=len(lines), storage=storage.value
+    )
+    if storage == OutputStreamArchiveStorage.BLOB:
+        chunk.blob_key = f'output-streams/{output_stream.pk}/{start_line}.json.zlib'
+    else:
+        chunk.content = data
+    return chunk, data
+
+
+def _upload_blobs(chunks: List[Tuple[OutputStreamChunk, bytes]]):
+    store = None
+    for chunk, data in chunks:
+        if chunk.storage != OutputStreamArchiveStorage.BLOB:
+            continue
+        store = store or get_archive_blob_store()
+        store.upload_fileobj(io.BytesIO(data), key=chunk.blob_key)
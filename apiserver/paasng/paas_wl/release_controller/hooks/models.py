@@ -124,7 +124,7 @@ class Command(UuidAuditedModel):
 
     @property
     def lines(self):
-        return self.output_stream.lines.all().order_by('created')
+        return self.output_stream.get_lines()
 
     @property
     def split_command(self) -> List[str]:
@@ -18,16 +18,21 @@ to the current version of the project delivered to anyone in the future.
 """
 """Base utils for kubernetes scheduler"""
 import logging
+import threading
+import time
 from functools import lru_cache
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 from blue_krill.connections.ha_endpoint_pool import HAEndpointPool
+from django.conf import settings
 from kubernetes.client import ApiClient as BaseApiClient
 from kubernetes.client.rest import RESTClientObject
 from urllib3.exceptions import HTTPError
 
 from paas_wl.cluster.models import EnhancedConfiguration
 from paas_wl.cluster.pools import ContextConfigurationPoolMap
+from paas_wl.resources.base.kube_client import CoreDynamicClient
+from paasng.metrics import KUBE_CLIENT_REGISTRY_COUNTER
 
 logger = logging.getLogger(__name__)
 
@@ -51,10 +56,12 @@ class EnhancedApiClient(BaseApiClient):
     Arguments:
 
     :param ep_pool: Endpoints Pool object.
+    :param cluster_name: The name of cluster, only set when the client was managed by `KubeClientRegistry`.
     """
 
-    def __init__(self, ep_pool: HAEndpointPool, *args, **kwargs):
+    def __init__(self, ep_pool: HAEndpointPool, *args, cluster_name: Optional[str] = None, **kwargs):
         self.ep_pool = ep_pool
+        self.cluster_name = cluster_name
         configuration = ep_pool.get()
         super().__init__(configuration, *args, **kwargs)
 
@@ -99,10 +106,100 @@ def get_all_cluster_names() -> List[str]:
     return list(get_global_configuration_pool().keys())
 
 
+class KubeClientRegistry:
+    """A process-wide registry which keeps long-lived kubernetes clients for every cluster.
+
+    - The `EnhancedApiClient` object of a cluster is created only once and reused afterwards
+    - The `CoreDynamicClient` object(and the API resources discovered by it) of a cluster is shared
+      in memory, it will be re-created when `discovery_ttl` expires
+
+    Call `invalidate()` when the cluster's configurations have been changed.
+
+    :param discovery_ttl: How long(in seconds) the discovered resources will be kept
+    """
+
+    def __init__(self, discovery_ttl: Optional[float] = None):
+        self._discovery_ttl = discovery_ttl
+        self._lock = threading.Lock()
+        self._api_clients: Dict[str, EnhancedApiClient] = {}
+        # Value: (dynamic client, the timestamp when it was created)
+        self._dynamic_clients: Dict[str, Tuple[CoreDynamicClient, float]] = {}
+
+    @property
+    def discovery_ttl(self) -> float:
+        if self._discovery_ttl is not None:
+            return self._discovery_ttl
+        return settings.K8S_DISCOVERY_CACHE_TTL
+
+    def get_api_client(self, cluster_name: str) -> EnhancedApiClient:
+        """Get the shared api client object of given cluster
+
+        :raise ValueError: when the cluster's configurations can not be found
+        """
+        client = self._api_clients.get(cluster_name)
+        if client is not None:
+            KUBE_CLIENT_REGISTRY_COUNTER.labels(cluster=cluster_name, type="api_client", result="hit").inc()
+            return client
+
+        with self._lock:
+            if cluster_name not in self._api_clients:
+                KUBE_CLIENT_REGISTRY_COUNTER.labels(cluster=cluster_name, type="api_client", result="miss").inc()
+                ep_pool = get_global_configuration_pool()[cluster_name]
+                self._api_clients[cluster_name] = EnhancedApiClient(ep_pool=ep_pool, cluster_name=cluster_name)
+            return self._api_clients[cluster_name]
+
+    def get_dynamic_client(self, api_client: BaseApiClient) -> CoreDynamicClient:
+        """Get a dynamic client object for given api client. If the api client was managed by current registry,
+        the shared dynamic client object will be returned, otherwise a new object will be created.
+        """
+        cluster_name = getattr(api_client, 'cluster_name', None)
+        if not cluster_name or self._api_clients.get(cluster_name) is not api_client:
+            return CoreDynamicClient(api_client)
+
+        item = self._dynamic_clients.get(cluster_name)
+        if item and time.monotonic() - item[1] < self.discovery_ttl:
+            KUBE_CLIENT_REGISTRY_COUNTER.labels(cluster=cluster_name, type="discovery", result="hit").inc()
+            return item[0]
+
+        with self._lock:
+            item = self._dynamic_clients.get(cluster_name)
+            if item and time.monotonic() - item[1] < self.discovery_ttl:
+                return item[0]
+
+            KUBE_CLIENT_REGISTRY_COUNTER.labels(cluster=cluster_name, type="discovery", result="miss").inc()
+            dynamic_client = CoreDynamicClient(api_client)
+            # The discoverer will load the resources from local cache file, which might be stale, always discover
+            # the resources again unless it's the first time.
+            if item:
+                dynamic_client.resources.invalidate_cache()
+            self._dynamic_clients[cluster_name] = (dynamic_client, time.monotonic())
+            return dynamic_client
+
+    def invalidate(self, cluster_name: Optional[str] = None):
+        """Invalidate the clients of given cluster, invalidate all clusters if no cluster name was given"""
+        with self._lock:
+            if cluster_name is None:
+                self._api_clients.clear()
+                self._dynamic_clients.clear()
+            else:
+                self._api_clients.pop(cluster_name, None)
+                self._dynamic_clients.pop(cluster_name, None)
+        # The configuration pool was cached globally, also clear it to load the latest configurations
+        get_global_configuration_pool.cache_clear()
+
+
+kube_client_registry = KubeClientRegistry()
+
+
+def get_dynamic_client(api_client: BaseApiClient) -> CoreDynamicClient:
+    """Get the dynamic client object for given api client, shortcut for `KubeClientRegistry.get_dynamic_client`"""
+    return kube_client_registry.get_dynamic_client(api_client)
+
+
 def get_client_by_cluster_name(cluster_name: str) -> EnhancedApiClient:
-    """Initialize an kubernetes api client object by given context
+    """Get the kubernetes api client object by given cluster name, the object is shared in current process.
 
-    TODO/IMPORTANT: Add cache to reuse connection pools which were maintained by every individual client object
+    :raise ValueError: when the cluster do not exist
     """
     if not cluster_name:
         raise ValueError("context_name must not be empty")
@@ -111,5 +208,4 @@ def get_client_by_cluster_name(cluster_name: str) -> EnhancedApiClient:
         # if the context which user want to use do not exist, raise a ValueError
         raise ValueError(f'context "{cluster_name}" not found in settings, ' f'all context: {get_all_cluster_names()}')
 
-    ep_pool = get_global_configuration_pool()[cluster_name]
-    return EnhancedApiClient(ep_pool=ep_pool)
+    return kube_client_registry.get_api_client(cluster_name)
@@ -35,6 +35,7 @@ from kubernetes.client.exceptions import ApiException
 from kubernetes.dynamic.exceptions import ResourceNotFoundError
 from kubernetes.dynamic.resource import Resource, ResourceInstance
 
+from paas_wl.resources.base.base import get_dynamic_client
 from paas_wl.resources.base.constants import QUERY_LOG_DEFAULT_TIMEOUT
 from paas_wl.resources.base.exceptions import (
     CreateServiceAccountTimeout,
@@ -42,7 +43,6 @@ from paas_wl.resources.base.exceptions import (
     ResourceDeleteTimeout,
     ResourceMissing,
 )
-from paas_wl.resources.base.kube_client import CoreDynamicClient
 from paas_wl.utils.kubestatus import parse_pod
 
 logger = logging.getLogger(__name__)
@@ -151,8 +151,8 @@ class BaseKresource:
 
         self.client = _api_client
 
-        # TODO: Add cache
-        self.dynamic_client = CoreDynamicClient(self.client)
+        # The dynamic client(and the resources discovered) will be shared when the client was managed by registry
+        self.dynamic_client = get_dynamic_client(self.client)
         self.version = self.dynamic_client.version
 
         self.request_timeout = request_timeout or get_default_options().get("request_timeout")
@@ -18,33 +18,43 @@ to the current version of the project delivered to anyone in the future.
 """
 import datetime
 import logging
+import threading
 import time
 from abc import ABCMeta, abstractmethod
 from collections import OrderedDict
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import (
     TYPE_CHECKING,
     Callable,
     ContextManager,
     Dict,
     Generic,
+    Hashable,
     Iterator,
     List,
     NamedTuple,
     Optional,
+    Tuple,
     Type,
     TypeVar,
+    Union,
+    cast,
 )
 
+from django.conf import settings
 from kubernetes.client.exceptions import ApiException
 from kubernetes.dynamic import ResourceField, ResourceInstance
 
+from paas_wl.cluster.utils import get_cluster_by_app
 from paas_wl.platform.applications.models import WlApp
 from paas_wl.resources.base import kres
 from paas_wl.resources.base.exceptions import NotAppScopedResource, ResourceDeleteTimeout, ResourceMissing
 from paas_wl.resources.kube_res.exceptions import APIServerVersionIncompatible, AppEntityNotFound
+from paas_wl.resources.kube_res.informer import InformerObjectList, get_synced_informer
+from paas_wl.resources.kube_res.watch_hub import HubEvent, HubSubscriber, watch_hub_registry
 from paas_wl.resources.utils.basic import get_client_by_app, get_client_by_cluster_name
+from paasng.metrics import KUBE_CLIENT_REGISTRY_COUNTER
 
 if TYPE_CHECKING:
     from paas_wl.deploy.app_res.generation.mapper import MapperPack
@@ -245,6 +255,85 @@ class EntitySerializerPicker(EntityTransformerPicker[AppEntitySerializer]):
     pass
 
 
+@dataclass
+class _GVKConfigEntry:
+    gvk_config: GVKConfig
+    created_at: float
+    # Key: (entity type, transformer role), value: the picked transformer object
+    transformers: Dict[Tuple[Type['AppEntity'], str], BaseTransformer] = field(default_factory=dict)
+
+
+class GVKConfigRegistry:
+    """A process-wide registry which caches the `GVKConfig` of every (cluster, kind), as well as the
+    serializers/deserializers picked by it, to avoid querying the apiserver before every request.
+
+    The cached objects will be dropped when `ttl` expires, call `invalidate()` when the cluster's
+    configurations have been changed.
+
+    :param ttl: How long(in seconds) the objects will be kept, default to `settings.K8S_DISCOVERY_CACHE_TTL`
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], _GVKConfigEntry] = {}
+
+    @property
+    def ttl(self) -> float:
+        if self._ttl is not None:
+            return self._ttl
+        return settings.K8S_DISCOVERY_CACHE_TTL
+
+    def get_gvk_config(self, cluster_name: str, kind: str, loader: Callable[[], GVKConfig]) -> GVKConfig:
+        """Get the GVKConfig of given cluster and kind, call `loader` when it's missing or expired"""
+        return self._get_entry(cluster_name, kind, loader).gvk_config
+
+    def get_transformer(
+        self,
+        cluster_name: str,
+        kind: str,
+        loader: Callable[[], GVKConfig],
+        key: Tuple[Type['AppEntity'], str],
+        factory: Callable[[GVKConfig], T],
+    ) -> T:
+        """Get the transformer picked by `factory` for given cluster and kind
+
+        :param loader: The function to load GVKConfig when it's missing or expired
+        :param key: The key of the transformer, such as (entity_type, "deserializer")
+        :param factory: The function to pick the transformer by GVKConfig, it's result will be cached
+        """
+        entry = self._get_entry(cluster_name, kind, loader)
+        transformer = entry.transformers.get(key)
+        if transformer is None:
+            transformer = entry.transformers[key] = factory(entry.gvk_config)
+        return cast(T, transformer)
+
+    def invalidate(self, cluster_name: Optional[str] = None):
+        """Invalidate the cached objects of given cluster, invalidate all clusters if no cluster name was given"""
+        with self._lock:
+            if cluster_name is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == cluster_name]:
+                del self._entries[key]
+
+    def _get_entry(self, cluster_name: str, kind: str, loader: Callable[[], GVKConfig]) -> _GVKConfigEntry:
+        entry = self._entries.get((cluster_name, kind))
+        if entry and time.monotonic() - entry.created_at < self.ttl:
+            KUBE_CLIENT_REGISTRY_COUNTER.labels(cluster=cluster_name, type="gvk_config", result="hit").inc()
+            return entry
+
+        KUBE_CLIENT_REGISTRY_COUNTER.labels(cluster=cluster_name, type="gvk_config", result="miss").inc()
+        # Load the config outside of the lock, concurrent loadings are harmless
+        entry = _GVKConfigEntry(gvk_config=loader(), created_at=time.monotonic())
+        with self._lock:
+            self._entries[(cluster_name, kind)] = entry
+        return entry
+
+
+gvk_config_registry = GVKConfigRegistry()
+
+
 @dataclass
 class ResourceList(Generic[AET]):
     """List container for multiple AppKubeResources"""
@@ -265,10 +354,44 @@ class WatchEvent(Generic[AET]):
     error_message: str = ""
 
 
+class WlAppLRUCache:
+    """A small LRU cache of WlApp objects, used by long-running watches to avoid querying the database
+    for every event.
+
+    :param max_size: the max number of objects to keep
+    """
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self._apps: 'OrderedDict[Hashable, WlApp]' = OrderedDict()
+
+    def get_or_retrieve(self, key: Hashable, retrieve: Callable[[], WlApp]) -> WlApp:
+        """Get the object by key, call `retrieve` when it's missing
+
+        :raise: NotAppScopedResource when `retrieve` raises it, the result will not be cached
+        """
+        if key in self._apps:
+            self._apps.move_to_end(key)
+            return self._apps[key]
+
+        wl_app = retrieve()
+        self._apps[key] = wl_app
+        if len(self._apps) > self.max_size:
+            self._apps.popitem(last=False)
+        return wl_app
+
+
 class NamespaceScopedReader(Generic[AET]):
-    """A reader for namespace-scoped resources."""
+    """A reader for namespace-scoped resources.
+
+    :param informer_enabled: whether to serve "list" requests from a shared informer, it only takes effect
+        when `settings.ENABLE_KUBE_INFORMER` is on.
+    """
 
     entity_type: Type[AET]
+    informer_enabled: bool = False
+    # The max number of WlApp objects cached by each watch
+    wl_app_cache_size: int = 64
 
     def retrieve_associated_wl_app(self, kube_data: ResourceInstance) -> WlApp:
         """Detect the corresponding wl_app for the given kube_data
@@ -281,6 +404,28 @@ class NamespaceScopedReader(Generic[AET]):
         """
         raise NotImplementedError
 
+    def retrieve_associated_wl_apps(self, kube_data_list: List[ResourceInstance]) -> List[Optional[WlApp]]:
+        """Detect the corresponding wl_apps for many kube_data, subclasses should override this method to
+        query the objects in bulk.
+
+        :return: A list of the same length as `kube_data_list`, None for those not app-scoped.
+        """
+        results: List[Optional[WlApp]] = []
+        for kube_data in kube_data_list:
+            try:
+                results.append(self.retrieve_associated_wl_app(kube_data))
+            except NotAppScopedResource:
+                results.append(None)
+        return results
+
+    def get_wl_app_cache_key(self, kube_data: ResourceInstance) -> Optional[Hashable]:
+        """Get the key for caching the wl_app associated with the given kube_data during watches,
+        objects with the same key must be associated with the same wl_app.
+
+        :return: None if the wl_app should not be cached
+        """
+        return None
+
     def list_by_ns(self, cluster_name: str, namespace: str, labels: Optional[Dict] = None) -> List[AET]:
         """List resources from a specified namespace while optionally filtering based on labels."""
         return self.list_by_ns_with_mdata(cluster_name, namespace, labels).items
@@ -291,14 +436,20 @@ class NamespaceScopedReader(Generic[AET]):
         """List resources from a specified namespace while optionally filtering based on labels."""
         labels = labels or {}
         deserializer = self._make_deserializer(cluster_name)
-        with self.kres(cluster_name, api_version=deserializer.get_apiversion()) as kres_client:
-            ret = kres_client.ops_label.list(namespace=namespace, labels=labels)
+        api_version = deserializer.get_apiversion()
+        ret: Union[InformerObjectList, kres.KubeObjectList]
+        if self.informer_enabled and (
+            informer := get_synced_informer(cluster_name, namespace, self.entity_type.Meta.kres_class, api_version)
+        ):
+            ret = informer.list(labels)
+        else:
+            with self.kres(cluster_name, api_version=api_version) as kres_client:
+                ret = kres_client.ops_label.list(namespace=namespace, labels=labels)
 
         items = []
-        for kube_data in ret.items:
-            try:
-                wl_app = self.retrieve_associated_wl_app(kube_data)
-            except NotAppScopedResource:
+        wl_apps = self.retrieve_associated_wl_apps(ret.items)
+        for kube_data, wl_app in zip(ret.items, wl_apps):
+            if wl_app is None:
                 continue
             item = deserializer.deserialize(wl_app, kube_data)
             # Set _kube_data
@@ -322,6 +473,7 @@ class NamespaceScopedReader(Generic[AET]):
             kwargs["resource_version"] = resource_version
 
         deserializer = self._make_deserializer(cluster_name)
+        wl_app_cache = WlAppLRUCache(self.wl_app_cache_size)
         with self.kres(cluster_name, api_version=deserializer.get_apiversion()) as kres_client:
             try:
                 for raw_event in kres_client.ops_label.create_watch_stream(
@@ -336,7 +488,7 @@ class NamespaceScopedReader(Generic[AET]):
 
                     kube_data = raw_event["object"]
                     try:
-                        wl_app = self.retrieve_associated_wl_app(kube_data)
+                        wl_app = self._retrieve_associated_wl_app_cached(kube_data, wl_app_cache)
                     except NotAppScopedResource:
                         continue
 
@@ -351,6 +503,49 @@ class NamespaceScopedReader(Generic[AET]):
                 else:
                     raise
 
+    def subscribe_by_ns(
+        self,
+        subscriber: HubSubscriber,
+        cluster_name: str,
+        namespace: str,
+        resource_version: Optional[int] = None,
+    ):
+        """Subscribe resources change events for a specified namespace through the shared watch hub, the events
+        will be received by `subscriber`.
+        """
+        deserializer = self._make_deserializer(cluster_name)
+        wl_app_cache = WlAppLRUCache(self.wl_app_cache_size)
+
+        def transform(raw_event: HubEvent) -> Optional[WatchEvent[AET]]:
+            if raw_event.type == 'ERROR':
+                return WatchEvent(type='ERROR', error_message=raw_event.error_message)
+
+            kube_data = raw_event.object
+            try:
+                wl_app = self._retrieve_associated_wl_app_cached(kube_data, wl_app_cache)
+            except NotAppScopedResource:
+                return None
+
+            event = WatchEvent[AET](type=raw_event.type)
+            event.res_object = deserializer.deserialize(wl_app, kube_data)
+            event.res_object._kube_data = kube_data
+            return event
+
+        hub = watch_hub_registry.get(
+            cluster_name, namespace, self.entity_type.Meta.kres_class, deserializer.get_apiversion()
+        )
+        subscriber.subscribe(hub, transform, resource_version)
+
+    def _retrieve_associated_wl_app_cached(self, kube_data: ResourceInstance, cache: WlAppLRUCache) -> WlApp:
+        """Detect the corresponding wl_app for the given kube_data, use the cache when possible
+
+        :raise: NotAppScopedResource If no WlApp object is found for the given kube_data.
+        """
+        key = self.get_wl_app_cache_key(kube_data)
+        if key is None:
+            return self.retrieve_associated_wl_app(kube_data)
+        return cache.get_or_retrieve(key, lambda: self.retrieve_associated_wl_app(kube_data))
+
     @staticmethod
     def _exc_is_expired_rv(exc: ApiException) -> bool:
         """Check if an exception is raised because of expired ResourceVersion"""
@@ -362,14 +557,13 @@ class NamespaceScopedReader(Generic[AET]):
         return exc.status == 410
 
     def _make_deserializer(self, cluster_name: str) -> AppEntityDeserializer[AET]:
-        gvk_config = self._load_gvk_config(cluster_name)
-        if self.entity_type.Meta.deserializer:
-            return self.entity_type.Meta.deserializer(self.entity_type, gvk_config)
-
-        picker = EntityDeserializerPicker(self.entity_type.Meta.deserializers)
-        ret = picker.get_transformer(self.entity_type, gvk_config)
-        logger.debug('Picked deserializer:%s from multi choices, gvk_config: %s', ret.__class__.__name__, gvk_config)
-        return ret
+        return gvk_config_registry.get_transformer(
+            cluster_name,
+            self.entity_type.Meta.kres_class.kind,
+            loader=lambda: self._load_gvk_config(cluster_name),
+            key=(self.entity_type, 'deserializer'),
+            factory=lambda gvk_config: _pick_deserializer(self.entity_type, gvk_config),
+        )
 
     def _load_gvk_config(self, cluster_name: str) -> GVKConfig:
         """Load GVK config of current Kind"""
@@ -395,10 +589,13 @@ class AppEntityReader(Generic[AET]):
     """Read app related kube resource, produces `AppEntity` objects
 
     :param entity_type: Bind current reader with this type, it must be subtype of AppEntity
+    :param informer_enabled: whether to serve "list" requests from a shared informer, it only takes effect
+        when `settings.ENABLE_KUBE_INFORMER` is on.
     """
 
-    def __init__(self, entity_type: Type[AET]):
+    def __init__(self, entity_type: Type[AET], informer_enabled: bool = False):
         self.entity_type = entity_type
+        self.informer_enabled = informer_enabled
 
     def get(self, app: WlApp, name: str) -> AET:
         """Get a resource by name
@@ -428,8 +625,18 @@ class AppEntityReader(Generic[AET]):
         """
         labels = labels or {}
         deserializer = self._make_deserializer(app)
-        with self.kres(app, api_version=deserializer.get_apiversion()) as kres_client:
-            ret = kres_client.ops_label.list(namespace=self._get_namespace(app), labels=labels)
+        api_version = deserializer.get_apiversion()
+        namespace = self._get_namespace(app)
+        ret: Union[InformerObjectList, kres.KubeObjectList]
+        if self.informer_enabled and (
+            informer := get_synced_informer(
+                get_cluster_by_app(app).name, namespace, self.entity_type.Meta.kres_class, api_version
+            )
+        ):
+            ret = informer.list(labels)
+        else:
+            with self.kres(app, api_version=api_version) as kres_client:
+                ret = kres_client.ops_label.list(namespace=namespace, labels=labels)
 
         items = []
         for kube_data in ret.items:
@@ -474,6 +681,45 @@ class AppEntityReader(Generic[AET]):
                 else:
                     raise
 
+    def subscribe_by_app(
+        self,
+        subscriber: HubSubscriber,
+        app: WlApp,
+        labels: Optional[Dict] = None,
+        resource_version: Optional[int] = None,
+    ):
+        """Subscribe app's resources change events through the shared watch hub, the events will be received
+        by `subscriber`.
+
+        :param labels: labels for filtering events
+        """
+        expected_labels = {k: str(v) for k, v in (labels or {}).items()}
+        deserializer = self._make_deserializer(app)
+
+        def transform(raw_event: HubEvent) -> Optional[WatchEvent[AET]]:
+            if raw_event.type == 'ERROR':
+                return WatchEvent(type='ERROR', error_message=raw_event.error_message)
+
+            kube_data = raw_event.object
+            if kube_data is None:
+                return None
+            obj_labels = (kube_data.metadata.labels if kube_data.metadata else None) or {}
+            if any(obj_labels.get(k) != v for k, v in expected_labels.items()):
+                return None
+
+            event = WatchEvent[AET](type=raw_event.type)
+            event.res_object = deserializer.deserialize(app, kube_data)
+            event.res_object._kube_data = kube_data
+            return event
+
+        hub = watch_hub_registry.get(
+            get_cluster_by_app(app).name,
+            self._get_namespace(app),
+            self.entity_type.Meta.kres_class,
+            deserializer.get_apiversion(),
+        )
+        subscriber.subscribe(hub, transform, resource_version)
+
     @staticmethod
     def _exc_is_expired_rv(exc: ApiException) -> bool:
         """Check if an exception is raised because of expired ResourceVersion"""
@@ -485,19 +731,17 @@ class AppEntityReader(Generic[AET]):
         return exc.status == 410
 
     def _make_deserializer(self, app: WlApp) -> AppEntityDeserializer[AET]:
-        gvk_config = self._load_gvk_config(app)
-        if self.entity_type.Meta.deserializer:
-            return self.entity_type.Meta.deserializer(self.entity_type, gvk_config)
-
-        picker = EntityDeserializerPicker(self.entity_type.Meta.deserializers)
-        ret = picker.get_transformer(self.entity_type, gvk_config)
-        logger.debug('Picked deserializer:%s from multi choices, gvk_config: %s', ret.__class__.__name__, gvk_config)
-        return ret
+        return gvk_config_registry.get_transformer(
+            get_cluster_by_app(app).name,
+            self.entity_type.Meta.kres_class.kind,
+            loader=lambda: self._load_gvk_config(app),
+            key=(self.entity_type, 'deserializer'),
+            factory=lambda gvk_config: _pick_deserializer(self.entity_type, gvk_config),
+        )
 
     def _load_gvk_config(self, app: WlApp) -> GVKConfig:
         """Load GVK config of current Kind"""
         with self.kres(app) as kres_client:
-            # TODO: Add cache to avoid too many api calls
             return GVKConfig(
                 server_version=kres_client.version['kubernetes']['gitVersion'],
                 kind=kres_client.kind,
@@ -606,14 +850,13 @@ class AppEntityManager(AppEntityReader, Generic[AET]):
 
     def _make_serializer(self, app: WlApp) -> AppEntitySerializer[AET]:
         """Make a serializer object by given AppEntity object"""
-        gvk_config = self._load_gvk_config(app)
-        if self.entity_type.Meta.serializer:
-            return self.entity_type.Meta.serializer(self.entity_type, gvk_config)
-
-        picker = EntitySerializerPicker(self.entity_type.Meta.serializers)
-        ret = picker.get_transformer(self.entity_type, gvk_config)
-        logger.debug('Picked serializer:%s from multi choices, gvk_config: %s', ret.__class__.__name__, gvk_config)
-        return ret
+        return gvk_config_registry.get_transformer(
+            get_cluster_by_app(app).name,
+            self.entity_type.Meta.kres_class.kind,
+            loader=lambda: self._load_gvk_config(app),
+            key=(self.entity_type, 'serializer'),
+            factory=lambda gvk_config: _pick_serializer(self.entity_type, gvk_config),
+        )
 
     def guide_res_argument(self, res: AET, allow_concrete_only=False):
         """Raise exception when resource is invalid"""
@@ -623,6 +866,28 @@ class AppEntityManager(AppEntityReader, Generic[AET]):
             raise TypeError(f'resource {res.name} is not concrete')
 
 
+def _pick_deserializer(entity_type: Type[AET], gvk_config: GVKConfig) -> AppEntityDeserializer[AET]:
+    """Pick the deserializer of given entity type by gvk_config"""
+    if entity_type.Meta.deserializer:
+        return entity_type.Meta.deserializer(entity_type, gvk_config)
+
+    picker = EntityDeserializerPicker(entity_type.Meta.deserializers)
+    ret = picker.get_transformer(entity_type, gvk_config)
+    logger.debug('Picked deserializer:%s from multi choices, gvk_config: %s', ret.__class__.__name__, gvk_config)
+    return ret
+
+
+def _pick_serializer(entity_type: Type[AET], gvk_config: GVKConfig) -> AppEntitySerializer[AET]:
+    """Pick the serializer of given entity type by gvk_config"""
+    if entity_type.Meta.serializer:
+        return entity_type.Meta.serializer(entity_type, gvk_config)
+
+    picker = EntitySerializerPicker(entity_type.Meta.serializers)
+    ret = picker.get_transformer(entity_type, gvk_config)
+    logger.debug('Picked serializer:%s from multi choices, gvk_config: %s', ret.__class__.__name__, gvk_config)
+    return ret
+
+
 class WaitDelete(Generic[AET]):
     """A helper to wait resource actually be deleted from the k8s server"""
 
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+"""Informer: keep a local copy of kubernetes resources by list-watch
+
+An informer lists all resources of one kind in a namespace, then keeps watching the changes and applies them
+to a local store which was indexed by labels. The readers may serve "list" requests from the store instead
+of requesting the apiserver every time.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple, Type
+
+from django.conf import settings
+from kubernetes.client.exceptions import ApiException
+from kubernetes.dynamic import ResourceField, ResourceInstance
+from kubernetes.watch import Watch
+
+from paas_wl.resources.base import kres
+from paas_wl.resources.base.base import get_client_by_cluster_name
+from paasng.metrics import KUBE_INFORMER_DATA_AGE_HISTOGRAM, KUBE_INFORMER_LIST_COUNTER, KUBE_INFORMER_RESYNC_COUNTER
+
+logger = logging.getLogger(__name__)
+
+# Type alias: (cluster_name, namespace, kind, api_version)
+InformerKey = Tuple[str, str, str, str]
+
+
+class InformerObjectList:
+    """A list of objects served by informer, compatible with `kres.KubeObjectList`"""
+
+    def __init__(self, items: List[ResourceInstance], resource_version: str):
+        self.items = items
+        self.metadata = ResourceField(params={'resourceVersion': resource_version})
+
+
+class InformerStore:
+    """A thread-safe store of kubernetes objects, indexed by labels"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._objects: Dict[str, ResourceInstance] = {}
+        self._label_index: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        self.resource_version = ''
+
+    def replace(self, items: List[ResourceInstance], resource_version: str):
+        """Replace all objects in store, usually called after a full list"""
+        with self._lock:
+            self._objects.clear()
+            self._label_index.clear()
+            for obj in items:
+                self._add(obj)
+            self.resource_version = resource_version
+
+    def upsert(self, obj: ResourceInstance):
+        with self._lock:
+            self._remove(obj.metadata.name)
+            self._add(obj)
+            self.resource_version = obj.metadata.resourceVersion
+
+    def delete(self, obj: ResourceInstance):
+        with self._lock:
+            self._remove(obj.metadata.name)
+            self.resource_version = obj.metadata.resourceVersion
+
+    def list(self, labels: Dict[str, str]) -> InformerObjectList:
+        """List objects which match all given labels"""
+        with self._lock:
+            if not labels:
+                names = set(self._objects.keys())
+            else:
+                names = set.intersection(*[self._label_index.get((k, str(v)), set()) for k, v in labels.items()])
+            items = [self._objects[name] for name in sorted(names)]
+            return InformerObjectList(items, self.resource_version)
+
+    def _add(self, obj: ResourceInstance):
+        name = obj.metadata.name
+        self._objects[name] = obj
+        for key, value in _get_labels(obj).items():
+            self._label_index[(key, value)].add(name)
+
+    def _remove(self, name: str):
+        obj = self._objects.pop(name, None)
+        if obj is None:
+            return
+        for key, value in _get_labels(obj).items():
+            names = self._label_index.get((key, value))
+            if names is None:
+                continue
+            names.discard(name)
+            if not names:
+                del self._label_index[(key, value)]
+
+
+def _get_labels(obj: ResourceInstance) -> Dict[str, str]:
+    return dict(obj.metadata.labels or {})
+
+
+class KubeInformer:
+    """Keep all resources of one kind in a namespace up to date in a background thread
+
+    :param kres_client: The kres object, the informer will list and watch the resources by it
+    :param namespace: The namespace to watch
+    :param watch_timeout: The timeout seconds of each watch request, a new watch request will be made after
+        the former one finished
+    :param resync_period: How often(in seconds) the informer should re-list all resources
+    :param idle_timeout: The informer will be stopped when it's not read for this long(in seconds)
+    """
+
+    def __init__(
+        self,
+        kres_client: kres.BaseKresource,
+        namespace: str,
+        watch_timeout: int = 60,
+        resync_period: int = 60 * 10,
+        idle_timeout: Optional[float] = None,
+    ):
+        self.kres_client = kres_client
+        self.namespace = namespace
+        self.kind = kres_client.kind
+        self.watch_timeout = watch_timeout
+        self.resync_period = resync_period
+        self.idle_timeout = idle_timeout if idle_timeout is not None else settings.KUBE_INFORMER_IDLE_TIMEOUT
+
+        self.store = InformerStore()
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._watcher: Optional[Watch] = None
+        self._thread: Optional[threading.Thread] = None
+
+        # Whether the store is consistent with apiserver, it's False when the informer is recovering from errors
+        self._healthy = False
+        self._last_synced_at = 0.0
+        self._last_listed_at = 0.0
+        self._last_read_at = time.monotonic()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f'informer-{self.kind}-{self.namespace}')
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._watcher:
+            self._watcher.stop()
+
+    def is_alive(self) -> bool:
+        return bool(self._thread and self._thread.is_alive()) and not self._stopped.is_set()
+
+    def is_fresh(self) -> bool:
+        """Whether the objects in store can be served"""
+        return self._synced.is_set() and self._healthy and self.is_alive()
+
+    @property
+    def data_age(self) -> float:
+        """Seconds since the store was confirmed to be consistent with apiserver last time"""
+        return time.monotonic() - self._last_synced_at
+
+    def list(self, labels: Optional[Dict[str, str]] = None) -> InformerObjectList:
+        """List objects from local store"""
+        self._last_read_at = time.monotonic()
+        KUBE_INFORMER_DATA_AGE_HISTOGRAM.labels(kind=self.kind).observe(self.data_age)
+        return self.store.list(labels or {})
+
+    def _run(self):
+        """The main loop: list all resources, then keep watching the changes"""
+        backoff = 1
+        while not self._stopped.is_set():
+            if self._is_idle():
+                logger.info('informer for %s/%s has been idle for too long, stop', self.kind, self.namespace)
+                self._stopped.set()
+                break
+
+            try:
+                if not self._healthy or time.monotonic() - self._last_listed_at > self.resync_period:
+                    self._list()
+                self._watch()
+            except Exception:
+                logger.exception('informer for %s/%s failed, will re-list later', self.kind, self.namespace)
+                self._healthy = False
+                KUBE_INFORMER_RESYNC_COUNTER.labels(kind=self.kind, reason='error').inc()
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            else:
+                backoff = 1
+
+    def _list(self):
+        ret = self.kres_client.ops_label.list(labels={}, namespace=self.namespace)
+        self.store.replace(ret.items, ret.metadata.resourceVersion)
+        self._last_listed_at = self._last_synced_at = time.monotonic()
+        self._healthy = True
+        self._synced.set()
+
+    def _watch(self):
+        """Watch changes since the last resource version, the store will be marked as unhealthy when the
+        resource version has expired, so a full list will be triggered in next round.
+        """
+        self._watcher = Watch()
+        try:
+            for raw_event in self.kres_client.ops_label.create_watch_stream(
+                labels={},
+                namespace=self.namespace,
+                resource_version=self.store.resource_version,
+                timeout_seconds=self.watch_timeout,
+                watcher=self._watcher,
+            ):
+                if raw_event['type'] == 'ERROR':
+                    logger.info('informer for %s/%s got error event, re-list', self.kind, self.namespace)
+                    self._mark_expired()
+                    return
+
+                obj = raw_event['object']
+                if raw_event['type'] == 'DELETED':
+                    self.store.delete(obj)
+                else:
+                    self.store.upsert(obj)
+                self._last_synced_at = time.monotonic()
+        except ApiException as exc:
+            # The resource version has expired, ref: NamespaceScopedReader._exc_is_expired_rv
+            if exc.status == 410:
+                self._mark_expired()
+                return
+            raise
+        else:
+            # The watch request ended normally, no changes have been missed until now
+            self._last_synced_at = time.monotonic()
+        finally:
+            self._watcher = None
+
+    def _mark_expired(self):
+        self._healthy = False
+        KUBE_INFORMER_RESYNC_COUNTER.labels(kind=self.kind, reason='expired').inc()
+
+    def _is_idle(self) -> bool:
+        return time.monotonic() - self._last_read_at > self.idle_timeout
+
+
+class InformerRegistry:
+    """A process-wide registry of informers, one informer for each (cluster, namespace, kind, api_version)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._informers: Dict[InformerKey, KubeInformer] = {}
+
+    def get(
+        self, cluster_name: str, namespace: str, kres_class: Type[kres.BaseKresource], api_version: str = ''
+    ) -> KubeInformer:
+        """Get the informer, a new informer will be started if it does not exist or has been stopped"""
+        key = (cluster_name, namespace, kres_class.kind, api_version)
+        informer = self._informers.get(key)
+        if informer and informer.is_alive():
+            return informer
+
+        with self._lock:
+            informer = self._informers.get(key)
+            if informer and informer.is_alive():
+                return informer
+
+            kres_client = kres_class(get_client_by_cluster_name(cluster_name), api_version=api_version)
+            informer = KubeInformer(kres_client, namespace)
+            informer.start()
+            self._informers[key] = informer
+            return informer
+
+    def stop_all(self):
+        with self._lock:
+            for informer in self._informers.values():
+                informer.stop()
+            self._informers.clear()
+
+
+informer_registry = InformerRegistry()
+
+
+def get_synced_informer(
+    cluster_name: str, namespace: str, kres_class: Type[kres.BaseKresource], api_version: str = ''
+) -> Optional[KubeInformer]:
+    """Get an informer which is able to serve requests, return None if informer was disabled or the informer
+    is not ready(the caller should query apiserver directly instead).
+
+    The informer will be started in background if it's not running, this function never waits for it to be
+    synced, so the first requests are served by apiserver directly.
+    """
+    if not settings.ENABLE_KUBE_INFORMER:
+        return None
+
+    informer = informer_registry.get(cluster_name, namespace, kres_class, api_version)
+    if informer.is_fresh():
+        KUBE_INFORMER_LIST_COUNTER.labels(kind=kres_class.kind, result='hit').inc()
+        return informer
+
+    KUBE_INFORMER_LIST_COUNTER.labels(kind=kres_class.kind, result='miss').inc()
+    return None
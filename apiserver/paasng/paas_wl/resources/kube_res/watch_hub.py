@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+"""Watch hub: share one upstream watch connection between many subscribers
+
+Every hub keeps one watch connection to apiserver for all resources of one kind in a namespace, and fans out
+the events to subscribers. Each subscriber owns a bounded buffer and a resourceVersion cursor, only events
+newer than the cursor will be delivered. Recent events are kept in a history buffer so that subscribers who
+start watching from a slightly older resourceVersion can still catch up.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Type
+
+from kubernetes.client.exceptions import ApiException
+from kubernetes.dynamic import ResourceInstance
+from kubernetes.watch import Watch
+
+from paas_wl.resources.base import kres
+from paas_wl.resources.base.base import get_client_by_cluster_name
+
+logger = logging.getLogger(__name__)
+
+# Type alias: (cluster_name, namespace, kind, api_version)
+HubKey = Tuple[str, str, str, str]
+# A function which transforms the raw event into the event object received by subscriber, return None to skip it
+EventTransformer = Callable[['HubEvent'], Optional[Any]]
+
+
+@dataclass
+class HubEvent:
+    """Event produced by hub"""
+
+    type: str
+    resource_version: int
+    object: Optional[ResourceInstance] = None
+    # 错误信息, 只有 type = ERROR 时有该字段
+    error_message: str = ""
+
+
+def make_error_event(message: str) -> HubEvent:
+    return HubEvent(type='ERROR', resource_version=0, error_message=message)
+
+
+class HubSubscriber:
+    """A subscriber receives events from one or more hubs into one bounded buffer
+
+    :param max_buffer_size: When the buffer is full(the consumer is too slow), the subscriber will be dropped
+        and receive an ERROR event, the consumer should list the resources again.
+    """
+
+    def __init__(self, max_buffer_size: int = 1000):
+        self._queue: queue.Queue = queue.Queue(maxsize=max_buffer_size)
+        self._hubs: List['WatchHub'] = []
+        self._closed = False
+
+    def offer(self, transformer: EventTransformer, event: HubEvent) -> bool:
+        """Put an event into buffer, return False when the subscriber is unable to receive events anymore"""
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait((transformer, event))
+        except queue.Full:
+            logger.warning('subscriber buffer is full, drop it')
+            self._closed = True
+            # Make room for the error event, the events after it will never be consumed
+            with self._queue.mutex:
+                self._queue.queue.clear()
+            self._queue.put_nowait((transformer, make_error_event('too many pending events, please list again')))
+            return False
+        return True
+
+    def subscribe(self, hub: 'WatchHub', transformer: EventTransformer, resource_version: Optional[int] = None):
+        self._hubs.append(hub)
+        hub.attach(self, transformer, resource_version)
+
+    def iter_events(self, timeout_seconds: float) -> Iterator[Any]:
+        """Yield the transformed events until timeout or an ERROR event was received"""
+        deadline = time.monotonic() + timeout_seconds
+        try:
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    transformer, event = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+                if (item := transformer(event)) is not None:
+                    yield item
+                if event.type == 'ERROR':
+                    break
+        finally:
+            self.close()
+
+    def close(self):
+        self._closed = True
+        for hub in self._hubs:
+            hub.detach(self)
+        self._hubs.clear()
+
+
+class WatchHub:
+    """Keep one upstream watch connection for all resources of one kind in a namespace
+
+    :param kres_client: The kres object used for watching
+    :param namespace: The namespace to watch
+    :param history_size: How many recent events will be kept for replaying
+    :param watch_timeout: The timeout seconds of each upstream watch request
+    :param idle_timeout: The hub will be stopped when there are no subscribers for this long(in seconds)
+    """
+
+    def __init__(
+        self,
+        kres_client: kres.BaseKresource,
+        namespace: str,
+        history_size: int = 500,
+        watch_timeout: int = 30,
+        idle_timeout: float = 60,
+    ):
+        self.kres_client = kres_client
+        self.namespace = namespace
+        self.kind = kres_client.kind
+        self.watch_timeout = watch_timeout
+        self.idle_timeout = idle_timeout
+
+        self._lock = threading.Lock()
+        # Value: (transformer, resource version cursor)
+        self._subscribers: Dict[HubSubscriber, Tuple[EventTransformer, int]] = {}
+        self._history: Deque[HubEvent] = deque(maxlen=history_size)
+        # Events newer than this resource version are all kept in history(if not evicted)
+        self._min_rv = 0
+        self._last_rv = 0
+        self._last_active_at = time.monotonic()
+
+        self._stopped = threading.Event()
+        self._watcher: Optional[Watch] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def is_alive(self) -> bool:
+        return bool(self._thread and self._thread.is_alive()) and not self._stopped.is_set()
+
+    def attach(self, subscriber: HubSubscriber, transformer: EventTransformer, resource_version: Optional[int]):
+        """Attach a subscriber, the buffered events newer than `resource_version` will be replayed to it
+
+        :param resource_version: If not given, only the events after now will be delivered
+        """
+        with self._lock:
+            self._last_active_at = time.monotonic()
+            if self._stopped.is_set():
+                subscriber.offer(transformer, make_error_event('watch hub has been stopped'))
+                return
+
+            if self._thread is None:
+                self._start(resource_version)
+            if resource_version is None:
+                resource_version = self._last_rv
+            elif resource_version < self._min_rv:
+                subscriber.offer(transformer, make_error_event(f'resource version {resource_version} too old'))
+                return
+
+            for event in self._history:
+                if event.resource_version > resource_version:
+                    subscriber.offer(transformer, event)
+            self._subscribers[subscriber] = (transformer, resource_version)
+
+    def detach(self, subscriber: HubSubscriber):
+        with self._lock:
+            self._subscribers.pop(subscriber, None)
+            self._last_active_at = time.monotonic()
+
+    def stop(self):
+        self._stopped.set()
+        if self._watcher:
+            self._watcher.stop()
+
+    def _start(self, resource_version: Optional[int]):
+        if resource_version is None:
+            # Start watching from now on
+            ret = self.kres_client.ops_label.list(labels={}, namespace=self.namespace)
+            resource_version = int(ret.metadata.resourceVersion)
+        self._min_rv = self._last_rv = resource_version
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f'watch-hub-{self.kind}-{self.namespace}')
+        self._thread.start()
+
+    def _run(self):
+        backoff = 1
+        while not self._stopped.is_set():
+            if self._is_idle():
+                logger.info('watch hub for %s/%s has no subscribers for too long, stop', self.kind, self.namespace)
+                self._stopped.set()
+                break
+
+            try:
+                self._watch()
+            except ApiException as exc:
+                if exc.status == 410:
+                    self._shutdown(f'resource version expired: {exc.reason}')
+                    break
+                logger.exception('watch hub for %s/%s failed, retry later', self.kind, self.namespace)
+            except Exception:
+                logger.exception('watch hub for %s/%s failed, retry later', self.kind, self.namespace)
+            else:
+                backoff = 1
+                continue
+
+            self._stopped.wait(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def _watch(self):
+        self._watcher = Watch()
+        try:
+            for raw_event in self.kres_client.ops_label.create_watch_stream(
+                labels={},
+                namespace=self.namespace,
+                resource_version=self._last_rv,
+                timeout_seconds=self.watch_timeout,
+                watcher=self._watcher,
+            ):
+                if raw_event['type'] == 'ERROR':
+                    msg = raw_event['raw_object'].get('message', 'Unknown')
+                    raise ApiException(status=raw_event['raw_object'].get('code', 500), reason=msg)
+
+                obj = raw_event['object']
+                self._dispatch(HubEvent(raw_event['type'], int(obj.metadata.resourceVersion), obj))
+        finally:
+            self._watcher = None
+
+    def _dispatch(self, event: HubEvent):
+        with self._lock:
+            if len(self._history) == self._history.maxlen:
+                self._min_rv = self._history[0].resource_version
+            self._history.append(event)
+            self._last_rv = event.resource_version
+
+            dropped = []
+            for subscriber, (transformer, cursor) in self._subscribers.items():
+                # Skip the events which the subscriber has already seen
+                if event.resource_version <= cursor:
+                    continue
+                if not subscriber.offer(transformer, event):
+                    dropped.append(subscriber)
+            for subscriber in dropped:
+                self._subscribers.pop(subscriber, None)
+
+    def _shutdown(self, message: str):
+        """Stop the hub and notify all subscribers, they should list the resources again"""
+        self._stopped.set()
+        with self._lock:
+            for subscriber, (transformer, _) in self._subscribers.items():
+                subscriber.offer(transformer, make_error_event(message))
+            self._subscribers.clear()
+
+    def _is_idle(self) -> bool:
+        with self._lock:
+            return not self._subscribers and time.monotonic() - self._last_active_at > self.idle_timeout
+
+
+class WatchHubRegistry:
+    """A process-wide registry of watch hubs, one hub for each (cluster, namespace, kind, api_version)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hubs: Dict[HubKey, WatchHub] = {}
+
+    def get(
+        self, cluster_name: str, namespace: str, kres_class: Type[kres.BaseKresource], api_version: str = ''
+    ) -> WatchHub:
+        """Get the hub, a new hub will be created if it does not exist or has been stopped"""
+        key = (cluster_name, namespace, kres_class.kind, api_version)
+        with self._lock:
+            hub = self._hubs.get(key)
+            # A hub which has not been started yet is also usable
+            if hub and (hub._thread is None or hub.is_alive()):
+                return hub
+
+            kres_client = kres_class(get_client_by_cluster_name(cluster_name), api_version=api_version)
+            hub = self._hubs[key] = WatchHub(kres_client, namespace)
+            return hub
+
+    def stop_all(self):
+        with self._lock:
+            for hub in self._hubs.values():
+                hub.stop()
+            self._hubs.clear()
+
+
+watch_hub_registry = WatchHubRegistry()
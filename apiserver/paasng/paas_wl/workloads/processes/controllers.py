@@ -18,7 +18,8 @@ to the current version of the project delivered to anyone in the future.
 """
 import datetime
 import logging
-from typing import List, NamedTuple
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
 
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
@@ -26,7 +27,7 @@ from django.utils.translation import ugettext_lazy as _
 from paas_wl.cnative.specs.procs import get_procfile
 from paas_wl.platform.applications.constants import WlAppType
 from paas_wl.platform.applications.models import Release, WlApp
-from paas_wl.workloads.processes.entities import Process
+from paas_wl.workloads.processes.entities import Instance, Process
 from paas_wl.workloads.processes.exceptions import ProcessOperationTooOften
 from paas_wl.workloads.processes.models import ProcessSpec
 from paas_wl.workloads.processes.readers import instance_kmodel, ns_instance_kmodel, ns_process_kmodel, process_kmodel
@@ -58,16 +59,25 @@ class ProcessesInfo(NamedTuple):
     rv_inst: str
 
 
+def group_instances(instances: Iterable[Instance]) -> Dict[Tuple[Optional[int], str], List[Instance]]:
+    """Group instances by (app, process_type), the app is represented by it's primary key, so processes can
+    find their instances by a dict lookup instead of walking through all instances.
+    """
+    groups: Dict[Tuple[Optional[int], str], List[Instance]] = defaultdict(list)
+    for inst in instances:
+        groups[(inst.app.pk, inst.process_type)].append(inst)
+    return groups
+
+
 def list_ns_processes(cluster_name: str, namespace: str) -> ProcessesInfo:
     """list the real-time processes in given namespace"""
     processes: List[Process] = []
 
     procs_in_k8s = ns_process_kmodel.list_by_ns_with_mdata(cluster_name, namespace)
     insts_in_k8s = ns_instance_kmodel.list_by_ns_with_mdata(cluster_name, namespace)
+    insts_groups = group_instances(insts_in_k8s.items)
     for process in procs_in_k8s.items:
-        process.instances = [
-            inst for inst in insts_in_k8s.items if inst.process_type == process.type and inst.app == process.app
-        ]
+        process.instances = insts_groups.get((process.app.pk, process.type), [])
         if len(process.instances) == 0:
             logger.debug("Process %s have no instances", process.type)
             continue
@@ -104,8 +114,12 @@ def list_processes(env: ModuleEnvironment) -> ProcessesInfo:
 
     procs_in_k8s = process_kmodel.list_by_app_with_meta(wl_app)
     insts_in_k8s = instance_kmodel.list_by_app_with_meta(wl_app)
+    # All instances belong to the same app, group them by process type only
+    insts_groups: Dict[str, List[Instance]] = defaultdict(list)
+    for inst in insts_in_k8s.items:
+        insts_groups[inst.process_type].append(inst)
     for process in procs_in_k8s.items:
-        process.instances = [inst for inst in insts_in_k8s.items if inst.process_type == process.type]
+        process.instances = insts_groups.get(process.type, [])
         processes.append(process)
 
     if missing := procfile.keys() - {process.type for process in processes}:
@@ -16,7 +16,7 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple, overload
 
 from attrs import define, field
 
@@ -91,3 +91,96 @@ class PlainProcess:
             return False
 
         return sum(inst.is_ready_for(expected_version) for inst in self.instances) == self.replicas
+
+
+@define
+class InstancesStat:
+    """Precomputed counters of a group of instances"""
+
+    total: int = 0
+    ready: int = 0
+    max_restart_count: int = 0
+
+
+_EMPTY_STAT = InstancesStat()
+
+
+class ProcessesSnapshot(Sequence[PlainProcess]):
+    """A snapshot of processes, it behaves like a list of `PlainProcess` objects, but the processes and
+    instances are indexed by name, and instances are grouped by (process, version) with the counters
+    precomputed. Build it once for each poll, then all checks and diffs are done without re-walking the lists.
+
+    :param processes: The processes, the objects should not be modified after the snapshot was built.
+    """
+
+    def __init__(self, processes: List[PlainProcess]):
+        self.processes = processes
+        self._processes: Dict[str, PlainProcess] = {}
+        self._instances: Dict[str, Dict[str, PlainInstance]] = {}
+        # Key: (process name, instance version)
+        self._stats: Dict[Tuple[str, int], InstancesStat] = {}
+
+        for proc in processes:
+            self._processes[proc.name] = proc
+            self._instances[proc.name] = {inst.name: inst for inst in proc.instances}
+            for inst in proc.instances:
+                stat = self._stats.get((proc.name, inst.version))
+                if stat is None:
+                    stat = self._stats[(proc.name, inst.version)] = InstancesStat()
+                stat.total += 1
+                stat.ready += inst.ready
+                stat.max_restart_count = max(stat.max_restart_count, inst.restart_count)
+
+    @classmethod
+    def from_processes(cls, processes: Sequence[PlainProcess]) -> 'ProcessesSnapshot':
+        """Make a snapshot from processes, the snapshot object will be returned as is"""
+        if isinstance(processes, ProcessesSnapshot):
+            return processes
+        return cls(list(processes))
+
+    @overload
+    def __getitem__(self, index: int) -> PlainProcess:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[PlainProcess]:
+        ...
+
+    def __getitem__(self, index):
+        return self.processes[index]
+
+    def __len__(self) -> int:
+        return len(self.processes)
+
+    def __iter__(self) -> Iterator[PlainProcess]:
+        return iter(self.processes)
+
+    def __repr__(self) -> str:
+        return f'ProcessesSnapshot({self.processes!r})'
+
+    def get_process(self, name: str) -> PlainProcess:
+        """Get a process by name
+
+        :raise: KeyError when no process can be found
+        """
+        return self._processes[name]
+
+    def get_instances(self, proc_name: str) -> Dict[str, PlainInstance]:
+        """Get the instances of a process, indexed by name"""
+        return self._instances.get(proc_name, {})
+
+    def get_instances_stat(self, proc_name: str, version: int) -> InstancesStat:
+        """Get the counters of a process's instances which belongs to given version"""
+        return self._stats.get((proc_name, version), _EMPTY_STAT)
+
+    def is_all_ready(self, proc_name: str, expected_version: int) -> bool:
+        """detect if all instances of a process are ready, same as `PlainProcess.is_all_ready`"""
+        proc = self.get_process(proc_name)
+        if expected_version != proc.version:
+            return False
+        return self.get_instances_stat(proc_name, expected_version).ready == proc.replicas
+
+    def diff(self, other: 'ProcessesSnapshot') -> Tuple[Set[str], Set[str], Set[str]]:
+        """Diff processes names with a previous snapshot, returns (added, removed, both_exists)"""
+        names_before, names_after = other._processes.keys(), self._processes.keys()
+        return (set(names_after - names_before), set(names_before - names_after), set(names_after & names_before))
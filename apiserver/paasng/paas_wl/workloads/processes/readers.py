@@ -16,9 +16,12 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
-from typing import Dict, List, Optional, cast
+from functools import reduce
+from operator import or_
+from typing import Dict, Hashable, List, Optional, Tuple, cast
 
 from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
 from kubernetes.dynamic import ResourceInstance
 
 from paas_wl.cnative.specs.constants import (
@@ -29,6 +32,7 @@ from paas_wl.cnative.specs.constants import (
     WLAPP_NAME_ANNO_KEY,
 )
 from paas_wl.platform.applications.constants import WlAppType
+from paas_wl.platform.applications.identity import get_wl_apps
 from paas_wl.platform.applications.models import WlApp
 from paas_wl.platform.applications.models.managers.app_res_ver import AppResVerManager
 from paas_wl.resources.base.exceptions import NotAppScopedResource
@@ -86,7 +90,7 @@ class ProcessReader(AppEntityReader[Process]):
         raise AppEntityNotFound(f'No processes can be found with type={type}')
 
 
-process_kmodel = ProcessReader(Process)
+process_kmodel = ProcessReader(Process, informer_enabled=True)
 
 
 class InstanceReader(AppEntityReader[Instance]):
@@ -121,7 +125,7 @@ class InstanceReader(AppEntityReader[Instance]):
             )
 
 
-instance_kmodel = InstanceReader(Instance)
+instance_kmodel = InstanceReader(Instance, informer_enabled=True)
 
 
 def retrieve_associated_wl_app(labels: Dict[str, str]) -> WlApp:
@@ -146,8 +150,75 @@ def retrieve_associated_wl_app(labels: Dict[str, str]) -> WlApp:
         raise NotAppScopedResource
 
 
-class ProcessNamespaceScopedReader(NamespaceScopedReader[Process]):
+def get_wl_app_lookup_key(labels: Dict[str, str]) -> Optional[Tuple[str, ...]]:
+    """Get the key for looking up the wl_app by labels, the key is one of the forms below:
+
+    - ("name", wl_app_name)
+    - ("env", app_code, module_name, environment)
+
+    :return: None if the labels can not identify any wl_app
+    """
+    if wl_app_name := labels.get(WLAPP_NAME_ANNO_KEY):
+        return ("name", wl_app_name)
+
+    app_code = labels.get(BKAPP_CODE_ANNO_KEY)
+    module_name = labels.get(MODULE_NAME_ANNO_KEY)
+    environment = labels.get(ENVIRONMENT_ANNO_KEY)
+    if not app_code or not module_name or not environment:
+        return None
+    return ("env", app_code, module_name, environment)
+
+
+def bulk_retrieve_associated_wl_apps(labels_list: List[Dict[str, str]]) -> List[Optional[WlApp]]:
+    """Retrieve the associated wl_apps for many label sets, works like `retrieve_associated_wl_app`
+    but queries the database at most twice: one for wl_app names and one for the fallback environments.
+
+    :return: A list of the same length as `labels_list`, None for those not app-scoped.
+    """
+    keys = [get_wl_app_lookup_key(labels) for labels in labels_list]
+    found: Dict[Tuple[str, ...], WlApp] = {}
+
+    names = {key[1] for key in keys if key and key[0] == "name"}
+    if names:
+        for wl_app in WlApp.objects.filter(name__in=names):
+            found[("name", wl_app.name)] = wl_app
+
+    # 兜底, 根据 app code, module name, environment 查询 wl_app
+    env_keys = {key for key in keys if key and key[0] == "env"}
+    if env_keys:
+        cond = reduce(
+            or_,
+            (
+                Q(application__code=app_code, module__name=module_name, environment=environment)
+                for _, app_code, module_name, environment in env_keys
+            ),
+        )
+        envs = list(ModuleEnvironment.objects.filter(cond).select_related("application", "module", "engine_app"))
+        wl_apps = get_wl_apps((env.engine_app.region, env.engine_app.name) for env in envs)
+        for env in envs:
+            if wl_app := wl_apps.get((env.engine_app.region, env.engine_app.name)):
+                found[("env", env.application.code, env.module.name, env.environment)] = wl_app
+
+    return [found.get(key) if key else None for key in keys]
+
+
+class _WlAppLabelsMixin:
+    """Detect the associated wl_app by the labels of kube_data"""
+
+    def retrieve_associated_wl_app(self, kube_data: ResourceInstance) -> WlApp:
+        labels: Dict[str, str] = kube_data.metadata.labels or {}
+        return retrieve_associated_wl_app(labels)
+
+    def retrieve_associated_wl_apps(self, kube_data_list: List[ResourceInstance]) -> List[Optional[WlApp]]:
+        return bulk_retrieve_associated_wl_apps([kube_data.metadata.labels or {} for kube_data in kube_data_list])
+
+    def get_wl_app_cache_key(self, kube_data: ResourceInstance) -> Optional[Hashable]:
+        return get_wl_app_lookup_key(kube_data.metadata.labels or {})
+
+
+class ProcessNamespaceScopedReader(_WlAppLabelsMixin, NamespaceScopedReader[Process]):
     entity_type = Process
+    informer_enabled = True
 
     def list_by_ns_with_mdata(
         self, cluster_name: str, namespace: str, labels: Optional[Dict] = None
@@ -157,13 +228,10 @@ class ProcessNamespaceScopedReader(NamespaceScopedReader[Process]):
         labels.update(extra_labels)
         return super().list_by_ns_with_mdata(cluster_name, namespace, labels)
 
-    def retrieve_associated_wl_app(self, kube_data: ResourceInstance) -> WlApp:
-        labels: Dict[str, str] = kube_data.metadata.labels or {}
-        return retrieve_associated_wl_app(labels)
 
-
-class InstanceNamespaceScopeReader(NamespaceScopedReader[Instance]):
+class InstanceNamespaceScopeReader(_WlAppLabelsMixin, NamespaceScopedReader[Instance]):
     entity_type = Instance
+    informer_enabled = True
 
     def list_by_ns_with_mdata(
         self, cluster_name: str, namespace: str, labels: Optional[Dict] = None
@@ -173,10 +241,6 @@ class InstanceNamespaceScopeReader(NamespaceScopedReader[Instance]):
         labels.update(extra_labels)
         return super().list_by_ns_with_mdata(cluster_name, namespace, labels)
 
-    def retrieve_associated_wl_app(self, kube_data: ResourceInstance) -> WlApp:
-        labels: Dict[str, str] = kube_data.metadata.labels or {}
-        return retrieve_associated_wl_app(labels)
-
 
 ns_process_kmodel = ProcessNamespaceScopedReader()
 ns_instance_kmodel = InstanceNamespaceScopeReader()
@@ -17,16 +17,14 @@ We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
 import logging
-import queue
-import threading
-from typing import Any, Generator, List, Optional, Union
+from typing import Generator, Optional, Union
 
-from django.db import connection
 from django.utils.functional import cached_property
 
 from paas_wl.cluster.shim import EnvClusterService
 from paas_wl.platform.applications.models import WlApp
 from paas_wl.resources.kube_res.base import WatchEvent
+from paas_wl.resources.kube_res.watch_hub import HubSubscriber
 from paas_wl.workloads.processes.controllers import ProcessesInfo, list_ns_processes, list_processes
 from paas_wl.workloads.processes.entities import Instance, Process
 from paas_wl.workloads.processes.readers import (
@@ -84,31 +82,16 @@ class ProcInstByEnvListWatcher:
         :param rv_proc: if given, only events with greater resource_version will be returned
         :param rv_inst: same as rv_proc, but for ProcInst type
         """
-
-        event_gens: List = [
-            ns_process_kmodel.watch_by_ns(
-                cluster_name=self.cluster_name,
-                namespace=self.namespace,
-                resource_version=rv_proc,
-                timeout_seconds=timeout_seconds,
-            ),
-            ns_instance_kmodel.watch_by_ns(
-                cluster_name=self.cluster_name,
-                namespace=self.namespace,
-                resource_version=rv_inst,
-                timeout_seconds=timeout_seconds,
-            ),
-        ]
-        # NOTE: Using of ThreadPoolExecutor/Multi-Threading may cause apiserver connections leak because every
-        # `procinst_kmodel.watch_by_app` call will create a brand new kubernetes client object which holding a urllib3
-        # connection pool manager.
-        #
-        # Use with caution.
-        parallel_gen = ParallelChainedGenerator(event_gens)
-        parallel_gen.start()
-        for event in parallel_gen.iter_results():
-            yield event
-        parallel_gen.close()
+        # Both kinds of events are received by one subscriber, the upstream watch connections are shared
+        # with other subscribers who are watching the same namespace.
+        subscriber = HubSubscriber()
+        try:
+            ns_process_kmodel.subscribe_by_ns(subscriber, self.cluster_name, self.namespace, resource_version=rv_proc)
+            ns_instance_kmodel.subscribe_by_ns(subscriber, self.cluster_name, self.namespace, resource_version=rv_inst)
+        except Exception:
+            subscriber.close()
+            raise
+        yield from _iter_subscriber_events(subscriber, timeout_seconds)
 
 
 class ProcInstByModuleEnvListWatcher:
@@ -139,82 +122,20 @@ class ProcInstByModuleEnvListWatcher:
         :param rv_proc: if given, only events with greater resource_version will be returned
         :param rv_inst: same as rv_proc, but for ProcInst type
         """
-        event_gens: List = [
-            process_kmodel.watch_by_app(
-                app=self.wl_app,
-                labels=ProcessAPIAdapter.app_selector(self.wl_app),
-                resource_version=rv_proc,
-                timeout_seconds=timeout_seconds,
-            ),
-            instance_kmodel.watch_by_app(
-                app=self.wl_app,
-                labels=ProcessAPIAdapter.app_selector(self.wl_app),
-                resource_version=rv_inst,
-                timeout_seconds=timeout_seconds,
-            ),
-        ]
-        # NOTE: Using of ThreadPoolExecutor/Multi-Threading may cause apiserver connections leak because every
-        # `procinst_kmodel.watch_by_app` call will create a brand new kubernetes client object which holding a urllib3
-        # connection pool manager.
-        #
-        # Use with caution.
-        parallel_gen = ParallelChainedGenerator(event_gens)
-        parallel_gen.start()
-        for event in parallel_gen.iter_results():
-            yield event
-        parallel_gen.close()
-
-
-class ParallelChainedGenerator:
-    """Consumes multiple generators in parallel"""
-
-    def __init__(self, generators: List):
-        self.queue: queue.Queue = queue.Queue()
-        self.generators = generators
-        self.tasks: List = []
-        self._started = False
-
-    def start(self):
-        """Start current generator"""
-        for gen in self.generators:
-            task = threading.Thread(target=self._consume_gen, args=(gen,))
-            task.setDaemon(True)
-            task.start()
-            self.tasks.append(task)
-
-        self._started = True
-
-    def _consume_gen(self, gen: Generator[WatchEvent[Any], None, None]):
-        """Consumes generator and put result to queue"""
+        subscriber = HubSubscriber()
+        labels = ProcessAPIAdapter.app_selector(self.wl_app)
         try:
-            for value in gen:
-                if value.type == 'ERROR':
-                    logger.warning('Watch resource error: %s', value.error_message)
-                self.queue.put(value)
-        except Exception as e:
-            logger.exception('Error while consuming generator: %s', str(e))
-        finally:
-            # Always close connection in every thread to avoid leaking of database connections
-            logger.debug("generator stopped")
-            connection.close()
-
-    def iter_results(self) -> Generator[WatchEvent[Any], None, None]:
-        """yield results as a generator"""
-        if not self._started:
-            raise ValueError('current generator is not started yet')
-
-        while True:
-            try:
-                item = self.queue.get(timeout=0.5)
-            except queue.Empty:
-                pass
-            else:
-                yield item
-                self.queue.task_done()
-
-            all_task_finished = all(not task.is_alive() for task in self.tasks)
-            if all_task_finished and self.queue.empty():
-                break
-
-    def close(self):
-        pass
+            process_kmodel.subscribe_by_app(subscriber, self.wl_app, labels=labels, resource_version=rv_proc)
+            instance_kmodel.subscribe_by_app(subscriber, self.wl_app, labels=labels, resource_version=rv_inst)
+        except Exception:
+            subscriber.close()
+            raise
+        yield from _iter_subscriber_events(subscriber, timeout_seconds)
+
+
+def _iter_subscriber_events(subscriber: HubSubscriber, timeout_seconds: int) -> Generator[_EVENT_TYPE, None, None]:
+    """Yield the events received by subscriber until timeout, the subscriber will be closed when finished"""
+    for event in subscriber.iter_events(timeout_seconds):
+        if event.type == 'ERROR':
+            logger.warning('Watch resource error: %s', event.error_message)
+        yield event
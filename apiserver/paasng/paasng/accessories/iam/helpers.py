@@ -16,20 +16,71 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
-from typing import Dict, List, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Collection, Dict, Iterable, List, Optional, Union
 
 from bkpaas_auth.core.encoder import user_id_encoder
 from django.conf import settings
+from django.core.cache import cache
 
 from paasng.accessories.iam.members.models import ApplicationGradeManager, ApplicationUserGroup
 from paasng.platform.applications.constants import ApplicationRole
 
 from .client import BKIAMClient
 from .constants import APP_DEFAULT_ROLES, NEVER_EXPIRE_DAYS
+from .user_apps import hot_add_user_app, remove_hot_added_user_app
 
 IAM_CLI = BKIAMClient()
 
 
+def _user_group_members_cache_key(user_group_id: int) -> str:
+    return f'bk_paas3:iam:user_group_members:{user_group_id}'
+
+
+def fetch_user_groups_members(user_group_ids: Iterable[int]) -> Dict[int, List[str]]:
+    """
+    批量获取用户组成员，优先从缓存中读取，未命中缓存的用户组将并发请求权限中心
+
+    :param user_group_ids: 用户组 ID 列表
+    :return: {user_group_id: [username, ...]}
+    """
+    user_group_ids = list(dict.fromkeys(user_group_ids))
+    if not user_group_ids:
+        return {}
+
+    timeout = settings.IAM_GROUP_MEMBERS_CACHE_TIMEOUT
+    members: Dict[int, List[str]] = {}
+    if timeout:
+        cached = cache.get_many([_user_group_members_cache_key(group_id) for group_id in user_group_ids])
+        for group_id in user_group_ids:
+            key = _user_group_members_cache_key(group_id)
+            if key in cached:
+                members[group_id] = cached[key]
+
+    missing_ids = [group_id for group_id in user_group_ids if group_id not in members]
+    if not missing_ids:
+        return members
+
+    max_workers = min(len(missing_ids), settings.IAM_GROUP_MEMBERS_FETCH_CONCURRENCY)
+    if max_workers <= 1:
+        fetched = [IAM_CLI.fetch_user_group_members(group_id) for group_id in missing_ids]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            fetched = list(executor.map(IAM_CLI.fetch_user_group_members, missing_ids))
+
+    members.update(zip(missing_ids, fetched))
+    if timeout:
+        cache.set_many(
+            {_user_group_members_cache_key(group_id): members[group_id] for group_id in missing_ids}, timeout
+        )
+    return members
+
+
+def invalidate_user_groups_members(user_group_ids: Iterable[int]):
+    """用户组成员变更后，清理对应的成员缓存"""
+    cache.delete_many([_user_group_members_cache_key(group_id) for group_id in user_group_ids])
+
+
 def fetch_role_members(app_code: str, role: ApplicationRole) -> List[str]:
     """
     通过指定应用与角色，获取对应的用户组信息
@@ -37,9 +88,8 @@ def fetch_role_members(app_code: str, role: ApplicationRole) -> List[str]:
     :param app_code: 蓝鲸应用 ID
     :param role: 应用角色
     """
-    return IAM_CLI.fetch_user_group_members(
-        user_group_id=ApplicationUserGroup.objects.get(app_code=app_code, role=role).user_group_id
-    )
+    user_group_id = ApplicationUserGroup.objects.get(app_code=app_code, role=role).user_group_id
+    return fetch_user_groups_members([user_group_id])[user_group_id]
 
 
 def add_role_members(
@@ -62,11 +112,17 @@ def add_role_members(
             usernames=usernames,
         )
 
-    return IAM_CLI.add_user_group_members(
-        user_group_id=ApplicationUserGroup.objects.get(app_code=app_code, role=role).user_group_id,
-        usernames=usernames,
-        expired_after_days=expired_after_days,
-    )
+    user_group_id = ApplicationUserGroup.objects.get(app_code=app_code, role=role).user_group_id
+    try:
+        result = IAM_CLI.add_user_group_members(
+            user_group_id=user_group_id, usernames=usernames, expired_after_days=expired_after_days
+        )
+    finally:
+        invalidate_user_groups_members([user_group_id])
+
+    # 权限中心同步权限策略存在时延，先将应用临时授权给新成员
+    hot_add_user_app(usernames, app_code, role)
+    return result
 
 
 def delete_role_members(app_code: str, role: ApplicationRole, usernames: Union[List[str], str]):
@@ -86,10 +142,12 @@ def delete_role_members(app_code: str, role: ApplicationRole, usernames: Union[L
             usernames=usernames,
         )
 
-    return IAM_CLI.delete_user_group_members(
-        user_group_id=ApplicationUserGroup.objects.get(app_code=app_code, role=role).user_group_id,
-        usernames=usernames,
-    )
+    user_group_id = ApplicationUserGroup.objects.get(app_code=app_code, role=role).user_group_id
+    try:
+        return IAM_CLI.delete_user_group_members(user_group_id=user_group_id, usernames=usernames)
+    finally:
+        invalidate_user_groups_members([user_group_id])
+        remove_hot_added_user_app(usernames, app_code)
 
 
 def fetch_user_roles(app_code: str, username: str) -> List[ApplicationRole]:
@@ -97,11 +155,9 @@ def fetch_user_roles(app_code: str, username: str) -> List[ApplicationRole]:
     if username == settings.ADMIN_USERNAME:
         return [ApplicationRole.ADMINISTRATOR]
 
-    user_roles = []
-    for group in ApplicationUserGroup.objects.filter(app_code=app_code).order_by('role'):
-        if username in IAM_CLI.fetch_user_group_members(group.user_group_id):
-            user_roles.append(group.role)
-
+    # 角色按优先级排序
+    role_members = fetch_apps_role_members([app_code])[app_code]
+    user_roles = [role for role, members in role_members.items() if username in members]
     if not user_roles:
         return [ApplicationRole.NOBODY]
 
@@ -110,14 +166,29 @@ def fetch_user_roles(app_code: str, username: str) -> List[ApplicationRole]:
 
 def fetch_user_main_role(app_code: str, username: str) -> ApplicationRole:
     """获取用户在某个应用中最高优先级的角色"""
-    if username == settings.ADMIN_USERNAME:
-        return ApplicationRole.ADMINISTRATOR
+    return fetch_user_roles(app_code, username)[0]
+
+
+def fetch_apps_role_members(
+    app_codes: Collection[str], roles: Optional[Collection[ApplicationRole]] = None
+) -> Dict[str, Dict[ApplicationRole, List[str]]]:
+    """
+    批量获取多个应用各角色的成员，所有用户组只需查询一次数据库，成员获取复用用户组成员缓存，避免逐个应用，逐个用户组请求权限中心
 
-    for group in ApplicationUserGroup.objects.filter(app_code=app_code).order_by('role'):
-        if username in IAM_CLI.fetch_user_group_members(group.user_group_id):
-            return group.role
+    :param app_codes: 蓝鲸应用 ID 列表
+    :param roles: 需要获取的角色，默认为所有角色
+    :return: {app_code: {role: [username, ...]}}，角色按优先级排序
+    """
+    qs = ApplicationUserGroup.objects.filter(app_code__in=app_codes)
+    if roles is not None:
+        qs = qs.filter(role__in=roles)
+    groups = list(qs.order_by('app_code', 'role'))
+    members_map = fetch_user_groups_members(group.user_group_id for group in groups)
 
-    return ApplicationRole.NOBODY
+    results: Dict[str, Dict[ApplicationRole, List[str]]] = {app_code: {} for app_code in app_codes}
+    for group in groups:
+        results[group.app_code][group.role] = members_map[group.user_group_id]
+    return results
 
 
 def remove_user_all_roles(app_code: str, usernames: Union[List[str], str]):
@@ -139,8 +210,12 @@ def remove_user_all_roles(app_code: str, usernames: Union[List[str], str]):
         group.role: group.user_group_id for group in ApplicationUserGroup.objects.filter(app_code=app_code)
     }
     # 再将所有的内建角色权限清理掉
-    for role in APP_DEFAULT_ROLES:
-        IAM_CLI.delete_user_group_members(role_group_id_map[role], usernames)
+    try:
+        for role in APP_DEFAULT_ROLES:
+            IAM_CLI.delete_user_group_members(role_group_id_map[role], usernames)
+    finally:
+        invalidate_user_groups_members(role_group_id_map.values())
+        remove_hot_added_user_app(usernames, app_code)
 
 
 def fetch_application_members(app_code: str) -> List[Dict]:
@@ -148,9 +223,12 @@ def fetch_application_members(app_code: str) -> List[Dict]:
     获取一个蓝鲸应用所有用户（包含角色信息）
     顺序：管理员 - 开发者 - 运营者
     """
+    groups = list(ApplicationUserGroup.objects.filter(app_code=app_code).order_by('role'))
+    group_members_map = fetch_user_groups_members(group.user_group_id for group in groups)
+
     member_map: Dict[str, Dict] = {}
-    for group in ApplicationUserGroup.objects.filter(app_code=app_code).order_by('role'):
-        for username in IAM_CLI.fetch_user_group_members(group.user_group_id):
+    for group in groups:
+        for username in group_members_map[group.user_group_id]:
             if username not in member_map:
                 member_map[username] = {
                     'roles': [group.role],
@@ -17,20 +17,19 @@ We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Type
+from typing import Dict, Set, Type
 
 from attrs import define, field, validators
-from bkpaas_auth.core.encoder import user_id_encoder
 from blue_krill.data_types.enum import EnumField, StructuredEnum
-from django.conf import settings
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from iam.exceptions import AuthAPIError
 
-from paasng.accessories.iam.constants import PERM_EXEMPT_TIME_FOR_OWNER_AFTER_CREATE_APP, ResourceType
+from paasng.accessories.iam.constants import ResourceType
 from paasng.accessories.iam.permissions.perm import PermCtx, Permission, ResCreatorAction, validate_empty
 from paasng.accessories.iam.permissions.request import ResourceRequest
+from paasng.accessories.iam.user_apps import get_hot_added_app_codes
+from paasng.platform.applications.constants import ApplicationRole
 
 logger = logging.getLogger(__name__)
 
@@ -200,7 +199,7 @@ class ApplicationPermission(Permission):
         所有应用的角色都会有基础信息查看权限
         """
         request = self._make_request(username, AppAction.VIEW_BASIC_INFO)
-        return self._gen_app_filters_by_request(request)
+        return self._gen_app_filters_by_request(request, get_hot_added_app_codes(username))
 
     def gen_develop_app_filters(self, username):
         """
@@ -209,10 +208,16 @@ class ApplicationPermission(Permission):
         管理者，开发者才会有基础开发权限
         """
         request = self._make_request(username, AppAction.BASIC_DEVELOP)
-        return self._gen_app_filters_by_request(request)
+        hot_added_codes = get_hot_added_app_codes(
+            username, roles=[ApplicationRole.ADMINISTRATOR, ApplicationRole.DEVELOPER]
+        )
+        return self._gen_app_filters_by_request(request, hot_added_codes)
+
+    def _gen_app_filters_by_request(self, request, hot_added_codes: Set[str]):
+        """根据 IAM Auth Request 生成 Django 的过滤器
 
-    def _gen_app_filters_by_request(self, request):
-        """根据 IAM Auth Request 生成 Django 的过滤器"""
+        :param hot_added_codes: 新授权给用户，但权限中心还未同步完成的应用
+        """
         key_mapping = {"application.id": "code"}
 
         try:
@@ -222,12 +227,12 @@ class ApplicationPermission(Permission):
             return None
 
         # 因权限中心同步（用户组成员信息 —> 具体的权限策略）存在时延（约 20s），
-        # 因此在应用创建后的短时间内，需特殊豁免以免在列表页无法查询到最新的应用
-        perm_exempt_filter = Q(
-            owner=user_id_encoder.encode(settings.USER_TYPE, request.subject.id),
-            created__gt=datetime.now() - timedelta(seconds=PERM_EXEMPT_TIME_FOR_OWNER_AFTER_CREATE_APP),
-        )
+        # 因此新授权的应用（如刚创建的应用）会被临时添加到用户有权限的应用中，以免在列表页无法查询到最新的应用
+        if not hot_added_codes:
+            return filters or None
+
+        hot_added_filter = Q(code__in=sorted(hot_added_codes))
         if not filters:
-            return perm_exempt_filter
+            return hot_added_filter
 
-        return filters | perm_exempt_filter
+        return filters | hot_added_filter
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+"""Cache of the applications which users have permissions on
+
+Generating the app filters of a user requires a remote policy query to IAM, which is needed by app list,
+search and many other pages, so the generated filters are cached per user for a short time, and invalidated
+when the user's membership changes. The filters are cached as they are, so a user who was granted applications
+one by one still gets a `code__in` filter with all these codes.
+
+IAM syncs user group members to policies with a delay (about 20s), applications granted during this period
+are "hot-added" to the user's application set so that they can be found immediately.
+"""
+from typing import Collection, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from paasng.accessories.iam.constants import PERM_EXEMPT_TIME_FOR_OWNER_AFTER_CREATE_APP
+from paasng.platform.applications.constants import ApplicationRole
+
+
+def _user_app_filters_cache_key(username: str, action: str) -> str:
+    return f'bk_paas3:iam:user_app_filters:{username}:{action}'
+
+
+def _hot_added_apps_cache_key(username: str) -> str:
+    return f'bk_paas3:iam:hot_added_apps:{username}'
+
+
+def get_cached_user_app_filters(username: str, action: str) -> Tuple[bool, Optional[Q]]:
+    """Get the cached filters of applications which user is allowed to perform the action on
+
+    :return: (cached, filters), filters is None when the user has no permission on any application
+    """
+    if not settings.IAM_USER_APPS_CACHE_TIMEOUT:
+        return False, None
+
+    cached = cache.get(_user_app_filters_cache_key(username, action))
+    if cached is None:
+        return False, None
+    return True, cached['filters']
+
+
+def set_cached_user_app_filters(username: str, action: str, filters: Optional[Q]):
+    """Cache the filters of applications which user is allowed to perform the action on"""
+    if not settings.IAM_USER_APPS_CACHE_TIMEOUT:
+        return
+
+    # Wrap the filters so that "no permission" can also be cached
+    cache.set(
+        _user_app_filters_cache_key(username, action), {'filters': filters}, settings.IAM_USER_APPS_CACHE_TIMEOUT
+    )
+
+
+def invalidate_user_app_filters(usernames: Iterable[str]):
+    """Clear the cached application filters of users, should be called when users' membership changes"""
+    from paasng.accessories.iam.permissions.resources.application import AppAction
+
+    cache.delete_many(
+        [_user_app_filters_cache_key(username, action) for username in usernames for action in AppAction.get_values()]
+    )
+
+
+def hot_add_user_app(usernames: Iterable[str], app_code: str, role: ApplicationRole):
+    """Grant the application to users before IAM finishes syncing the policies
+
+    :param usernames: users who are granted
+    :param app_code: application code
+    :param role: the granted role
+    """
+    usernames = list(usernames)
+    for username in usernames:
+        key = _hot_added_apps_cache_key(username)
+        apps: Dict[str, List[int]] = cache.get(key) or {}
+        roles = set(apps.get(app_code, []))
+        roles.add(int(role))
+        apps[app_code] = sorted(roles)
+        cache.set(key, apps, PERM_EXEMPT_TIME_FOR_OWNER_AFTER_CREATE_APP)
+    invalidate_user_app_filters(usernames)
+
+
+def remove_hot_added_user_app(usernames: Iterable[str], app_code: str):
+    """Revoke the hot-added application of users, the cached application filters are also invalidated"""
+    usernames = list(usernames)
+    for username in usernames:
+        key = _hot_added_apps_cache_key(username)
+        apps: Dict[str, List[int]] = cache.get(key) or {}
+        if apps.pop(app_code, None) is not None:
+            cache.set(key, apps, PERM_EXEMPT_TIME_FOR_OWNER_AFTER_CREATE_APP)
+    invalidate_user_app_filters(usernames)
+
+
+def get_hot_added_app_codes(username: str, roles: Optional[Collection[ApplicationRole]] = None) -> Set[str]:
+    """Get the codes of applications hot-added to user
+
+    :param roles: only return applications granted with any of these roles, default to all roles
+    """
+    apps: Dict[str, List[int]] = cache.get(_hot_added_apps_cache_key(username)) or {}
+    if roles is None:
+        return set(apps)
+
+    role_values = {int(role) for role in roles}
+    return {code for code, granted_roles in apps.items() if role_values.intersection(granted_roles)}
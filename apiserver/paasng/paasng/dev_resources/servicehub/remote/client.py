@@ -18,11 +18,12 @@ to the current version of the project delivered to anyone in the future.
 """
 """Client for remote services
 """
+import hashlib
 import json
 import logging
 from contextlib import contextmanager
 from dataclasses import MISSING, dataclass
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urljoin
 
 import requests
@@ -152,6 +153,28 @@ class RemoteServiceClient:
             self.validate_resp(resp)
             return resp.json()
 
+    def list_services_if_changed(self, etag: Optional[str] = None) -> Optional[Tuple[List[Dict], str]]:
+        """List all services infos only when they were changed since given etag
+
+        :param etag: The etag returned by the last call, the remote server may respond with 304 when it's matched
+        :raises: RemoteClientError
+        :return: None if services are unchanged, otherwise ([<service dict>, ...], <etag>)
+        """
+        headers = {'If-None-Match': etag} if etag else {}
+        with wrap_request_exc(self):
+            resp = requests.get(
+                self.config.index_url, auth=self.auth, headers=headers, timeout=self.REQUEST_LIST_TIMEOUT
+            )
+            if resp.status_code == 304:
+                return None
+            self.validate_resp(resp)
+
+            # 远程服务未提供 ETag 时, 使用响应内容的摘要代替, 内容未变化时可跳过反序列化
+            new_etag = resp.headers.get('ETag') or hashlib.sha256(resp.content).hexdigest()
+            if etag and new_etag == etag:
+                return None
+            return resp.json(), new_etag
+
     def create_service(self, data: Dict):
         """Create a new service
 
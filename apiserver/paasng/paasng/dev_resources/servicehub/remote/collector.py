@@ -19,8 +19,10 @@ to the current version of the project delivered to anyone in the future.
 """Collector for remote services
 """
 import logging
+import time
 from collections import namedtuple
-from typing import Dict, Generator, List, Optional
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Generator, List, Optional, Protocol, Set, Tuple
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
@@ -30,6 +32,7 @@ from rest_framework.exceptions import ValidationError
 from paasng.dev_resources.servicehub.remote.client import RemoteServiceClient, RemoteSvcConfig
 from paasng.dev_resources.servicehub.remote.exceptions import FetchRemoteSvcError, RemoteClientError
 from paasng.dev_resources.servicehub.remote.store import RemoteServiceStore
+from paasng.metrics import REMOTE_SERVICE_FETCH_HISTOGRAM, REMOTE_SERVICE_LAST_FETCHED_GAUGE
 from paasng.utils.i18n.serializers import TranslatedCharField
 
 logger = logging.getLogger(__name__)
@@ -63,6 +66,21 @@ class RemoteSvcFetcher:
         items = self.validate_data(json_data)
         return items
 
+    def fetch_if_changed(self, etag: Optional[str]) -> Optional[Tuple[List[Dict], str]]:
+        """Fetch services and plans from remote address only when they were changed since given etag
+
+        :return: None if services are unchanged, otherwise (<validated items>, <etag>)
+        """
+        try:
+            ret = self.client.list_services_if_changed(etag)
+        except RemoteClientError as e:
+            raise FetchRemoteSvcError('error fetching services.') from e
+
+        if ret is None:
+            return None
+        json_data, new_etag = ret
+        return self.validate_data(json_data), new_etag
+
     def validate_data(self, json_data) -> List[Dict]:
         """Validate json data
 
@@ -127,7 +145,10 @@ class RemoteServiceSLZ(serializers.Serializer):
 # Serializers end
 
 
-FetchResult = namedtuple('FetchResult', 'config data meta_info')
+FetchResult = namedtuple('FetchResult', 'config data meta_info fingerprint', defaults=(None,))
+
+# 拉取远程服务时, 等待结果的轮询间隔（秒）
+_FETCH_POLL_INTERVAL = 1
 
 
 def fetch_remote_service(config: RemoteSvcConfig) -> FetchResult:
@@ -136,6 +157,26 @@ def fetch_remote_service(config: RemoteSvcConfig) -> FetchResult:
     return FetchResult(config, fetcher.fetch(), meta_info)
 
 
+def fetch_remote_service_if_changed(config: RemoteSvcConfig, fingerprint: Optional[Dict]) -> Optional[FetchResult]:
+    """Fetch the services only when they were changed since the given fingerprint
+
+    :param fingerprint: The fingerprint of the last fetched result, see `FetchResult.fingerprint`
+    :return: None if services are unchanged
+    """
+    fetcher = RemoteSvcFetcher(config)
+    meta_info = fetcher.get_meta_info()
+    # meta info 也会被写入服务数据中, 因此它发生变化时需要重新拉取完整数据
+    etag = None
+    if fingerprint and fingerprint.get('meta_info') == meta_info:
+        etag = fingerprint.get('etag')
+
+    ret = fetcher.fetch_if_changed(etag)
+    if ret is None:
+        return None
+    data, new_etag = ret
+    return FetchResult(config, data, meta_info, {'etag': new_etag, 'meta_info': meta_info})
+
+
 def refresh_remote_service(remote_store: RemoteServiceStore, service_id: str):
     """Refresh the service"""
     remote_config = remote_store.get_source_config(service_id)
@@ -143,8 +184,22 @@ def refresh_remote_service(remote_store: RemoteServiceStore, service_id: str):
     remote_store.bulk_upsert(ret.data, meta_info=ret.meta_info, source_config=ret.config)
 
 
-def fetch_all_remote_services() -> Generator[FetchResult, None, None]:
-    """Fetch all service data defined in config"""
+class FingerprintStore(Protocol):
+    """A store which keeps the fingerprints of upserted services, such as `RemoteServiceStore`"""
+
+    def get_source_fingerprint(self, source_name: str) -> Optional[Dict]:
+        ...
+
+
+def fetch_all_remote_services(
+    remote_store: Optional[FingerprintStore] = None,
+) -> Generator[FetchResult, None, None]:
+    """Fetch all service data defined in config, all endpoints are fetched concurrently, the endpoints which
+    exceed `settings.REMOTE_SERVICES_FETCH_TIMEOUT` will be skipped.
+
+    :param remote_store: If given, the endpoints whose services are unchanged since the last upsert to the store
+        will be skipped.
+    """
     try:
         remote_svc_configs = settings.SERVICE_REMOTE_ENDPOINTS
     except AttributeError:
@@ -152,16 +207,86 @@ def fetch_all_remote_services() -> Generator[FetchResult, None, None]:
     if not isinstance(remote_svc_configs, list):
         raise ImproperlyConfigured('SERVICE_REMOTE_ENDPOINTS must be list type')
 
-    for endpoint_conf in remote_svc_configs:
-        config = RemoteSvcConfig.from_json(endpoint_conf)
-        try:
-            yield fetch_remote_service(config)
-        except FetchRemoteSvcError:
-            logger.exception("unable to load remote service.")
-        except Exception:
-            logger.exception("unable to load remote service.")
+    configs = [RemoteSvcConfig.from_json(endpoint_conf) for endpoint_conf in remote_svc_configs]
+    if not configs:
+        return
+
+    # 记录各服务开始拉取的时间, 在线程池中排队的时间不计入超时
+    started_at: Dict[str, float] = {}
+    executor = ThreadPoolExecutor(
+        max_workers=min(len(configs), settings.REMOTE_SERVICES_FETCH_CONCURRENCY),
+        thread_name_prefix='remote-svc-fetcher',
+    )
+    futures: Dict[Future, RemoteSvcConfig] = {
+        executor.submit(_fetch_endpoint, config, remote_store, started_at): config for config in configs
+    }
+    try:
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=_FETCH_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from _collect_result(future, futures[future])
+            pending = _discard_timed_out(pending, futures, started_at)
+    finally:
+        for future in futures:
+            future.cancel()
+        # 不等待超时的线程结束, 它们会在请求超时后自行退出
+        executor.shutdown(wait=False)
+
+
+def _collect_result(future: Future, config: RemoteSvcConfig) -> Generator[FetchResult, None, None]:
+    """Collect the result of a finished fetching, the result is yielded only when services were changed"""
+    try:
+        ret = future.result()
+    except Exception:
+        logger.exception("unable to load remote service.")
+        return
+
+    # 只有未被丢弃（未超时）的结果才会被使用, 此时才记录拉取时间
+    REMOTE_SERVICE_LAST_FETCHED_GAUGE.labels(endpoint=config.name).set_to_current_time()
+    if ret is None:
+        logger.debug(f"services of {config} are unchanged, skip.")
+        return
+    logger.debug(f"successfully loaded {config}.")
+    yield ret
+
+
+def _discard_timed_out(
+    pending: Set[Future], futures: Dict[Future, RemoteSvcConfig], started_at: Dict[str, float]
+) -> Set[Future]:
+    """Discard the fetchings which have been running longer than the timeout, return the remaining ones"""
+    timeout = settings.REMOTE_SERVICES_FETCH_TIMEOUT
+    now = time.monotonic()
+    remaining = set()
+    for future in pending:
+        config = futures[future]
+        if config.name in started_at and now - started_at[config.name] > timeout:
+            logger.error(f"unable to load remote service, fetching {config} timed out after {timeout}s.")
+            REMOTE_SERVICE_FETCH_HISTOGRAM.labels(endpoint=config.name, result='timeout').observe(timeout)
+            continue
+        remaining.add(future)
+    return remaining
+
+
+def _fetch_endpoint(
+    config: RemoteSvcConfig, remote_store: Optional[FingerprintStore], started_at: Dict[str, float]
+) -> Optional[FetchResult]:
+    """Fetch the services of a single endpoint and record the metrics"""
+    started_at[config.name] = time.monotonic()
+    result = 'error'
+    try:
+        ret: Optional[FetchResult]
+        if remote_store is None:
+            ret = fetch_remote_service(config)
         else:
-            logger.debug(f"successfully loaded {config}.")
+            ret = fetch_remote_service_if_changed(config, remote_store.get_source_fingerprint(config.name))
+        result = 'unchanged' if ret is None else 'changed'
+        return ret
+    finally:
+        # 超时的服务已被记录为 "timeout", 不重复记录
+        elapsed = time.monotonic() - started_at[config.name]
+        if elapsed <= settings.REMOTE_SERVICES_FETCH_TIMEOUT:
+            REMOTE_SERVICE_FETCH_HISTOGRAM.labels(endpoint=config.name, result=result).observe(elapsed)
 
 
 def initialize_remote_services(remote_store: RemoteServiceStore):
@@ -105,6 +105,8 @@ VERSION_WITH_REST_UPSERT = '0.2.0'
 class RemotePlanObj(PlanObj):
     @classmethod
     def from_data(cls, data: Dict):
+        # Make a shallow copy because data may be read-only, see `remote.store.FrozenDict`
+        data = dict(data)
         data.setdefault("is_active", True)
         properties = data.get("properties") or {}
         is_eager = data.pop("is_eager", False)
@@ -22,8 +22,10 @@ import copy
 import json
 import logging
 import pickle
-from collections import OrderedDict
-from typing import Callable, Dict, List, Optional, Set
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from django.conf import settings
 from django.utils.encoding import force_bytes, force_str
@@ -52,6 +54,52 @@ def _loads(dumped: bytes) -> Dict:
         return pickle.loads(force_bytes(dumped, encoding="latin-1"))
 
 
+class FrozenDict(dict):
+    """A read-only dict, copying it(by `copy.copy` or `copy.deepcopy`) returns a mutable dict"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f'{self.__class__.__name__} is read-only, make a copy before modifying it')
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly  # type: ignore
+
+    def __copy__(self) -> Dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo) -> Dict:
+        return {key: copy.deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class FrozenList(list):
+    """A read-only list, copying it(by `copy.copy` or `copy.deepcopy`) returns a mutable list"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f'{self.__class__.__name__} is read-only, make a copy before modifying it')
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly  # type: ignore
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly  # type: ignore
+
+    def __copy__(self) -> List:
+        return list(self)
+
+    def __deepcopy__(self, memo) -> List:
+        return [copy.deepcopy(value, memo) for value in self]
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def freeze(value: Any) -> Any:
+    """Turn all dicts and lists in value into read-only ones recursively"""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
 def get_remote_store():
     """Get the single instanced remote services database object"""
     global _g_services_store
@@ -83,13 +131,13 @@ class StoreMixin:
                 result.append(copy.deepcopy(service))
         return result
 
-    def bulk_get(self, uuids: List[str], region: str) -> List[Dict]:
+    def bulk_get(self, uuids: List[str], region: str) -> List[Optional[Dict]]:
         """Get multiple service instances by a list of uuids
 
         :returns: a list of service object, if a service can not be found by given uuid, use
             None instead.
         """
-        items = []
+        items: List[Optional[Dict]] = []
         for uuid in uuids:
             try:
                 items.append(self.get(uuid, region))
@@ -113,10 +161,18 @@ class MemoryStore(StoreMixin):
     def __init__(self):
         self._map_id_to_service = OrderedDict()
         self._map_id_to_config = {}
-
-    def bulk_upsert(self, services: List[Dict], meta_info: Optional[Dict], source_config: RemoteSvcConfig):
+        self._map_source_to_fingerprint: Dict[str, Dict] = {}
+
+    def bulk_upsert(
+        self,
+        services: List[Dict],
+        meta_info: Optional[Dict],
+        source_config: RemoteSvcConfig,
+        fingerprint: Optional[Dict] = None,
+    ):
         """Insert the service if identical uuid does not exists, otherwise update it.
 
+        :param fingerprint: The fingerprint of given services, see `get_source_fingerprint`
         :raises ValueError: When services with the same uuid and different names in the service configuration.
         """
         for service in services:
@@ -131,10 +187,19 @@ class MemoryStore(StoreMixin):
             self._map_id_to_service[service['uuid']] = service
             self._map_id_to_config[service['uuid']] = source_config
 
+        if fingerprint:
+            self._map_source_to_fingerprint[source_config.name] = fingerprint
+        else:
+            self._map_source_to_fingerprint.pop(source_config.name, None)
+
     def get_source_config(self, uuid: str) -> RemoteSvcConfig:
         """Get the source remote svc config by service uuid"""
         return self._map_id_to_config[uuid]
 
+    def get_source_fingerprint(self, source_name: str) -> Optional[Dict]:
+        """Get the fingerprint of services which were upserted from given source"""
+        return self._map_source_to_fingerprint.get(source_name)
+
     def get(self, uuid: str, region: str) -> Dict:
         """Get a service instance by uuid"""
         try:
@@ -153,6 +218,46 @@ class MemoryStore(StoreMixin):
         """Empty this store"""
         self._map_id_to_service = OrderedDict()
         self._map_id_to_config = {}
+        self._map_source_to_fingerprint = {}
+
+
+class ServicesSnapshot:
+    """An immutable copy of all remote services, indexed by uuid, region, category and name
+
+    :param generation: The generation of services data when the snapshot was taken
+    :param services: All services
+    :param expires_at: The monotonic time when the first service in snapshot expires, None if never
+    """
+
+    def __init__(self, generation: int, services: Iterable[Dict], expires_at: Optional[float] = None):
+        self.generation = generation
+        self.expires_at = expires_at
+        self.by_uuid: Dict[str, FrozenDict] = {}
+        self.by_region: Dict[str, List[FrozenDict]] = defaultdict(list)
+        self.by_category: Dict[Tuple[str, Any], List[FrozenDict]] = defaultdict(list)
+        self.by_name: Dict[Tuple[str, Any], List[FrozenDict]] = defaultdict(list)
+
+        for service in services:
+            svc = freeze(service)
+            self.by_uuid[svc['uuid']] = svc
+            for region in {plan['properties'].get('region') for plan in svc['plans']}:
+                self.by_region[region].append(svc)
+                self.by_category[(region, svc.get('category'))].append(svc)
+                self.by_name[(region, svc.get('name'))].append(svc)
+
+    def is_expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def filter(self, region: str, conditions: Dict) -> List[FrozenDict]:
+        """Find services by given conditions, use the indexes when possible"""
+        candidates: List[FrozenDict]
+        if 'name' in conditions:
+            candidates = self.by_name.get((region, conditions['name']), [])
+        elif 'category' in conditions:
+            candidates = self.by_category.get((region, conditions['category']), [])
+        else:
+            candidates = self.by_region.get(region, [])
+        return [svc for svc in candidates if all(svc.get(k) == v for k, v in conditions.items())]
 
 
 class RedisStore(StoreMixin):
@@ -163,10 +268,14 @@ class RedisStore(StoreMixin):
     namespace = '1'
     encoding = 'utf-8'
     registered_services_key = namespace + 'remote:registered:service:uuid'
+    # Bumped whenever services were changed, used to detect whether the local snapshot is outdated
+    generation_key = namespace + 'remote:services:generation'
     expires = settings.REMOTE_SERVICES_UPDATE_INTERVAL_MINUTES * 60 * 10
 
     def __init__(self):
         self.redis = get_default_redis(self.cache_key)
+        self._snapshot: Optional[ServicesSnapshot] = None
+        self._snapshot_lock = threading.Lock()
 
     def _make_svc_info_key(self, uuid: str) -> str:
         return self.namespace + f"remote:service:info:{uuid}"
@@ -174,15 +283,25 @@ class RedisStore(StoreMixin):
     def _make_svc_config_key(self, uuid: str) -> str:
         return self.namespace + f"remote:service:config:{uuid}"
 
+    def _make_source_fingerprint_key(self, source_name: str) -> str:
+        return self.namespace + f"remote:source:fingerprint:{source_name}"
+
     def get_service_keys(self) -> Set[str]:
         """Get all registered service key"""
         result = self.redis.smembers(self.registered_services_key)
         return {force_str(i, encoding=self.encoding) for i in result}
 
-    def bulk_upsert(self, services: List[Dict], meta_info: Optional[Dict], source_config: RemoteSvcConfig):
+    def bulk_upsert(
+        self,
+        services: List[Dict],
+        meta_info: Optional[Dict],
+        source_config: RemoteSvcConfig,
+        fingerprint: Optional[Dict] = None,
+    ):
         """Insert the service if identical uuid does not exists, otherwise update it.
 
         :param meta_info: Service's meta info, including `version` etc.
+        :param fingerprint: The fingerprint of given services, see `get_source_fingerprint`
         :raises ValueError: When services with the same uuid and different names in the service configuration.
         """
         redis_client = self.redis
@@ -205,6 +324,14 @@ class RedisStore(StoreMixin):
             pipe.sadd(self.registered_services_key, sid.encode(self.encoding))
             pipe.execute()
 
+        fingerprint_key = self._make_source_fingerprint_key(source_config.name)
+        if fingerprint:
+            # 指纹的过期时间短于服务数据, 保证服务数据过期前一定会被完整地重新写入一次
+            redis_client.set(fingerprint_key, json.dumps(fingerprint), self.expires // 2)
+        else:
+            redis_client.delete(fingerprint_key)
+        self._bump_generation()
+
     def get_source_config(self, uuid: str) -> RemoteSvcConfig:
         """Get the source remote svc config by service uuid"""
         config = self.redis.get(self._make_svc_config_key(uuid))
@@ -212,33 +339,109 @@ class RedisStore(StoreMixin):
             raise ServiceConfigNotFound(f"Service config uuid={uuid} not found")
         return RemoteSvcConfig.from_json(_loads(config))
 
+    def get_source_fingerprint(self, source_name: str) -> Optional[Dict]:
+        """Get the fingerprint of services which were upserted from given source, the fingerprint is used to
+        skip writing when the services of the source are unchanged.
+        """
+        fingerprint = self.redis.get(self._make_source_fingerprint_key(source_name))
+        if fingerprint is None:
+            return None
+        return json.loads(fingerprint)
+
     def get(self, uuid: str, region: str) -> Dict:
-        """Get a service instance by uuid"""
-        result = self.redis.get(self._make_svc_info_key(uuid))
-        if result is None:
+        """Get a service instance by uuid, the result is read-only"""
+        item = self.get_snapshot().by_uuid.get(uuid)
+        if item is None:
             raise ServiceNotFound(f'remote service with id={uuid} not found')
 
-        item = _loads(result)
         if not self._svc_supports_region(item, region):
             raise RuntimeError('service does not contains a plan in given region')
         return item
 
     def all(self) -> List[Dict]:
-        """List all services"""
+        """List all services, the results are read-only"""
+        return list(self.get_snapshot().by_uuid.values())
+
+    def filter(self, region: str, conditions: Optional[Dict] = None) -> List[Dict]:
+        """Find a list of services by given conditions, the results are read-only
+
+        :param conditions: a dict of conditions, eg. {"category": 1}
+        """
+        return list(self.get_snapshot().filter(region, conditions or {}))
+
+    def bulk_get(self, uuids: List[str], region: str) -> List[Optional[Dict]]:
+        """Get multiple service instances by a list of uuids, the results are read-only
+
+        :returns: a list of service object, if a service can not be found by given uuid, use
+            None instead.
+        """
+        snapshot = self.get_snapshot()
+        items: List[Optional[Dict]] = []
+        for uuid in uuids:
+            item = snapshot.by_uuid.get(uuid)
+            if item is None:
+                logger.error(f'bulk_get: can not find a service by uuid {uuid}')
+            elif not self._svc_supports_region(item, region):
+                raise RuntimeError('service does not contains a plan in given region')
+            items.append(item)
+        return items
+
+    def get_snapshot(self) -> ServicesSnapshot:
+        """Get the snapshot of all services, reload it when services were changed by any process, or any
+        service in it has expired in redis
+        """
+        generation = self._get_generation()
+        snapshot = self._snapshot
+        if snapshot is not None and not self._is_outdated(snapshot, generation):
+            return snapshot
+
+        with self._snapshot_lock:
+            snapshot = self._snapshot
+            if snapshot is None or self._is_outdated(snapshot, generation):
+                services, expires_at = self._load_all_with_expiry()
+                snapshot = self._snapshot = ServicesSnapshot(generation, services, expires_at)
+        return snapshot
+
+    @staticmethod
+    def _is_outdated(snapshot: ServicesSnapshot, generation: int) -> bool:
+        return snapshot.generation != generation or snapshot.is_expired()
+
+    def _get_generation(self) -> int:
+        value = self.redis.get(self.generation_key)
+        if value is None:
+            # The key is missing(e.g. data was written by an older version), start a new generation
+            return self._bump_generation()
+        return int(value)
+
+    def _bump_generation(self) -> int:
+        return self.redis.incr(self.generation_key)
+
+    def _load_all_with_expiry(self) -> Tuple[List[Dict], Optional[float]]:
+        """Load all services from redis, with the monotonic time when the first service expires"""
         keys = self.get_service_keys()
         if not keys:
-            return []
+            return [], None
 
         pipe = self.redis.pipeline()
         for k in keys:
-            pipe.get(self._make_svc_info_key(k))
+            info_key = self._make_svc_info_key(k)
+            pipe.get(info_key)
+            pipe.pttl(info_key)
 
+        now = time.monotonic()
         results = []
-        for i in pipe.execute():
-            if i:
-                results.append(_loads(i))
+        expires_at: Optional[float] = None
+        values = pipe.execute()
+        for value, ttl in zip(values[::2], values[1::2]):
+            if not value:
+                continue
+            results.append(_loads(value))
+            # A negative ttl means the key has no expiration
+            if ttl is not None and ttl >= 0:
+                svc_expires_at = now + ttl / 1000
+                expires_at = svc_expires_at if expires_at is None else min(expires_at, svc_expires_at)
 
-        return results
+        return results, expires_at
 
     def empty(self):
         """Empty this store"""
@@ -250,9 +453,12 @@ class RedisStore(StoreMixin):
         for i in keys:
             pipe.delete(self._make_svc_config_key(i))
             pipe.delete(self._make_svc_info_key(i))
+        for fingerprint_key in self.redis.scan_iter(match=self._make_source_fingerprint_key('*')):
+            pipe.delete(fingerprint_key)
 
         pipe.delete(self.registered_services_key)
         pipe.execute()
+        self._bump_generation()
 
 
 RemoteServiceStore = RedisStore
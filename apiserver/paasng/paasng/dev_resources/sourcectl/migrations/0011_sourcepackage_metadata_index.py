@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+# Generated by Django 3.2.12 on 2026-10-18 09:40
+
+from django.db import migrations
+import jsonfield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sourcectl', '0010_alter_sourcetypespecconfig_client_secret'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sourcepackage',
+            name='metadata_index',
+            field=jsonfield.fields.JSONField(
+                help_text='源码包中元数据文件(如 Procfile)的索引, 用于在不下载源码包的情况下读取这些文件', null=True
+            ),
+        ),
+    ]
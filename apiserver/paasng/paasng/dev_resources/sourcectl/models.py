@@ -293,6 +293,7 @@ class SourcePackageManager(models.Manager):
                 package_size=policy.stat.size,
                 sha256_signature=policy.stat.sha256_signature,
                 meta_info=policy.stat.meta_info,
+                metadata_index=policy.stat.metadata_index,
                 relative_path=policy.stat.relative_path,
                 storage_engine=policy.engine,
                 storage_path=policy.path,
@@ -319,6 +320,7 @@ class SourcePackage(OwnerTimestampedModel):
     storage_url = models.CharField(verbose_name="存储地址", max_length=1024, help_text="可获取到源码包的 URL 地址")
 
     meta_info = JSONField(null=True, help_text="源码包的元信息, 例如 S-Mart 应用的 app.yaml")
+    metadata_index = JSONField(null=True, help_text="源码包中元数据文件(如 Procfile)的索引, 用于在不下载源码包的情况下读取这些文件")
     sha256_signature = models.CharField(verbose_name="sha256数字签名", max_length=64, null=True)
     relative_path = models.CharField(
         max_length=255, verbose_name="源码入口的相对路径", help_text="如果压缩时将目录也打包进来, 入目录名是 foo, 那么 relative_path = 'foo/'"
@@ -344,6 +346,7 @@ class SPStat:
     meta_info: Dict
     sha256_signature: str
     relative_path: str = "./"
+    metadata_index: Optional[Dict] = None
 
 
 @dataclass
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+"""Node-local cache for source packages, packages are addressed by their sha256 digests"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from os import PathLike
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# 计算摘要时每次读取的字节数
+_HASH_BLOCK_SIZE = 1024 * 1024
+# 缓存目录的权限, 仅当前用户可访问
+_DIR_MODE = 0o700
+
+
+def compute_sha256_digest(path: PathLike) -> str:
+    sha256_hash = hashlib.sha256()
+    with open(path, mode="rb") as fh:
+        for byte_block in iter(lambda: fh.read(_HASH_BLOCK_SIZE), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+class PackageCache:
+    """A size-bounded and content-addressed cache for source packages on local disk
+
+    - Packages are downloaded to a temporary file in the cache directory first, then renamed to the final path
+      atomically, so readers never see a partially written package.
+    - Readers do not need any lock: an opened package is still readable even if it's evicted at the same time.
+    - The digest of a cached package is verified on every hit, a corrupted package is removed from cache.
+    - The least recently used packages are evicted when the total size exceeds `max_size`.
+    - The cache directory is only accessible by the current user.
+
+    :param root: the directory to store the packages
+    :param max_size: the max total size(bytes) of cached packages
+    """
+
+    def __init__(self, root: PathLike, max_size: int):
+        self.root = Path(root)
+        self.max_size = max_size
+
+    def _make_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def _make_dirs(self, path: Path):
+        """Make the directories of given path, which are only accessible by the current user"""
+        for dir_ in (self.root, path.parent):
+            dir_.mkdir(mode=_DIR_MODE, parents=True, exist_ok=True)
+            # mkdir 受 umask 影响, 且目录可能已存在, 因此需要显式设置权限
+            os.chmod(dir_, _DIR_MODE)
+
+    def copy_to(self, digest: str, dest: PathLike) -> bool:
+        """Copy the cached package to dest, the digest of package will be verified
+
+        :return: False if the package is not cached or the cached package is corrupted
+        """
+        path = self._make_path(digest)
+        sha256_hash = hashlib.sha256()
+        try:
+            with open(path, mode="rb") as src, open(dest, mode="wb") as dst:
+                for byte_block in iter(lambda: src.read(_HASH_BLOCK_SIZE), b""):
+                    sha256_hash.update(byte_block)
+                    dst.write(byte_block)
+        except FileNotFoundError:
+            return False
+
+        actual_digest = sha256_hash.hexdigest()
+        if actual_digest != digest:
+            logger.warning(
+                "[sourcectl] cached package<%s> is corrupted, got digest: %s, removing it", digest, actual_digest
+            )
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            return False
+
+        try:
+            # 更新修改时间, 作为 LRU 淘汰的依据
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return True
+
+    def fetch(self, digest: str, dest: PathLike, download: Callable[[Path], None]):
+        """Copy the package to dest, download it by `download` and add it to cache if it's not cached yet
+
+        :param digest: the sha256 digest of package
+        :param dest: the destination path
+        :param download: a function which downloads the package to given path
+        """
+        if self.copy_to(digest, dest):
+            logger.debug("[sourcectl] package<%s> hit the local cache", digest)
+            return
+
+        path = self._make_path(digest)
+        self._make_dirs(path)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        os.close(fd)
+        tmp_path = Path(tmp_name)
+        try:
+            download(tmp_path)
+            shutil.copyfile(tmp_path, dest)
+            # 校验摘要, 避免缓存内容与摘要不一致的源码包
+            actual_digest = compute_sha256_digest(tmp_path)
+            if actual_digest != digest:
+                logger.warning(
+                    "[sourcectl] digest of package mismatched, expected: %s, got: %s", digest, actual_digest
+                )
+                return
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        self.evict()
+
+    def evict(self):
+        """Evict the least recently used packages until total size is not greater than `max_size`"""
+        entries = []
+        for path in self.root.glob("*/*"):
+            if path.name.startswith(".tmp-"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            logger.debug("[sourcectl] evicting package<%s> from local cache", path.name)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+
+_package_cache: Optional[PackageCache] = None
+
+
+def get_package_cache() -> Optional[PackageCache]:
+    """Get the package cache, return None if the cache is disabled"""
+    global _package_cache
+    if not settings.SOURCE_PACKAGE_CACHE_MAX_SIZE:
+        return None
+    if _package_cache is None:
+        _package_cache = PackageCache(settings.SOURCE_PACKAGE_CACHE_DIR, settings.SOURCE_PACKAGE_CACHE_MAX_SIZE)
+    return _package_cache
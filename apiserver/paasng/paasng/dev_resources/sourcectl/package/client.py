@@ -17,6 +17,7 @@ We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
 import abc
+import io
 import logging
 import os
 import subprocess
@@ -24,10 +25,15 @@ import tarfile
 import tempfile
 import zipfile
 from pathlib import Path
-from typing import IO, List, Literal, Optional, Union
+from typing import IO, Dict, List, Literal, Optional, Union
 
 from paasng.dev_resources.sourcectl.models import SourcePackage
-from paasng.dev_resources.sourcectl.package.downloader import download_file_via_url
+from paasng.dev_resources.sourcectl.package.downloader import (
+    HTTPRangeFile,
+    download_file_with_cache,
+    get_downloadable_url,
+)
+from paasng.dev_resources.sourcectl.package.indexer import PackageMetadataIndex
 from paasng.dev_resources.sourcectl.utils import generate_temp_dir, uncompress_directory
 from paasng.utils.text import remove_prefix
 
@@ -256,26 +262,91 @@ class GenericLocalClient(BasePackageClient):
         return self._client.list()
 
 
-class GenericRemoteClient(GenericLocalClient):
-    """操作远程 tar 包的 通用 client"""
+class GenericRemoteClient(BasePackageClient):
+    """操作远程 tar/zip 包的 通用 client
 
-    def __init__(self, url: str, relative_path: str = "./"):
+    读取文件时, 优先从上传时建立的元数据索引中读取, 其次尝试通过 HTTP Range 请求读取 zip 包,
+    仅当以上方式均不可用, 或需要导出整个源码包时, 才会下载完整的源码包
+    """
+
+    def __init__(
+        self,
+        url: str,
+        relative_path: str = "./",
+        metadata_index: Optional[Dict] = None,
+        ranged_read: bool = False,
+        sha256_signature: Optional[str] = None,
+    ):
+        """
+        :param url: 源码包的存储地址
+        :param relative_path: 源码包内容的相对位置
+        :param metadata_index: 源码包的元数据索引, 见 PackageMetadataIndex
+        :param ranged_read: 是否尝试通过 HTTP Range 请求读取文件, 仅对 zip 包有效
+        :param sha256_signature: 源码包的 sha256 摘要, 提供时将通过本地缓存下载源码包
+        """
+        self.url = url
+        self.relative_path = relative_path
+        self.metadata_index = PackageMetadataIndex.from_dict(metadata_index) if metadata_index else None
+        self.ranged_read = ranged_read
+        self.sha256_signature = sha256_signature
         self.filepath = Path(tempfile.mktemp())
-        download_file_via_url(url, local_path=self.filepath)
+        self._local_client: Optional[GenericLocalClient] = None
+        self._ranged_client: Optional[ZipClient] = None
 
-        try:
-            super().__init__(file_path=str(self.filepath), mode="r", relative_path=relative_path)
-        except Exception:
-            logger.exception(f"Can't handle a tar/zip file from remote path: {url}")
-            if self.filepath.exists():
-                self.filepath.unlink()
+    def read_file(self, file_path: str) -> bytes:
+        if self.metadata_index:
+            key = os.path.join(self.relative_path, os.path.relpath(file_path))
+            content = self.metadata_index.read_file(key)
+            if content is not None:
+                return content
+
+        if self._local_client is None and self.ranged_read:
+            try:
+                return self._get_ranged_client().read_file(file_path)
+            except KeyError:
+                raise
+            except Exception:
+                logger.warning("Can't read %s from remote zip file: %s by range requests", file_path, self.url)
+                self.ranged_read = False
+        return self._get_local_client().read_file(file_path)
+
+    def export(self, local_path: str):
+        return self._get_local_client().export(local_path)
+
+    def list(self) -> List[str]:
+        return self._get_local_client().list()
 
     def close(self):
         """关闭文件句柄并清理本地文件"""
-        super().close()
+        if self._ranged_client:
+            self._ranged_client.close()
+        if self._local_client:
+            self._local_client.close()
         if self.filepath.exists():
             self.filepath.unlink()
 
+    def _get_ranged_client(self) -> ZipClient:
+        if self._ranged_client is None:
+            # Wrap the raw range file in a buffered reader, which is the binary file object zipfile expects
+            file_obj = io.BufferedReader(HTTPRangeFile(get_downloadable_url(self.url)))
+            self._ranged_client = ZipClient(file_obj=file_obj, relative_path=self.relative_path)
+        return self._ranged_client
+
+    def _get_local_client(self) -> GenericLocalClient:
+        """下载完整的源码包, 并返回操作本地文件的 client"""
+        if self._local_client is None:
+            download_file_with_cache(self.url, self.filepath, sha256_signature=self.sha256_signature)
+            try:
+                self._local_client = GenericLocalClient(
+                    file_path=str(self.filepath), mode="r", relative_path=self.relative_path
+                )
+            except Exception:
+                logger.exception(f"Can't handle a tar/zip file from remote path: {self.url}")
+                if self.filepath.exists():
+                    self.filepath.unlink()
+                raise
+        return self._local_client
+
 
 # TODO: 只保留 GenericRemoteClient
 storage_engine_maps = {
@@ -293,4 +364,18 @@ storage_engine_maps = {
 def get_client(package: SourcePackage) -> BasePackageClient:
     """根据源码包存储信息, 获取对应的源码包操作客户端"""
     client_class = storage_engine_maps[package.storage_engine]
+    if client_class is GenericRemoteClient:
+        metadata_index = package.metadata_index
+        if metadata_index:
+            is_zipfile = metadata_index.get("is_zipfile", False)
+        else:
+            # 未建立索引的存量源码包, 根据文件名判断是否为 zip 包
+            is_zipfile = package.package_name.endswith(".zip")
+        return GenericRemoteClient(
+            package.storage_path,
+            relative_path=package.relative_path,
+            metadata_index=metadata_index,
+            ranged_read=is_zipfile,
+            sha256_signature=package.sha256_signature,
+        )
     return client_class(package.storage_path, relative_path=package.relative_path)
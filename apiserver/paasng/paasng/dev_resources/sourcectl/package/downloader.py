@@ -16,17 +16,31 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
+import io
 import logging
+import re
 from os import PathLike
+from typing import Optional, Tuple
 
 import requests
+from blue_krill.storages.blobstore.base import SignatureType
 
 from paasng.dev_resources.sourcectl.models import SourcePackage
+from paasng.dev_resources.sourcectl.package.cache import get_package_cache
 from paasng.dev_resources.sourcectl.package.utils import parse_url
-from paasng.utils.blobstore import StoreType, download_file_from_blob_store
+from paasng.utils.blobstore import StoreType, download_file_from_blob_store, make_blob_store
 
 logger = logging.getLogger(__name__)
 
+# 下载文件时每次读取的字节数
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+_CONTENT_RANGE_REGEX = re.compile(r'^bytes (?P<start>\d+)-(?P<end>\d+)/(?P<size>\d+)$')
+
+
+class RangeNotSupported(Exception):
+    """The remote server does not support range requests"""
+
 
 def download_file_via_http(target_url: str, local_path: PathLike):
     """从目标地址下载文件到目标位置"""
@@ -36,7 +50,7 @@ def download_file_via_http(target_url: str, local_path: PathLike):
         raise ValueError(f'The status code returned by the download link({target_url}) is {resp.status_code}')
 
     with open(local_path, mode="wb") as fh:
-        for chunk in resp.iter_content(chunk_size=512):
+        for chunk in resp.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
             if chunk:
                 fh.write(chunk)
     return local_path
@@ -52,5 +66,104 @@ def download_file_via_url(url: str, local_path: PathLike):
         download_file_from_blob_store(bucket=o.bucket, key=o.key, local_path=local_path, store_type=o.store_type)
 
 
+def download_file_with_cache(url: str, local_path: PathLike, sha256_signature: Optional[str] = None):
+    """Download file via url, the file will be served from local package cache if sha256_signature is given"""
+    cache = get_package_cache()
+    if not sha256_signature or cache is None:
+        download_file_via_url(url, local_path=local_path)
+        return local_path
+
+    try:
+        cache.fetch(sha256_signature, local_path, download=lambda path: download_file_via_url(url, local_path=path))
+    except requests.RequestException:
+        # 下载本身失败时不再重试
+        raise
+    except OSError:
+        # 缓存目录不可写, 磁盘空间不足等缓存自身的问题不应导致下载失败, 直接下载源码包
+        logger.warning("[sourcectl] local package cache is unavailable, download the package directly", exc_info=True)
+        download_file_via_url(url, local_path=local_path)
+    return local_path
+
+
 def download_package(package: SourcePackage, dest_path: PathLike):
-    return download_file_via_url(package.storage_url, local_path=dest_path)
+    return download_file_with_cache(package.storage_url, dest_path, sha256_signature=package.sha256_signature)
+
+
+def get_downloadable_url(url: str, expires_in: int = 60 * 10) -> str:
+    """Get an url which can be downloaded via http directly, the blob store objects will be signed"""
+    o = parse_url(url)
+    if o.store_type in [StoreType.HTTP, StoreType.HTTPS]:
+        return o.url
+    store = make_blob_store(bucket=o.bucket, store_type=o.store_type)
+    return store.generate_presigned_url(key=o.key, expires_in=expires_in, signature_type=SignatureType.DOWNLOAD)
+
+
+class HTTPRangeFile(io.RawIOBase):
+    """A read-only and seekable file object which reads the remote file by HTTP range requests, it can be used by
+    `zipfile` to read the central directory and a few members without downloading the whole file.
+
+    :raises RangeNotSupported: when the server does not respond with partial content
+    """
+
+    # 每次请求最少读取的字节数, 减少 zipfile 小块读取时产生的请求数
+    min_fetch_size = 64 * 1024
+    # 首次请求读取文件末尾的字节数, 足以覆盖 zip 的 End of Central Directory 记录(包括最长的注释)
+    tail_size = 64 * 1024 + 22
+    timeout = 30
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+        self._pos = 0
+        self._buffer_start, self._buffer, self.size = self._fetch(f'bytes=-{self.tail_size}')
+
+    def _fetch(self, range_: str) -> Tuple[int, bytes, int]:
+        """Fetch the given range, return the start position, content and the total size of the file"""
+        resp = requests.get(self.url, headers={'Range': range_}, stream=True, timeout=self.timeout)
+        try:
+            if resp.status_code != 206:
+                raise RangeNotSupported(f'the status code of range request is {resp.status_code}')
+            match = _CONTENT_RANGE_REGEX.match(resp.headers.get('Content-Range', ''))
+            if not match:
+                raise RangeNotSupported('invalid Content-Range header')
+            return int(match.group('start')), resp.content, int(match.group('size'))
+        finally:
+            resp.close()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self.size + offset
+        else:
+            raise ValueError(f'invalid whence: {whence}')
+        if self._pos < 0:
+            raise ValueError('negative seek position')
+        return self._pos
+
+    def readinto(self, b) -> int:
+        n = min(len(b), self.size - self._pos)
+        if n <= 0:
+            return 0
+
+        offset = self._pos - self._buffer_start
+        if offset < 0 or offset + n > len(self._buffer):
+            end = min(self._pos + max(n, self.min_fetch_size), self.size) - 1
+            self._buffer_start, self._buffer, _ = self._fetch(f'bytes={self._pos}-{end}')
+            offset = self._pos - self._buffer_start
+            n = min(n, len(self._buffer) - offset)
+
+        b[:n] = self._buffer[offset : offset + n]
+        self._pos += n
+        return n
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+"""Index the metadata files (Procfile, app_desc.yaml etc.) of source packages, so that these files can be read
+without downloading the whole package.
+"""
+import base64
+import logging
+import posixpath
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from paasng.dev_resources.sourcectl.package.client import BasePackageClient
+
+logger = logging.getLogger(__name__)
+
+# 部署时会从源码包中读取的元数据文件
+METADATA_FILENAMES = frozenset(
+    [
+        'Procfile',
+        'app_desc.yaml',
+        'app_desc.yml',
+        'app.yaml',
+        'app.yml',
+        'bkapp.yaml',
+        'bkapp.yml',
+        '.dockerignore',
+    ]
+)
+# 只索引目录层级不超过该值的元数据文件, 源码包的 relative_path 和模块的 source_dir 一般不会超过该层级
+METADATA_FILE_MAX_DEPTH = 3
+# 超过该大小的元数据文件不保存内容, 读取时仍需访问源码包
+METADATA_FILE_MAX_SIZE = 256 * 1024
+# 元数据文件过多(如依赖目录中存在同名文件)时放弃建立索引, 避免上传源码包时耗时过长
+METADATA_INDEX_MAX_FILES = 20
+
+
+def normalize_member_name(name: str) -> str:
+    """Normalize the member name of archive, e.g. "./foo/../bar/Procfile" -> "bar/Procfile" """
+    return posixpath.normpath(name)
+
+
+def is_indexable(name: str) -> bool:
+    """Check if the member should be included in the index
+
+    :param name: normalized member name
+    """
+    return posixpath.basename(name) in METADATA_FILENAMES and name.count('/') <= METADATA_FILE_MAX_DEPTH
+
+
+class PackageMetadataIndex:
+    """The index of metadata files in source package
+
+    :param files: the contents of metadata files, key is the normalized member name
+    :param oversized: the members which are too large to be included in the index
+    :param is_zipfile: whether the package is a zip file, zip file supports reading members by range requests
+    """
+
+    def __init__(self, files: Dict[str, bytes], oversized: Optional[List[str]] = None, is_zipfile: bool = False):
+        self.files = files
+        self.oversized = oversized or []
+        self.is_zipfile = is_zipfile
+
+    @classmethod
+    def build(cls, archive: 'BasePackageClient', is_zipfile: bool = False) -> Optional['PackageMetadataIndex']:
+        """Build index by reading the metadata files in given archive
+
+        :return: None if there are too many metadata files
+        """
+        names = [name for name in archive.list() if is_indexable(normalize_member_name(name))]
+        if len(names) > METADATA_INDEX_MAX_FILES:
+            logger.info('too many metadata files(%s) in package, skip building index', len(names))
+            return None
+
+        files: Dict[str, bytes] = {}
+        oversized: List[str] = []
+        for name in names:
+            try:
+                content = archive.read_file(name)
+            except (RuntimeError, KeyError):
+                # 可能是与元数据文件同名的目录
+                logger.warning('unable to read member: %s, skip building index', name)
+                return None
+
+            key = normalize_member_name(name)
+            if len(content) > METADATA_FILE_MAX_SIZE:
+                oversized.append(key)
+            else:
+                files[key] = content
+        return cls(files=files, oversized=oversized, is_zipfile=is_zipfile)
+
+    def read_file(self, key: str) -> Optional[bytes]:
+        """Read the file from index
+
+        :param key: the member name in archive
+        :raises KeyError: when the file does not exist in the package
+        :return: None if the file is not covered by this index
+        """
+        key = normalize_member_name(key)
+        if key in self.files:
+            return self.files[key]
+        if not is_indexable(key) or key in self.oversized:
+            return None
+        raise KeyError(f"filename: {key} Don't exists.")
+
+    def to_dict(self) -> Dict:
+        # Q: 为什么需要进行 base64 编码?
+        # A: 因为索引会被存储进数据库, bytes 类型无法序列化成 json
+        return {
+            'files': {key: base64.b64encode(content).decode() for key, content in self.files.items()},
+            'oversized': self.oversized,
+            'is_zipfile': self.is_zipfile,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'PackageMetadataIndex':
+        return cls(
+            files={key: base64.b64decode(content) for key, content in data['files'].items()},
+            oversized=data.get('oversized', []),
+            is_zipfile=data.get('is_zipfile', False),
+        )
@@ -77,7 +77,11 @@ def start_bg_build_process(deploy_id, bp_id, stream_channel_id=None, metadata=No
         stream = ConsoleStream()
 
     bp_executor = BuildProcessExecutor(Deployment.objects.get(pk=deploy_id), build_process, stream)
-    bp_executor.execute(metadata=metadata)
+    try:
+        bp_executor.execute(metadata=metadata)
+    finally:
+        # Messages may be buffered by stream, make sure they are all written
+        stream.flush()
 
 
 def interrupt_build_proc(bp_id: UUID) -> bool:
@@ -192,6 +196,7 @@ class BuildProcessExecutor(DeployStep):
         else:
             self.wait_for_succeeded()
         finally:
+            self.stream.flush()
             # 不管构建成功与否, 均需要清理 slugbuilder 容器
             self.clean_slugbuilder()
 
@@ -72,4 +72,8 @@ def execute_bg_command(uuid: str, stream_channel_id: Optional[str] = None, extra
         stream = ConsoleStream()
 
     executor = AppCommandExecutor(command=command, stream=stream, extra_envs=extra_envs or {})
-    executor.perform()
+    try:
+        executor.perform()
+    finally:
+        # Messages may be buffered by stream, make sure they are all written
+        stream.flush()
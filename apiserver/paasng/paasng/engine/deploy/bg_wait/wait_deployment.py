@@ -25,7 +25,7 @@ from typing import Any, Dict, List, Optional, Type
 from blue_krill.async_utils.poll_task import PollingMetadata, PollingResult, PollingStatus, TaskPoller
 from pydantic import BaseModel, validator
 
-from paas_wl.workloads.processes.processes import PlainProcess
+from paas_wl.workloads.processes.processes import PlainProcess, ProcessesSnapshot
 from paas_wl.workloads.processes.shim import ProcessManager
 from paasng.engine.models import Deployment
 from paasng.engine.processes.events import ProcEventsProducer
@@ -83,10 +83,10 @@ class AbortPolicy(ABC):
         return False
 
     @abstractmethod
-    def evaluate(self, processes: List[PlainProcess], already_waited: float, extra_params: Dict) -> bool:
+    def evaluate(self, processes: ProcessesSnapshot, already_waited: float, extra_params: Dict) -> bool:
         """Determine if current wait procedure should be aborted
 
-        :param processes: current process list
+        :param processes: snapshot of current processes, it's shared by all policies of the poll
         :param already_waited: how long since current procedure has been started, in seconds
         :param extra_params: extra params of current procedure
         """
@@ -118,7 +118,8 @@ class WaitProcedurePoller(TaskPoller):
 
     def query(self) -> PollingResult:
         """Start polling query"""
-        current_processes = self._get_current_processes()
+        # Build the snapshot only once, all policies and checks share it's indexes and counters
+        current_processes = ProcessesSnapshot.from_processes(self._get_current_processes())
 
         already_waited = time.time() - self.metadata.query_started_at
         logger.info(f'wait procedure started {already_waited} seconds, env: {self.env}')
@@ -148,7 +149,7 @@ class WaitProcedurePoller(TaskPoller):
             polling_result.data = AbortedDetails(aborted=False, extra_data=polling_result.data).dict()
         return polling_result
 
-    def broadcast_events(self, current_processes: List[PlainProcess]):
+    def broadcast_events(self, current_processes: ProcessesSnapshot):
         """Broadcast processes/instances related events"""
         last_processes = self._get_last_processes()
         is_first_query = self.metadata.queried_count == 0
@@ -164,7 +165,7 @@ class WaitProcedurePoller(TaskPoller):
         """Get current process list"""
         return ProcessManager(self.env).list_plain_processes()
 
-    def _get_last_processes(self) -> Optional[List[PlainProcess]]:
+    def _get_last_processes(self) -> Optional[ProcessesSnapshot]:
         """Get process list of last polling action"""
         try:
             return self.store.get()
@@ -172,7 +173,7 @@ class WaitProcedurePoller(TaskPoller):
             logger.warning('Failed to get last processes, error: %s', e)
             return None
 
-    def get_status(self, processes: List[PlainProcess]) -> PollingResult:
+    def get_status(self, processes: ProcessesSnapshot) -> PollingResult:
         raise NotImplementedError()
 
 
@@ -184,7 +185,7 @@ class DynamicReadyTimeoutPolicy(AbortPolicy):
     def get_reason(self) -> str:
         return 'release took too long to complete'
 
-    def evaluate(self, processes: List[PlainProcess], already_waited: float, extra_params: Dict) -> bool:
+    def evaluate(self, processes: ProcessesSnapshot, already_waited: float, extra_params: Dict) -> bool:
         total_desired_replicas = sum(p.replicas for p in processes)
 
         # Minimal timeout is 2 minutes, plus 60 seconds for every extra replica
@@ -201,16 +202,11 @@ class TooManyRestartsPolicy(AbortPolicy):
     def get_reason(self) -> str:
         return f'instance restarted more than {self.maximum_count} times'
 
-    def evaluate(self, processes: List[PlainProcess], already_waited: float, extra_params: Dict) -> bool:
+    def evaluate(self, processes: ProcessesSnapshot, already_waited: float, extra_params: Dict) -> bool:
         for p in processes:
-            proc_version = p.version
-            for inst in p.instances:
-                # Only check fresh instances which matches current process
-                if inst.version != proc_version:
-                    continue
-
-                if inst.restart_count > self.maximum_count:
-                    return True
+            # Only check fresh instances which matches current process
+            if processes.get_instances_stat(p.name, p.version).max_restart_count > self.maximum_count:
+                return True
         return False
 
 
@@ -224,7 +220,7 @@ class UserInterruptedPolicy(AbortPolicy):
     def is_interrupted(self) -> bool:
         return True
 
-    def evaluate(self, processes: List[PlainProcess], already_waited: float, extra_params: Dict) -> bool:
+    def evaluate(self, processes: ProcessesSnapshot, already_waited: float, extra_params: Dict) -> bool:
         deployment_id = extra_params.get('deployment_id')
         if not deployment_id:
             logger.warning('Deployment was not provided for UserInterruptedPolicy, will not proceed.')
@@ -243,7 +239,7 @@ class WaitForAllStopped(WaitProcedurePoller):
 
     overall_timeout_seconds = 2 * 60
 
-    def get_status(self, processes: List[PlainProcess]) -> PollingResult:
+    def get_status(self, processes: ProcessesSnapshot) -> PollingResult:
         """Check if all processes were stopped"""
         for process in processes:
             count = len(process.instances)
@@ -265,10 +261,10 @@ class WaitForReleaseAllReady(WaitProcedurePoller):
         super().__init__(params, metadata)
         self.release_version = int(self.params['release_version'])
 
-    def get_status(self, processes: List[PlainProcess]) -> PollingResult:
+    def get_status(self, processes: ProcessesSnapshot) -> PollingResult:
         """Check if all where processes was updated to given release_version"""
         for process in processes:
-            if not process.is_all_ready(self.release_version):
+            if not processes.is_all_ready(process.name, self.release_version):
                 logger.info(f'Process {process.type} was not updated to {self.release_version}, env: {self.env}')
                 return PollingResult.doing()
 
@@ -501,8 +501,8 @@ class BuildProcessPoller(DeployPoller):
 
         # TODO: Use a flag value to indicate the progress of the scanning of the log,
         # so that we won't need to scan the log from the beginning every time.
-        for line in build_proc.output_stream.lines.all().values_list('line', flat=True):
-            update_step_by_line(line, pattern_maps, phase)
+        for line in build_proc.output_stream.get_lines():
+            update_step_by_line(line.line, pattern_maps, phase)
 
 
 class BuildProcessResultHandler(CallbackHandler):
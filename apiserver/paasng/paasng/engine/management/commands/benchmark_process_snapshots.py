@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+"""Benchmark the joining and polling of processes in namespaces with thousands of pods
+
+The legacy implementations walk the process and instance lists: the join scans all instances for every process,
+and every poll re-walks the lists to check restarts and readiness, and to diff against the last poll. They are
+kept here as the reference to check that `group_instances` and `ProcessesSnapshot` produce the same results.
+"""
+import random
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from django.core.management.base import BaseCommand
+
+from paas_wl.platform.applications.models import WlApp
+from paas_wl.workloads.processes.controllers import group_instances
+from paas_wl.workloads.processes.entities import Instance
+from paas_wl.workloads.processes.processes import PlainInstance, PlainProcess, ProcessesSnapshot
+from paasng.engine.deploy.bg_wait.wait_deployment import TooManyRestartsPolicy
+from paasng.engine.processes.utils import diff_list
+
+# (too many restarts, all ready, {process name: (added, removed, both_exists) instance names})
+PollResult = Tuple[bool, bool, Dict[str, Tuple[Set[str], Set[str], Set[str]]]]
+
+
+class ProcessKey(NamedTuple):
+    """The fields of `Process` used by the join, building full `Process` objects is not needed"""
+
+    app: WlApp
+    type: str
+
+
+def legacy_join(processes: List[ProcessKey], instances: List[Instance]) -> Dict[Tuple[Optional[int], str], List[str]]:
+    result = {}
+    for process in processes:
+        insts = [inst for inst in instances if inst.process_type == process.type and inst.app == process.app]
+        result[(process.app.pk, process.type)] = [inst.name for inst in insts]
+    return result
+
+
+def join(processes: List[ProcessKey], instances: List[Instance]) -> Dict[Tuple[Optional[int], str], List[str]]:
+    groups = group_instances(instances)
+    return {
+        (process.app.pk, process.type): [inst.name for inst in groups.get((process.app.pk, process.type), [])]
+        for process in processes
+    }
+
+
+def legacy_poll(procs_old: Sequence[PlainProcess], procs_new: List[PlainProcess], version: int) -> PollResult:
+    too_many_restarts = any(
+        inst.restart_count > TooManyRestartsPolicy.maximum_count
+        for p in procs_new
+        for inst in p.instances
+        if inst.version == p.version
+    )
+    all_ready = all(p.is_all_ready(version) for p in procs_new)
+
+    diffs = {}
+    _, _, procs_both = diff_list([p.name for p in procs_old], [p.name for p in procs_new])
+    for name in procs_both:
+        proc_old = next(p for p in procs_old if p.name == name)
+        proc_new = next(p for p in procs_new if p.name == name)
+        diffs[name] = diff_list([i.name for i in proc_old.instances], [i.name for i in proc_new.instances])
+    return too_many_restarts, all_ready, diffs
+
+
+def poll(procs_old: ProcessesSnapshot, procs_new: List[PlainProcess], version: int) -> PollResult:
+    snapshot = ProcessesSnapshot(procs_new)
+    too_many_restarts = TooManyRestartsPolicy().evaluate(snapshot, already_waited=0, extra_params={})
+    all_ready = all(snapshot.is_all_ready(p.name, version) for p in snapshot)
+
+    diffs = {}
+    _, _, procs_both = snapshot.diff(procs_old)
+    for name in procs_both:
+        diffs[name] = diff_list(list(procs_old.get_instances(name)), list(snapshot.get_instances(name)))
+    return too_many_restarts, all_ready, diffs
+
+
+def make_plain_processes(
+    processes_count: int, instances_count: int, version: int, seed: int = 0
+) -> List[PlainProcess]:
+    """Make processes, half of the instances of each process are updated to given version"""
+    rand = random.Random(seed)
+    procs = []
+    for i in range(processes_count):
+        instances = [
+            PlainInstance(
+                name=f"proc{i}-v{version if j % 2 else 1}-{j}",
+                version=version if j % 2 else 1,
+                process_type=f"proc{i}",
+                ready=bool(j % 2),
+                restart_count=rand.randint(0, TooManyRestartsPolicy.maximum_count),
+            )
+            for j in range(instances_count)
+        ]
+        procs.append(
+            PlainProcess(
+                name=f"proc{i}",
+                version=version,
+                replicas=instances_count,
+                type=f"proc{i}",
+                command="",
+                instances=instances,
+            )
+        )
+    return procs
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the joining and polling of processes, compare with the legacy implementations'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--apps", dest="apps", type=int, default=4, help="Number of apps in the namespace.")
+        parser.add_argument("--processes", dest="processes", type=int, default=25, help="Number of processes per app.")
+        parser.add_argument(
+            "--instances", dest="instances", type=int, default=40, help="Number of instances per process."
+        )
+        parser.add_argument("--rounds", dest="rounds", type=int, default=5, help="Number of rounds to run.")
+
+    def handle(self, apps, processes, instances, rounds, *args, **options):
+        pods_count = apps * processes * instances
+        self.stdout.write(f"{apps} apps, {processes} processes per app, {pods_count} pods, {rounds} rounds")
+
+        # The apps are never saved, only their primary keys are used
+        wl_apps = [WlApp(pk=i + 1, name=f"app-{i}") for i in range(apps)]
+        proc_keys = [ProcessKey(app, f"proc{i}") for app in wl_apps for i in range(processes)]
+        insts = [
+            Instance(app=app, name=f"{app.name}-proc{i}-{j}", process_type=f"proc{i}")
+            for app in wl_apps
+            for i in range(processes)
+            for j in range(instances)
+        ]
+        if not self._compare("join", rounds, lambda: legacy_join(proc_keys, insts), lambda: join(proc_keys, insts)):
+            return
+
+        # One process was removed and one was added since the last poll
+        procs_old = make_plain_processes(apps * processes, instances, version=1)[1:]
+        procs_new = make_plain_processes(apps * processes + 1, instances, version=2)
+        snapshot_old = ProcessesSnapshot(procs_old)
+        self._compare(
+            "poll",
+            rounds,
+            lambda: legacy_poll(procs_old, procs_new, 2),
+            lambda: poll(snapshot_old, procs_new, 2),
+        )
+
+    def _compare(self, name: str, rounds: int, legacy_func: Callable, func: Callable) -> bool:
+        if legacy_func() != func():
+            self.stderr.write(self.style.ERROR(f"{name}: results differ from the legacy implementation"))
+            return False
+
+        legacy_cost, cost = self._timeit(legacy_func, rounds), self._timeit(func, rounds)
+        self.stdout.write(f"{name}: legacy {legacy_cost * 1000:.1f}ms, current {cost * 1000:.1f}ms per call")
+        self.stdout.write(self.style.SUCCESS(f"{name}: results are identical, speedup: {legacy_cost / cost:.1f}x"))
+        return True
+
+    @staticmethod
+    def _timeit(func: Callable, rounds: int) -> float:
+        """Return the average seconds of each call"""
+        start = time.perf_counter()
+        for _ in range(rounds):
+            func()
+        return (time.perf_counter() - start) / rounds
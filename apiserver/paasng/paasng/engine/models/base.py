@@ -23,6 +23,7 @@ from typing import TYPE_CHECKING, Optional
 from django.db import models
 from django.utils import timezone
 
+from paas_wl.platform.applications.identity import get_wl_app
 from paas_wl.platform.applications.models import WlApp
 from paasng.engine.constants import JobStatus
 from paasng.utils.models import BkUserField, OwnerTimestampedModel, TimestampedModel
@@ -63,8 +64,9 @@ class EngineApp(OwnerTimestampedModel):
         return "{name}-{region}".format(name=self.name, region=self.region)
 
     def to_wl_obj(self) -> 'WlApp':
-        """Return the corresponding WlApp object in the workloads module"""
-        return WlApp.objects.get(region=self.region, name=self.name)
+        """Return the corresponding WlApp object in the workloads module, memoized in current
+        request or task, see `paas_wl.platform.applications.identity` for details."""
+        return get_wl_app(self.region, self.name)
 
 
 class MarkStatusMixin:
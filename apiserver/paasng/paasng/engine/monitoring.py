@@ -64,14 +64,13 @@ def deployment_is_frozen(deployment: Deployment, since: datetime.datetime) -> bo
         return True
 
     client = EngineDeployClient(deployment.get_engine_app())
-    log_lines = client.list_build_proc_logs(deployment.build_process_id)
-
     # Deployment with no logs lines was frozen
-    if not log_lines:
+    total = client.count_build_proc_logs(deployment.build_process_id)
+    if not total:
         return True
 
-    # Deployment which has no new lines in `edge_seconds` was frozen
-    last_log_line = log_lines[-1]
+    # Deployment which has no new lines in `edge_seconds` was frozen, only the last line is needed
+    last_log_line = client.list_build_proc_logs(deployment.build_process_id, offset=total - 1, limit=1)[-1]
     try:
         last_line_created = arrow.get(last_log_line['created'])
     except KeyError:
@@ -20,9 +20,9 @@ to the current version of the project delivered to anyone in the future.
 import logging
 from dataclasses import dataclass
 from enum import IntEnum
-from typing import Any, Dict, Iterator, List, Tuple
+from typing import Any, Dict, Iterator, Sequence, Tuple
 
-from paas_wl.workloads.processes.processes import PlainInstance, PlainProcess
+from paas_wl.workloads.processes.processes import PlainInstance, PlainProcess, ProcessesSnapshot
 from paasng.engine.processes.utils import diff_list
 
 logger = logging.getLogger(__name__)
@@ -72,30 +72,29 @@ class ProcEventsProducer:
         'removed': (ProcessEventType.REMOVED, ProcInstEventType.REMOVED, '{type} removed'),
     }
 
-    def __init__(self, procs_old: List[PlainProcess], procs_new: List[PlainProcess]):
-        self.procs_old = procs_old
-        self.procs_new = procs_new
+    def __init__(self, procs_old: Sequence[PlainProcess], procs_new: Sequence[PlainProcess]):
+        # Index the processes by name, a `ProcessesSnapshot` object will be used as is
+        self.procs_old = ProcessesSnapshot.from_processes(procs_old)
+        self.procs_new = ProcessesSnapshot.from_processes(procs_new)
 
     def produce(self) -> Iterator[ProcessBaseEvent]:
         """Yields events which represents the process list's state changes"""
-        procs_old_names = [inst.name for inst in self.procs_old]
-        procs_new_names = [inst.name for inst in self.procs_new]
-        procs_added, procs_removed, procs_both = diff_list(procs_old_names, procs_new_names)
+        procs_added, procs_removed, procs_both = self.procs_new.diff(self.procs_old)
 
         # Process added processes
         for proc_name in procs_added:
-            process = self._get_proc_by_name(self.procs_new, proc_name)
+            process = self.procs_new.get_process(proc_name)
             yield from self.proc_process_pure(process, 'created')
 
         # Process removed processes
         for proc_name in procs_removed:
-            process = self._get_proc_by_name(self.procs_old, proc_name)
+            process = self.procs_old.get_process(proc_name)
             yield from self.proc_process_pure(process, 'removed')
 
         # Process both exists processes
         for proc_name in procs_both:
-            proc_old = self._get_proc_by_name(self.procs_old, proc_name)
-            proc_new = self._get_proc_by_name(self.procs_new, proc_name)
+            proc_old = self.procs_old.get_process(proc_name)
+            proc_new = self.procs_new.get_process(proc_name)
             yield from self.proc_process_updated(proc_old, proc_new)
 
     def proc_process_pure(self, process: PlainProcess, type: str) -> Iterator[ProcessBaseEvent]:
@@ -123,28 +122,29 @@ class ProcEventsProducer:
             )
 
         # Detect instances changes
-        yield from ProcInstanceEventsProducer(proc_new, proc_old.instances, proc_new.instances).produce()
-
-    def _get_proc_by_name(self, processes: List[PlainProcess], name: str) -> PlainProcess:
-        """Find an Process by name"""
-        try:
-            return next(process for process in processes if process.name == name)
-        except StopIteration:
-            raise KeyError(name)
+        yield from ProcInstanceEventsProducer(
+            proc_new,
+            self.procs_old.get_instances(proc_old.name),
+            self.procs_new.get_instances(proc_new.name),
+        ).produce()
 
 
 class ProcInstanceEventsProducer:
     """Produces events according to process's instances states"""
 
-    def __init__(self, process: PlainProcess, insts_old: List[PlainInstance], insts_new: List[PlainInstance]):
+    def __init__(
+        self, process: PlainProcess, insts_old: Dict[str, PlainInstance], insts_new: Dict[str, PlainInstance]
+    ):
+        """
+        :param insts_old: The instances before, indexed by name
+        :param insts_new: The instances after, indexed by name
+        """
         self.process = process
         self.insts_old = insts_old
         self.insts_new = insts_new
 
     def produce(self) -> Iterator[ProcInstEvent]:
-        insts_old_names = [inst.name for inst in self.insts_old]
-        insts_new_names = [inst.name for inst in self.insts_new]
-        insts_added, insts_removed, insts_both = diff_list(insts_old_names, insts_new_names)
+        insts_added, insts_removed, insts_both = diff_list(list(self.insts_old), list(self.insts_new))
 
         # Process added instances
         for name in insts_added:
@@ -192,9 +192,6 @@ class ProcInstanceEventsProducer:
                 message='instance became not ready',
             )
 
-    def _get_inst_by_name(self, insts: List[PlainInstance], name: str) -> PlainInstance:
+    def _get_inst_by_name(self, insts: Dict[str, PlainInstance], name: str) -> PlainInstance:
         """Find an instance by name"""
-        try:
-            return next(inst for inst in insts if inst.name == name)
-        except StopIteration:
-            raise KeyError(name)
+        return insts[name]
@@ -16,39 +16,158 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
-import pickle
-from typing import List, Optional, Set, Tuple, TypeVar
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, TypeVar
 
-from paas_wl.workloads.processes.processes import PlainProcess
+import msgpack
+from django.conf import settings
+
+from paas_wl.workloads.processes.entities import Status
+from paas_wl.workloads.processes.processes import PlainInstance, PlainProcess, ProcessesSnapshot
 from paasng.platform.applications.models import ModuleEnvironment
 from paasng.platform.core.storages.redisdb import get_default_redis
 
+logger = logging.getLogger(__name__)
+
 T = TypeVar("T")
 
+# The version of the snapshot encoding, increase it when the layout of packed processes was changed,
+# snapshots of other versions will be ignored.
+SNAPSHOT_SCHEMA_VERSION = 1
+
 
 def diff_list(l_before: List[T], l_after: List[T]) -> Tuple[Set[T], Set[T], Set[T]]:
     """Returns (added, removed, both_exists)"""
     return (set(l_after) - set(l_before), set(l_before) - set(l_after), set(l_after) & set(l_before))
 
 
+def pack_process(proc: PlainProcess) -> List[Any]:
+    """Pack a process into a list of basic values, instances are sorted by name to make the result stable"""
+    status = None
+    if proc.status:
+        status = [proc.status.replicas, proc.status.success, proc.status.failed, proc.status.version]
+    instances = [
+        [inst.name, inst.version, inst.process_type, inst.state, inst.ready, inst.restart_count, inst.image]
+        for inst in sorted(proc.instances, key=lambda inst: inst.name)
+    ]
+    return [proc.name, proc.version, proc.replicas, proc.type, proc.command, status, instances]
+
+
+def unpack_process(data: List[Any]) -> PlainProcess:
+    """Unpack a process from the result of `pack_process`"""
+    name, version, replicas, type_, command, status, instances = data
+    return PlainProcess(
+        name=name,
+        version=version,
+        replicas=replicas,
+        type=type_,
+        command=command,
+        status=Status(*status) if status else None,
+        instances=[PlainInstance(*inst) for inst in instances],
+    )
+
+
+def compute_snapshot_digest(packed: Dict[str, List[Any]]) -> bytes:
+    """Compute the digest of packed processes, the order of processes does not matter"""
+    return hashlib.blake2b(msgpack.packb([packed[name] for name in sorted(packed)]), digest_size=16).digest()
+
+
 class ProcessesSnapshotStore:
-    """Stores snapshot of application's processes data, use redis as backend."""
+    """Stores snapshot of application's processes data, use redis as backend.
+
+    Processes are encoded by msgpack with a schema version. Two keys are used:
+
+    - base: a full snapshot, `[schema_version, digest, [packed_process, ...]]`
+    - delta: changes against the base, `[schema_version, base_digest, digest, [packed_process, ...], [removed_name]]`
+
+    The delta is only written when `delta_enabled` is on, a full snapshot will be written instead when there are
+    too many changes. Writing will be skipped when the processes are same with the ones loaded by `get()`.
+
+    :param delta_enabled: whether to save changes as delta, default to `settings.PROCESSES_SNAPSHOT_DELTA_ENABLED`
+    """
 
     # processes will expire after 1 day to save space
     data_expires_in = 3600 * 24
+    # write a full snapshot when the ratio of changed processes exceeds this value
+    delta_max_ratio = 0.5
 
-    def __init__(self, env: ModuleEnvironment):
+    def __init__(self, env: ModuleEnvironment, delta_enabled: Optional[bool] = None):
         self.env = env
         self.redis_db = get_default_redis()
         self.rkey = f'procs::snapshot::app:{env.engine_app.name}'
+        self.delta_rkey = f'{self.rkey}::delta'
+        if delta_enabled is None:
+            delta_enabled = settings.PROCESSES_SNAPSHOT_DELTA_ENABLED
+        self.delta_enabled = delta_enabled
+
+        # The full snapshot(digest, packed processes) and the digest of processes loaded or saved last time
+        self._base: Optional[Tuple[bytes, Dict[str, List[Any]]]] = None
+        self._last_digest: Optional[bytes] = None
 
-    def save(self, processes: List[PlainProcess]):
+    def save(self, processes: Sequence[PlainProcess]):
         """Save processes"""
-        self.redis_db.setex(self.rkey, value=pickle.dumps(processes), time=self.data_expires_in)
+        packed = {proc.name: pack_process(proc) for proc in processes}
+        digest = compute_snapshot_digest(packed)
+        if digest == self._last_digest:
+            return
+
+        if self.delta_enabled and self._base and (delta := self._make_delta(packed)):
+            changed, removed = delta
+            value = msgpack.packb([SNAPSHOT_SCHEMA_VERSION, self._base[0], digest, changed, removed])
+            self.redis_db.setex(self.delta_rkey, value=value, time=self.data_expires_in)
+        else:
+            value = msgpack.packb([SNAPSHOT_SCHEMA_VERSION, digest, list(packed.values())])
+            pipe = self.redis_db.pipeline()
+            pipe.setex(self.rkey, value=value, time=self.data_expires_in)
+            pipe.delete(self.delta_rkey)
+            pipe.execute()
+            self._base = (digest, packed)
+        self._last_digest = digest
+
+    def get(self) -> Optional[ProcessesSnapshot]:
+        """Get processes, return None if no snapshot can be found or it was saved in other versions"""
+        base_val, delta_val = self.redis_db.mget([self.rkey, self.delta_rkey])
+        base = self._loads(base_val)
+        if base is None or len(base) != 3:
+            return None
+
+        _, digest, procs = base
+        packed = {proc[0]: proc for proc in procs}
+        self._base = (digest, dict(packed))
 
-    def get(self) -> Optional[List[PlainProcess]]:
-        """Get processes"""
-        val = self.redis_db.get(self.rkey)
-        if val is None:
+        delta = self._loads(delta_val)
+        # Ignore the delta when it's not made from current base
+        if delta and len(delta) == 5 and delta[1] == digest:
+            _, _, digest, changed, removed = delta
+            packed.update((proc[0], proc) for proc in changed)
+            for name in removed:
+                packed.pop(name, None)
+
+        self._last_digest = digest
+        return ProcessesSnapshot([unpack_process(proc) for proc in packed.values()])
+
+    def _make_delta(self, packed: Dict[str, List[Any]]) -> Optional[Tuple[List[List[Any]], List[str]]]:
+        """Make changes against the base snapshot, return None if there are too many changes"""
+        assert self._base is not None
+        base_packed = self._base[1]
+        changed = [proc for name, proc in packed.items() if base_packed.get(name) != proc]
+        removed = [name for name in base_packed if name not in packed]
+        if len(changed) + len(removed) > max(len(packed), 1) * self.delta_max_ratio:
+            return None
+        return changed, removed
+
+    @staticmethod
+    def _loads(value: Optional[bytes]) -> Optional[List[Any]]:
+        """Load the value, return None when it was not saved by current schema version"""
+        if value is None:
+            return None
+        try:
+            data = msgpack.unpackb(value)
+        except ValueError:
+            # The value might be saved by other formats, such as "pickle" in older versions
+            logger.info('Unable to load processes snapshot, ignore it')
+            return None
+        if not isinstance(data, list) or not data or data[0] != SNAPSHOT_SCHEMA_VERSION:
             return None
-        return pickle.loads(val)
+        return data
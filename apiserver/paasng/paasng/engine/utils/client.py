@@ -18,7 +18,7 @@ to the current version of the project delivered to anyone in the future.
 """Engine services module
 """
 import datetime
-from typing import Dict, List, TypedDict
+from typing import Dict, List, Optional, TypedDict
 
 from django.utils.functional import cached_property
 
@@ -92,15 +92,26 @@ class EngineDeployClient:
         command = self.wl_app.command_set.get(pk=command_id)
         return [{'stream': line.stream, 'line': line.line, 'created': line.created} for line in command.lines]
 
-    def list_build_proc_logs(self, build_process_id: str) -> List[LogLine]:
-        """Get current status of build process"""
+    def list_build_proc_logs(
+        self, build_process_id: str, offset: int = 0, limit: Optional[int] = None
+    ) -> List[LogLine]:
+        """List logs of build process
+
+        :param offset: index of the first line
+        :param limit: max number of lines, default to all lines
+        """
         build_proc = BuildProcess.objects.get(pk=build_process_id)
 
         lines: List[LogLine] = []
-        for line in build_proc.output_stream.lines.all().order_by('created'):
+        for line in build_proc.output_stream.get_lines(offset=offset, limit=limit):
             lines.append({'stream': line.stream, 'line': line.line, 'created': line.created})
         return lines
 
+    def count_build_proc_logs(self, build_process_id: str) -> int:
+        """Count the logs of build process"""
+        build_proc = BuildProcess.objects.get(pk=build_process_id)
+        return build_proc.output_stream.count_lines()
+
     def upsert_image_credentials(self, registry: str, username: str, password: str):
         """Update an engine app's image credentials, which will be used to pull image."""
         AppImageCredential.objects.update_or_create(
@@ -18,8 +18,9 @@ to the current version of the project delivered to anyone in the future.
 import abc
 import json
 import sys
+import time
 from enum import Enum
-from typing import TYPE_CHECKING, Optional, Protocol
+from typing import TYPE_CHECKING, List, Optional, Protocol, Tuple
 
 from blue_krill.redis_tools.messaging import StreamChannel
 from django.conf import settings
@@ -95,6 +96,11 @@ class DeployStream(metaclass=abc.ABCMeta):
     def close(self):
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def flush(self):
+        """Flush the buffered messages"""
+        raise NotImplementedError
+
     @classmethod
     @abc.abstractmethod
     def from_deployment_id(cls, deployment_id: str):
@@ -119,6 +125,10 @@ class RedisChannelStream(DeployStream):
     def close(self):
         return self.channel.close()
 
+    def flush(self):
+        # Messages are published immediately, nothing to flush
+        pass
+
     @classmethod
     def from_deployment_id(cls, deployment_id: str) -> 'RedisChannelStream':
         stream_channel = StreamChannel(deployment_id, redis_db=get_default_redis())
@@ -142,6 +152,9 @@ class ConsoleStream(DeployStream):
     def close(self):
         pass
 
+    def flush(self):
+        pass
+
     @classmethod
     def from_deployment_id(cls, deployment_id: str):
         return cls()
@@ -164,6 +177,13 @@ class ModelStream:
         message = self.cleanup_message(message)
         self.model.output_stream.write(line=message, stream=stream)
 
+    def write_messages(self, messages: List[Tuple[str, str]]):
+        """Write multiple messages to output stream in one batch
+
+        :param messages: list of (message, stream) pairs
+        """
+        self.model.output_stream.write_lines((self.cleanup_message(msg), stream) for msg, stream in messages)
+
     @staticmethod
     def cleanup_message(message):
         # Remove bad characters output by slugbuilder
@@ -176,17 +196,85 @@ class RedisWithModelStream(RedisChannelStream):
     """A modified redis channel stream which writes message to both model's output_stream
     and redis channel.
 
+    Messages are buffered, then saved to model in one query and published to redis channel through
+    one pipeline. The buffer will be flushed when it's too big or too old, and always before writing
+    titles, events or closing the stream, so the messages are never published out of order.
+
     :param model: A model which has output_stream field
     :param steam_channel: A redis channel stream
     """
 
+    # Max number of lines in buffer
+    max_buffered_lines = 100
+    # Max total size of lines in buffer
+    max_buffered_bytes = 64 * 1024
+    # Max seconds a message may stay in buffer, only checked when new message arrives
+    flush_interval = 1.0
+
     def __init__(self, model: MessageWriter, stream_channel: StreamChannel):
         self.model_stream = ModelStream(model)
+        self._buffer: List[Tuple[str, str]] = []
+        self._buffered_bytes = 0
+        self._last_flushed_at = time.monotonic()
         super().__init__(stream_channel)
 
     def write_message(self, message, stream='STDOUT'):
-        self.model_stream.write_message(message, stream)
-        super().write_message(message, stream)
+        self._buffer.append((message, stream))
+        self._buffered_bytes += len(message)
+        if (
+            len(self._buffer) >= self.max_buffered_lines
+            or self._buffered_bytes >= self.max_buffered_bytes
+            or time.monotonic() - self._last_flushed_at >= self.flush_interval
+        ):
+            self.flush()
+
+    def write_title(self, title):
+        self.flush()
+        return super().write_title(title)
+
+    def write_event(self, event_name: str, data: dict):
+        self.flush()
+        return super().write_event(event_name, data)
+
+    def close(self):
+        self.flush()
+        return super().close()
+
+    def flush(self):
+        """Write all buffered messages to model and redis channel"""
+        messages, self._buffer = self._buffer, []
+        self._buffered_bytes = 0
+        self._last_flushed_at = time.monotonic()
+        if not messages:
+            return
+
+        try:
+            self.model_stream.write_messages(messages)
+        finally:
+            publish_msgs(self.channel, [json.dumps({'line': msg, 'stream': str(stream)}) for msg, stream in messages])
+
+
+def publish_msgs(channel: StreamChannel, messages: List[str]):
+    """Publish multiple "msg" events to channel, use pipeline to save round trips.
+
+    The result is the same as calling `channel.publish_msg` for each message.
+    """
+    if not messages:
+        return
+
+    redis_db = channel.redis_db
+    # Reserve the event ids first, the payloads contain them
+    last_id = redis_db.incrby(channel.keys.counter, len(messages))
+    first_id = last_id - len(messages) + 1
+    payloads = [
+        json.dumps({'id': first_id + i, 'event': 'msg', 'data': message}) for i, message in enumerate(messages)
+    ]
+
+    pipe = redis_db.pipeline(transaction=False)
+    pipe.rpush(channel.keys.history, *payloads)
+    for payload in payloads:
+        pipe.publish(channel.keys.channel, payload)
+    pipe.execute()
 
 
 def get_default_stream(deployment: Deployment) -> RedisChannelStream:
@@ -1,6 +1,6 @@
 import logging
 from dataclasses import dataclass
-from typing import ClassVar
+from typing import ClassVar, Union
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +11,7 @@ class ServerSendEvent:
 
     id: str
     event: str
-    data: dict
+    data: Union[str, dict]
     __slots__ = ['id', 'event', 'data']
 
     INTERNAL_TERM: ClassVar[str] = "internal"
@@ -35,6 +35,7 @@ from yaml import YAMLError
 
 from paasng.dev_resources.sourcectl.models import SPStat
 from paasng.dev_resources.sourcectl.package.client import BinaryTarClient, ZipClient
+from paasng.dev_resources.sourcectl.package.indexer import PackageMetadataIndex
 from paasng.extensions.declarative.application.resources import ApplicationDesc
 from paasng.extensions.declarative.constants import AppDescPluginType, AppSpecVersion
 from paasng.extensions.declarative.exceptions import DescriptionValidationError
@@ -144,6 +145,18 @@ class SourcePackageStatReader:
         plugin = desc.get_plugin(AppDescPluginType.APP_VERSION)
         return plugin['data'] if plugin else None
 
+    def get_metadata_index(self) -> Optional[Dict]:
+        """Build the index of metadata files(Procfile etc.), so that these files can be read without downloading
+        the whole package when deploying
+        """
+        with self.accessor(self.path) as archive:
+            try:
+                index = PackageMetadataIndex.build(archive, is_zipfile=self.accessor is ZipClient)
+            except RuntimeError:
+                logger.warning('file: %s is not a valid tar file.', self.path)
+                return None
+        return index.to_dict() if index else None
+
     def compute_sha256_digest(self) -> str:
         """Compute package's sha256 digest"""
         # generate signature
@@ -165,6 +178,7 @@ class SourcePackageStatReader:
             meta_info=meta_info,
             relative_path=relative_path,
             sha256_signature=self.compute_sha256_digest(),
+            metadata_index=self.get_metadata_index(),
         )
 
     @staticmethod
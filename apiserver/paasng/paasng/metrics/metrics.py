@@ -16,7 +16,7 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 # API
 API_VISITED_COUNTER = Counter("api_visited_counter", "", ("method", "endpoint", "status"))
@@ -55,6 +55,34 @@ DEPLOYMENT_INFO_COUNTER = Counter("deploy_operation", "", ("source_type", "envir
 # 增强服务
 SERVICE_BIND_COUNTER = Counter('service_bind', "", ("service", "region"))
 SERVICE_PROVISION_COUNTER = Counter('service_provision', "", ("environment", "service", "plan"))
+# 拉取远程增强服务的耗时（秒），result 取值为 "changed"、"unchanged"、"error" 或 "timeout"
+REMOTE_SERVICE_FETCH_HISTOGRAM = Histogram(
+    'remote_service_fetch_seconds', "", ("endpoint", "result"), buckets=[0.1, 0.5, 1, 2, 5, 10, 30, 60]
+)
+# 最近一次成功拉取远程增强服务的时间戳（秒），可通过 time() - 该值 计算数据的陈旧程度
+REMOTE_SERVICE_LAST_FETCHED_GAUGE = Gauge('remote_service_last_fetched_timestamp_seconds', "", ("endpoint",))
+
+# 通过 API 网关调用第三方系统(如插件开发中心、日志平台)接口的耗时（秒），result 取值为 "success" 或 "error"
+APIGW_REQUEST_HISTOGRAM = Histogram(
+    'apigw_request_seconds', "", ("api_name", "method", "path", "result"), buckets=[0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+)
 
 # 进程
 PROCESS_OPERATE_COUNTER = Counter('process_operate', "", ("environment", "operate_type"))
+
+# 工作负载
+# 进程内 kubernetes 客户端注册表的命中情况，type 取值为 "api_client" 或 "discovery"
+KUBE_CLIENT_REGISTRY_COUNTER = Counter('kube_client_registry', "", ("cluster", "type", "result"))
+# informer 读取请求的命中情况，未命中时将直接请求 apiserver
+KUBE_INFORMER_LIST_COUNTER = Counter('kube_informer_list', "", ("kind", "result"))
+# informer 返回数据时，距离数据上一次确认与 apiserver 一致的时长（秒）
+KUBE_INFORMER_DATA_AGE_HISTOGRAM = Histogram(
+    'kube_informer_data_age_seconds', "", ("kind",), buckets=[1, 5, 10, 30, 60, 120, 300]
+)
+# informer 重新全量拉取（re-list）的次数，reason 取值为 "expired" 或 "error"
+KUBE_INFORMER_RESYNC_COUNTER = Counter('kube_informer_resync', "", ("kind", "reason"))
+# 监控图表范围查询缓存的命中情况，以时间分桶为单位统计，result 取值为 "hit" 或 "miss"
+METRICS_RANGE_CACHE_COUNTER = Counter('metrics_range_cache', "", ("result",))
+
+# ES 日志查询的索引列表及 mappings 缓存，type: indexes/mappings，result: hit/miss
+ES_LOG_QUERY_CACHE_COUNTER = Counter('es_log_query_cache', "", ("type", "result"))
@@ -23,8 +23,7 @@ from django.utils.timezone import now
 from prometheus_client.core import GaugeMetricFamily
 
 from paas_wl.cluster.models import Cluster
-from paas_wl.resources.base.base import get_client_by_cluster_name
-from paas_wl.resources.base.kube_client import CoreDynamicClient
+from paas_wl.resources.base.base import get_client_by_cluster_name, get_dynamic_client
 from paas_wl.workloads.processes.utils import list_unavailable_deployment
 
 logger = logging.getLogger(__name__)
@@ -53,7 +52,7 @@ class UnavailableDeploymentTotalMetric:
             except ValueError:
                 logger.exception(f"configuration of cluster<{cluster.name}> is not ready")
                 continue
-            unavailable_deployments = list_unavailable_deployment(CoreDynamicClient(client))
+            unavailable_deployments = list_unavailable_deployment(get_dynamic_client(client))
             gauge_family.add_metric(
                 labels=[cluster.region, cluster.name],
                 value=len(unavailable_deployments),
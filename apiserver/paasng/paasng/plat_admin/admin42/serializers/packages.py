@@ -30,4 +30,5 @@ class SourcePackageSLZ(serializers.ModelSerializer):
 
     class Meta:
         model = SourcePackage
-        fields = '__all__'
+        # The metadata index may be large and is only used internally for reading files
+        exclude = ['metadata_index']
@@ -19,8 +19,9 @@ to the current version of the project delivered to anyone in the future.
 """Applications related stuff
 """
 import datetime
+import itertools
 from dataclasses import dataclass
-from typing import Any, Collection, Dict, List, Optional
+from typing import Any, Collection, Dict, Iterable, List, Optional
 
 from bkpaas_auth import get_user_by_user_id
 from bkpaas_auth.models import BasicUser, User
@@ -29,7 +30,9 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Q, QuerySet
 from django.utils.translation import get_language
 
+from paasng.accessories.iam.helpers import fetch_apps_role_members
 from paasng.engine.models.operations import ModuleEnvironmentOperations
+from paasng.platform.applications.constants import ApplicationRole
 from paasng.platform.applications.models import Application, ModuleEnvironment, UserApplicationFilter
 from paasng.platform.core.storages.sqlalchemy import legacy_db
 from paasng.publish.sync_market.managers import AppDeveloperManger
@@ -71,7 +74,10 @@ class UniSimpleApp:
         return self._source.value
 
 
-def get_simple_app_by_default_app(app: Application) -> UniSimpleApp:
+def get_simple_app_by_default_app(app: Application, developers: Optional[List[str]] = None) -> UniSimpleApp:
+    """
+    :param developers: developers of the app, will be fetched if not given
+    """
     simple_app = UniSimpleApp(
         _source=SimpleAppSource.DEFAULT,
         region=app.region or 'unknown',
@@ -81,12 +87,27 @@ def get_simple_app_by_default_app(app: Application) -> UniSimpleApp:
         logo_url=app.get_logo_url(),
         created=app.created,
         creator=str_username(app.creator),
-        developers=app.get_developers(),
+        developers=app.get_developers() if developers is None else developers,
         _db_object=app,
     )
     return simple_app
 
 
+def get_simple_apps_by_default_apps(apps: Iterable[Application]) -> List[UniSimpleApp]:
+    """Get universal models of many applications, the developers of all apps are fetched in one batch"""
+    apps = list(apps)
+    role_members = fetch_apps_role_members(
+        [app.code for app in apps], roles=[ApplicationRole.ADMINISTRATOR, ApplicationRole.DEVELOPER]
+    )
+
+    results = []
+    for app in apps:
+        # Same as `Application.get_developers`: administrators are also developers
+        developers = set(itertools.chain.from_iterable(role_members[app.code].values()))
+        results.append(get_simple_app_by_default_app(app, developers=list(developers)))
+    return results
+
+
 def get_simple_app_by_legacy_app(app: LApplication) -> Optional[UniSimpleApp]:
     normalizer = LegacyAppNormalizer(app)
     region = normalizer.get_region()
@@ -125,11 +146,7 @@ def query_uni_apps_by_ids(ids: List[str]) -> Dict[str, UniSimpleApp]:
 def query_default_apps_by_ids(ids: Collection[str]) -> Dict[str, UniSimpleApp]:
     """Query applications by application ids, returns universal model"""
     apps = Application.objects.filter(code__in=ids, is_active=True).select_related('product')
-
-    results = {}
-    for app in apps:
-        results[app.code] = get_simple_app_by_default_app(app)
-    return results
+    return {simple_app.code: simple_app for simple_app in get_simple_apps_by_default_apps(apps)}
 
 
 def query_legacy_apps_by_ids(ids: Collection[str]) -> Dict[str, UniSimpleApp]:
@@ -154,11 +171,7 @@ def query_uni_apps_by_username(username: str) -> List[UniSimpleApp]:
 def query_default_apps_by_username(username: str) -> List[UniSimpleApp]:
     user = BasicUser(settings.USER_TYPE, username)
     applications = UserApplicationFilter(user).filter()
-
-    results = []
-    for app in applications:
-        results.append(get_simple_app_by_default_app(app))
-    return results
+    return get_simple_apps_by_default_apps(applications)
 
 
 def query_legacy_apps_by_username(username: str) -> List[UniSimpleApp]:
@@ -21,6 +21,8 @@ import logging
 from paasng.accessories.iam.client import BKIAMClient
 from paasng.accessories.iam.constants import NEVER_EXPIRE_DAYS
 from paasng.accessories.iam.members.models import ApplicationGradeManager, ApplicationUserGroup
+from paasng.accessories.iam.user_apps import hot_add_user_app
+from paasng.platform.applications.constants import ApplicationRole
 from paasng.platform.applications.models import Application
 from paasng.utils.basic import get_username_by_bkpaas_user_id
 
@@ -56,3 +58,5 @@ def register_builtin_user_groups_and_grade_manager(application: Application):
 
     # 5. 将创建者添加到管理者用户组，返回数据中第一个即为管理者用户组信息
     cli.add_user_group_members(user_groups[0]['id'], [creator], NEVER_EXPIRE_DAYS)
+    # 权限中心同步权限策略存在时延，先将应用临时授权给创建者，以免在应用列表中无法查询到新应用
+    hot_add_user_app([creator], application.code, ApplicationRole.ADMINISTRATOR)
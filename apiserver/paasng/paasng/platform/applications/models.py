@@ -31,7 +31,8 @@ from django.shortcuts import get_object_or_404
 from pilkit.processors import ResizeToFill
 
 from paasng.accessories.iam.helpers import fetch_role_members
-from paasng.accessories.iam.permissions.resources.application import ApplicationPermission
+from paasng.accessories.iam.permissions.resources.application import AppAction, ApplicationPermission
+from paasng.accessories.iam.user_apps import get_cached_user_app_filters, set_cached_user_app_filters
 from paasng.platform.applications.constants import AppFeatureFlag, ApplicationRole, ApplicationType
 from paasng.platform.core.storages.object_storage import app_logo_storage
 from paasng.platform.modules.constants import SourceOrigin
@@ -83,10 +84,14 @@ class ApplicationQuerySet(models.QuerySet):
         :param user: User object or user_id
         """
         username = self.get_username(user)
-        filters = ApplicationPermission().gen_user_app_filters(username)
+        # 缓存权限中心生成的过滤条件，避免每次查询都请求权限中心
+        cached, filters = get_cached_user_app_filters(username, AppAction.VIEW_BASIC_INFO)
+        if not cached:
+            filters = ApplicationPermission().gen_user_app_filters(username)
+            set_cached_user_app_filters(username, AppAction.VIEW_BASIC_INFO, filters)
+
         if not filters:
             return self.none()
-
         return self.filter(filters)
 
     def search_by_code_or_name(self, search_term):
@@ -29,6 +29,7 @@ from bkpaas_auth.models import user_id_encoder
 from django.conf import settings
 from django.db import IntegrityError as DbIntegrityError
 from django.db import transaction
+from django.db.models import Count, Exists, OuterRef
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy as _
 from drf_yasg.utils import swagger_auto_schema
@@ -41,6 +42,7 @@ from rest_framework.views import APIView
 from paas_wl.cluster.constants import ClusterFeatureFlag
 from paas_wl.cluster.shim import RegionClusterService
 from paas_wl.cluster.utils import get_cluster_by_app
+from paas_wl.platform.applications.identity import get_wl_apps
 from paas_wl.workloads.images.models import AppUserCredential
 from paasng.accessories.bk_lesscode.client import make_bk_lesscode_client
 from paasng.accessories.bk_lesscode.exceptions import LessCodeApiError, LessCodeGatewayServiceError
@@ -111,7 +113,7 @@ from paasng.platform.modules.manager import init_module_in_view
 from paasng.platform.modules.protections import ModuleDeletionPreparer
 from paasng.platform.oauth2.utils import get_oauth2_client_secret
 from paasng.platform.region.models import get_all_regions
-from paasng.publish.entrance.exposer import get_exposed_links
+from paasng.publish.entrance.exposer import get_bulk_exposed_links
 from paasng.publish.market.constant import AppState, ProductSourceUrlType
 from paasng.publish.market.models import MarketConfig, Product
 from paasng.publish.sync_market.managers import AppDeveloperManger
@@ -159,21 +161,31 @@ class ApplicationViewSet(viewsets.ViewSet):
         if not settings.DISPLAY_BK_PLUGIN_APPS:
             applications = applications.exclude(type=ApplicationType.BK_PLUGIN)
 
-        paginator = ApplicationListPagination()
-        # 如果将用户标记的应用排在前面，需要特殊处理一下
+        # 统计普通应用、云原生应用、外链应用的数量
+        type_counts = dict(applications.order_by().values_list('type').annotate(count=Count('id')))
+        default_app_count = sum(type_counts.get(t.value, 0) for t in ApplicationType.normal_app_type())
+        engineless_app_count = type_counts.get(ApplicationType.ENGINELESS_APP.value, 0)
+        cloud_native_app_count = type_counts.get(ApplicationType.CLOUD_NATIVE.value, 0)
+
+        # 如果将用户标记的应用排在前面，需要在原有排序的基础上优先按是否标记排序
         if params.get('prefer_marked'):
-            applications_ids = applications.values_list('id', flat=True)
-            applications_ids = sorted(applications_ids, key=lambda x: x in marked_application_ids, reverse=True)
+            applications = applications.annotate(
+                is_marked=Exists(marked_applications.filter(application=OuterRef('pk')))
+            ).order_by('-is_marked', *applications.query.order_by)
 
-            page = paginator.paginate_queryset(applications_ids, self.request, view=self)
-            page_applications = list(Application.objects.filter(id__in=page).select_related('product'))
-            page_applications = sorted(page_applications, key=lambda x: applications_ids.index(x.id))
-        else:
-            page_applications = paginator.paginate_queryset(applications, self.request, view=self)
+        paginator = ApplicationListPagination()
+        page_applications = paginator.paginate_queryset(
+            applications.select_related('product', 'market_config'), self.request, view=self
+        )
+
+        # 预先批量加载所有环境的 WlApp, 供后续的序列化过程使用
+        page_envs = ApplicationEnvironment.objects.filter(application__in=page_applications)
+        get_wl_apps((env.engine_app.region, env.engine_app.name) for env in page_envs.select_related('engine_app'))
 
         # Set exposed links property, to be used by the serializer later
+        exposed_links = get_bulk_exposed_links(page_applications)
         for app in page_applications:
-            app._deploy_info = get_exposed_links(app)
+            app._deploy_info = exposed_links[app.id]
         data = [
             {
                 'application': application,
@@ -185,11 +197,6 @@ class ApplicationViewSet(viewsets.ViewSet):
             for application in page_applications
         ]
 
-        # 统计普通应用、云原生应用、外链应用的数量
-        default_app_count = applications.filter(type__in=ApplicationType.normal_app_type()).count()
-        engineless_app_count = applications.filter(type=ApplicationType.ENGINELESS_APP).count()
-        cloud_native_app_count = applications.filter(type=ApplicationType.CLOUD_NATIVE).count()
-
         serializer = slzs.ApplicationWithMarketSLZ(data, many=True)
         return paginator.get_paginated_response(
             serializer.data,
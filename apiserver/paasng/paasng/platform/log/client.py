@@ -16,18 +16,32 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
+import datetime
+import hashlib
+import logging
+import threading
 from operator import attrgetter
-from typing import Dict, List, Optional, Protocol, Tuple, Union
+from typing import Dict, Generator, List, Optional, Protocol, Tuple, Union
 
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.translation import gettext_lazy as _
 from elasticsearch import Elasticsearch
+from elasticsearch.exceptions import TransportError
 from elasticsearch.helpers import ScanError
+from elasticsearch_dsl import Search
 from elasticsearch_dsl.aggs import DateHistogram
 from elasticsearch_dsl.response import AggResponse, Response
 from elasticsearch_dsl.response.aggs import FieldBucketData
 
-from paasng.platform.log.constants import DEFAULT_LOG_BATCH_SIZE
+from paasng.metrics import ES_LOG_QUERY_CACHE_COUNTER
+from paasng.platform.log.constants import (
+    DEFAULT_LOG_BATCH_SIZE,
+    ES_INDEXES_CACHE_TIMEOUT,
+    ES_MAPPINGS_CACHE_TIMEOUT,
+    LOG_EXPORT_BATCH_SIZE,
+    LOG_EXPORT_PIT_KEEP_ALIVE,
+)
 from paasng.platform.log.exceptions import LogQueryError, NoIndexError
 from paasng.platform.log.filters import (
     FieldFilter,
@@ -44,6 +58,8 @@ from paasng.pluginscenter.thirdparty.utils import make_client
 from paasng.utils.es_log.misc import filter_indexes_by_time_range
 from paasng.utils.es_log.search import SmartSearch, SmartTimeRange
 
+logger = logging.getLogger(__name__)
+
 
 class LogClientProtocol(Protocol):
     """LogClient protocol, all log search backend should abide this protocol"""
@@ -64,6 +80,14 @@ class LogClientProtocol(Protocol):
     ) -> List[FieldFilter]:
         """Aggregate fields filters"""
 
+    def iter_search(
+        self, index: str, search: SmartSearch, timeout: int, batch_size: int = LOG_EXPORT_BATCH_SIZE
+    ) -> Generator[Response, None, None]:
+        """Iterate all logs matching the search page by page, without keeping a scroll context
+
+        Closing the iterator releases all resources held by the search.
+        """
+
     def get_mappings(self, index: str, time_range: SmartTimeRange, timeout: int) -> dict:
         """query the mappings in es
 
@@ -132,6 +156,28 @@ class BKLogClient:
         filters = count_filters_options_from_logs(list(Response(search.search, resp["data"])), filters)
         return sorted(filters.values(), key=attrgetter("total", "key"), reverse=True)
 
+    def iter_search(
+        self, index: str, search: SmartSearch, timeout: int, batch_size: int = LOG_EXPORT_BATCH_SIZE
+    ) -> Generator[Response, None, None]:
+        """Iterate all logs matching the search page by page, implement with search_after of bk-log"""
+        sorted_search = make_search_after_sortable(search).extra(size=batch_size, from_=0, track_total_hits=False)
+        search_after = None
+        while True:
+            page_search = sorted_search if search_after is None else sorted_search.extra(search_after=search_after)
+            data = {
+                "indices": index,
+                "scenario_id": self.config.scenarioID,
+                "body": page_search.to_dict(),
+            }
+            resp = self._call_api(data, timeout)
+            hits = resp["data"]["hits"]["hits"]
+            if not hits:
+                return
+            yield Response(search.search, resp["data"])
+            if len(hits) < batch_size:
+                return
+            search_after = hits[-1]["sort"]
+
     def get_mappings(self, index: str, time_range: SmartTimeRange, timeout: int) -> dict:
         """query the mappings in es"""
         raise NotImplementedError("TODO: 确认日志平台接口 /esquery_mapping/ 是否可用")
@@ -148,12 +194,31 @@ class BKLogClient:
         return self.client.call(data=data, timeout=timeout)
 
 
+_es_clients: Dict[str, Elasticsearch] = {}
+_es_clients_lock = threading.Lock()
+
+
+def get_es_client(host: ElasticSearchHost) -> Elasticsearch:
+    """Get the ES client of given host, clients are pooled by host to reuse the connections"""
+    key = host.json(exclude_none=True)
+    with _es_clients_lock:
+        client = _es_clients.get(key)
+        if client is None:
+            client = _es_clients[key] = Elasticsearch(hosts=[host.dict(exclude_none=True)])
+    return client
+
+
 class ESLogClient:
-    """ESLogClient is an implement of LogClientProtocol, the log search backend is official elasticsearch"""
+    """ESLogClient is an implement of LogClientProtocol, the log search backend is official elasticsearch
+
+    The resolved indexes and mappings are cached in a short time, so most queries only pay for the search itself.
+    """
 
     def __init__(self, host: ElasticSearchHost):
         self.host = host
-        self._client = Elasticsearch(hosts=[host.dict(exclude_none=True)])
+        self._client = get_es_client(host)
+        host_digest = hashlib.md5(host.json(exclude_none=True).encode()).hexdigest()
+        self._cache_key_prefix = f"bk_paas3:es_log:{host_digest}"
 
     def execute_search(self, index: str, search: SmartSearch, timeout: int) -> Tuple[Response, int]:
         """search log from index with body and params, implement with es client"""
@@ -228,11 +293,56 @@ class ESLogClient:
         # 根据 field 在所有日志记录中出现的次数进行降序排序, 再根据 key 的字母序排序(保证前缀接近的 key 靠近在一起, 例如 json.*)
         return sorted(filters.values(), key=attrgetter("total", "key"), reverse=True)
 
+    def iter_search(
+        self, index: str, search: SmartSearch, timeout: int, batch_size: int = LOG_EXPORT_BATCH_SIZE
+    ) -> Generator[Response, None, None]:
+        """Iterate all logs matching the search page by page, implement with point in time and search_after
+
+        Unlike scroll, the point in time is lightweight and renewed by every page, it's closed when the iteration
+        finishes or the iterator is closed. If point in time is unsupported by ES, fall back to search_after only.
+        """
+        es_index = self._get_indexes(index, search.time_range, timeout)
+        pit_id = self._open_point_in_time(es_index, timeout)
+        sorted_search = make_search_after_sortable(search, with_pit=bool(pit_id)).extra(
+            size=batch_size, from_=0, track_total_hits=False
+        )
+        search_after = None
+        try:
+            while True:
+                page_search = sorted_search if search_after is None else sorted_search.extra(search_after=search_after)
+                body = page_search.to_dict()
+                if pit_id:
+                    # 使用 point in time 查询时不能指定 index
+                    body["pit"] = {"id": pit_id, "keep_alive": LOG_EXPORT_PIT_KEEP_ALIVE}
+                    raw_resp = self._client.search(body=body, params={"request_timeout": timeout})
+                    pit_id = raw_resp.get("pit_id", pit_id)
+                else:
+                    raw_resp = self._client.search(body=body, index=es_index, params={"request_timeout": timeout})
+
+                hits = raw_resp["hits"]["hits"]
+                if not hits:
+                    return
+                yield Response(search.search, raw_resp)
+                if len(hits) < batch_size:
+                    return
+                search_after = hits[-1]["sort"]
+        finally:
+            if pit_id:
+                self._close_point_in_time(pit_id)
+
     def get_mappings(self, index: str, time_range: SmartTimeRange, timeout: int) -> dict:
         """query the mappings in es"""
         # 当前假设同一批次的 index(类似 aa-2021.04.20,aa-2021.04.19) 拥有相同的 mapping, 因此直接获取最新的 mapping
         # 如果同一批次 index mapping 发生变化，可能会导致日志查询为空
         es_index = self._get_indexes(index, time_range, timeout)
+        index_digest = hashlib.md5(",".join(es_index).encode()).hexdigest()
+        cache_key = f"{self._cache_key_prefix}:mappings:{index_digest}"
+        docs_mappings = cache.get(cache_key)
+        if docs_mappings is not None:
+            ES_LOG_QUERY_CACHE_COUNTER.labels(type="mappings", result="hit").inc()
+            return docs_mappings
+
+        ES_LOG_QUERY_CACHE_COUNTER.labels(type="mappings", result="miss").inc()
         all_mappings = self._client.indices.get_mapping(es_index, params={"request_timeout": timeout})
         # 由于手动创建会没有 properties, 需要将无 properties 的 mappings 过滤掉
         all_not_empty_mappings = {
@@ -241,19 +351,15 @@ class ESLogClient:
         if not all_not_empty_mappings:
             raise LogQueryError(_("No mappings available, maybe index does not exist or no logs at all"))
         first_mapping = all_not_empty_mappings[sorted(all_not_empty_mappings, reverse=True)[0]]
-        docs_mappings: Dict = first_mapping["mappings"]["properties"]
+        docs_mappings = first_mapping["mappings"]["properties"]
+        cache.set(cache_key, docs_mappings, ES_MAPPINGS_CACHE_TIMEOUT)
         return docs_mappings
 
     def _get_indexes(self, index: str, time_range: SmartTimeRange, timeout: int) -> List[str]:
         """Get indexes within the time_range range from ES"""
         # 为了避免 ES 会提前创建 index 导致无法查询到 mappings, 需要精准控制使用的 indexes
         # 为了避免 ES indexes 未即时清理, 导致查询的 indexes 范围过大, 需要精准控制使用的 indexes
-        # Note: 使用 stats 接口优化查询性能
-        all_indexes = list(
-            self._client.indices.stats(
-                index, metric="fielddata", params={"request_timeout": timeout, "level": "indices"}
-            )["indices"].keys()
-        )
+        all_indexes = self._get_all_indexes(index, timeout)
         if filtered_indexes := filter_indexes_by_time_range(all_indexes, time_range=time_range):
             return filtered_indexes
         # 当无法匹配到 indexes 时, 实际上也会查询不到日志, 所以无需报错, 只需要返回一部分 index 提供给 ES 查询即可
@@ -261,6 +367,46 @@ class ESLogClient:
             raise NoIndexError
         return sorted(all_indexes)[-10:]
 
+    def _open_point_in_time(self, es_index: List[str], timeout: int) -> Optional[str]:
+        """Open a point in time of indexes, return None if it's unsupported by ES(requires ES 7.10+)"""
+        try:
+            resp = self._client.transport.perform_request(
+                "POST",
+                f"/{','.join(es_index)}/_pit",
+                params={"keep_alive": LOG_EXPORT_PIT_KEEP_ALIVE, "request_timeout": timeout},
+            )
+        except TransportError as e:
+            logger.warning("failed to open point in time, fall back to search_after only: %s", e)
+            return None
+        return resp["id"]
+
+    def _close_point_in_time(self, pit_id: str):
+        try:
+            self._client.transport.perform_request("DELETE", "/_pit", body={"id": pit_id})
+        except TransportError:
+            # point in time 会在 keep_alive 后自动释放, 关闭失败无需报错
+            logger.warning("failed to close point in time")
+
+    def _get_all_indexes(self, index: str, timeout: int) -> List[str]:
+        """Get all indexes matching the index pattern from ES, the result is cached in a short time"""
+        # 索引按天滚动创建, 因此缓存 key 中包含当天的日期, 跨天后将重新查询
+        cache_key = f"{self._cache_key_prefix}:indexes:{index}:{datetime.date.today().isoformat()}"
+        all_indexes = cache.get(cache_key)
+        if all_indexes is not None:
+            ES_LOG_QUERY_CACHE_COUNTER.labels(type="indexes", result="hit").inc()
+            return all_indexes
+
+        ES_LOG_QUERY_CACHE_COUNTER.labels(type="indexes", result="miss").inc()
+        # Note: 使用 stats 接口优化查询性能
+        all_indexes = list(
+            self._client.indices.stats(
+                index, metric="fielddata", params={"request_timeout": timeout, "level": "indices"}
+            )["indices"].keys()
+        )
+        if all_indexes:
+            cache.set(cache_key, all_indexes, ES_INDEXES_CACHE_TIMEOUT)
+        return all_indexes
+
     def _get_response_count(
         self, index: Union[str, List[str]], search: SmartSearch, timeout: int, response: Response
     ) -> int:
@@ -272,6 +418,17 @@ class ESLogClient:
         ]
 
 
+def make_search_after_sortable(search: SmartSearch, with_pit: bool = False) -> Search:
+    """Add a tiebreaker to the sort of search, so that the search can be paginated by search_after
+
+    :param with_pit: whether search with point in time, ES adds `_shard_doc` as tiebreaker implicitly for it
+    """
+    if with_pit:
+        return search.search
+    sort_keys = search.to_dict().get("sort", [])
+    return search.search.sort(*sort_keys, "_doc")
+
+
 def instantiate_log_client(log_config: ElasticSearchConfig, bk_username: str) -> LogClientProtocol:
     """实例化 log client 实例"""
     if log_config.backend_type == "bkLog":
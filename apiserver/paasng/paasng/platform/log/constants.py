@@ -22,6 +22,25 @@ from blue_krill.data_types.enum import EnumField, StructuredEnum
 DEFAULT_LOG_CONFIG_PLACEHOLDER = "-"
 # 默认查询日志的分片大小
 DEFAULT_LOG_BATCH_SIZE = 200
+# ES 索引列表的缓存时间（秒）, 索引按天滚动创建, 缓存 key 中也包含了当天的日期
+ES_INDEXES_CACHE_TIMEOUT = 60
+# ES mappings 的缓存时间（秒）
+ES_MAPPINGS_CACHE_TIMEOUT = 300
+# 流式导出日志时, 每批次从 ES 拉取的日志条数
+LOG_EXPORT_BATCH_SIZE = 1000
+# 流式导出日志时, ES point in time 的保持时间, 每次拉取都会续期
+LOG_EXPORT_PIT_KEEP_ALIVE = "1m"
+
+# 实时日志(tail): 拉取新日志的间隔(秒)
+LOG_TAIL_POLL_INTERVAL = 2
+# 实时日志(tail): 单次拉取的最大日志条数
+LOG_TAIL_BATCH_SIZE = 500
+# 实时日志(tail): 开始订阅时返回的最近日志条数, 也是缓存的最近日志条数
+LOG_TAIL_BACKLOG_SIZE = 100
+# 实时日志(tail): 持续多久(秒)没有新日志时自动停止
+LOG_TAIL_IDLE_TIMEOUT = 5 * 60
+# 实时日志(tail): 单次订阅的最长时间(秒)
+LOG_TAIL_MAX_DURATION = 30 * 60
 
 
 class LogTimeChoices(str, StructuredEnum):
@@ -48,6 +67,13 @@ class LogType(str, StructuredEnum):
     INGRESS = EnumField("INGRESS", label="接入层日志")
 
 
+class LogExportFormat(str, StructuredEnum):
+    """日志导出格式"""
+
+    NDJSON = EnumField("ndjson", label="NDJSON")
+    CSV = EnumField("csv", label="CSV(gzip 压缩)")
+
+
 class LogCollectorType(str, StructuredEnum):
     """日志采集器类型"""
 
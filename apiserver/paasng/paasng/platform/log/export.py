@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+"""Stream logs as downloadable files"""
+import csv
+import io
+import json
+import zlib
+from typing import Any, Dict, Generator, Iterator, List, Type
+
+from attrs import fields
+
+from paasng.platform.log.constants import LogExportFormat
+from paasng.utils.es_log.models import LogLine
+
+
+class LogExporter:
+    """Render pages of log lines to file content chunks, memory usage is bounded by the size of one page
+
+    :param line_model: the log line model, its fields become the columns(CSV) or keys(NDJSON)
+    :param export_format: the format of exported file, CSV content is gzip compressed
+    :param max_rows: the max number of exported lines, lines beyond the limit are dropped
+    """
+
+    def __init__(self, line_model: Type[LogLine], export_format: LogExportFormat, max_rows: int):
+        self.export_format = export_format
+        self.max_rows = max_rows
+        self.fields = [f.name for f in fields(line_model) if f.name != "raw"]
+
+    @property
+    def content_type(self) -> str:
+        if self.export_format == LogExportFormat.CSV:
+            return "application/gzip"
+        return "application/x-ndjson"
+
+    @property
+    def file_extension(self) -> str:
+        if self.export_format == LogExportFormat.CSV:
+            return "csv.gz"
+        return "ndjson"
+
+    def iter_chunks(self, pages: Iterator[List[LogLine]]) -> Generator[bytes, None, None]:
+        """Iterate the file content chunks, one chunk for each page
+
+        The pages iterator is closed when the rows limit is reached or the chunks iterator is closed,
+        e.g. when the client disconnects from a streaming response.
+        """
+        compressor = None
+        if self.export_format == LogExportFormat.CSV:
+            # wbits > 16 makes zlib write the gzip header and trailer
+            compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+
+        rows = 0
+        try:
+            if compressor:
+                yield compressor.compress(self._render_csv_header())
+
+            for lines in pages:
+                lines = lines[: self.max_rows - rows]
+                rows += len(lines)
+                chunk = self._render_csv(lines) if compressor else self._render_ndjson(lines)
+                if compressor:
+                    chunk = compressor.compress(chunk)
+                if chunk:
+                    yield chunk
+                if rows >= self.max_rows:
+                    break
+
+            if compressor:
+                yield compressor.flush()
+        finally:
+            close = getattr(pages, "close", None)
+            if close:
+                close()
+
+    def _render_ndjson(self, lines: List[LogLine]) -> bytes:
+        return "".join(
+            json.dumps({**self._to_dict(line), "raw": line.raw}, ensure_ascii=False, default=str) + "\n"
+            for line in lines
+        ).encode()
+
+    def _render_csv_header(self) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(self.fields)
+        return buffer.getvalue().encode()
+
+    def _render_csv(self, lines: List[LogLine]) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.fields)
+        writer.writerows(self._to_dict(line) for line in lines)
+        return buffer.getvalue().encode()
+
+    def _to_dict(self, line: LogLine) -> Dict[str, Any]:
+        return {name: getattr(line, name) for name in self.fields}
@@ -18,19 +18,18 @@ to the current version of the project delivered to anyone in the future.
 """
 import json
 import logging
-from collections import defaultdict
 from functools import reduce
 from operator import add
-from typing import Counter, Dict, List, Optional
+from typing import Dict, List, Optional
 
 import jinja2
 from elasticsearch_dsl.aggs import Terms
-from rest_framework.fields import get_attribute
 
 from paasng.platform.applications.models import ModuleEnvironment
 from paasng.platform.log.models import ElasticSearchParams
 from paasng.platform.log.utils import get_es_term
 from paasng.platform.modules.models import Module
+from paasng.utils.es_log.misc import count_fields_values
 from paasng.utils.es_log.models import FieldFilter
 from paasng.utils.es_log.search import SmartSearch
 from paasng.utils.text import calculate_percentage
@@ -109,18 +108,7 @@ def count_filters_options_from_logs(logs: List, properties: Dict[str, FieldFilte
     :param properties: 需要统计的ES 字段
     """
     # 在内存中统计 filters 的可选值
-    field_counter: Dict[str, Counter] = defaultdict(Counter)
-    log_fields = [(f, f.split(".")) for f in properties.keys()]
-    for log in logs:
-        for log_field, split_log_field in log_fields:
-            try:
-                value = get_attribute(log, split_log_field)
-            except (AttributeError, KeyError):
-                continue
-            try:
-                field_counter[log_field][value] += 1
-            except TypeError:
-                logger.warning("Field<%s> got an unhashable value: %s", log_field, value)
+    field_counter = count_fields_values(logs, properties.keys())
 
     result = {}
     for title, values in field_counter.items():
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+"""Benchmark the counting of log filter options
+
+The legacy implementation looks up every (log, field) pair with DRF's `get_attribute`, it's kept here as the
+reference to check that `count_fields_values` produces the same result.
+"""
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List
+
+from django.core.management.base import BaseCommand
+from elasticsearch_dsl.utils import AttrDict
+from rest_framework.fields import get_attribute
+
+from paasng.utils.es_log.misc import count_fields_values
+
+
+def legacy_count_fields_values(logs: List, fields: List[str]) -> Dict[str, Counter]:
+    field_counter: Dict[str, Counter] = defaultdict(Counter)
+    log_fields = [(f, f.split(".")) for f in fields]
+    for log in logs:
+        for log_field, split_log_field in log_fields:
+            try:
+                value = get_attribute(log, split_log_field)
+            except (AttributeError, KeyError):
+                continue
+            try:
+                field_counter[log_field][value] += 1
+            except TypeError:
+                pass
+    return field_counter
+
+
+def make_logs(logs_count: int, json_fields_count: int, seed: int = 0) -> List[Dict]:
+    """Make logs with a few common fields and many JSON sub-fields, each log contains part of the sub-fields"""
+    rand = random.Random(seed)
+    logs = []
+    for i in range(logs_count):
+        json_fields = {
+            f"field_{n}": rand.choice(["foo", "bar", "baz", n, None])
+            for n in range(json_fields_count)
+            if rand.random() < 0.8
+        }
+        logs.append(
+            {
+                "environment": rand.choice(["stag", "prod"]),
+                "process_id": rand.choice(["web", "worker"]),
+                "stream": rand.choice(["stdout", "stderr"]),
+                "message": f"message {i}",
+                "json": {"levelname": rand.choice(["INFO", "ERROR"]), "extra": json_fields},
+            }
+        )
+    return logs
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the counting of log filter options, compare with the legacy implementation'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logs", dest="logs", type=int, default=200, help="Number of sampled logs.")
+        parser.add_argument("--fields", dest="fields", type=int, default=300, help="Number of JSON sub-fields.")
+        parser.add_argument("--rounds", dest="rounds", type=int, default=20, help="Number of rounds to run.")
+        parser.add_argument(
+            "--as-hits",
+            dest="as_hits",
+            action="store_true",
+            help="Wrap logs in AttrDict like ES hits, instead of using plain dicts.",
+        )
+
+    def handle(self, logs, fields, rounds, as_hits, *args, **options):
+        samples: List = make_logs(logs, fields)
+        if as_hits:
+            samples = [AttrDict(log) for log in samples]
+        declared_fields = ["environment", "process_id", "stream", "json.levelname"] + [
+            f"json.extra.field_{n}" for n in range(fields)
+        ]
+
+        legacy_result = legacy_count_fields_values(samples, declared_fields)
+        result = count_fields_values(samples, declared_fields)
+        if list(legacy_result.items()) != list(result.items()):
+            self.stderr.write(self.style.ERROR("Results differ from the legacy implementation"))
+            return
+
+        legacy_cost = self._timeit(lambda: legacy_count_fields_values(samples, declared_fields), rounds)
+        cost = self._timeit(lambda: count_fields_values(samples, declared_fields), rounds)
+        self.stdout.write(f"{logs} logs, {len(declared_fields)} declared fields, {rounds} rounds")
+        self.stdout.write(f"legacy get_attribute: {legacy_cost * 1000:.1f}ms per call")
+        self.stdout.write(f"count_fields_values: {cost * 1000:.1f}ms per call")
+        self.stdout.write(self.style.SUCCESS(f"Results are identical, speedup: {legacy_cost / cost:.1f}x"))
+
+    @staticmethod
+    def _timeit(func: Callable, rounds: int) -> float:
+        """Return the average seconds of each call"""
+        start = time.perf_counter()
+        for _ in range(rounds):
+            func()
+        return (time.perf_counter() - start) / rounds
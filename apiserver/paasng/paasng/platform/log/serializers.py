@@ -16,12 +16,13 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
+from django.conf import settings
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from paasng.utils.es_log.time_range import SmartTimeRange
 
-from .constants import LogTimeChoices
+from .constants import LogExportFormat, LogTimeChoices
 
 
 class StandardOutputLogLineSLZ(serializers.Serializer):
@@ -139,6 +140,18 @@ class LogQueryParamsSLZ(serializers.Serializer):
         return attrs
 
 
+class LogExportParamsSLZ(LogQueryParamsSLZ):
+    """导出日志的 query 参数"""
+
+    format = serializers.ChoiceField(
+        choices=LogExportFormat.get_choices(), default=LogExportFormat.NDJSON, help_text="导出格式"
+    )
+    max_rows = serializers.IntegerField(min_value=1, required=False, help_text="最大导出行数, 不能超过平台的限制")
+
+    def validate_max_rows(self, max_rows: int) -> int:
+        return min(max_rows, settings.LOG_EXPORT_MAX_ROWS)
+
+
 class LogQueryDSLSLZ(serializers.Serializer):
     """查询日志的 DSL 参数"""
 
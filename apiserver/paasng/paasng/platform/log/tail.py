@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+"""Tail logs in real time
+
+Viewers of the same env and filters subscribe to one tail channel, the channel keeps the recently fetched
+logs in a redis stream. Only one of the viewers(who holds the poller lock) polls the log backend for newer logs
+and appends them to the stream, all viewers read logs from the stream, so the upstream poll is shared.
+"""
+import json
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Generator, List, Optional, Union
+
+import redis
+
+from paasng.engine.workflow import ServerSendEvent
+from paasng.platform.log.constants import (
+    LOG_TAIL_BACKLOG_SIZE,
+    LOG_TAIL_IDLE_TIMEOUT,
+    LOG_TAIL_MAX_DURATION,
+    LOG_TAIL_POLL_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TailCursor:
+    """The position of the latest fetched log
+
+    :param timestamp: the sort value of time field of the latest log
+    :param ids: ids of the fetched logs at `timestamp`, logs with same timestamp may arrive in different polls
+    """
+
+    timestamp: Any
+    ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class TailRecord:
+    """A log fetched by tail
+
+    :param timestamp: the sort value of time field
+    :param id: the document id
+    :param data: the serialized log line
+    """
+
+    timestamp: Any
+    id: str
+    data: Dict
+
+
+# A function fetches logs newer than the cursor(including logs at cursor.timestamp), in ascending order.
+# When cursor is None, fetch the latest logs.
+TailFetcher = Callable[[Optional[TailCursor]], List[TailRecord]]
+
+
+class LogTailChannel:
+    """A tail channel shared by all viewers of the same logs
+
+    :param redis_db: redis client
+    :param key: the unique key of the tailed logs, such as the digest of env and filters
+    """
+
+    poll_interval: float = LOG_TAIL_POLL_INTERVAL
+    idle_timeout = LOG_TAIL_IDLE_TIMEOUT
+    max_duration = LOG_TAIL_MAX_DURATION
+    backlog_size = LOG_TAIL_BACKLOG_SIZE
+
+    def __init__(self, redis_db: redis.Redis, key: str):
+        self.redis_db = redis_db
+        self.stream_key = f"bk_paas3:log_tail:{key}:stream"
+        self.cursor_key = f"bk_paas3:log_tail:{key}:cursor"
+        self.poller_key = f"bk_paas3:log_tail:{key}:poller"
+
+    def iter_events(self, fetch: TailFetcher) -> Generator[str, None, None]:
+        """Iterate the SSE messages of logs, starts with the recent logs, stops when no new logs for a while
+
+        Close the iterator to unsubscribe, e.g. when the client disconnects from a streaming response.
+        """
+        token = uuid.uuid4().hex
+        started_at = last_active_at = time.monotonic()
+        next_poll_at = 0.0
+        last_id = "0-0"
+        try:
+            for entry_id, fields in reversed(self.redis_db.xrevrange(self.stream_key, count=self.backlog_size)):
+                last_id = entry_id
+                yield from self._make_event(entry_id, fields)
+
+            while True:
+                now = time.monotonic()
+                if now >= next_poll_at and self._acquire_poller(token):
+                    next_poll_at = now + self.poll_interval
+                    try:
+                        self.poll(fetch)
+                    except Exception:
+                        logger.exception("failed to poll logs for tail channel")
+
+                entries = self.redis_db.xread(
+                    {self.stream_key: last_id}, count=self.backlog_size, block=int(self.poll_interval * 1000)
+                )
+                if entries:
+                    last_active_at = time.monotonic()
+                    for entry_id, fields in entries[0][1]:
+                        last_id = entry_id
+                        yield from self._make_event(entry_id, fields)
+                else:
+                    # Heartbeat, also detects the disconnected clients
+                    yield ": heartbeat\n\n"
+
+                now = time.monotonic()
+                if now - last_active_at >= self.idle_timeout or now - started_at >= self.max_duration:
+                    yield from ServerSendEvent.to_eof_str_list()
+                    return
+        finally:
+            self._release_poller(token)
+
+    def poll(self, fetch: TailFetcher):
+        """Fetch the logs newer than the cursor and append them to the stream"""
+        cursor = self._get_cursor()
+        records = fetch(cursor)
+        if not records:
+            return
+
+        seen_ids = set(cursor.ids) if cursor else set()
+        new_records = [r for r in records if not (cursor and r.timestamp == cursor.timestamp and r.id in seen_ids)]
+
+        latest_timestamp = records[-1].timestamp
+        latest_ids = [r.id for r in records if r.timestamp == latest_timestamp]
+        if cursor and cursor.timestamp == latest_timestamp:
+            latest_ids = list(dict.fromkeys(cursor.ids + latest_ids))
+        new_cursor = TailCursor(timestamp=latest_timestamp, ids=latest_ids)
+
+        pipe = self.redis_db.pipeline(transaction=False)
+        for record in new_records:
+            pipe.xadd(self.stream_key, {"data": json.dumps(record.data)}, maxlen=self.backlog_size * 10)
+        pipe.set(self.cursor_key, json.dumps(asdict(new_cursor)), ex=self.idle_timeout)
+        pipe.expire(self.stream_key, self.idle_timeout)
+        pipe.execute()
+
+    def _get_cursor(self) -> Optional[TailCursor]:
+        raw = self.redis_db.get(self.cursor_key)
+        if not raw:
+            return None
+        return TailCursor(**json.loads(raw))
+
+    def _acquire_poller(self, token: str) -> bool:
+        """Acquire or renew the poller lock, the lock expires if the poller stops polling"""
+        ttl = int(self.poll_interval * 3 * 1000)
+        if self.redis_db.set(self.poller_key, token, nx=True, px=ttl):
+            return True
+        if self._get_poller() == token:
+            self.redis_db.pexpire(self.poller_key, ttl)
+            return True
+        return False
+
+    def _release_poller(self, token: str):
+        if self._get_poller() == token:
+            self.redis_db.delete(self.poller_key)
+
+    def _get_poller(self) -> Optional[str]:
+        value = self.redis_db.get(self.poller_key)
+        return None if value is None else _to_str(value)
+
+    @staticmethod
+    def _make_event(entry_id, fields: Dict) -> List[str]:
+        data = fields.get(b"data") or fields.get("data") or ""
+        return ServerSendEvent(id=_to_str(entry_id), event="message", data=_to_str(data)).to_yield_str_list()
+
+
+def _to_str(value: Union[str, bytes]) -> str:
+    if isinstance(value, bytes):
+        return value.decode()
+    return value
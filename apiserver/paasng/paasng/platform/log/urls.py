@@ -40,6 +40,16 @@ urlpatterns = [
         views.StructuredLogAPIView.as_view({"post": "aggregate_fields_filters"}),
         name='api.logs.structured.aggregate_fields_filters',
     ),
+    re_path(
+        make_app_pattern(r'/log/structured/export/$'),
+        views.StructuredLogAPIView.as_view({"post": "export_logs"}),
+        name='api.logs.structured.export_logs',
+    ),
+    re_path(
+        make_app_pattern(r'/log/structured/tail/$'),
+        views.StructuredLogAPIView.as_view({"get": "tail_logs", "post": "tail_logs"}),
+        name='api.logs.structured.tail_logs',
+    ),
     # 标准输出日志
     re_path(
         make_app_pattern(r'/log/stdout/list/$'),
@@ -51,6 +61,16 @@ urlpatterns = [
         views.StdoutLogAPIView.as_view({"post": "aggregate_fields_filters"}),
         name='api.logs.stdout.aggregate_fields_filters',
     ),
+    re_path(
+        make_app_pattern(r'/log/stdout/export/$'),
+        views.StdoutLogAPIView.as_view({"post": "export_logs"}),
+        name='api.logs.stdout.export_logs',
+    ),
+    re_path(
+        make_app_pattern(r'/log/stdout/tail/$'),
+        views.StdoutLogAPIView.as_view({"get": "tail_logs", "post": "tail_logs"}),
+        name='api.logs.stdout.tail_logs',
+    ),
     # Ingress 日志
     re_path(
         make_app_pattern(r'/log/ingress/list/$'),
@@ -67,6 +87,16 @@ urlpatterns = [
         views.IngressLogAPIView.as_view({"post": "aggregate_fields_filters"}),
         name='api.logs.ingress.aggregate_fields_filters',
     ),
+    re_path(
+        make_app_pattern(r'/log/ingress/export/$'),
+        views.IngressLogAPIView.as_view({"post": "export_logs"}),
+        name='api.logs.ingress.export_logs',
+    ),
+    re_path(
+        make_app_pattern(r'/log/ingress/tail/$'),
+        views.IngressLogAPIView.as_view({"get": "tail_logs", "post": "tail_logs"}),
+        name='api.logs.ingress.tail_logs',
+    ),
     # 模块维度下的日志搜索
     re_path(
         make_app_pattern(r'/log/structured/list/$', include_envs=False),
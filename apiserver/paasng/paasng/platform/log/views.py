@@ -16,18 +16,22 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
+import hashlib
+import itertools
 import json
 import logging
 import re
 from functools import wraps
-from typing import TYPE_CHECKING, ClassVar, List, Optional, Tuple, Type
+from typing import TYPE_CHECKING, ClassVar, Generator, Iterator, List, Optional, Tuple, Type
 
 import cattr
 from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.utils.translation import gettext as _
 from drf_yasg.utils import swagger_auto_schema
 from elasticsearch.exceptions import RequestError
 from elasticsearch.helpers import ScanError
+from elasticsearch_dsl.response import Response as EsResponse
 from pydantic import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -40,21 +44,25 @@ from paasng.accounts.permissions.constants import SiteAction
 from paasng.accounts.permissions.global_site import site_perm_required
 from paasng.platform.applications.mixins import ApplicationCodeInPathMixin
 from paasng.platform.applications.models import ModuleEnvironment
+from paasng.platform.core.storages.redisdb import get_default_redis
 from paasng.platform.log import serializers
 from paasng.platform.log.client import instantiate_log_client
-from paasng.platform.log.constants import DEFAULT_LOG_BATCH_SIZE, LogType
+from paasng.platform.log.constants import DEFAULT_LOG_BATCH_SIZE, LOG_TAIL_BACKLOG_SIZE, LOG_TAIL_BATCH_SIZE, LogType
 from paasng.platform.log.dsl import SearchRequestSchema
 from paasng.platform.log.exceptions import NoIndexError
+from paasng.platform.log.export import LogExporter
 from paasng.platform.log.filters import EnvFilter, ModuleFilter
 from paasng.platform.log.models import ElasticSearchParams, ProcessLogQueryConfig
 from paasng.platform.log.responses import IngressLogLine, StandardOutputLogLine, StructureLogLine
 from paasng.platform.log.shim import setup_env_log_model
+from paasng.platform.log.tail import LogTailChannel, TailCursor, TailRecord
 from paasng.platform.log.utils import clean_logs, parse_request_to_es_dsl
 from paasng.utils.error_codes import error_codes
 from paasng.utils.es_log.misc import clean_histogram_buckets
 from paasng.utils.es_log.models import DateHistogram, Logs
 from paasng.utils.es_log.search import SmartSearch
 from paasng.utils.es_log.time_range import SmartTimeRange
+from paasng.utils.views import EventStreamRender
 
 logger = logging.getLogger(__name__)
 
@@ -175,6 +183,7 @@ class LogBaseAPIView(ViewSet, ApplicationCodeInPathMixin):
 
 class LogAPIView(LogBaseAPIView):
     line_model: ClassVar[Type]
+    line_serializer_class: ClassVar[Type[Serializer]]
     logs_serializer_class: ClassVar[Type[Serializer]]
 
     @swagger_auto_schema(
@@ -263,6 +272,130 @@ class LogAPIView(LogBaseAPIView):
         )
         return Response(data=self.logs_serializer_class(logs).data)
 
+    @swagger_auto_schema(
+        query_serializer=serializers.LogExportParamsSLZ,
+        request_body=serializers.LogQueryBodySLZ,
+    )
+    @transform_noindex_error
+    def export_logs(self, request, code, module_name, environment):
+        """流式导出日志, 用于拉取大量日志, 超出最大行数的日志将被忽略"""
+        slz = serializers.LogExportParamsSLZ(data=request.query_params)
+        slz.is_valid(raise_exception=True)
+        params = slz.validated_data
+
+        log_client, log_config = self.instantiate_log_client()
+        search = self.make_search(
+            mappings=log_client.get_mappings(
+                log_config.search_params.indexPattern,
+                time_range=self.parse_time_range(),
+                timeout=settings.DEFAULT_ES_SEARCH_TIMEOUT,
+            ),
+            time_field=log_config.search_params.timeField,
+        )
+        responses = log_client.iter_search(
+            index=log_config.search_params.indexPattern, search=search, timeout=settings.DEFAULT_ES_SEARCH_TIMEOUT
+        )
+
+        # 先查询第一页, 以便在开始返回数据前就能报告查询条件错误等异常
+        try:
+            first_response = next(responses, None)
+        except RequestError:
+            raise error_codes.QUERY_REQUEST_ERROR
+        except Exception:
+            logger.exception("failed to export logs")
+            raise error_codes.QUERY_LOG_FAILED.f(_('日志查询失败，请稍后再试。'))
+
+        exporter = LogExporter(self.line_model, params["format"], params.get("max_rows", settings.LOG_EXPORT_MAX_ROWS))
+        pages = self._iter_lines_pages(first_response, responses, log_config.search_params)
+        # 客户端断开连接时, 服务器会关闭响应, 进而关闭迭代器并释放 ES 的查询资源
+        response = StreamingHttpResponse(exporter.iter_chunks(pages), content_type=exporter.content_type)
+        filename = f"{code}-{module_name}-{environment}-{self.log_type.value.lower()}.{exporter.file_extension}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    @swagger_auto_schema(
+        query_serializer=serializers.LogQueryParamsSLZ,
+        request_body=serializers.LogQueryBodySLZ,
+    )
+    @transform_noindex_error
+    def tail_logs(self, request, code, module_name, environment):
+        """实时日志: 以 SSE 的形式持续推送新日志, 长时间无新日志时自动停止
+
+        查看相同环境, 相同过滤条件的日志的用户共享同一个日志拉取任务
+        """
+        log_client, log_config = self.instantiate_log_client()
+        search_params = log_config.search_params
+        time_field = search_params.timeField
+        mappings = log_client.get_mappings(
+            search_params.indexPattern, time_range=self.parse_time_range(), timeout=settings.DEFAULT_ES_SEARCH_TIMEOUT
+        )
+
+        def fetch(cursor: Optional[TailCursor]) -> List[TailRecord]:
+            search = self.make_search(mappings=mappings, time_field=time_field)
+            if cursor is None:
+                search = search.sort({time_field: {"order": "desc"}}).limit_offset(LOG_TAIL_BACKLOG_SIZE, 0)
+            else:
+                search = (
+                    search.filter("range", **{time_field: {"gte": cursor.timestamp}})
+                    .sort({time_field: {"order": "asc"}})
+                    .limit_offset(LOG_TAIL_BATCH_SIZE, 0)
+                )
+            response, _ = log_client.execute_search(
+                index=search_params.indexPattern, search=search, timeout=settings.DEFAULT_ES_SEARCH_TIMEOUT
+            )
+            hits = list(response)
+            records = [
+                TailRecord(
+                    timestamp=hit.meta.sort[0],
+                    id=hit.meta.id,
+                    data=self.line_serializer_class(cattr.structure(log, self.line_model)).data,
+                )
+                for hit, log in zip(hits, clean_logs(hits, search_params))
+            ]
+            # 首次拉取的是最新的日志(倒序), 需要转换成正序
+            return records if cursor else records[::-1]
+
+        tail_key = hashlib.md5(
+            json.dumps(
+                {
+                    "env": self.get_env_via_path().pk,
+                    "log_type": self.log_type.value,
+                    # 时间范围等参数位于 query string 中, 也需要区分
+                    "params": dict(request.query_params.lists()),
+                    "query": request.data,
+                },
+                sort_keys=True,
+            ).encode()
+        ).hexdigest()
+        channel = LogTailChannel(get_default_redis(), tail_key)
+        # 客户端断开连接时, 服务器会关闭响应, 进而关闭迭代器并退出拉取
+        return StreamingHttpResponse(channel.iter_events(fetch), content_type='text/event-stream')
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.action == "tail_logs":
+            renderers.append(EventStreamRender())
+        return renderers
+
+    def _iter_lines_pages(
+        self,
+        first_response: Optional[EsResponse],
+        responses: Generator[EsResponse, None, None],
+        search_params: ElasticSearchParams,
+    ) -> Iterator[List]:
+        """Convert ES responses to pages of log lines"""
+        try:
+            if first_response is None:
+                return
+            for response in itertools.chain([first_response], responses):
+                yield [cattr.structure(log, self.line_model) for log in clean_logs(list(response), search_params)]
+        except Exception:
+            # 数据已经开始返回, 无法再返回错误信息, 继续抛出异常以中断响应, 避免客户端将不完整的文件当作导出成功
+            logger.exception("failed to export logs")
+            raise
+        finally:
+            responses.close()
+
     @swagger_auto_schema(
         query_serializer=serializers.LogQueryParamsSLZ,
         request_body=serializers.LogQueryBodySLZ,
@@ -325,18 +458,21 @@ class LogAPIView(LogBaseAPIView):
 class StdoutLogAPIView(LogAPIView):
     line_model = StandardOutputLogLine
     log_type = LogType.STANDARD_OUTPUT
+    line_serializer_class = serializers.StandardOutputLogLineSLZ
     logs_serializer_class = serializers.StandardOutputLogsSLZ
 
 
 class StructuredLogAPIView(LogAPIView):
     line_model = StructureLogLine
     log_type = LogType.STRUCTURED
+    line_serializer_class = serializers.StructureLogLineSLZ
     logs_serializer_class = serializers.StructureLogsSLZ
 
 
 class IngressLogAPIView(LogAPIView):
     line_model = IngressLogLine
     log_type = LogType.INGRESS
+    line_serializer_class = serializers.IngressLogLineSLZ
     logs_serializer_class = serializers.IngressLogSLZ
 
 
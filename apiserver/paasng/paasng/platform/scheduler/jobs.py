@@ -33,5 +33,8 @@ def update_remote_services():
     """Update remote services periodically"""
     remote_store = get_remote_store()
     logger.debug('Start updating remote services...')
-    for ret in fetch_all_remote_services():
-        remote_store.bulk_upsert(ret.data, meta_info=ret.meta_info, source_config=ret.config)
+    # 仅写入发生变化的服务, 未变化的服务将在拉取时被跳过
+    for ret in fetch_all_remote_services(remote_store):
+        remote_store.bulk_upsert(
+            ret.data, meta_info=ret.meta_info, source_config=ret.config, fingerprint=ret.fingerprint
+        )
@@ -17,9 +17,12 @@ We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
 import logging
+import threading
+import time
+from collections import OrderedDict
 from contextlib import suppress
 from functools import lru_cache, wraps
-from typing import Optional, Type
+from typing import Dict, Optional, Tuple, Type
 
 from bkapi_client_core.apigateway import APIGatewayClient, Operation
 from bkapi_client_core.apigateway import OperationGroup as _OperationGroup
@@ -30,8 +33,10 @@ from bkapi_client_core.session import Session
 from blue_krill.web.std_error import APIError
 from django.conf import settings
 from django.utils.translation import get_language
+from requests.adapters import HTTPAdapter
 from requests.models import Request
 
+from paasng.metrics import APIGW_REQUEST_HISTOGRAM
 from paasng.pluginscenter.definitions import PluginBackendAPIResource
 
 logger = logging.getLogger(__name__)
@@ -43,6 +48,8 @@ class OperationGroup(_OperationGroup):
 
 class DynamicClient(APIGatewayClient):
     group: OperationGroup
+    # session 由 SessionRegistry 管理并在多个 client 间复用, 请求结束后不关闭连接
+    _reuse_session_connection = True
 
     def __init__(self, api_name: str, stage: Optional[str] = None, endpoint: str = "", session=None):
         self._api_name = api_name
@@ -50,7 +57,13 @@ class DynamicClient(APIGatewayClient):
 
     def with_group(self, group_cls: Type[OperationGroup]):
         self.group = group_cls("group", self)
-        self.group.call = exception_transformer_decorator(self.group.call)
+        resource: Optional[PluginBackendAPIResource] = getattr(group_cls, "resource", None)
+        self.group.call = latency_observer_decorator(
+            exception_transformer_decorator(self.group.call),
+            api_name=self._api_name,
+            method=resource.method if resource else "",
+            path=resource.path if resource else "",
+        )
         return self
 
     def with_bkapi_authorization(self, **auth):
@@ -58,16 +71,70 @@ class DynamicClient(APIGatewayClient):
         return self
 
     def with_i18n_hook(self):
-        registry_i18n_hook(self.session)
+        # 复用的 session 只需要注册一次 hook
+        if not getattr(self.session, "_i18n_hook_registered", False):
+            registry_i18n_hook(self.session)
+            setattr(self.session, "_i18n_hook_registered", True)
         return self
 
 
+class SessionRegistry:
+    """Registry of the sessions used by DynamicClient, sessions are keyed by (api_name, stage, auth identity) so
+    that the authorization bound to session is always correct, and all sessions share the same connection pool to
+    make use of keep-alive connections.
+
+    :param max_size: the max number of sessions, the least recently used session will be discarded when exceeded
+    :param pool_maxsize: the max number of connections to save in the pool for each host
+    """
+
+    def __init__(self, max_size: int = 256, pool_maxsize: int = 10):
+        self.max_size = max_size
+        self.pool_maxsize = pool_maxsize
+        self._sessions: "OrderedDict[Tuple, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._adapter: Optional[HTTPAdapter] = None
+
+    def get(self, api_name: str, stage: str, auth: Dict[str, str]) -> Session:
+        """Get the session, create a new one if not exists"""
+        key = (api_name, stage, tuple(sorted(auth.items())))
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+                return session
+
+            session = self._make_session()
+            self._sessions[key] = session
+            if len(self._sessions) > self.max_size:
+                # 连接池由所有 session 共享, 被淘汰的 session 不能关闭
+                self._sessions.popitem(last=False)
+            return session
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def _make_session(self) -> Session:
+        if self._adapter is None:
+            self._adapter = HTTPAdapter(pool_maxsize=self.pool_maxsize)
+        session = Session()
+        session.mount("http://", self._adapter)
+        session.mount("https://", self._adapter)
+        return session
+
+
+session_registry = SessionRegistry(pool_maxsize=settings.BK_APIGW_CLIENT_POOL_MAXSIZE)
+
+
 @lru_cache
 def _make_operation_group(resource: PluginBackendAPIResource) -> Type[OperationGroup]:
     group_cls = type(
         "group",
         (OperationGroup,),
-        {"call": bind_property(Operation, name="call", method=resource.method, path=resource.path)},
+        {
+            "call": bind_property(Operation, name="call", method=resource.method, path=resource.path),
+            "resource": resource,
+        },
     )
     assert issubclass(group_cls, OperationGroup)
     return group_cls
@@ -77,11 +144,13 @@ def make_client(resource: PluginBackendAPIResource, bk_username: Optional[str] =
     auth = {"bk_app_code": settings.BK_APP_CODE, "bk_app_secret": settings.BK_APP_SECRET}
     if bk_username:
         auth["bk_username"] = bk_username
+    stage = settings.BK_PLUGIN_APIGW_SERVICE_STAGE
     return (
         DynamicClient(
             api_name=resource.apiName,
-            stage=settings.BK_PLUGIN_APIGW_SERVICE_STAGE,
+            stage=stage,
             endpoint=settings.BK_API_URL_TMPL,
+            session=session_registry.get(resource.apiName, stage, auth),
         )
         .with_group(_make_operation_group(resource))
         .with_bkapi_authorization(**auth)
@@ -135,6 +204,25 @@ def exception_transformer_decorator(func):
     return wrapper
 
 
+def latency_observer_decorator(func, api_name: str, method: str, path: str):
+    """A decorator which records the latency of calling API"""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        result = "error"
+        start = time.perf_counter()
+        try:
+            ret = func(*args, **kwargs)
+            result = "success"
+            return ret
+        finally:
+            APIGW_REQUEST_HISTOGRAM.labels(api_name=api_name, method=method, path=path, result=result).observe(
+                time.perf_counter() - start
+            )
+
+    return wrapper
+
+
 def registry_i18n_hook(session: Session):
     """registry hook to bkapi client session, which will auto set Accept-Language"""
 
@@ -18,9 +18,12 @@ to the current version of the project delivered to anyone in the future.
 """
 """Manage logics related with how to expose an application"""
 import logging
-from typing import Dict, Optional
+from typing import Dict, Optional, Sequence
+from uuid import UUID
 
-from paas_wl.core.env import env_is_running
+from django.db.models import Prefetch
+
+from paas_wl.core.env import EnvIsRunningHub, env_is_running
 from paas_wl.networking.entrance.addrs import EnvExposedURL
 from paas_wl.networking.entrance.handlers import refresh_module_domains
 from paas_wl.networking.entrance.shim import get_builtin_addr_preferred
@@ -58,6 +61,28 @@ def get_exposed_links(application: Application) -> Dict:
     return get_module_exposed_links(application.get_default_module())
 
 
+def get_bulk_exposed_links(applications: Sequence[Application]) -> Dict[UUID, Dict]:
+    """Get exposed links for default modules of many applications, the modules, envs and
+    "is_running" status are loaded in bulk instead of once per application.
+
+    :return: A dict of {application id: links}, links has the same format as `get_exposed_links`
+    """
+    modules = (
+        Module.objects.filter(application__in=applications, is_default=True)
+        .select_related('application')
+        .prefetch_related(
+            Prefetch('envs', queryset=ModuleEnvironment.objects.select_related('application', 'engine_app'))
+        )
+    )
+    default_modules = {module.application_id: module for module in modules}
+    EnvIsRunningHub.prefetch(env for module in default_modules.values() for env in module.envs.all())
+    links: Dict[UUID, Dict] = {}
+    for app in applications:
+        module = default_modules.get(app.id)
+        links[app.id] = get_module_exposed_links(module) if module else get_exposed_links(app)
+    return links
+
+
 def get_exposed_url(module_env: ModuleEnvironment) -> Optional[EnvExposedURL]:
     """Get exposed url object of given environment, if the environment is not
     running, return None instead.
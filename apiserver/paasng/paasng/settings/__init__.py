@@ -204,6 +204,7 @@ MIDDLEWARE = [
     # Other utilities middlewares
     'paasng.utils.middlewares.AutoDisableCSRFMiddleware',
     'paasng.utils.middlewares.APILanguageMiddleware',
+    'paasng.utils.middlewares.WlAppIdentityMapMiddleware',
     'django_prometheus.middleware.PrometheusAfterMiddleware',
 ]
 
@@ -547,6 +548,13 @@ BK_IAM_MIGRATION_APP_NAME = "bkpaas_iam_migration"
 # 跳过初始化已有应用数据到权限中心（注意：仅跳过初始化数据，所有权限相关的操作还是依赖权限中心）
 BK_IAM_SKIP = settings.get('BK_IAM_SKIP', False)
 
+# 用户组成员缓存时间（秒），设置为 0 表示不缓存，成员变更时会主动清理缓存
+IAM_GROUP_MEMBERS_CACHE_TIMEOUT = settings.get('IAM_GROUP_MEMBERS_CACHE_TIMEOUT', 60)
+# 并发获取用户组成员时的最大线程数，设置为 1 表示串行获取
+IAM_GROUP_MEMBERS_FETCH_CONCURRENCY = settings.get('IAM_GROUP_MEMBERS_FETCH_CONCURRENCY', 8)
+# 用户有权限的应用列表缓存时间（秒），设置为 0 表示不缓存，成员变更时会主动清理缓存
+IAM_USER_APPS_CACHE_TIMEOUT = settings.get('IAM_USER_APPS_CACHE_TIMEOUT', 30)
+
 BKAUTH_DEFAULT_PROVIDER_TYPE = settings.get('BKAUTH_DEFAULT_PROVIDER_TYPE', 'BK')
 
 # 蓝鲸的云 API 地址，用于内置环境变量的配置项
@@ -564,6 +572,8 @@ APIGW_ENVIRONMENT = settings.get('APIGW_ENVIRONMENT', 'prod')
 BK_API_URL_TMPL = settings.get('BK_API_URL_TMPL', 'http://localhost:8080/api/{api_name}/')
 # 网关 API 默认网关环境
 BK_API_DEFAULT_STAGE_MAPPINGS = settings.get("BK_API_DEFAULT_STAGE_MAPPINGS", {})
+# 调用网关 API 时, 连接池中为每个域名保留的最大连接数
+BK_APIGW_CLIENT_POOL_MAXSIZE = settings.get("BK_APIGW_CLIENT_POOL_MAXSIZE", 10)
 
 # 开发者中心 region 与 APIGW user_auth_type 的对应关系
 REGION_TO_USER_AUTH_TYPE_MAP = settings.get('REGION_TO_USER_AUTH_TYPE_MAP', {'default': 'default'})
@@ -894,6 +904,12 @@ BLOBSTORE_BUCKET_TEMPLATES = settings.get('BLOBSTORE_BUCKET_TEMPLATES', 'bkpaas3
 # Bucket 名称：存储源码包
 BLOBSTORE_BUCKET_AP_PACKAGES = settings.get('BLOBSTORE_BUCKET_AP_PACKAGES', 'bkpaas3-source-packages')
 
+# 源码包的本地缓存目录, 以源码包的 sha256 摘要为键, 重复部署同一源码包时无需再次下载
+# 默认使用项目目录下的私有目录(权限为 0700), 不要使用 /tmp 等其他用户可写的目录
+SOURCE_PACKAGE_CACHE_DIR = settings.get('SOURCE_PACKAGE_CACHE_DIR', str(BASE_DIR / 'data' / 'package-cache'))
+# 源码包本地缓存的最大总大小(bytes), 设置为 0 时禁用缓存
+SOURCE_PACKAGE_CACHE_MAX_SIZE = settings.get('SOURCE_PACKAGE_CACHE_MAX_SIZE', 2 * 1024 * 1024 * 1024)
+
 # S-Mart 应用默认增强服务配置信息
 SMART_APP_DEFAULT_SERVICES_CONFIG = settings.get('SMART_APP_DEFAULT_SERVICES_CONFIG', {"mysql": {}})
 
@@ -923,6 +939,9 @@ ENGINE_APP_SOURCE_SIZE_WARNING_THRESHOLD_MB = 300
 # 可恢复下架操作的最长时限
 ENGINE_OFFLINE_RESUMABLE_SECS = 60
 
+# 部署时轮询进程状态，是否以增量方式（与上一份完整快照对比）保存进程快照，可减少进程较多的应用写入 Redis 的数据量
+PROCESSES_SNAPSHOT_DELTA_ENABLED = settings.get('PROCESSES_SNAPSHOT_DELTA_ENABLED', False)
+
 
 # == 应用运行时相关配置
 #
@@ -938,6 +957,10 @@ SERVICES_VENDOR_CONFIGS: Dict[str, Dict] = settings.get('SERVICES_VENDOR_CONFIGS
 
 # 后端轮询任务：刷新远程增强服务信息 - 默认轮询间隔
 REMOTE_SERVICES_UPDATE_INTERVAL_MINUTES = 5
+# 后端轮询任务：并发拉取远程增强服务的最大线程数
+REMOTE_SERVICES_FETCH_CONCURRENCY = settings.get('REMOTE_SERVICES_FETCH_CONCURRENCY', 8)
+# 后端轮询任务：单个远程服务的拉取超时时间（秒），超时的服务将在本轮中被跳过
+REMOTE_SERVICES_FETCH_TIMEOUT = settings.get('REMOTE_SERVICES_FETCH_TIMEOUT', 60)
 
 # 是否禁用定时任务调度器
 DISABLE_PERIODICAL_JOBS = settings.get("DISABLE_PERIODICAL_JOBS", False)
@@ -1019,6 +1042,8 @@ ELASTICSEARCH_HOSTS = settings.get('ELASTICSEARCH_HOSTS', [{'host': 'localhost',
 
 # 日志 ES 搜索超时时间
 DEFAULT_ES_SEARCH_TIMEOUT = 30
+# 流式导出日志时, 单次导出的最大行数
+LOG_EXPORT_MAX_ROWS = settings.get('LOG_EXPORT_MAX_ROWS', 100000)
 
 # 日志 Index 名称模式
 ES_K8S_LOG_INDEX_PATTERNS = settings.get('ES_K8S_LOG_INDEX_PATTERNS', 'app_log-*')
@@ -126,6 +126,14 @@ MUL_MODULE_VOLUME_HOST_PATH_APP_LOGGING_DIR = settings.get(
 K8S_DEFAULT_CONNECT_TIMEOUT = 5
 K8S_DEFAULT_READ_TIMEOUT = 60
 
+# 进程内共享的 kubernetes 资源发现（discovery）结果的有效期，单位秒
+K8S_DISCOVERY_CACHE_TTL = int(settings.get('K8S_DISCOVERY_CACHE_TTL', 60 * 10))
+
+# 是否启用 informer：在进程内通过 list-watch 维护 Deployment、Pod 等资源的本地缓存，读取进程信息时优先使用缓存
+ENABLE_KUBE_INFORMER = settings.get('ENABLE_KUBE_INFORMER', False)
+# informer 在多久未被读取后自动停止，单位秒
+KUBE_INFORMER_IDLE_TIMEOUT = int(settings.get('KUBE_INFORMER_IDLE_TIMEOUT', 60 * 5))
+
 # 指定 kubectl 使用的 config.yaml 文件路径，容器化交付时由 secret 挂载而来
 KUBE_CONFIG_FILE = settings.get('KUBE_CONFIG_FILE', '/data/kubelet/conf/kubeconfig.yaml')
 
@@ -142,6 +150,16 @@ LEGACY_MAPPER_VERSION = "v1"
 # 默认读取 POD 最近日志行数
 DEFAULT_POD_LOGS_LINE = 512
 
+# ---------------
+# 部署日志归档
+# ---------------
+# 归档后的日志分块存储方式，可选值：db（压缩后保存在数据库）、blob（上传至对象存储）
+OUTPUT_STREAM_ARCHIVE_STORAGE = settings.get('OUTPUT_STREAM_ARCHIVE_STORAGE', 'db')
+# 使用对象存储保存日志分块时的 Bucket 名称，默认使用 BLOBSTORE_BUCKET_APP_SOURCE
+OUTPUT_STREAM_ARCHIVE_BUCKET = settings.get('OUTPUT_STREAM_ARCHIVE_BUCKET', None)
+# 每个日志分块包含的最大行数
+OUTPUT_STREAM_ARCHIVE_CHUNK_LINES = int(settings.get('OUTPUT_STREAM_ARCHIVE_CHUNK_LINES', 1000))
+
 
 # ---------------
 # Ingress 配置
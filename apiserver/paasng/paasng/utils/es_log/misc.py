@@ -19,14 +19,13 @@ to the current version of the project delivered to anyone in the future.
 import datetime
 import logging
 import re
-from collections import Counter, defaultdict
-from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional, Union
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Literal, Optional, Tuple, Union
 
 import arrow
 import pytz
 from _operator import attrgetter
 from elasticsearch_dsl.response.aggs import FieldBucketData
-from rest_framework.fields import get_attribute
 
 from paasng.utils.es_log.models import FieldFilter
 from paasng.utils.text import calculate_percentage
@@ -88,21 +87,50 @@ def format_timestamp(
         return int(arrow.get(value).timestamp)
 
 
+def count_fields_values(logs: Iterable, fields: Iterable[str]) -> Dict[str, Counter]:
+    """统计日志样本(logs)中各字段的取值分布
+
+    每条日志只会被扁平化一次, 然后按字段收集成列, 再对每列做一次计数, 避免逐个 (日志, 字段) 查找属性.
+    返回结果中字段的顺序与逐条日志、逐个字段遍历时首次出现的顺序一致.
+
+    :param logs: 日志样本, 可以是 ES 的 Hit 或 dict
+    :param fields: 需要统计的字段, 以 "." 分隔嵌套层级
+    :return: {字段: 取值计数}, 不包含在所有日志中都不存在的字段
+    """
+    field_positions = {field: idx for idx, field in enumerate(fields)}
+    columns: Dict[str, List] = {}
+    first_seen: Dict[str, Tuple[int, int]] = {}
+    for log_idx, log in enumerate(logs):
+        flattened = flatten_structure(log.to_dict() if hasattr(log, "to_dict") else log)
+        for field, value in flattened.items():
+            if field not in field_positions:
+                continue
+            if field not in columns:
+                columns[field] = []
+                first_seen[field] = (log_idx, field_positions[field])
+            columns[field].append(value)
+
+    result: Dict[str, Counter] = {}
+    for field in sorted(columns, key=first_seen.__getitem__):
+        column = columns[field]
+        try:
+            result[field] = Counter(column)
+        except TypeError:
+            # 列中存在 list 等不可哈希的值时, 逐个计数并跳过这些值
+            counter: Counter = Counter()
+            for value in column:
+                try:
+                    counter[value] += 1
+                except TypeError:
+                    logger.warning("Field<%s> got an unhashable value: %s", field, value)
+            result[field] = counter
+    return result
+
+
 def count_filters_options(logs: List, properties: Dict[str, FieldFilter]) -> List[FieldFilter]:
     """统计 ES 日志的可选字段, 并填充到 filters 的 options"""
     # 在内存中统计 filters 的可选值
-    field_counter: Dict[str, Counter] = defaultdict(Counter)
-    log_fields = [(f, f.split(".")) for f in properties.keys()]
-    for log in logs:
-        for log_field, split_log_field in log_fields:
-            try:
-                value = get_attribute(log, split_log_field)
-            except (AttributeError, KeyError):
-                continue
-            try:
-                field_counter[log_field][value] += 1
-            except TypeError:
-                logger.warning("Field<%s> got an unhashable value: %s", log_field, value)
+    field_counter = count_fields_values(logs, properties.keys())
 
     result = []
     for title, values in field_counter.items():
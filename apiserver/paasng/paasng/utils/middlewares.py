@@ -24,6 +24,8 @@ from django.utils.deprecation import MiddlewareMixin
 from django.utils.translation import trans_real as trans
 from whitenoise.middleware import WhiteNoiseMiddleware
 
+from paas_wl.platform.applications.identity import wl_app_identity_scope
+
 logger = logging.getLogger(__name__)
 
 
@@ -74,6 +76,17 @@ class AutoDisableCSRFMiddleware:
         return None
 
 
+class WlAppIdentityMapMiddleware:
+    """Memoize WlApp objects in each request, see `paas_wl.platform.applications.identity`"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with wl_app_identity_scope():
+            return self.get_response(request)
+
+
 class APILanguageMiddleware(MiddlewareMixin):
     """Set the language for API requests"""
 
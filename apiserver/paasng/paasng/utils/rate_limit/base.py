@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+import abc
+import time
+from dataclasses import dataclass
+
+import redis
+
+
+@dataclass
+class RateLimitResult:
+    """速率控制的判定结果
+
+    :param allowed: 是否允许当前行为
+    :param remaining: 当前剩余的可用次数
+    :param retry_after: 被限制时，距离可以再次执行的秒数；未被限制时为 0
+    """
+
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+
+class RedisScriptRateLimiter(abc.ABC):
+    """基于 Redis Lua 脚本的速率控制器，判定与计数在服务端一次往返内原子完成
+
+    子类需提供 Lua 脚本，脚本接收 KEYS[1]（计数用的 key）与 ARGV[1]（当前时间戳，单位：秒）、
+    ARGV[2]（时间窗口长度）、ARGV[3]（次数阈值），返回 {allowed(0/1), remaining, retry_after（单位：毫秒）}
+    """
+
+    script: str
+
+    def __init__(self, redis_db: redis.Redis, window_size: int, threshold: int):
+        """
+        :param redis_db: redis client
+        :param window_size: 时间窗口长度（单位：秒）
+        :param threshold: 时间窗口内的次数阈值
+        """
+        # 阈值为 0 时脚本中的估算会出现除零，窗口长度为 0 时也没有意义，直接拒绝
+        if window_size <= 0 or threshold <= 0:
+            raise ValueError('window_size and threshold must be positive')
+
+        self.redis_db = redis_db
+        self.window_size = window_size
+        self.threshold = threshold
+        # 通过 EVALSHA 调用脚本，当 Redis 中不存在该脚本时会自动 SCRIPT LOAD 后重试
+        self._script = redis_db.register_script(self.script)
+
+    def is_allowed(self) -> bool:
+        """是否允许当前行为（未受速率限制影响）"""
+        return self.acquire().allowed
+
+    def acquire(self) -> RateLimitResult:
+        """尝试消耗一次配额，返回判定结果"""
+        return self._run_script(time.time())
+
+    def _run_script(self, now: float) -> RateLimitResult:
+        allowed, remaining, retry_after_ms = self._script(
+            keys=[self._gen_key()], args=[repr(now), self.window_size, self.threshold]
+        )
+        return RateLimitResult(
+            allowed=bool(allowed), remaining=max(int(remaining), 0), retry_after=max(int(retry_after_ms), 0) / 1000
+        )
+
+    @abc.abstractmethod
+    def _gen_key(self) -> str:
+        """生成 redis 中的 key"""
+        raise NotImplementedError
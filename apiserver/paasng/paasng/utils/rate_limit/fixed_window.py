@@ -16,7 +16,7 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
-import abc
+import math
 import time
 
 import redis
@@ -25,54 +25,50 @@ from rest_framework.response import Response
 from rest_framework.status import HTTP_429_TOO_MANY_REQUESTS
 
 from paasng.platform.core.storages.redisdb import get_default_redis
+from paasng.utils.rate_limit.base import RateLimitResult, RedisScriptRateLimiter
 from paasng.utils.rate_limit.constants import UserAction
 
+# KEYS[1] 为当前窗口的计数 key，重试时间为距离当前窗口结束的时长
+FIXED_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window_size = tonumber(ARGV[2])
+local threshold = tonumber(ARGV[3])
+
+local count = tonumber(redis.call('GET', KEYS[1]) or '0')
+if count >= threshold then
+    local window_end = (math.floor(now / window_size) + 1) * window_size
+    return {0, 0, math.ceil((window_end - now) * 1000)}
+end
+
+count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], window_size)
+end
+return {1, threshold - count, 0}
+"""
 
-class RedisFixedWindowRateLimiter(abc.ABC):
-    """基于 Redis 的固定窗口速率控制器"""
-
-    def __init__(self, redis_db: redis.Redis, window_size: int, threshold: int):
-        """
-        :param redis_db: redis client
-        :param window_size: 时间窗口长度（单位：秒）
-        :param threshold: 时间窗口内的次数阈值
-        """
-        self.redis_db = redis_db
-        self.window_size = window_size
-        self.threshold = threshold
 
-    def is_allowed(self) -> bool:
-        """
-        是否允许当前行为（未受速率限制影响）
-
-        固定窗口实现：
-        +--------------+      +---------------------+      +------------------+  < threshold   +---------------------+
-        | user request | ---> | calc current window | ---> | check used count | -------------> | increase used count |
-        +--------------+      +---------------------+      +------------------+                +---------------------+
-                                                                     |
-                                                                     | >= threshold
-                                                                     v
-                                                           +----------------------+
-                                                           | [✗] cause rate limit |
-                                                           +----------------------+
-        """
-        self.cur_window = int(time.time() / self.window_size)
-        key = self._gen_key()
-        count = self.redis_db.get(key)
-        if not count:
-            self.redis_db.set(key, 1, ex=self.window_size)
-            return True
+class RedisFixedWindowRateLimiter(RedisScriptRateLimiter):
+    """基于 Redis 的固定窗口速率控制器
 
-        if int(count) < self.threshold:
-            self.redis_db.incr(key)
-            return True
+    固定窗口实现（在 Redis 中通过 Lua 脚本原子执行）：
+    +--------------+      +---------------------+      +------------------+  < threshold   +---------------------+
+    | user request | ---> | calc current window | ---> | check used count | -------------> | increase used count |
+    +--------------+      +---------------------+      +------------------+                +---------------------+
+                                                                 |
+                                                                 | >= threshold
+                                                                 v
+                                                       +----------------------+
+                                                       | [✗] cause rate limit |
+                                                       +----------------------+
+    """
 
-        return False
+    script = FIXED_WINDOW_SCRIPT
 
-    @abc.abstractmethod
-    def _gen_key(self) -> str:
-        """生成 redis 中的 key"""
-        raise NotImplementedError
+    def acquire(self) -> RateLimitResult:
+        now = time.time()
+        self.cur_window = int(now / self.window_size)
+        return self._run_script(now)
 
 
 class UserActionRateLimiter(RedisFixedWindowRateLimiter):
@@ -102,15 +98,18 @@ class UserActionRateLimiter(RedisFixedWindowRateLimiter):
 
 
 def rate_limits_by_user(action: UserAction, window_size: int, threshold: int):
-    """适用于 Django View 方法的装饰器，提供频率限制的能力"""
+    """适用于 Django View 方法的装饰器，提供频率限制的能力（固定窗口）"""
 
     @wrapt.decorator
     def wrapper(wrapped, instance, args, kwargs):
         rate_limiter = UserActionRateLimiter(
             get_default_redis(), instance.request.user.username, action, window_size, threshold
         )
-        if not rate_limiter.is_allowed():
-            return Response(status=HTTP_429_TOO_MANY_REQUESTS)
+        result = rate_limiter.acquire()
+        if not result.allowed:
+            return Response(
+                status=HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(math.ceil(result.retry_after))}
+            )
 
         return wrapped(*args, **kwargs)
 
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+import math
+
+import redis
+import wrapt
+from rest_framework.response import Response
+from rest_framework.status import HTTP_429_TOO_MANY_REQUESTS
+
+from paasng.platform.core.storages.redisdb import get_default_redis
+from paasng.utils.rate_limit.base import RedisScriptRateLimiter
+from paasng.utils.rate_limit.constants import UserAction
+
+# 保存当前与上一个固定窗口的计数，用上一窗口计数按剩余时间比例加权，估算滑动窗口内的请求数，
+# 只需保存 3 个整数，判定复杂度为 O(1)
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window_size = tonumber(ARGV[2])
+local threshold = tonumber(ARGV[3])
+local idx = math.floor(now / window_size)
+
+local data = redis.call('HMGET', KEYS[1], 'idx', 'cur', 'prev')
+local last_idx = tonumber(data[1])
+local cur = tonumber(data[2]) or 0
+local prev = tonumber(data[3]) or 0
+if last_idx == nil or idx - last_idx > 1 then
+    cur, prev = 0, 0
+elseif idx - last_idx == 1 then
+    cur, prev = 0, cur
+end
+
+local elapsed = now - idx * window_size
+local estimated = prev * (1 - elapsed / window_size) + cur
+
+local allowed = 0
+local retry_after = 0
+if estimated + 1 <= threshold then
+    cur = cur + 1
+    estimated = estimated + 1
+    allowed = 1
+elseif cur + 1 <= threshold then
+    -- 等待上一窗口的权重衰减到足够小
+    retry_after = window_size * (1 - (threshold - cur - 1) / prev) - elapsed
+else
+    -- 等待进入下一窗口，当前窗口的计数成为新的上一窗口计数
+    retry_after = window_size - elapsed + math.max(0, window_size * (1 - (threshold - 1) / cur))
+end
+
+redis.call('HMSET', KEYS[1], 'idx', idx, 'cur', cur, 'prev', prev)
+redis.call('EXPIRE', KEYS[1], window_size * 2)
+return {allowed, math.floor(threshold - estimated), math.ceil(retry_after * 1000)}
+"""
+
+
+class RedisSlidingWindowRateLimiter(RedisScriptRateLimiter):
+    """基于 Redis 的滑动窗口计数速率控制器
+
+    与固定窗口相比，不会在窗口边界处放行两倍于阈值的请求；与记录每次请求时间戳的滑动日志相比，
+    存储与计算开销均为 O(1)，代价是窗口内请求数为按均匀分布估算的近似值。
+    """
+
+    script = SLIDING_WINDOW_SCRIPT
+
+
+class UserActionRateLimiter(RedisSlidingWindowRateLimiter):
+    """针对用户行为的速率控制器"""
+
+    def __init__(
+        self,
+        redis_db: redis.Redis,
+        username: str,
+        action: UserAction,
+        window_size: int,
+        threshold: int,
+    ):
+        """
+        :param redis_db: redis client
+        :param username: 用户 ID
+        :param action: 用户操作名
+        :param window_size: 时间窗口长度（单位：秒）
+        :param threshold: 时间窗口内的次数阈值
+        """
+        super().__init__(redis_db, window_size, threshold)
+        self.username = username
+        self.action = action
+
+    def _gen_key(self) -> str:
+        return f'bk_paas3:rate_limits:sliding_window:{self.username}:{self.action}'
+
+
+def sliding_rate_limits_by_user(action: UserAction, window_size: int, threshold: int):
+    """适用于 Django View 方法的装饰器，提供频率限制的能力（滑动窗口），用法与 fixed_window.rate_limits_by_user 一致"""
+
+    @wrapt.decorator
+    def wrapper(wrapped, instance, args, kwargs):
+        rate_limiter = UserActionRateLimiter(
+            get_default_redis(), instance.request.user.username, action, window_size, threshold
+        )
+        result = rate_limiter.acquire()
+        if not result.allowed:
+            return Response(
+                status=HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(math.ceil(result.retry_after))}
+            )
+
+        return wrapped(*args, **kwargs)
+
+    return wrapper
@@ -16,82 +16,70 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
-import abc
-import time
-
-import msgpack
 import redis
 
+from paasng.utils.rate_limit.base import RedisScriptRateLimiter
 from paasng.utils.rate_limit.constants import UserAction
 
+# 令牌桶容量为 threshold，令牌以 threshold / window_size 个每秒的速率匀速补充，
+# 桶的状态（剩余令牌数、上次更新时间）保存在 hash 中，判定复杂度为 O(1)
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window_size = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[3])
+local rate = capacity / window_size
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = math.ceil((1 - tokens) / rate * 1000)
+end
+
+redis.call('HMSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(window_size))
+return {allowed, math.floor(tokens), retry_after}
+"""
 
-class RedisTokenBucketRateLimiter(abc.ABC):
-    """基于 Redis 的令牌桶速率控制器"""
-
-    def __init__(self, redis_db: redis.Redis, window_size: int, threshold: int):
-        """
-        :param redis_db: redis client
-        :param window_size: 时间窗口长度（单位：秒）
-        :param threshold: 时间窗口内的次数阈值
-        """
-        self.redis_db = redis_db
-        self.window_size = window_size
-        self.threshold = threshold
-
-    def is_allowed(self) -> bool:
-        """
-        是否允许当前行为（未受速率限制影响）
-
-        令牌桶实现：
-        +------------------------------------------+
-        |               user request               |
-        +------------------------------------------+
-                           |
-                           |
-                           v
-        +------------------------------------------+    < threshold     +------------------------------+
-        |           check queue length             | -----------------> | [✓] lpush current timestamp  |
-        +------------------------------------------+                    +------------------------------+
-                           |
-                           | >= threshold
-                           v
-        +------------------------------------------+   < window_size    +----------------------+
-        |   check timedelta (current and oldest)   | -----------------> | [✗] cause rate limit |
-        +------------------------------------------+                    +----------------------+
-                           |
-                           | >= window_size
-                           v
-        +------------------------------------------+
-        |   [✓] rpop and lpush current timestamp   |
-        +------------------------------------------+
-        """
-        cur_timestamp = int(time.time())
-        self.key = self._gen_key()
-
-        raw = self.redis_db.get(self.key)
-        self.records = msgpack.unpackb(raw) if raw else []
-
-        if len(self.records) < self.threshold:
-            self._update_bucket(cur_timestamp)
-            return True
-
-        if cur_timestamp - self.records[-1] >= self.window_size:
-            self._update_bucket(cur_timestamp, pop=True)
-            return True
-
-        return False
-
-    @abc.abstractmethod
-    def _gen_key(self) -> str:
-        """生成 redis 中的 key"""
-        raise NotImplementedError
 
-    def _update_bucket(self, cur_timestamp: int, pop: bool = False):
-        """更新令牌桶数据，若指定 pop 为 True，则会移除最老的时间戳"""
-        self.records.insert(0, cur_timestamp)
-        if pop:
-            self.records.pop()
-        self.redis_db.set(self.key, msgpack.packb(self.records), ex=self.window_size)
+class RedisTokenBucketRateLimiter(RedisScriptRateLimiter):
+    """基于 Redis 的令牌桶速率控制器
+
+    令牌桶实现（在 Redis 中通过 Lua 脚本原子执行）：
+    +--------------------------------------------+
+    |                user request                |
+    +--------------------------------------------+
+                          |
+                          v
+    +--------------------------------------------+
+    |        refill tokens by elapsed time       |
+    |     (threshold tokens per window_size)     |
+    +--------------------------------------------+
+                          |
+                          v
+    +--------------------------------------------+      >= 1      +-----------------------+
+    |             check tokens count             | -------------> | [✓] consume one token |
+    +--------------------------------------------+                +-----------------------+
+                          |
+                          | < 1
+                          v
+    +--------------------------------------------+
+    |            [✗] cause rate limit            |
+    +--------------------------------------------+
+    """
+
+    script = TOKEN_BUCKET_SCRIPT
 
 
 class UserActionRateLimiter(RedisTokenBucketRateLimiter):
@@ -117,4 +105,4 @@ class UserActionRateLimiter(RedisTokenBucketRateLimiter):
         self.action = action
 
     def _gen_key(self) -> str:
-        return f'bk_paas3:rate_limits:{self.username}:{self.action}'
+        return f'bk_paas3:rate_limits:token_bucket:{self.username}:{self.action}'
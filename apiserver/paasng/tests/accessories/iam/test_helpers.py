@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+from unittest import mock
+
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+
+from paasng.accessories.iam import helpers
+from paasng.accessories.iam.members.models import ApplicationUserGroup
+from paasng.platform.applications.constants import ApplicationRole
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def group_members():
+    """{user_group_id: [username, ...]} of the fake IAM client"""
+    return {
+        1001: ['admin-user'],
+        1002: ['admin-user', 'dev-user'],
+        1003: ['ops-user'],
+        2001: [],
+        2002: ['dev-user'],
+        2003: [],
+    }
+
+
+@pytest.fixture
+def iam_cli(group_members):
+    cli = mock.MagicMock()
+    cli.fetch_user_group_members.side_effect = lambda user_group_id: list(group_members[user_group_id])
+    with mock.patch.object(helpers, 'IAM_CLI', new=cli):
+        yield cli
+
+
+@pytest.fixture
+def user_groups():
+    roles = [ApplicationRole.ADMINISTRATOR, ApplicationRole.DEVELOPER, ApplicationRole.OPERATOR]
+    for app_code, start_id in [('app-foo', 1001), ('app-bar', 2001)]:
+        for idx, role in enumerate(roles):
+            ApplicationUserGroup.objects.create(app_code=app_code, role=role, user_group_id=start_id + idx)
+
+
+@pytest.fixture
+def members_cache(settings):
+    settings.IAM_GROUP_MEMBERS_CACHE_TIMEOUT = 60
+    settings.IAM_GROUP_MEMBERS_FETCH_CONCURRENCY = 4
+    with mock.patch.object(helpers, 'cache', new=LocMemCache('iam-group-members', {})):
+        yield
+
+
+@pytest.mark.usefixtures('user_groups')
+class TestFetchAppsRoleMembers:
+    def test_normal(self, iam_cli):
+        results = helpers.fetch_apps_role_members(['app-foo', 'app-bar', 'app-missing'])
+        assert results['app-foo'] == {
+            ApplicationRole.ADMINISTRATOR: ['admin-user'],
+            ApplicationRole.DEVELOPER: ['admin-user', 'dev-user'],
+            ApplicationRole.OPERATOR: ['ops-user'],
+        }
+        assert results['app-bar'][ApplicationRole.DEVELOPER] == ['dev-user']
+        assert results['app-missing'] == {}
+        # Every user group is fetched only once
+        assert iam_cli.fetch_user_group_members.call_count == 6
+
+    def test_roles(self, iam_cli):
+        results = helpers.fetch_apps_role_members(['app-foo', 'app-bar'], roles=[ApplicationRole.DEVELOPER])
+        assert results == {
+            'app-foo': {ApplicationRole.DEVELOPER: ['admin-user', 'dev-user']},
+            'app-bar': {ApplicationRole.DEVELOPER: ['dev-user']},
+        }
+        assert iam_cli.fetch_user_group_members.call_count == 2
+
+    def test_user_roles(self, iam_cli):
+        assert helpers.fetch_user_roles('app-foo', 'admin-user') == [
+            ApplicationRole.ADMINISTRATOR,
+            ApplicationRole.DEVELOPER,
+        ]
+        assert helpers.fetch_user_roles('app-bar', 'admin-user') == [ApplicationRole.NOBODY]
+
+    def test_main_role(self, iam_cli):
+        assert helpers.fetch_user_main_role('app-foo', 'dev-user') == ApplicationRole.DEVELOPER
+        assert helpers.fetch_user_main_role('app-foo', 'admin-user') == ApplicationRole.ADMINISTRATOR
+        assert helpers.fetch_user_main_role('app-bar', 'ops-user') == ApplicationRole.NOBODY
+
+
+@pytest.mark.usefixtures('user_groups', 'members_cache')
+class TestGroupMembersCache:
+    def test_cached(self, iam_cli):
+        assert helpers.fetch_user_roles('app-foo', 'dev-user') == [ApplicationRole.DEVELOPER]
+        assert helpers.fetch_user_roles('app-foo', 'ops-user') == [ApplicationRole.OPERATOR]
+        assert [m['username'] for m in helpers.fetch_application_members('app-foo')] == [
+            'admin-user',
+            'dev-user',
+            'ops-user',
+        ]
+        assert iam_cli.fetch_user_group_members.call_count == 3
+
+    def test_invalidate_on_add(self, iam_cli, group_members):
+        assert helpers.fetch_user_roles('app-bar', 'ops-user') == [ApplicationRole.NOBODY]
+
+        group_members[2003].append('ops-user')
+        helpers.add_role_members('app-bar', ApplicationRole.OPERATOR, 'ops-user')
+        assert helpers.fetch_user_roles('app-bar', 'ops-user') == [ApplicationRole.OPERATOR]
+        iam_cli.add_user_group_members.assert_called_once_with(
+            user_group_id=2003, usernames=['ops-user'], expired_after_days=mock.ANY
+        )
+
+    def test_invalidate_on_delete(self, iam_cli, group_members):
+        assert helpers.fetch_role_members('app-bar', ApplicationRole.DEVELOPER) == ['dev-user']
+
+        group_members[2002].remove('dev-user')
+        helpers.delete_role_members('app-bar', ApplicationRole.DEVELOPER, 'dev-user')
+        assert helpers.fetch_role_members('app-bar', ApplicationRole.DEVELOPER) == []
+
+    def test_disabled(self, iam_cli, settings):
+        settings.IAM_GROUP_MEMBERS_CACHE_TIMEOUT = 0
+        helpers.fetch_user_roles('app-foo', 'dev-user')
+        helpers.fetch_user_roles('app-foo', 'dev-user')
+        assert iam_cli.fetch_user_group_members.call_count == 6
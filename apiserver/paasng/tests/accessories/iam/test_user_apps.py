@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+from unittest import mock
+
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Q
+
+from paasng.accessories.iam import user_apps
+from paasng.accessories.iam.permissions.resources.application import AppAction
+from paasng.platform.applications.constants import ApplicationRole
+from paasng.platform.applications.models import Application
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def user_apps_cache(settings):
+    settings.IAM_USER_APPS_CACHE_TIMEOUT = 60
+    with mock.patch.object(user_apps, 'cache', new=LocMemCache('iam-user-apps', {})):
+        yield
+
+
+class TestHotAddedApps:
+    def test_add_and_remove(self):
+        user_apps.hot_add_user_app(['foo', 'bar'], 'app-a', ApplicationRole.OPERATOR)
+        user_apps.hot_add_user_app(['foo'], 'app-b', ApplicationRole.DEVELOPER)
+
+        assert user_apps.get_hot_added_app_codes('foo') == {'app-a', 'app-b'}
+        assert user_apps.get_hot_added_app_codes('foo', roles=[ApplicationRole.DEVELOPER]) == {'app-b'}
+        assert user_apps.get_hot_added_app_codes('bar') == {'app-a'}
+
+        user_apps.remove_hot_added_user_app(['foo'], 'app-a')
+        assert user_apps.get_hot_added_app_codes('foo') == {'app-b'}
+        assert user_apps.get_hot_added_app_codes('bar') == {'app-a'}
+
+    def test_invalidate_cached_filters(self):
+        user_apps.set_cached_user_app_filters('foo', AppAction.VIEW_BASIC_INFO, Q(code='app-a'))
+        assert user_apps.get_cached_user_app_filters('foo', AppAction.VIEW_BASIC_INFO) == (True, Q(code='app-a'))
+
+        user_apps.hot_add_user_app(['foo'], 'app-b', ApplicationRole.ADMINISTRATOR)
+        assert user_apps.get_cached_user_app_filters('foo', AppAction.VIEW_BASIC_INFO) == (False, None)
+
+
+class TestFilterByUser:
+    def test_cached(self, bk_app, bk_user):
+        with mock.patch(
+            'paasng.platform.applications.models.ApplicationPermission.gen_user_app_filters',
+            return_value=Q(code=bk_app.code),
+        ) as mocked_gen:
+            assert list(Application.objects.filter_by_user(bk_user)) == [bk_app]
+            assert list(Application.objects.filter_by_user(bk_user)) == [bk_app]
+            assert mocked_gen.call_count == 1
+
+    def test_no_permission(self, bk_app, bk_user):
+        with mock.patch(
+            'paasng.platform.applications.models.ApplicationPermission.gen_user_app_filters', return_value=None
+        ) as mocked_gen:
+            assert not Application.objects.filter_by_user(bk_user).exists()
+            assert not Application.objects.filter_by_user(bk_user).exists()
+            assert mocked_gen.call_count == 1
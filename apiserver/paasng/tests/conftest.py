@@ -348,10 +348,17 @@ def mock_iam():
     from tests.utils.mocks.iam import StubBKIAMClient
     from tests.utils.mocks.permissions import StubApplicationPermission
 
-    with mock.patch('paasng.accessories.iam.client.BKIAMClient', new=StubBKIAMClient), mock.patch(
+    # StubBKIAMClient 直接读写数据库，而用例间的用户组 ID 可能重复，因此不缓存用户组成员及用户有权限的应用；
+    # 测试线程外无法读取事务中的数据，因此也不并发请求
+    with override_settings(
+        IAM_GROUP_MEMBERS_CACHE_TIMEOUT=0, IAM_GROUP_MEMBERS_FETCH_CONCURRENCY=1, IAM_USER_APPS_CACHE_TIMEOUT=0
+    ), mock.patch('paasng.accessories.iam.client.BKIAMClient', new=StubBKIAMClient), mock.patch(
         'paasng.accessories.iam.helpers.BKIAMClient',
         new=StubBKIAMClient,
-    ), mock.patch('paasng.platform.applications.helpers.BKIAMClient', new=StubBKIAMClient,), mock.patch(
+    ), mock.patch(
+        'paasng.platform.applications.helpers.BKIAMClient',
+        new=StubBKIAMClient,
+    ), mock.patch(
         'paasng.accessories.iam.helpers.IAM_CLI',
         new=StubBKIAMClient(),
     ), mock.patch(
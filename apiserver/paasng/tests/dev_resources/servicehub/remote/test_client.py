@@ -56,6 +56,26 @@ class TestClient:
         auth_inst = mocked_get.call_args[1]['auth']
         assert isinstance(auth_inst, ClientJWTAuth)
 
+    @mock.patch('requests.get')
+    def test_list_services_if_changed(self, mocked_get, client):
+        mocked_get.return_value = mock_json_response(data_mocks.OBJ_STORE_REMOTE_SERVICES_JSON)
+        services, etag = client.list_services_if_changed()
+        assert len(services) == 3
+        assert 'If-None-Match' not in mocked_get.call_args[1]['headers']
+
+        # Server does not support ETag, use the digest of content instead
+        assert client.list_services_if_changed(etag) is None
+        assert mocked_get.call_args[1]['headers']['If-None-Match'] == etag
+
+        mocked_get.return_value = mock_json_response(None, status_code=304)
+        assert client.list_services_if_changed('"foo"') is None
+
+        mocked_get.return_value = mock_json_response(data_mocks.OBJ_STORE_REMOTE_SERVICES_JSON)
+        mocked_get.return_value.headers['ETag'] = '"bar"'
+        services, etag = client.list_services_if_changed('"foo"')
+        assert len(services) == 3
+        assert etag == '"bar"'
+
     @mock.patch('requests.get')
     def test_retrieve_instance_normal(self, mocked_get, client):
         mocked_get.return_value = mock_json_response(data_mocks.REMOTE_INSTANCE_JSON)
@@ -16,13 +16,15 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
+import time
 from unittest import mock
 
 import pytest
 from django.core.exceptions import ImproperlyConfigured
 from django.test import override_settings
 
-from paasng.dev_resources.servicehub.remote.collector import initialize_remote_services
+from paasng.dev_resources.servicehub.remote.collector import fetch_all_remote_services, initialize_remote_services
+from paasng.dev_resources.servicehub.remote.store import MemoryStore
 from tests.dev_resources.servicehub import data_mocks
 from tests.utils.api import mock_json_response
 
@@ -47,3 +49,37 @@ class TestInitialize:
         assert mocked_store.bulk_upsert.call_count == len(SERVICE_REMOTE_ENDPOINTS)
         assert mocked_get.called
         assert mocked_get.call_args[0][0] == 'http://faked-host/services/'
+
+
+class TestFetchAllRemoteServices:
+    @pytest.fixture()
+    def endpoints(self, config):
+        return [config.to_json(), dict(config.to_json(), name='another', endpoint_url='http://another-host')]
+
+    @mock.patch('requests.get')
+    def test_skip_unchanged(self, mocked_get, endpoints):
+        mocked_get.side_effect = lambda *args, **kwargs: mock_json_response(data_mocks.OBJ_STORE_REMOTE_SERVICES_JSON)
+        store = MemoryStore()
+        with override_settings(SERVICE_REMOTE_ENDPOINTS=endpoints):
+            results = list(fetch_all_remote_services(store))
+            assert {ret.config.name for ret in results} == {'obj_store_remote', 'another'}
+            # Only write services of "obj_store_remote" to store
+            ret = next(ret for ret in results if ret.config.name == 'obj_store_remote')
+            store.bulk_upsert(ret.data, meta_info=ret.meta_info, source_config=ret.config, fingerprint=ret.fingerprint)
+
+            results = list(fetch_all_remote_services(store))
+            assert [ret.config.name for ret in results] == ['another']
+
+    @mock.patch('requests.get')
+    def test_timeout(self, mocked_get, endpoints):
+        def fake_get(url, *args, **kwargs):
+            if url.startswith('http://another-host'):
+                time.sleep(0.5)
+            return mock_json_response(data_mocks.OBJ_STORE_REMOTE_SERVICES_JSON)
+
+        mocked_get.side_effect = fake_get
+        with override_settings(SERVICE_REMOTE_ENDPOINTS=endpoints, REMOTE_SERVICES_FETCH_TIMEOUT=0.1), mock.patch(
+            'paasng.dev_resources.servicehub.remote.collector._FETCH_POLL_INTERVAL', 0.05
+        ):
+            results = list(fetch_all_remote_services())
+        assert [ret.config.name for ret in results] == ['obj_store_remote']
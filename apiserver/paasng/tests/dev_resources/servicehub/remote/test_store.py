@@ -123,3 +123,40 @@ class TestRemoteStore:
         config_json["name"] = "xman"
         with pytest.raises(ValueError):
             store.bulk_upsert(deepcopy(store.all()), meta_info, collector.RemoteSvcConfig.from_json(config_json))
+
+    def test_results_read_only(self, store):
+        uuid = data_mocks.OBJ_STORE_REMOTE_SERVICES_JSON[0]["uuid"]
+        obj = store.get(uuid, region='r1')
+        with pytest.raises(TypeError):
+            obj['name'] = 'foo'
+        with pytest.raises(TypeError):
+            obj['plans'].append({})
+
+        # Copies are mutable
+        obj_copy = deepcopy(obj)
+        obj_copy['name'] = 'foo'
+        obj_copy['plans'].append({})
+        assert store.get(uuid, region='r1')['name'] != 'foo'
+
+    def test_snapshot_reused(self, store):
+        snapshot = store.get_snapshot()
+        assert store.get_snapshot() is snapshot
+
+    def test_snapshot_reloaded_when_changed(self, store, config):
+        snapshot = store.get_snapshot()
+        # Simulate changes made by other processes
+        another_store = type(store)()
+        another_store.bulk_upsert(deepcopy(store.all()), {'version': None}, config)
+
+        assert store.get_snapshot() is not snapshot
+
+    def test_snapshot_reloaded_when_expired(self, store):
+        uuid = data_mocks.OBJ_STORE_REMOTE_SERVICES_JSON[0]["uuid"]
+        snapshot = store.get_snapshot()
+        assert snapshot.expires_at is not None
+
+        # Simulate the service data expired in redis
+        store.redis.delete(store._make_svc_info_key(uuid))
+        with mock.patch('time.monotonic', return_value=snapshot.expires_at):
+            with pytest.raises(ServiceNotFound):
+                store.get(uuid, region='r1')
@@ -16,10 +16,13 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
+import pickle
+
 import pytest
 
-from paas_wl.workloads.processes.processes import PlainInstance, PlainProcess
-from paasng.engine.processes.utils import ProcessesSnapshotStore
+from paas_wl.workloads.processes.entities import Status
+from paas_wl.workloads.processes.processes import PlainInstance, PlainProcess, ProcessesSnapshot
+from paasng.engine.processes.utils import ProcessesSnapshotStore, pack_process, unpack_process
 
 pytestmark = pytest.mark.django_db(databases=['default', 'workloads'])
 
@@ -42,4 +45,82 @@ class TestProcessesSnapshotStore:
     def test_save_then_get(self, bk_stag_env, process):
         store = ProcessesSnapshotStore(bk_stag_env)
         store.save([process])
-        assert store.get() == [process]
+        snapshot = store.get()
+        assert isinstance(snapshot, ProcessesSnapshot)
+        assert list(snapshot) == [process]
+
+    def test_save_snapshot(self, bk_stag_env, process):
+        store = ProcessesSnapshotStore(bk_stag_env)
+        store.save(ProcessesSnapshot([process]))
+        snapshot = store.get()
+        assert snapshot is not None
+        assert snapshot.get_process("web") == process
+
+
+def make_processes(count: int = 4, web_ready: bool = False):
+    return [
+        PlainProcess(
+            name=f"proc{i}",
+            version=1,
+            replicas=1,
+            type=f"proc{i}",
+            command="foo",
+            status=Status(replicas=1, success=1) if i == 0 else None,
+            instances=[
+                PlainInstance(name=f"proc{i}-foo", version=1, process_type=f"proc{i}", ready=web_ready and i == 0)
+            ],
+        )
+        for i in range(count)
+    ]
+
+
+def sorted_processes(processes):
+    return sorted(processes, key=lambda p: p.name)
+
+
+def test_pack_process():
+    for process in make_processes():
+        assert unpack_process(pack_process(process)) == process
+
+
+class TestProcessesSnapshotStoreEncoding:
+    def test_ignore_pickled_value(self, bk_stag_env, process):
+        store = ProcessesSnapshotStore(bk_stag_env)
+        store.redis_db.set(store.rkey, pickle.dumps([process]))
+        assert store.get() is None
+
+    def test_skip_unchanged(self, bk_stag_env):
+        ProcessesSnapshotStore(bk_stag_env).save(make_processes())
+
+        store = ProcessesSnapshotStore(bk_stag_env)
+        assert store.get() is not None
+        store.redis_db.delete(store.rkey)
+        # The processes are the same with the loaded ones, nothing will be written
+        store.save(make_processes())
+        assert store.redis_db.get(store.rkey) is None
+
+        store.save(make_processes(web_ready=True))
+        assert sorted_processes(store.get()) == make_processes(web_ready=True)
+
+    def test_delta(self, bk_stag_env):
+        ProcessesSnapshotStore(bk_stag_env, delta_enabled=True).save(make_processes())
+
+        store = ProcessesSnapshotStore(bk_stag_env, delta_enabled=True)
+        base_value = store.redis_db.get(store.rkey)
+        store.get()
+        store.save(make_processes(web_ready=True))
+        # Only the delta was written, the full snapshot stays unchanged
+        assert store.redis_db.get(store.rkey) == base_value
+        assert store.redis_db.get(store.delta_rkey) is not None
+        assert sorted_processes(ProcessesSnapshotStore(bk_stag_env).get()) == make_processes(web_ready=True)
+
+    def test_delta_too_many_changes(self, bk_stag_env):
+        ProcessesSnapshotStore(bk_stag_env, delta_enabled=True).save(make_processes())
+
+        store = ProcessesSnapshotStore(bk_stag_env, delta_enabled=True)
+        store.get()
+        store.save(make_processes(count=1))
+        assert store.redis_db.get(store.delta_rkey) is None
+        snapshot = ProcessesSnapshotStore(bk_stag_env).get()
+        assert snapshot is not None
+        assert list(snapshot) == make_processes(count=1)
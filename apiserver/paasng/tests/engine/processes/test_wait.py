@@ -28,6 +28,7 @@ import pytest
 from blue_krill.async_utils.poll_task import PollingMetadata, PollingStatus
 from django.dispatch import receiver
 
+from paas_wl.workloads.processes.processes import ProcessesSnapshot
 from paasng.engine.deploy.bg_wait.wait_deployment import (
     AbortedDetails,
     AbortedDetailsPolicy,
@@ -79,7 +80,9 @@ class TestDynamicReadyTimeoutPolicy:
     def test_evaluate(self, desired_replicas, already_waited, desired_result, process):
         process.replicas = desired_replicas
         assert (
-            DynamicReadyTimeoutPolicy().evaluate([process], already_waited=already_waited, extra_params={})
+            DynamicReadyTimeoutPolicy().evaluate(
+                ProcessesSnapshot([process]), already_waited=already_waited, extra_params={}
+            )
             is desired_result
         )
 
@@ -171,22 +174,29 @@ class TestTooManyRestartsPolicy:
     def test_evaluate(self, restart_count, instance_has_different_version, desired_result, process, instance):
         instance.version = (process.version + 1) if instance_has_different_version else process.version
         instance.restart_count = restart_count
-        assert TooManyRestartsPolicy().evaluate([process], already_waited=0, extra_params={}) is desired_result
+        assert (
+            TooManyRestartsPolicy().evaluate(ProcessesSnapshot([process]), already_waited=0, extra_params={})
+            is desired_result
+        )
 
 
 class TestUserInterruptedPolicy:
     def test_no_deployment_id(self):
-        ret = UserInterruptedPolicy().evaluate([], 0, extra_params={})
+        ret = UserInterruptedPolicy().evaluate(ProcessesSnapshot([]), 0, extra_params={})
         assert ret is False
 
     def test_wrong_deployment_id(self):
-        ret = UserInterruptedPolicy().evaluate([], 0, extra_params={'deployment_id': uuid.uuid4().hex})
+        ret = UserInterruptedPolicy().evaluate(
+            ProcessesSnapshot([]), 0, extra_params={'deployment_id': uuid.uuid4().hex}
+        )
         assert ret is False
 
     def test_int_requested(self, bk_deployment):
         bk_deployment.release_int_requested_at = datetime.datetime.now()
         bk_deployment.save()
-        ret = UserInterruptedPolicy().evaluate([], 0, extra_params={'deployment_id': bk_deployment.pk})
+        ret = UserInterruptedPolicy().evaluate(
+            ProcessesSnapshot([]), 0, extra_params={'deployment_id': bk_deployment.pk}
+        )
         assert ret is True
 
 
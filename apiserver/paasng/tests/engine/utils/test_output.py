@@ -16,11 +16,16 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
+import json
+from typing import List
 from unittest import mock
 
 import pytest
+from blue_krill.redis_tools.messaging import StreamChannel, StreamChannelSubscriber
 
 from paasng.engine.utils.output import ConsoleStream, ModelStream, RedisWithModelStream
+from paasng.platform.core.storages.redisdb import get_default_redis
+from tests.utils.helpers import generate_random_string
 
 pytestmark = pytest.mark.django_db(databases=['default', 'workloads'])
 
@@ -53,11 +58,25 @@ class TestConsoleStream:
         assert "".join(line) == "write_message\n"
 
 
+@pytest.fixture
+def stream_channel():
+    channel = StreamChannel(generate_random_string(), redis_db=get_default_redis())
+    channel.initialize()
+    yield channel
+    channel.destroy()
+
+
+def get_published_lines(channel: StreamChannel) -> List[str]:
+    events = StreamChannelSubscriber(channel.channel_id, redis_db=channel.redis_db).get_history_events()
+    return [json.loads(event["data"])["line"] for event in events if event["event"] == "msg"]
+
+
 class TestMixStream:
-    def test_write_message(self, build_proc):
-        bps = RedisWithModelStream(build_proc, mock.MagicMock())
+    def test_write_message(self, build_proc, stream_channel):
+        bps = RedisWithModelStream(build_proc, stream_channel)
         bps.write_message("message")
         bps.write_message("write \n message test")
+        bps.flush()
         assert build_proc.output_stream.lines.count() == 2
         assert list(build_proc.output_stream.lines.values_list("line", flat=True)) == [
             "message\n",
@@ -67,3 +86,32 @@ class TestMixStream:
     def test_write_title(self, build_proc):
         RedisWithModelStream(build_proc, mock.MagicMock()).write_title("title")
         assert build_proc.output_stream.lines.count() == 0, "title should not be saved"
+
+    def test_write_message_buffered(self, build_proc, stream_channel):
+        bps = RedisWithModelStream(build_proc, stream_channel)
+        bps.max_buffered_lines = 3
+        bps.flush_interval = 3600
+        for i in range(4):
+            bps.write_message(f"line-{i}")
+
+        assert build_proc.output_stream.lines.count() == 3
+        assert get_published_lines(stream_channel) == [f"line-{i}" for i in range(3)]
+
+        bps.close()
+        assert list(build_proc.output_stream.lines.values_list("line", flat=True)) == [f"line-{i}\n" for i in range(4)]
+        assert get_published_lines(stream_channel) == [f"line-{i}" for i in range(4)]
+
+    def test_write_title_flushes(self, build_proc, stream_channel):
+        bps = RedisWithModelStream(build_proc, stream_channel)
+        bps.flush_interval = 3600
+        bps.write_message("message")
+        assert build_proc.output_stream.lines.count() == 0
+        assert get_published_lines(stream_channel) == []
+
+        bps.write_title("title")
+        assert build_proc.output_stream.lines.count() == 1
+        assert get_published_lines(stream_channel) == ["message"]
+        events = StreamChannelSubscriber(stream_channel.channel_id, redis_db=get_default_redis()).get_history_events()
+        assert [event["event"] for event in events] == ["msg", "title"]
+        # Event ids are continuous, same as publishing one by one
+        assert [event["id"] for event in events] == [2, 3]
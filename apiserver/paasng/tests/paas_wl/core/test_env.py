@@ -18,7 +18,7 @@ to the current version of the project delivered to anyone in the future.
 """
 import pytest
 
-from paas_wl.core.env import env_is_running
+from paas_wl.core.env import EnvIsRunningHub, env_is_running
 from tests.paas_wl.cnative.specs.utils import create_cnative_deploy
 from tests.paas_wl.workloads.conftest import create_release
 
@@ -50,3 +50,22 @@ class TestEnvIsRunning:
         bk_stag_env.is_offlined = True
         bk_stag_env.save()
         assert env_is_running(bk_stag_env) is False
+
+
+class TestPrefetchEnvIsRunning:
+    def test_default_app(self, bk_app, bk_stag_env, bk_prod_env, bk_user, with_wl_apps):
+        create_release(bk_stag_env, bk_user, failed=False)
+        create_release(bk_prod_env, bk_user, failed=True)
+
+        EnvIsRunningHub.prefetch([bk_stag_env, bk_prod_env])
+        assert getattr(bk_stag_env, EnvIsRunningHub.prefetched_attr) is True
+        assert getattr(bk_prod_env, EnvIsRunningHub.prefetched_attr) is False
+        assert env_is_running(bk_stag_env) is True
+        assert env_is_running(bk_prod_env) is False
+
+    def test_cnative_app(self, bk_cnative_app, bk_stag_env, bk_prod_env, bk_user):
+        create_cnative_deploy(bk_stag_env, bk_user)
+
+        EnvIsRunningHub.prefetch([bk_stag_env, bk_prod_env])
+        assert env_is_running(bk_stag_env) is True
+        assert env_is_running(bk_prod_env) is False
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+from unittest import mock
+
+import pytest
+
+from paas_wl.monitoring.metrics.cache import MetricsRangeCache
+
+
+class FakeBackend:
+    def __init__(self):
+        self.calls = []
+
+    def fetch(self, start, end):
+        self.calls.append((start, end))
+        return {'pod-a': [[ts, str(ts)] for ts in range(start, end + 1, 15)]}
+
+
+def expected_points(start, end):
+    return [[ts, str(ts)] for ts in range(start, end + 1, 15)]
+
+
+class TestMetricsRangeCache:
+    @pytest.fixture(autouse=True)
+    def _now(self):
+        with mock.patch('paas_wl.monitoring.metrics.cache.time.time', return_value=10000):
+            yield
+
+    def test_closed_buckets_cached(self):
+        cache, backend = MetricsRangeCache(bucket_steps=4), FakeBackend()
+        assert cache.query('ns', 'up', '9000', '9600', '15s', backend.fetch)['pod-a'] == expected_points(9000, 9600)
+        # Query again with unaligned timestamps and different whitespaces, only the trailing bucket is requested
+        assert cache.query('ns', ' up ', '9007', '9610', '15s', backend.fetch)['pod-a'] == expected_points(9000, 9600)
+        assert backend.calls == [(9000, 9600), (9600, 9600)]
+
+    def test_open_buckets_not_cached(self):
+        cache, backend = MetricsRangeCache(bucket_steps=4), FakeBackend()
+        cache.query('ns', 'up', '9900', '9990', '15s', backend.fetch)
+        cache.query('ns', 'up', '9900', '9990', '15s', backend.fetch)
+        assert backend.calls == [(9900, 9990), (9900, 9990)]
+
+    def test_fetch_whole_first_bucket(self):
+        cache, backend = MetricsRangeCache(bucket_steps=4), FakeBackend()
+        results = cache.query('ns', 'up', '9030', '9300', '15s', backend.fetch)
+        assert results['pod-a'] == expected_points(9030, 9300)
+        assert backend.calls == [(9000, 9300)]
+
+    def test_namespace_isolated(self):
+        cache, backend = MetricsRangeCache(bucket_steps=4), FakeBackend()
+        cache.query('ns1', 'up', '9000', '9300', '15s', backend.fetch)
+        cache.query('ns2', 'up', '9000', '9300', '15s', backend.fetch)
+        assert len(backend.calls) == 2
+
+    def test_empty_results_not_cached(self):
+        cache = MetricsRangeCache(bucket_steps=4)
+        fetch = mock.Mock(return_value={})
+        cache.query('ns', 'up', '9000', '9300', '15s', fetch)
+        cache.query('ns', 'up', '9000', '9300', '15s', fetch)
+        assert fetch.call_count == 2
+
+    def test_lru_eviction(self):
+        cache, backend = MetricsRangeCache(bucket_steps=4, max_entries=2), FakeBackend()
+        cache.query('ns', 'up', '9000', '9239', '15s', backend.fetch)
+        assert len(cache._entries) == 2
+        assert [key[-1] for key in cache._entries] == [9120, 9180]
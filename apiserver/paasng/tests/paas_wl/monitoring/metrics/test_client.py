@@ -118,6 +118,24 @@ class TestPromResult(TestCase):
         r4 = pr.get_raw_by_container_name()
         assert r4 and len(r4['values']) == 3
 
+    def test_get_raws_by_instance(self):
+        pr = PromResult.from_resp(
+            raw_resp={
+                "status": "success",
+                "data": {
+                    "resultType": "matrix",
+                    "result": [
+                        {"metric": {"container_name": "web", "pod_name": "pod-a"}, "values": [[1, "1"]]},
+                        {"metric": {"container_name": "web", "pod_name": "pod-b"}, "values": [[1, "2"]]},
+                        {"metric": {"container": "sidecar", "pod": "pod-b"}, "values": [[1, "3"]]},
+                    ],
+                },
+            }
+        )
+        raws = pr.get_raws_by_instance("web")
+        assert {name: raw['values'] for name, raw in raws.items()} == {"pod-a": [[1, "1"]], "pod-b": [[1, "2"]]}
+        assert pr.get_raws_by_instance("sidecar")["pod-b"]['values'] == [[1, "3"]]
+
     def test_response_change(self):
         """测试返回值变动（只测试增）"""
         fake_range_result = {
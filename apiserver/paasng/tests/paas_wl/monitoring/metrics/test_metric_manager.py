@@ -52,8 +52,12 @@ class TestResourceMetricManager:
     def test_normal_gen_series_query(self, metric_client):
         manager = ResourceMetricManager(process=self.web_process, metric_client=metric_client, bcs_cluster_id='')
         fake_metrics_value = [[1234, 1234], [1234, 1234], [1234, 1234]]
-        query_range_mock = Mock(return_value=fake_metrics_value)
-        with patch('paas_wl.monitoring.metrics.clients.BkMonitorMetricClient._query_range', query_range_mock):
+        query_range_mock = Mock(
+            return_value={instance.name: fake_metrics_value for instance in self.web_process.instances}
+        )
+        with patch(
+            'paas_wl.monitoring.metrics.clients.BkMonitorMetricClient._query_range_by_instances', query_range_mock
+        ):
             result = list(
                 manager.get_all_instances_metrics(
                     time_range=MetricSmartTimeRange(start="2013-05-11 21:23:58", end="2013-05-11 21:25:58"),
@@ -65,12 +69,16 @@ class TestResourceMetricManager:
             assert result[0].results[0].type_name == "mem"
             assert result[0].results[0].results[0].type_name == "current"
             assert result[0].results[0].results[0].results == fake_metrics_value
+            # One query for each series type, no matter how many instances
+            assert query_range_mock.call_count == 2
 
     def test_empty_gen_series_query(self, metric_client):
         manager = ResourceMetricManager(process=self.web_process, metric_client=metric_client, bcs_cluster_id='')
         fake_metrics_value: List = []
-        query_range_mock = Mock(return_value=fake_metrics_value)
-        with patch('paas_wl.monitoring.metrics.clients.BkMonitorMetricClient._query_range', query_range_mock):
+        query_range_mock = Mock(return_value={})
+        with patch(
+            'paas_wl.monitoring.metrics.clients.BkMonitorMetricClient._query_range_by_instances', query_range_mock
+        ):
             result = list(
                 manager.get_all_instances_metrics(
                     time_range=MetricSmartTimeRange(start="2013-05-11 21:23:58", end="2013-05-11 21:25:58"),
@@ -87,7 +95,9 @@ class TestResourceMetricManager:
         FakeResponse = namedtuple('FakeResponse', 'status_code')
 
         query_range_mock = Mock(side_effect=RequestMetricBackendError(FakeResponse(status_code=400)))
-        with patch('paas_wl.monitoring.metrics.clients.BkMonitorMetricClient._query_range', query_range_mock):
+        with patch(
+            'paas_wl.monitoring.metrics.clients.BkMonitorMetricClient._query_range_by_instances', query_range_mock
+        ):
             result = list(
                 manager.get_all_instances_metrics(
                     time_range=MetricSmartTimeRange(start="2013-05-11 21:23:58", end="2013-05-11 21:25:58"),
@@ -114,6 +124,34 @@ class TestResourceMetricManager:
             f'pod_name="{settings.DEFAULT_REGION_NAME}-test-test-stag-asdfasdf",container_name!="POD",'
         )
 
+    def test_batch_query_split_instances(self, metric_client):
+        manager = ResourceMetricManager(process=self.web_process, metric_client=metric_client, bcs_cluster_id='')
+        names = [instance.name for instance in self.web_process.instances]
+        query_range_mock = Mock(return_value={names[0]: [[1, '1']], names[1]: [[2, '2']]})
+        with patch(
+            'paas_wl.monitoring.metrics.clients.BkMonitorMetricClient._query_range_by_instances', query_range_mock
+        ), patch('paas_wl.monitoring.metrics.models.BATCH_QUERY_MAX_INSTANCES', 1):
+            result = manager.get_all_instances_metrics(
+                time_range=MetricSmartTimeRange(start="2013-05-11 21:23:58", end="2013-05-11 21:25:58"),
+                resource_types=[MetricsResourceType.MEM, MetricsResourceType.CPU],
+                series_type=MetricsSeriesType.CURRENT,
+            )
+
+        # 2 resource types * 1 series type * 2 batches
+        assert query_range_mock.call_count == 4
+        assert [r.instance_name for r in result] == names
+        assert result[0].results[1].type_name == "cpu"
+        assert result[0].results[1].results[0].results == [[1, '1']]
+        assert result[1].results[1].results[0].results == [[2, '2']]
+
+    def test_gen_batch_query_promql(self, metric_client):
+        promql = metric_client.get_batch_query_promql(
+            MetricsResourceType.MEM, MetricsSeriesType.CURRENT, ['foo-1', 'bar.2'], 'c1'
+        )
+        assert promql.startswith(
+            'sum by(pod_name, container_name)(container_memory_working_set_bytes{pod_name=~"foo-1|bar\\\\.2",'
+        )
+
     def test_gen_all_series_query(self, metric_client):
         manager = ResourceMetricManager(process=self.web_process, metric_client=metric_client, bcs_cluster_id='')
         queries = manager.gen_all_series_query(
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+from unittest import mock
+
+import pytest
+
+from paas_wl.platform.applications.identity import (
+    get_current_identity_map,
+    get_wl_app,
+    get_wl_apps,
+    wl_app_identity_scope,
+)
+from paas_wl.platform.applications.models import WlApp
+from tests.paas_wl.utils.wl_app import create_wl_app
+
+pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
+
+
+class TestWlAppIdentityScope:
+    def test_no_scope(self):
+        wl_app = create_wl_app()
+        assert get_current_identity_map() is None
+        assert get_wl_app(wl_app.region, wl_app.name) is not get_wl_app(wl_app.region, wl_app.name)
+
+    def test_memoized(self):
+        wl_app = create_wl_app()
+        with wl_app_identity_scope():
+            obj = get_wl_app(wl_app.region, wl_app.name)
+            with mock.patch.object(WlApp.objects, "get") as mocked_get:
+                assert get_wl_app(wl_app.region, wl_app.name) is obj
+                assert not mocked_get.called
+        assert get_current_identity_map() is None
+
+    def test_nested_scope(self):
+        with wl_app_identity_scope() as outer, wl_app_identity_scope() as inner:
+            assert outer is inner
+        assert get_current_identity_map() is None
+
+    def test_get_many(self):
+        wl_apps = [create_wl_app(), create_wl_app()]
+        keys = [(wl_app.region, wl_app.name) for wl_app in wl_apps]
+        with wl_app_identity_scope():
+            results = get_wl_apps(keys + [("invalid-region", "invalid-name")])
+            assert set(results) == set(keys)
+            assert get_wl_app(*keys[0]) is results[keys[0]]
+
+    def test_discard_on_save(self):
+        wl_app = create_wl_app()
+        with wl_app_identity_scope():
+            obj = get_wl_app(wl_app.region, wl_app.name)
+            obj.save()
+            assert get_wl_app(wl_app.region, wl_app.name) is not obj
+
+    def test_discard_on_delete(self):
+        wl_app = create_wl_app()
+        with wl_app_identity_scope():
+            get_wl_app(wl_app.region, wl_app.name)
+            WlApp.objects.get(pk=wl_app.pk).delete()
+            with pytest.raises(WlApp.DoesNotExist):
+                get_wl_app(wl_app.region, wl_app.name)
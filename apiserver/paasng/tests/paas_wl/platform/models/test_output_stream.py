@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+from typing import Dict
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+
+from paas_wl.platform.applications.models import OutputStream, OutputStreamChunk
+from paas_wl.platform.applications.output_archive import archive_output_stream
+
+pytestmark = pytest.mark.django_db(databases=["workloads"])
+
+
+@pytest.fixture
+def output_stream():
+    obj = OutputStream.objects.create()
+    obj.write_lines((f'line-{i}', 'STDERR' if i % 2 else 'STDOUT') for i in range(10))
+    return obj
+
+
+class TestArchiveOutputStream:
+    def test_db(self, output_stream):
+        expected = [f'line-{i}\n' for i in range(10)]
+        assert [x.line for x in output_stream.get_lines()] == expected
+
+        assert archive_output_stream(output_stream, storage='db', chunk_lines=3) == 10
+        assert output_stream.lines.count() == 0
+        assert OutputStreamChunk.objects.filter(output_stream=output_stream).count() == 4
+
+        output_stream.refresh_from_db()
+        assert [x.line for x in output_stream.get_lines()] == expected
+
+    @pytest.mark.parametrize(
+        'offset, limit, expected',
+        [
+            (4, 3, ['line-4\n', 'line-5\n', 'line-6\n']),
+            (3, 3, ['line-3\n', 'line-4\n', 'line-5\n']),
+            (8, None, ['line-8\n', 'line-9\n']),
+            (9, 5, ['line-9\n']),
+            (10, 5, []),
+        ],
+    )
+    def test_read_page(self, output_stream, offset, limit, expected):
+        assert [x.line for x in output_stream.get_lines(offset, limit)] == expected
+
+        archive_output_stream(output_stream, storage='db', chunk_lines=3)
+        output_stream.refresh_from_db()
+        assert output_stream.count_lines() == 10
+        with mock.patch.object(
+            OutputStreamChunk, 'load_lines', autospec=True, side_effect=OutputStreamChunk.load_lines
+        ) as load_lines:
+            assert [x.line for x in output_stream.get_lines(offset, limit)] == expected
+        # Only the chunks overlapping with the page were decompressed
+        expected_starts = sorted({(offset + i) // 3 * 3 for i in range(len(expected))})
+        assert [call.args[0].start_line for call in load_lines.call_args_list] == expected_starts
+
+    def test_stream_preserved(self, output_stream):
+        archive_output_stream(output_stream, storage='db', chunk_lines=3)
+        lines = output_stream.get_lines()
+        assert [x.stream for x in lines[1:3]] == ['STDERR', 'STDOUT']
+        assert lines[0].created is not None
+
+    def test_blob(self, output_stream):
+        blobs: Dict[str, bytes] = {}
+        store = mock.MagicMock()
+        store.upload_fileobj.side_effect = lambda fh, key: blobs.__setitem__(key, fh.getvalue())
+        store.download_fileobj.side_effect = lambda key, fh: fh.write(blobs[key])
+        with mock.patch('paas_wl.platform.applications.models.misc.make_blob_store', return_value=store):
+            archive_output_stream(output_stream, storage='blob', chunk_lines=4)
+            assert len(blobs) == 3
+            assert [x.line for x in output_stream.get_lines()][3:6] == ['line-3\n', 'line-4\n', 'line-5\n']
+
+            output_stream.delete()
+            assert store.delete_file.call_count == 3
+
+    def test_blob_upload_failed(self, output_stream):
+        store = mock.MagicMock()
+        store.upload_fileobj.side_effect = [None, RuntimeError('upload failed')]
+        with mock.patch('paas_wl.platform.applications.models.misc.make_blob_store', return_value=store):
+            with pytest.raises(RuntimeError):
+                archive_output_stream(output_stream, storage='blob', chunk_lines=4)
+
+        output_stream.refresh_from_db()
+        assert output_stream.archived_at is None
+        assert output_stream.chunks.count() == 0
+        assert output_stream.lines.count() == 10
+
+    def test_archive_twice(self, output_stream):
+        assert archive_output_stream(output_stream, storage='db') == 10
+        assert archive_output_stream(output_stream, storage='db') == 0
+
+
+def test_archive_command(output_stream):
+    OutputStream.objects.filter(pk=output_stream.pk).update(created=output_stream.created.replace(year=2000))
+    call_command('archive_output_streams', days=30, batch_size=1, storage='db')
+
+    output_stream.refresh_from_db()
+    assert output_stream.archived_at is not None
+    assert len(output_stream.get_lines()) == 10
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+from unittest import mock
+
+import pytest
+from kubernetes.client import ApiClient
+
+from paas_wl.resources.base.base import EnhancedApiClient, KubeClientRegistry
+from tests.conftest import CLUSTER_NAME_FOR_TESTING
+
+pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
+
+
+class TestKubeClientRegistry:
+    @pytest.fixture
+    def registry(self):
+        return KubeClientRegistry(discovery_ttl=60)
+
+    def test_api_client_reused(self, registry):
+        client = registry.get_api_client(CLUSTER_NAME_FOR_TESTING)
+        assert isinstance(client, EnhancedApiClient)
+        assert client.cluster_name == CLUSTER_NAME_FOR_TESTING
+        assert registry.get_api_client(CLUSTER_NAME_FOR_TESTING) is client
+
+    def test_invalidate(self, registry):
+        client = registry.get_api_client(CLUSTER_NAME_FOR_TESTING)
+        registry.invalidate(CLUSTER_NAME_FOR_TESTING)
+        assert registry.get_api_client(CLUSTER_NAME_FOR_TESTING) is not client
+
+    def test_dynamic_client_shared(self, registry):
+        client = registry.get_api_client(CLUSTER_NAME_FOR_TESTING)
+        with mock.patch("paas_wl.resources.base.base.CoreDynamicClient") as mocked_cls:
+            mocked_cls.side_effect = lambda *args, **kwargs: mock.MagicMock()
+            dynamic_client = registry.get_dynamic_client(client)
+            assert registry.get_dynamic_client(client) is dynamic_client
+            assert mocked_cls.call_count == 1
+
+    def test_dynamic_client_expired(self):
+        registry = KubeClientRegistry(discovery_ttl=0)
+        client = registry.get_api_client(CLUSTER_NAME_FOR_TESTING)
+        with mock.patch("paas_wl.resources.base.base.CoreDynamicClient") as mocked_cls:
+            mocked_cls.side_effect = lambda *args, **kwargs: mock.MagicMock()
+            dynamic_client = registry.get_dynamic_client(client)
+            new_dynamic_client = registry.get_dynamic_client(client)
+            assert new_dynamic_client is not dynamic_client
+            # The stale resources should be discovered again
+            assert new_dynamic_client.resources.invalidate_cache.called
+
+    def test_dynamic_client_not_managed(self, registry):
+        with mock.patch("paas_wl.resources.base.base.CoreDynamicClient") as mocked_cls:
+            mocked_cls.side_effect = lambda *args, **kwargs: mock.MagicMock()
+            client = ApiClient()
+            assert registry.get_dynamic_client(client) is not registry.get_dynamic_client(client)
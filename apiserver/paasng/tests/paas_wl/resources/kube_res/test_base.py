@@ -31,6 +31,7 @@ from paas_wl.resources.kube_res.base import (
     AppEntitySerializer,
     EntitySerializerPicker,
     GVKConfig,
+    GVKConfigRegistry,
 )
 from paas_wl.resources.kube_res.exceptions import APIServerVersionIncompatible
 
@@ -190,3 +191,73 @@ class TestEntitySerializerPicker:
 
         with pytest.raises(APIServerVersionIncompatible):
             picker.get_transformer(DummyObj, self.gvk_config)
+
+
+class TestGVKConfigRegistry:
+    @pytest.fixture()
+    def gvk_config(self):
+        return GVKConfig(
+            server_version='v1.20.0',
+            kind='Namespace',
+            preferred_apiversion='v1',
+            available_apiversions=['v1'],
+        )
+
+    @pytest.fixture()
+    def loader(self, gvk_config):
+        return mock.MagicMock(return_value=gvk_config)
+
+    def test_get_gvk_config(self, gvk_config, loader):
+        registry = GVKConfigRegistry(ttl=60)
+        assert registry.get_gvk_config('default', 'Namespace', loader) == gvk_config
+        assert registry.get_gvk_config('default', 'Namespace', loader) == gvk_config
+        assert loader.call_count == 1
+
+        registry.get_gvk_config('default', 'Pod', loader)
+        registry.get_gvk_config('another', 'Namespace', loader)
+        assert loader.call_count == 3
+
+    def test_expired(self, loader):
+        registry = GVKConfigRegistry(ttl=0)
+        registry.get_gvk_config('default', 'Namespace', loader)
+        registry.get_gvk_config('default', 'Namespace', loader)
+        assert loader.call_count == 2
+
+    def test_invalidate(self, loader):
+        registry = GVKConfigRegistry(ttl=60)
+        registry.get_gvk_config('default', 'Namespace', loader)
+        registry.get_gvk_config('another', 'Namespace', loader)
+
+        registry.invalidate('default')
+        registry.get_gvk_config('default', 'Namespace', loader)
+        registry.get_gvk_config('another', 'Namespace', loader)
+        assert loader.call_count == 3
+
+        registry.invalidate()
+        registry.get_gvk_config('another', 'Namespace', loader)
+        assert loader.call_count == 4
+
+    def test_get_transformer(self, gvk_config, loader):
+        registry = GVKConfigRegistry(ttl=60)
+        factory = mock.MagicMock(side_effect=lambda gvk_config: DummySerializer(DummyObj, gvk_config))
+
+        slz = registry.get_transformer('default', 'Namespace', loader, key=(DummyObj, 'serializer'), factory=factory)
+        assert isinstance(slz, DummySerializer)
+        assert slz.gvk_config == gvk_config
+        assert (
+            registry.get_transformer('default', 'Namespace', loader, key=(DummyObj, 'serializer'), factory=factory)
+            is slz
+        )
+        assert factory.call_count == 1
+        assert loader.call_count == 1
+
+        registry.get_transformer('default', 'Namespace', loader, key=(DummyObj, 'deserializer'), factory=factory)
+        assert factory.call_count == 2
+
+    def test_get_transformer_incompatible(self, loader):
+        registry = GVKConfigRegistry(ttl=60)
+        factory = mock.MagicMock(side_effect=APIServerVersionIncompatible('boom'))
+        for _ in range(2):
+            with pytest.raises(APIServerVersionIncompatible):
+                registry.get_transformer('default', 'Namespace', loader, key=(DummyObj, 'serializer'), factory=factory)
+        assert factory.call_count == 2
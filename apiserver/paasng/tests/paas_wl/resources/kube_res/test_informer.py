@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+from typing import Dict, Optional
+from unittest import mock
+
+import pytest
+from kubernetes.client.exceptions import ApiException
+from kubernetes.dynamic import ResourceField, ResourceInstance
+
+from paas_wl.resources.kube_res.informer import InformerStore, KubeInformer
+
+
+def make_obj(name: str, resource_version: str, labels: Optional[Dict] = None) -> ResourceInstance:
+    return ResourceInstance(
+        None,
+        {
+            'apiVersion': 'v1',
+            'kind': 'Pod',
+            'metadata': {'name': name, 'resourceVersion': resource_version, 'labels': labels or {}},
+        },
+    )
+
+
+class TestInformerStore:
+    @pytest.fixture
+    def store(self):
+        store = InformerStore()
+        store.replace(
+            [make_obj('foo', '1', {'app': 'a', 'type': 'web'}), make_obj('bar', '2', {'app': 'a', 'type': 'worker'})],
+            '10',
+        )
+        return store
+
+    def test_list(self, store):
+        assert [o.metadata.name for o in store.list({}).items] == ['bar', 'foo']
+        assert [o.metadata.name for o in store.list({'app': 'a', 'type': 'web'}).items] == ['foo']
+        assert store.list({'app': 'b'}).items == []
+        assert store.list({}).metadata.resourceVersion == '10'
+
+    def test_upsert(self, store):
+        store.upsert(make_obj('foo', '11', {'app': 'a', 'type': 'worker'}))
+        assert [o.metadata.name for o in store.list({'type': 'worker'}).items] == ['bar', 'foo']
+        assert store.list({'type': 'web'}).items == []
+        assert store.resource_version == '11'
+
+    def test_delete(self, store):
+        store.delete(make_obj('foo', '12', {'app': 'a', 'type': 'web'}))
+        assert [o.metadata.name for o in store.list({'app': 'a'}).items] == ['bar']
+        assert store.resource_version == '12'
+
+
+class TestKubeInformer:
+    @pytest.fixture
+    def kres_client(self):
+        client = mock.MagicMock(kind='Pod')
+        client.ops_label.list.return_value = mock.MagicMock(
+            items=[make_obj('foo', '1', {'app': 'a'})], metadata=ResourceField(params={'resourceVersion': '1'})
+        )
+        return client
+
+    @pytest.fixture
+    def informer(self, kres_client):
+        return KubeInformer(kres_client, 'default', idle_timeout=60)
+
+    def test_list_and_watch(self, informer, kres_client):
+        kres_client.ops_label.create_watch_stream.return_value = iter(
+            [
+                {'type': 'ADDED', 'object': make_obj('bar', '2', {'app': 'a'})},
+                {'type': 'DELETED', 'object': make_obj('foo', '3', {'app': 'a'})},
+            ]
+        )
+        informer._list()
+        informer._watch()
+
+        assert [o.metadata.name for o in informer.list({'app': 'a'}).items] == ['bar']
+        assert informer.store.resource_version == '3'
+        assert kres_client.ops_label.create_watch_stream.call_args.kwargs['resource_version'] == '1'
+
+    def test_expired(self, informer, kres_client):
+        kres_client.ops_label.create_watch_stream.side_effect = ApiException(status=410)
+        informer._list()
+        informer._watch()
+        # The store should be listed again in next round
+        assert informer._healthy is False
+
+    def test_not_fresh_before_started(self, informer):
+        informer._list()
+        assert informer.is_fresh() is False
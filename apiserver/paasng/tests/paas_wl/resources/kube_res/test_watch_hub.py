@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+from typing import Optional
+from unittest import mock
+
+import pytest
+from kubernetes.client.exceptions import ApiException
+from kubernetes.dynamic import ResourceField, ResourceInstance
+
+from paas_wl.resources.kube_res.watch_hub import HubEvent, HubSubscriber, WatchHub
+
+# The original main loop, `WatchHub._run` is patched in most tests to avoid starting real watch requests
+_run_hub = WatchHub._run
+
+
+def make_event(type_: str, name: str, resource_version: int) -> HubEvent:
+    obj = ResourceInstance(
+        None, {'apiVersion': 'v1', 'kind': 'Pod', 'metadata': {'name': name, 'resourceVersion': str(resource_version)}}
+    )
+    return HubEvent(type=type_, resource_version=resource_version, object=obj)
+
+
+def identity(event: HubEvent) -> Optional[HubEvent]:
+    return event
+
+
+@pytest.fixture
+def hub():
+    kres_client = mock.MagicMock(kind='Pod')
+    kres_client.ops_label.list.return_value = mock.MagicMock(metadata=ResourceField(params={'resourceVersion': '10'}))
+    with mock.patch.object(WatchHub, '_run'):
+        yield WatchHub(kres_client, 'default', history_size=3)
+
+
+class TestWatchHub:
+    def test_dispatch(self, hub):
+        subscriber = HubSubscriber()
+        subscriber.subscribe(hub, identity)
+        hub._dispatch(make_event('ADDED', 'foo', 11))
+        hub._dispatch(make_event('MODIFIED', 'foo', 12))
+
+        events = list(subscriber.iter_events(timeout_seconds=0.1))
+        assert [e.resource_version for e in events] == [11, 12]
+        # Subscriber has been detached
+        assert hub._subscribers == {}
+
+    def test_cursor(self, hub):
+        HubSubscriber().subscribe(hub, identity, resource_version=10)
+        hub._dispatch(make_event('ADDED', 'foo', 11))
+        hub._dispatch(make_event('ADDED', 'bar', 12))
+
+        # Replay the events in history
+        subscriber = HubSubscriber()
+        subscriber.subscribe(hub, identity, resource_version=11)
+        # Events which are not newer than the cursor should be skipped
+        late_subscriber = HubSubscriber()
+        late_subscriber.subscribe(hub, identity, resource_version=13)
+        hub._dispatch(make_event('ADDED', 'baz', 13))
+        hub._dispatch(make_event('ADDED', 'qux', 14))
+
+        assert [e.resource_version for e in subscriber.iter_events(0.1)] == [12, 13, 14]
+        assert [e.resource_version for e in late_subscriber.iter_events(0.1)] == [14]
+
+    def test_too_old_resource_version(self, hub):
+        HubSubscriber().subscribe(hub, identity, resource_version=10)
+        for rv in range(11, 16):
+            hub._dispatch(make_event('ADDED', 'foo', rv))
+
+        subscriber = HubSubscriber()
+        subscriber.subscribe(hub, identity, resource_version=11)
+        events = list(subscriber.iter_events(0.1))
+        assert len(events) == 1
+        assert events[0].type == 'ERROR'
+
+    def test_slow_subscriber(self, hub):
+        subscriber = HubSubscriber(max_buffer_size=2)
+        subscriber.subscribe(hub, identity, resource_version=10)
+        for rv in range(11, 15):
+            hub._dispatch(make_event('ADDED', 'foo', rv))
+
+        assert subscriber not in hub._subscribers
+        events = list(subscriber.iter_events(0.1))
+        assert [e.type for e in events] == ['ERROR']
+
+    def test_expired(self, hub):
+        subscriber = HubSubscriber()
+        subscriber.subscribe(hub, identity, resource_version=10)
+        hub._stopped.clear()
+        with mock.patch.object(hub, '_watch', side_effect=ApiException(status=410)):
+            _run_hub(hub)
+
+        assert hub._stopped.is_set()
+        assert [e.type for e in subscriber.iter_events(0.1)] == ['ERROR']
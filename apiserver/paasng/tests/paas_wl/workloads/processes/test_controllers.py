@@ -16,6 +16,7 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
+import time
 from unittest import mock
 
 import pytest
@@ -23,7 +24,7 @@ import pytest
 from paas_wl.platform.applications.models import WlApp
 from paas_wl.platform.applications.models.managers.app_res_ver import AppResVerManager
 from paas_wl.resources.kube_res.base import ResourceField, ResourceList
-from paas_wl.workloads.processes.controllers import list_processes
+from paas_wl.workloads.processes.controllers import list_ns_processes, list_processes
 from paas_wl.workloads.processes.entities import Instance, Process, Runtime, Schedule
 
 pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
@@ -117,3 +118,69 @@ def test_list_processes_without_release(bk_stag_env, wl_app, wl_release, mock_re
     mock_reader.set_instances([Instance(app=wl_app, name="web", process_type="web")])
     wl_release.delete()
     assert len(list_processes(bk_stag_env).processes) == 1
+
+
+def test_list_ns_processes_many_instances(bk_stag_wl_app, bk_prod_wl_app):
+    """A namespace with thousands of instances, each process should only get its own instances"""
+    wl_apps = [bk_stag_wl_app, bk_prod_wl_app]
+    proc_types = [f"proc{i}" for i in range(20)]
+    processes = [make_process(wl_app, proc_type) for wl_app in wl_apps for proc_type in proc_types]
+    # "idle" process has no instances, it will be ignored
+    processes.append(make_process(bk_stag_wl_app, "idle"))
+    instances = [
+        Instance(app=wl_app, name=f"{wl_app.name}-{proc_type}-{i}", process_type=proc_type)
+        for i in range(50)
+        for wl_app in wl_apps
+        for proc_type in proc_types
+    ]
+    metadata = ResourceField({"resourceVersion": "1"})
+
+    with mock.patch(
+        "paas_wl.workloads.processes.readers.ProcessNamespaceScopedReader.list_by_ns_with_mdata",
+        return_value=ResourceList(items=processes, metadata=metadata),
+    ), mock.patch(
+        "paas_wl.workloads.processes.readers.InstanceNamespaceScopeReader.list_by_ns_with_mdata",
+        return_value=ResourceList(items=instances, metadata=metadata),
+    ):
+        ret = list_ns_processes("default", "default").processes
+
+    assert len(ret) == len(wl_apps) * len(proc_types)
+    for process in ret:
+        assert len(process.instances) == 50
+        assert all(inst.app == process.app and inst.process_type == process.type for inst in process.instances)
+
+
+def test_list_ns_processes_linear_time(bk_stag_wl_app, bk_prod_wl_app):
+    """Joining processes and instances should take linear time: when both of them grow 4 times, the time cost
+    should grow about 4 times rather than 16 times.
+    """
+    metadata = ResourceField({"resourceVersion": "1"})
+
+    def measure(proc_count: int) -> float:
+        wl_apps = [bk_stag_wl_app, bk_prod_wl_app]
+        proc_types = [f"proc{i}" for i in range(proc_count)]
+        processes = [make_process(wl_app, proc_type) for wl_app in wl_apps for proc_type in proc_types]
+        instances = [
+            Instance(app=wl_app, name=f"{wl_app.name}-{proc_type}-{i}", process_type=proc_type)
+            for i in range(10)
+            for wl_app in wl_apps
+            for proc_type in proc_types
+        ]
+        with mock.patch(
+            "paas_wl.workloads.processes.readers.ProcessNamespaceScopedReader.list_by_ns_with_mdata",
+            return_value=ResourceList(items=processes, metadata=metadata),
+        ), mock.patch(
+            "paas_wl.workloads.processes.readers.InstanceNamespaceScopeReader.list_by_ns_with_mdata",
+            return_value=ResourceList(items=instances, metadata=metadata),
+        ):
+            costs = []
+            # Take the best of several rounds to reduce the noise
+            for _ in range(5):
+                started_at = time.perf_counter()
+                list_ns_processes("default", "default")
+                costs.append(time.perf_counter() - started_at)
+        return min(costs)
+
+    small, large = measure(50), measure(200)
+    # A quadratic join takes about 16 times, leave enough room for the noise
+    assert large / small < 10
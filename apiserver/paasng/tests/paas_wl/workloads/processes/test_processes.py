@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+import pytest
+
+from paas_wl.workloads.processes.processes import InstancesStat, PlainInstance, PlainProcess, ProcessesSnapshot
+
+
+def make_process(name: str, version: int, replicas: int, instances) -> PlainProcess:
+    return PlainProcess(name=name, version=version, replicas=replicas, type=name, command="foo", instances=instances)
+
+
+@pytest.fixture
+def snapshot():
+    return ProcessesSnapshot(
+        [
+            make_process(
+                "web",
+                2,
+                2,
+                [
+                    PlainInstance(name="web-1", version=2, process_type="web", ready=True, restart_count=1),
+                    PlainInstance(name="web-2", version=2, process_type="web", ready=False, restart_count=4),
+                    PlainInstance(name="web-3", version=1, process_type="web", ready=True, restart_count=9),
+                ],
+            ),
+            make_process("worker", 2, 0, []),
+        ]
+    )
+
+
+class TestProcessesSnapshot:
+    def test_sequence(self, snapshot):
+        assert len(snapshot) == 2
+        assert [p.name for p in snapshot] == ["web", "worker"]
+        assert snapshot[0] is snapshot.get_process("web")
+        assert ProcessesSnapshot.from_processes(snapshot) is snapshot
+        assert list(ProcessesSnapshot.from_processes(snapshot.processes)) == snapshot.processes
+
+    def test_get_process(self, snapshot):
+        assert snapshot.get_process("worker").replicas == 0
+        with pytest.raises(KeyError):
+            snapshot.get_process("beat")
+
+    def test_get_instances(self, snapshot):
+        assert set(snapshot.get_instances("web")) == {"web-1", "web-2", "web-3"}
+        assert snapshot.get_instances("beat") == {}
+
+    def test_get_instances_stat(self, snapshot):
+        assert snapshot.get_instances_stat("web", 2) == InstancesStat(total=2, ready=1, max_restart_count=4)
+        assert snapshot.get_instances_stat("web", 1) == InstancesStat(total=1, ready=1, max_restart_count=9)
+        assert snapshot.get_instances_stat("worker", 2) == InstancesStat()
+
+    @pytest.mark.parametrize(
+        ("web_2_ready", "expected_version", "expected"),
+        [
+            (False, 2, False),
+            (True, 2, True),
+            (True, 1, False),
+        ],
+    )
+    def test_is_all_ready(self, snapshot, web_2_ready, expected_version, expected):
+        snapshot.get_process("web").instances[1].ready = web_2_ready
+        # Rebuild the snapshot since it's counters are precomputed
+        snapshot = ProcessesSnapshot(snapshot.processes)
+        assert snapshot.is_all_ready("web", expected_version) is expected
+        assert snapshot.is_all_ready("web", expected_version) is snapshot.get_process("web").is_all_ready(
+            expected_version
+        )
+
+    def test_diff(self, snapshot):
+        current = ProcessesSnapshot([make_process("web", 3, 1, []), make_process("beat", 1, 1, [])])
+        assert current.diff(snapshot) == ({"beat"}, {"worker"}, {"web"})
+
+    def test_many_instances(self):
+        procs = [
+            make_process(
+                f"proc-{i}",
+                1,
+                100,
+                [PlainInstance(name=f"proc-{i}-{j}", version=1, process_type=f"proc-{i}") for j in range(100)],
+            )
+            for i in range(50)
+        ]
+        snapshot = ProcessesSnapshot(procs)
+        assert all(snapshot.is_all_ready(p.name, 1) for p in snapshot)
+        assert sum(snapshot.get_instances_stat(p.name, 1).total for p in snapshot) == 5000
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+from typing import Dict, List
+
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from kubernetes.dynamic import ResourceInstance
+
+from paas_wl.cnative.specs.constants import (
+    BKAPP_CODE_ANNO_KEY,
+    ENVIRONMENT_ANNO_KEY,
+    MODULE_NAME_ANNO_KEY,
+    WLAPP_NAME_ANNO_KEY,
+)
+from paas_wl.resources.base.exceptions import NotAppScopedResource
+from paas_wl.resources.kube_res.base import WlAppLRUCache
+from paas_wl.workloads.processes.readers import (
+    bulk_retrieve_associated_wl_apps,
+    get_wl_app_lookup_key,
+    ns_instance_kmodel,
+)
+
+pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
+
+
+def make_kube_data(labels):
+    return ResourceInstance(None, {"metadata": {"name": "foo", "labels": labels}})
+
+
+class TestBulkRetrieveAssociatedWlApps:
+    def test_by_name(self, bk_stag_wl_app, bk_prod_wl_app):
+        labels_list: List[Dict[str, str]] = [
+            {WLAPP_NAME_ANNO_KEY: bk_stag_wl_app.name},
+            {WLAPP_NAME_ANNO_KEY: bk_prod_wl_app.name},
+            {WLAPP_NAME_ANNO_KEY: bk_stag_wl_app.name},
+            {WLAPP_NAME_ANNO_KEY: "not-exists"},
+            {},
+        ]
+        with CaptureQueriesContext(connections["workloads"]) as ctx:
+            ret = bulk_retrieve_associated_wl_apps(labels_list)
+        assert ret == [bk_stag_wl_app, bk_prod_wl_app, bk_stag_wl_app, None, None]
+        assert len(ctx.captured_queries) == 1
+
+    def test_fallback_by_env(self, bk_app, bk_module, bk_stag_env, bk_prod_env, bk_stag_wl_app, bk_prod_wl_app):
+        labels_list = [
+            {BKAPP_CODE_ANNO_KEY: bk_app.code, MODULE_NAME_ANNO_KEY: bk_module.name, ENVIRONMENT_ANNO_KEY: "stag"},
+            {BKAPP_CODE_ANNO_KEY: bk_app.code, MODULE_NAME_ANNO_KEY: bk_module.name, ENVIRONMENT_ANNO_KEY: "prod"},
+            {BKAPP_CODE_ANNO_KEY: bk_app.code, MODULE_NAME_ANNO_KEY: "not-exists", ENVIRONMENT_ANNO_KEY: "prod"},
+            {BKAPP_CODE_ANNO_KEY: bk_app.code, MODULE_NAME_ANNO_KEY: bk_module.name},
+        ]
+        with CaptureQueriesContext(connections["default"]) as ctx:
+            ret = bulk_retrieve_associated_wl_apps(labels_list)
+        assert ret == [bk_stag_wl_app, bk_prod_wl_app, None, None]
+        assert len(ctx.captured_queries) == 1
+
+    def test_name_takes_priority(self, bk_app, bk_module, bk_stag_env, bk_stag_wl_app):
+        labels = {
+            WLAPP_NAME_ANNO_KEY: "not-exists",
+            BKAPP_CODE_ANNO_KEY: bk_app.code,
+            MODULE_NAME_ANNO_KEY: bk_module.name,
+            ENVIRONMENT_ANNO_KEY: "stag",
+        }
+        assert bulk_retrieve_associated_wl_apps([labels]) == [None]
+
+    def test_reader(self, bk_stag_wl_app):
+        kube_data_list = [make_kube_data({WLAPP_NAME_ANNO_KEY: bk_stag_wl_app.name}), make_kube_data(None)]
+        assert ns_instance_kmodel.retrieve_associated_wl_apps(kube_data_list) == [bk_stag_wl_app, None]
+
+
+@pytest.mark.parametrize(
+    ("labels", "expected"),
+    [
+        ({WLAPP_NAME_ANNO_KEY: "foo", BKAPP_CODE_ANNO_KEY: "bar"}, ("name", "foo")),
+        (
+            {BKAPP_CODE_ANNO_KEY: "bar", MODULE_NAME_ANNO_KEY: "default", ENVIRONMENT_ANNO_KEY: "stag"},
+            ("env", "bar", "default", "stag"),
+        ),
+        ({BKAPP_CODE_ANNO_KEY: "bar", MODULE_NAME_ANNO_KEY: "default"}, None),
+    ],
+)
+def test_get_wl_app_lookup_key(labels, expected):
+    assert get_wl_app_lookup_key(labels) == expected
+
+
+class TestWlAppLRUCache:
+    def test_cached(self, bk_stag_wl_app):
+        cache = WlAppLRUCache()
+        kube_data = make_kube_data({WLAPP_NAME_ANNO_KEY: bk_stag_wl_app.name})
+        assert ns_instance_kmodel._retrieve_associated_wl_app_cached(kube_data, cache) == bk_stag_wl_app
+        with CaptureQueriesContext(connections["workloads"]) as ctx:
+            assert ns_instance_kmodel._retrieve_associated_wl_app_cached(kube_data, cache) == bk_stag_wl_app
+        assert len(ctx.captured_queries) == 0
+
+    def test_not_app_scoped_not_cached(self):
+        cache = WlAppLRUCache()
+        kube_data = make_kube_data({WLAPP_NAME_ANNO_KEY: "not-exists"})
+        for _ in range(2):
+            with pytest.raises(NotAppScopedResource):
+                ns_instance_kmodel._retrieve_associated_wl_app_cached(kube_data, cache)
+
+    def test_evict(self, bk_stag_wl_app, bk_prod_wl_app):
+        cache = WlAppLRUCache(max_size=1)
+        cache.get_or_retrieve("stag", lambda: bk_stag_wl_app)
+        cache.get_or_retrieve("prod", lambda: bk_prod_wl_app)
+        assert cache.get_or_retrieve("stag", lambda: bk_prod_wl_app) == bk_prod_wl_app
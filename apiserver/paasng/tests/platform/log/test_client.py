@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+from unittest import mock
+
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+
+from paasng.platform.log import client as client_module
+from paasng.platform.log.client import ESLogClient, get_es_client
+from paasng.platform.log.exceptions import LogQueryError
+from paasng.platform.log.models import ElasticSearchHost
+
+
+@pytest.fixture
+def es_host():
+    return ElasticSearchHost(host="127.0.0.1", port=9200)
+
+
+@pytest.fixture(autouse=True)
+def local_cache():
+    with mock.patch.object(client_module, "cache", new=LocMemCache("es-log", {})):
+        yield
+
+
+@pytest.fixture
+def es_client(es_host):
+    es = mock.MagicMock()
+    with mock.patch.dict(client_module._es_clients, {es_host.json(exclude_none=True): es}):
+        yield es
+
+
+def test_get_es_client_pooled(es_host):
+    with mock.patch.object(client_module, "Elasticsearch") as mocked_es, mock.patch.dict(client_module._es_clients):
+        assert get_es_client(es_host) is get_es_client(ElasticSearchHost(host="127.0.0.1", port=9200))
+        assert get_es_client(es_host) is not get_es_client(ElasticSearchHost(host="127.0.0.1", port=9201))
+        assert mocked_es.call_count == 2
+
+
+class TestESLogClientCache:
+    def test_get_all_indexes(self, es_host, es_client):
+        es_client.indices.stats.return_value = {"indices": {"foo-2023.01.01": {}, "foo-2023.01.02": {}}}
+        log_client = ESLogClient(es_host)
+
+        assert log_client._get_all_indexes("foo-*", 10) == ["foo-2023.01.01", "foo-2023.01.02"]
+        assert log_client._get_all_indexes("foo-*", 10) == ["foo-2023.01.01", "foo-2023.01.02"]
+        assert es_client.indices.stats.call_count == 1
+
+        es_client.indices.stats.return_value = {"indices": {}}
+        assert log_client._get_all_indexes("bar-*", 10) == []
+        assert log_client._get_all_indexes("bar-*", 10) == []
+        assert es_client.indices.stats.call_count == 3, "empty result should not be cached"
+
+    def test_get_mappings(self, es_host, es_client):
+        es_client.indices.get_mapping.return_value = {
+            "foo-2023.01.01": {"mappings": {"properties": {"old": {"type": "text"}}}},
+            "foo-2023.01.02": {"mappings": {"properties": {"new": {"type": "text"}}}},
+        }
+        log_client = ESLogClient(es_host)
+        with mock.patch.object(log_client, "_get_indexes", return_value=["foo-2023.01.01", "foo-2023.01.02"]):
+            assert log_client.get_mappings("foo-*", mock.MagicMock(), 10) == {"new": {"type": "text"}}
+            assert log_client.get_mappings("foo-*", mock.MagicMock(), 10) == {"new": {"type": "text"}}
+        assert es_client.indices.get_mapping.call_count == 1
+
+    def test_get_mappings_empty(self, es_host, es_client):
+        es_client.indices.get_mapping.return_value = {"foo-2023.01.01": {"mappings": {}}}
+        log_client = ESLogClient(es_host)
+        with mock.patch.object(log_client, "_get_indexes", return_value=["foo-2023.01.01"]):
+            with pytest.raises(LogQueryError):
+                log_client.get_mappings("foo-*", mock.MagicMock(), 10)
+
+
+class TestESLogClientIterSearch:
+    @pytest.fixture
+    def search(self):
+        from paasng.utils.es_log.search import SmartSearch
+        from paasng.utils.es_log.time_range import SmartTimeRange
+
+        return SmartSearch(time_field="@timestamp", time_range=SmartTimeRange(time_range="1h"))
+
+    @staticmethod
+    def make_hits(*sort_values):
+        return {"hits": {"hits": [{"_source": {}, "sort": [v]} for v in sort_values]}}
+
+    def test_with_pit(self, es_host, es_client, search):
+        es_client.transport.perform_request.return_value = {"id": "pit-1"}
+        es_client.search.side_effect = [self.make_hits(3, 2), self.make_hits(1)]
+        log_client = ESLogClient(es_host)
+        with mock.patch.object(log_client, "_get_indexes", return_value=["foo-2023.01.01"]):
+            pages = list(log_client.iter_search("foo-*", search, 10, batch_size=2))
+
+        assert [len(page.hits) for page in pages] == [2, 1]
+        first_body = es_client.search.call_args_list[0][1]["body"]
+        second_body = es_client.search.call_args_list[1][1]["body"]
+        assert first_body["pit"]["id"] == "pit-1"
+        assert "index" not in es_client.search.call_args_list[0][1]
+        assert "search_after" not in first_body
+        assert second_body["search_after"] == [2]
+        # The point in time is closed at last
+        assert es_client.transport.perform_request.call_args_list[-1][0][:2] == ("DELETE", "/_pit")
+
+    def test_without_pit(self, es_host, es_client, search):
+        from elasticsearch.exceptions import TransportError
+
+        es_client.transport.perform_request.side_effect = TransportError(400, "unsupported")
+        es_client.search.side_effect = [self.make_hits(3, 2), self.make_hits()]
+        log_client = ESLogClient(es_host)
+        with mock.patch.object(log_client, "_get_indexes", return_value=["foo-2023.01.01"]):
+            pages = list(log_client.iter_search("foo-*", search, 10, batch_size=2))
+
+        assert len(pages) == 1
+        call_kwargs = es_client.search.call_args_list[0][1]
+        assert call_kwargs["index"] == ["foo-2023.01.01"]
+        assert call_kwargs["body"]["sort"][-1] == "_doc"
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+import gzip
+import json
+
+import pytest
+
+from paasng.platform.log.constants import LogExportFormat
+from paasng.platform.log.export import LogExporter
+from paasng.platform.log.responses import StandardOutputLogLine
+
+
+def make_pages(closed: list, pages: int = 3, page_size: int = 2):
+    try:
+        for i in range(pages):
+            yield [
+                StandardOutputLogLine(
+                    timestamp=i * 10 + j, message=f"foo, {j}", raw={"pod_name": "pod-a", "environment": "prod"}
+                )
+                for j in range(page_size)
+            ]
+    finally:
+        closed.append(True)
+
+
+class TestLogExporter:
+    def test_ndjson(self):
+        closed: list = []
+        exporter = LogExporter(StandardOutputLogLine, LogExportFormat.NDJSON, max_rows=100)
+        lines = b"".join(exporter.iter_chunks(make_pages(closed))).decode().splitlines()
+
+        assert len(lines) == 6
+        first = json.loads(lines[0])
+        assert first["message"] == "foo, 0"
+        assert first["pod_name"] == "pod-a"
+        assert first["raw"] == {"pod_name": "pod-a", "environment": "prod"}
+        assert closed
+
+    def test_csv_max_rows(self):
+        closed: list = []
+        exporter = LogExporter(StandardOutputLogLine, LogExportFormat.CSV, max_rows=3)
+        content = gzip.decompress(b"".join(exporter.iter_chunks(make_pages(closed)))).decode()
+
+        rows = content.splitlines()
+        assert rows[0].split(",") == exporter.fields
+        assert len(rows) == 4
+        assert closed, "pages should be closed when max rows reached"
+
+    def test_close(self):
+        closed: list = []
+        exporter = LogExporter(StandardOutputLogLine, LogExportFormat.NDJSON, max_rows=100)
+        chunks = exporter.iter_chunks(make_pages(closed))
+        next(chunks)
+        chunks.close()
+        assert closed
+
+    def test_pages_error(self):
+        def broken_pages():
+            yield from make_pages(closed, pages=1)
+            raise RuntimeError("es error")
+
+        closed: list = []
+        exporter = LogExporter(StandardOutputLogLine, LogExportFormat.CSV, max_rows=100)
+        chunks = []
+        with pytest.raises(RuntimeError):
+            for chunk in exporter.iter_chunks(broken_pages()):
+                chunks.append(chunk)
+        # The gzip trailer is never written, the truncated file can not pass the integrity check
+        with pytest.raises(EOFError):
+            gzip.decompress(b"".join(chunks))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+import json
+from unittest import mock
+
+from paasng.platform.log.tail import LogTailChannel, TailRecord
+
+
+class TestLogTailChannel:
+    def test_poll_first(self):
+        redis_db = mock.MagicMock()
+        redis_db.get.return_value = None
+        channel = LogTailChannel(redis_db, "foo")
+        fetch = mock.MagicMock(return_value=[TailRecord(1, "a", {"m": "a"}), TailRecord(2, "b", {"m": "b"})])
+
+        channel.poll(fetch)
+
+        fetch.assert_called_once_with(None)
+        pipe = redis_db.pipeline.return_value
+        assert [c[0][1]["data"] for c in pipe.xadd.call_args_list] == ['{"m": "a"}', '{"m": "b"}']
+        assert json.loads(pipe.set.call_args[0][1]) == {"timestamp": 2, "ids": ["b"]}
+
+    def test_poll_skip_seen(self):
+        redis_db = mock.MagicMock()
+        redis_db.get.return_value = json.dumps({"timestamp": 2, "ids": ["b"]})
+        channel = LogTailChannel(redis_db, "foo")
+        fetch = mock.MagicMock(return_value=[TailRecord(2, "b", {"m": "b"}), TailRecord(2, "c", {"m": "c"})])
+
+        channel.poll(fetch)
+
+        assert fetch.call_args[0][0].timestamp == 2
+        pipe = redis_db.pipeline.return_value
+        assert [c[0][1]["data"] for c in pipe.xadd.call_args_list] == ['{"m": "c"}']
+        assert json.loads(pipe.set.call_args[0][1]) == {"timestamp": 2, "ids": ["b", "c"]}
+
+    def test_poll_nothing(self):
+        redis_db = mock.MagicMock()
+        redis_db.get.return_value = None
+        LogTailChannel(redis_db, "foo").poll(lambda cursor: [])
+        assert not redis_db.pipeline.called
+
+    def test_release_poller(self):
+        redis_db = mock.MagicMock()
+        redis_db.xrevrange.return_value = []
+        redis_db.xread.return_value = []
+        redis_db.set.return_value = True
+        channel = LogTailChannel(redis_db, "foo")
+        channel.poll_interval = 0.01
+
+        events = channel.iter_events(lambda cursor: [])
+        assert next(events) == ": heartbeat\n\n"
+        token = redis_db.set.call_args_list[0][0][1]
+        redis_db.get.return_value = token.encode()
+        events.close()
+        redis_db.delete.assert_called_once_with(channel.poller_key)
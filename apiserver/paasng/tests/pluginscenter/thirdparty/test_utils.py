@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+import json
+from unittest import mock
+
+import pytest
+import requests
+
+from paasng.pluginscenter.definitions import PluginBackendAPIResource
+from paasng.pluginscenter.thirdparty.utils import SessionRegistry, make_client, session_registry
+
+
+class TestSessionRegistry:
+    def test_get(self):
+        registry = SessionRegistry()
+        session = registry.get("foo", "prod", {"bk_username": "admin"})
+        assert registry.get("foo", "prod", {"bk_username": "admin"}) is session
+        assert registry.get("foo", "stag", {"bk_username": "admin"}) is not session
+        assert registry.get("foo", "prod", {"bk_username": "nobody"}) is not session
+        # All sessions share the same connection pool
+        assert registry.get("bar", "prod", {}).get_adapter("http://") is session.get_adapter("http://")
+
+    def test_evict(self):
+        registry = SessionRegistry(max_size=2)
+        session = registry.get("foo", "prod", {})
+        registry.get("bar", "prod", {})
+        # Make "foo" the most recently used one, "bar" will be evicted
+        assert registry.get("foo", "prod", {}) is session
+        registry.get("baz", "prod", {})
+        assert registry.get("foo", "prod", {}) is session
+        assert len(registry._sessions) == 2
+
+
+class TestMakeClient:
+    @pytest.fixture(autouse=True)
+    def _clear_registry(self):
+        session_registry.clear()
+        yield
+        session_registry.clear()
+
+    @pytest.fixture
+    def mocked_request(self):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b"{}"
+        with mock.patch("requests.adapters.HTTPAdapter.send", return_value=response) as send:
+            yield send
+
+    def test_reuse_session(self, mocked_request):
+        resource = PluginBackendAPIResource(apiName="foo", path="bar/", method="GET")
+        make_client(resource, bk_username="admin").call()
+        make_client(resource, bk_username="nobody").call()
+        make_client(resource, bk_username="admin").call()
+
+        usernames = [
+            json.loads(c.args[0].headers["X-Bkapi-Authorization"])["bk_username"]
+            for c in mocked_request.call_args_list
+        ]
+        assert usernames == ["admin", "nobody", "admin"]
+        assert len(session_registry._sessions) == 2
+
+    def test_i18n_hook_registered_once(self, mocked_request):
+        resource = PluginBackendAPIResource(apiName="foo", path="bar/", method="GET")
+        make_client(resource).call()
+        make_client(resource).call()
+        (session,) = session_registry._sessions.values()
+        assert len(session.hooks["request"]) == 1
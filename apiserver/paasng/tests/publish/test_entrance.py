@@ -29,6 +29,7 @@ from paasng.engine.constants import JobStatus
 from paasng.platform.core.storages.sqlalchemy import console_db
 from paasng.platform.modules.constants import ExposedURLType
 from paasng.publish.entrance.exposer import (
+    get_bulk_exposed_links,
     get_exposed_url,
     get_module_exposed_links,
     update_exposed_url_type_to_subdomain,
@@ -93,6 +94,22 @@ def test_get_module_exposed_links(
     }
 
 
+def test_get_bulk_exposed_links(
+    bk_app, bk_module, bk_stag_env, bk_prod_env, mock_env_is_running, mock_get_builtin_addresses
+):
+    mock_env_is_running[bk_stag_env] = True
+    mock_get_builtin_addresses[bk_stag_env] = [Address(type=AddressType.SUBDOMAIN, url="http://foo-stag.example.com")]
+    bk_module.exposed_url_type = ExposedURLType.SUBDOMAIN
+    bk_module.save()
+
+    assert get_bulk_exposed_links([bk_app]) == {
+        bk_app.id: {
+            'stag': {'deployed': True, 'url': 'http://foo-stag.example.com'},
+            'prod': {'deployed': False, 'url': None},
+        }
+    }
+
+
 class TestUpdateExposedURLType:
     @pytest.fixture(autouse=True)
     def setUp(self, bk_module):
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+import hashlib
+import os
+import stat
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from paasng.dev_resources.sourcectl.package.cache import PackageCache
+from paasng.dev_resources.sourcectl.utils import generate_temp_dir, generate_temp_file
+
+
+def make_downloader(content: bytes) -> mock.Mock:
+    def download(path: Path):
+        path.write_bytes(content)
+
+    return mock.Mock(side_effect=download)
+
+
+class TestPackageCache:
+    @pytest.fixture
+    def cache(self):
+        with generate_temp_dir() as root:
+            yield PackageCache(root, max_size=10)
+
+    def test_fetch(self, cache):
+        content = b"foo"
+        digest = hashlib.sha256(content).hexdigest()
+        download = make_downloader(content)
+        with generate_temp_file() as dest:
+            cache.fetch(digest, dest, download)
+            assert dest.read_bytes() == content
+
+        with generate_temp_file() as dest:
+            cache.fetch(digest, dest, download)
+            assert dest.read_bytes() == content
+        # The second fetch hit the cache
+        assert download.call_count == 1
+
+    def test_digest_mismatched(self, cache):
+        download = make_downloader(b"foo")
+        with generate_temp_file() as dest:
+            cache.fetch("0" * 64, dest, download)
+            assert dest.read_bytes() == b"foo"
+            assert not cache.copy_to("0" * 64, dest)
+
+    def test_corrupted_package(self, cache):
+        content = b"foo"
+        digest = hashlib.sha256(content).hexdigest()
+        download = make_downloader(content)
+        with generate_temp_file() as dest:
+            cache.fetch(digest, dest, download)
+        cache._make_path(digest).write_bytes(b"bar")
+
+        # The corrupted package is removed and downloaded again
+        with generate_temp_file() as dest:
+            cache.fetch(digest, dest, download)
+            assert dest.read_bytes() == content
+        assert download.call_count == 2
+        assert cache._make_path(digest).read_bytes() == content
+
+    def test_private_dirs(self, cache):
+        content = b"foo"
+        digest = hashlib.sha256(content).hexdigest()
+        with generate_temp_file() as dest:
+            cache.fetch(digest, dest, make_downloader(content))
+
+        path = cache._make_path(digest)
+        assert stat.S_IMODE(path.parent.stat().st_mode) == 0o700
+        assert stat.S_IMODE(cache.root.stat().st_mode) == 0o700
+
+    def test_evict(self, cache):
+        cache.max_size = 100
+        digests = []
+        for idx, content in enumerate([b"1234", b"5678", b"abcd"]):
+            digest = hashlib.sha256(content).hexdigest()
+            with generate_temp_file() as dest:
+                cache.fetch(digest, dest, make_downloader(content))
+            # Make the modified time of packages different
+            os.utime(cache._make_path(digest), (idx, idx))
+            digests.append(digest)
+
+        with generate_temp_file() as dest:
+            # Touch the first package, so the second one is the least recently used
+            assert cache.copy_to(digests[0], dest)
+            cache.max_size = 10
+            cache.evict()
+            assert cache.copy_to(digests[0], dest)
+            assert not cache.copy_to(digests[1], dest)
+            assert cache.copy_to(digests[2], dest)
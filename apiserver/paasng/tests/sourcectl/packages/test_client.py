@@ -16,8 +16,11 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
+import re
 import tarfile
 from contextlib import ExitStack
+from pathlib import Path
+from unittest import mock
 
 import pytest
 from blue_krill.contextlib import nullcontext as does_not_raise
@@ -31,9 +34,12 @@ from paasng.dev_resources.sourcectl.package.client import (
     TarClient,
     ZipClient,
 )
+from paasng.dev_resources.sourcectl.package.downloader import RangeNotSupported
+from paasng.dev_resources.sourcectl.package.indexer import PackageMetadataIndex
 from paasng.dev_resources.sourcectl.package.uploader import upload_to_blob_store
 from paasng.dev_resources.sourcectl.utils import compress_directory, generate_temp_dir, generate_temp_file
 from tests.sourcectl.packages.utils import gen_tar, gen_zip
+from tests.utils.api import mock_json_response
 from tests.utils.helpers import generate_random_string
 
 
@@ -178,3 +184,71 @@ class TestGenericRemoteClient:
             cli = GenericRemoteClient(obj_url)
             with ctx:
                 assert cli.read_file(filename) == expected
+
+
+class TestGenericRemoteClientWithoutDownloading:
+    @pytest.fixture
+    def zip_file(self):
+        with generate_temp_file() as file_path:
+            gen_zip(file_path, {"foo/Procfile": "web: npm run dev\n", "foo/src/main.js": "1"})
+            yield Path(file_path)
+
+    @pytest.fixture
+    def range_requests(self, zip_file):
+        """Mock the server which supports range requests"""
+        content = zip_file.read_bytes()
+
+        def fake_get(url, headers, **kwargs):
+            matched = re.match(r"bytes=(\d*)-(\d*)", headers["Range"])
+            assert matched is not None
+            start, end = matched.groups()
+            if not start:
+                start, end = max(len(content) - int(end), 0), len(content) - 1
+            start, end = int(start), min(int(end), len(content) - 1)
+            resp = mock_json_response(None, status_code=206)
+            resp._content = content[start : end + 1]
+            resp.headers["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+            return resp
+
+        with mock.patch("requests.get", side_effect=fake_get) as mocked_get, mock.patch(
+            "paasng.dev_resources.sourcectl.package.client.download_file_with_cache"
+        ) as mocked_download:
+            yield mocked_get, mocked_download
+
+    def test_read_from_index(self, zip_file, range_requests):
+        with ZipClient(file_path=str(zip_file)) as archive:
+            index = PackageMetadataIndex.build(archive, is_zipfile=True)
+        assert index is not None
+
+        cli = GenericRemoteClient("http://foo/bar.zip", relative_path="./foo/", metadata_index=index.to_dict())
+        assert cli.read_file("Procfile") == b"web: npm run dev\n"
+        with pytest.raises(KeyError):
+            cli.read_file("app_desc.yaml")
+
+        mocked_get, mocked_download = range_requests
+        assert not mocked_get.called
+        assert not mocked_download.called
+
+    def test_ranged_read(self, range_requests):
+        cli = GenericRemoteClient("http://foo/bar.zip", relative_path="./foo/", ranged_read=True)
+        assert cli.read_file("src/main.js") == b"1"
+        with pytest.raises(KeyError):
+            cli.read_file("Procfile.not_exists")
+
+        mocked_get, mocked_download = range_requests
+        assert mocked_get.called
+        assert not mocked_download.called
+
+    def test_range_not_supported(self, mock_adapter):
+        url = f"http://foo/{generate_random_string()}"
+        with generate_temp_file() as file_path:
+            gen_zip(file_path, {"Procfile": "web: npm run dev\n"})
+            with open(file_path, mode="rb") as fh, mock.patch(
+                "paasng.dev_resources.sourcectl.package.downloader.HTTPRangeFile._fetch"
+            ) as fetch:
+                mock_adapter.register(url, fh)
+                # The server responds 200 instead of 206, fallback to downloading the whole package
+                fetch.side_effect = RangeNotSupported
+                cli = GenericRemoteClient(url, ranged_read=True)
+                assert cli.read_file("Procfile") == b"web: npm run dev\n"
+            cli.close()
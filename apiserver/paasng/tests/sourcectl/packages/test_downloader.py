@@ -16,9 +16,13 @@ limitations under the License.
 We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
+import hashlib
+from unittest import mock
+
 import pytest
 
-from paasng.dev_resources.sourcectl.package.downloader import download_file_via_http
+from paasng.dev_resources.sourcectl.package.cache import PackageCache
+from paasng.dev_resources.sourcectl.package.downloader import download_file_via_http, download_file_with_cache
 from paasng.dev_resources.sourcectl.utils import generate_temp_file
 from tests.utils.helpers import generate_random_string
 
@@ -42,3 +46,24 @@ def test_download_file_via_http(mock_adapter, content):
         assert source != dest
         with open(dest, "rb") as dh:
             assert dh.read() == content
+
+
+class TestDownloadFileWithCache:
+    @pytest.fixture
+    def unwritable_cache(self):
+        with generate_temp_file() as file_path:
+            # The parent of cache root is a regular file, so the cache directories can not be created
+            file_path.write_bytes(b"")
+            cache = PackageCache(file_path / "cache", max_size=1024)
+            with mock.patch("paasng.dev_resources.sourcectl.package.downloader.get_package_cache", return_value=cache):
+                yield cache
+
+    def test_cache_unavailable(self, mock_adapter, unwritable_cache):
+        url = f"http://foo.com/{generate_random_string()}"
+        content = b"foo\n"
+        with generate_temp_file() as source, generate_temp_file() as dest:
+            source.write_bytes(content)
+            with open(source, mode="rb") as fh:
+                mock_adapter.register(url, fh)
+                download_file_with_cache(url, dest, sha256_signature=hashlib.sha256(content).hexdigest())
+            assert dest.read_bytes() == content
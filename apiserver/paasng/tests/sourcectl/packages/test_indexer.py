@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except
+in compliance with the License. You may obtain a copy of the License at
+
+    http://opensource.org/licenses/MIT
+
+Unless required by applicable law or agreed to in writing, software distributed under
+the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+import pytest
+
+from paasng.dev_resources.sourcectl.package.client import GenericLocalClient
+from paasng.dev_resources.sourcectl.package.indexer import METADATA_FILE_MAX_SIZE, PackageMetadataIndex
+from paasng.dev_resources.sourcectl.utils import generate_temp_file
+from tests.sourcectl.packages.utils import gen_tar, gen_zip
+
+
+class TestPackageMetadataIndex:
+    @pytest.mark.parametrize("archive_maker", [gen_tar, gen_zip])
+    def test_build(self, archive_maker):
+        contents = {
+            "Procfile": "web: npm run dev\n",
+            "app/app_desc.yaml": "spec_version: 2\n",
+            "app/src/.dockerignore": "x" * (METADATA_FILE_MAX_SIZE + 1),
+            "app/src/main.js": "1",
+        }
+        with generate_temp_file() as file_path:
+            archive_maker(file_path, contents)
+            with GenericLocalClient(file_path=str(file_path)) as archive:
+                index = PackageMetadataIndex.build(archive)
+
+        assert index is not None
+        assert index.files == {"Procfile": b"web: npm run dev\n", "app/app_desc.yaml": b"spec_version: 2\n"}
+        assert index.oversized == ["app/src/.dockerignore"]
+
+    def test_read_file(self):
+        index = PackageMetadataIndex.from_dict(
+            PackageMetadataIndex(files={"app/Procfile": b"web: npm run dev\n"}, oversized=["app/bkapp.yaml"]).to_dict()
+        )
+        assert index.read_file("./app/Procfile") == b"web: npm run dev\n"
+        assert index.read_file("app/../app/Procfile") == b"web: npm run dev\n"
+        # Files which are not covered by the index
+        assert index.read_file("app/bkapp.yaml") is None
+        assert index.read_file("app/main.js") is None
+        assert index.read_file("a/b/c/d/Procfile") is None
+        with pytest.raises(KeyError):
+            index.read_file("app/app_desc.yaml")
@@ -19,7 +19,7 @@ to the current version of the project delivered to anyone in the future.
 import arrow
 import pytest
 
-from paasng.utils.es_log.misc import filter_indexes_by_time_range
+from paasng.utils.es_log.misc import count_fields_values, filter_indexes_by_time_range
 from paasng.utils.es_log.time_range import SmartTimeRange
 
 
@@ -96,3 +96,27 @@ def indexes():
 )
 def test_filter_indexes_by_time_range(indexes, time_range, expected):
     assert filter_indexes_by_time_range(indexes, time_range) == expected
+
+
+@pytest.mark.parametrize(
+    "logs, fields, expected",
+    [
+        ([], ["foo"], {}),
+        # 字段按照首次出现的日志及声明的顺序排列, 忽略未声明及不存在的字段
+        (
+            [{"bar": 1, "noise": 1}, {"foo": {"a": "x"}, "bar": 2}, {"foo": {"a": "y"}}],
+            ["foo.a", "bar", "baz"],
+            {"bar": {1: 1, 2: 1}, "foo.a": {"x": 1, "y": 1}},
+        ),
+        # 忽略不可哈希的值
+        (
+            [{"foo": [1, 2]}, {"foo": "x"}, {"bar": [1]}],
+            ["foo", "bar"],
+            {"foo": {"x": 1}, "bar": {}},
+        ),
+    ],
+)
+def test_count_fields_values(logs, fields, expected):
+    result = count_fields_values(logs, fields)
+    assert result == expected
+    assert list(result) == list(expected)
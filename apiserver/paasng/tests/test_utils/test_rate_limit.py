@@ -17,6 +17,7 @@ We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
 import time
+from unittest import mock
 
 import pytest
 from django.http import HttpRequest
@@ -27,6 +28,8 @@ from paasng.platform.core.storages.redisdb import get_default_redis
 from paasng.utils.rate_limit.constants import UserAction
 from paasng.utils.rate_limit.fixed_window import UserActionRateLimiter as UserActionFixedWindowRateLimiter
 from paasng.utils.rate_limit.fixed_window import rate_limits_by_user
+from paasng.utils.rate_limit.sliding_window import UserActionRateLimiter as UserActionSlidingWindowRateLimiter
+from paasng.utils.rate_limit.sliding_window import sliding_rate_limits_by_user
 from paasng.utils.rate_limit.token_bucket import UserActionRateLimiter as UserActionTokenBucketRateLimiter
 from tests.utils.auth import create_user
 
@@ -48,7 +51,67 @@ def test_UserActionRateLimiter(RateLimiter):
     assert rate_limiter.is_allowed()
 
 
-def test_rate_limits_on_view_func():
+@pytest.mark.parametrize(
+    'RateLimiter, retry_after',
+    [
+        (UserActionTokenBucketRateLimiter, 1.5),
+        (UserActionFixedWindowRateLimiter, 2),
+        (UserActionSlidingWindowRateLimiter, 3.5),
+    ],
+)
+def test_rate_limit_result(RateLimiter, retry_after):
+    window_size, threshold = 3, 2
+    user = create_user()
+    rate_limiter = RateLimiter(get_default_redis(), user.username, UserAction.WATCH_PROCESS, window_size, threshold)
+    with mock.patch('time.time', return_value=3001.0):
+        assert [rate_limiter.acquire().remaining for _ in range(threshold)] == [1, 0]
+
+        result = rate_limiter.acquire()
+        assert not result.allowed
+        assert result.retry_after == pytest.approx(retry_after)
+
+
+def test_sliding_window_rate_limiter():
+    window_size, threshold = 10, 4
+    user = create_user()
+    rate_limiter = UserActionSlidingWindowRateLimiter(
+        get_default_redis(), user.username, UserAction.WATCH_PROCESS, window_size, threshold
+    )
+    with mock.patch('time.time') as mocked_time:
+        mocked_time.return_value = 1009.0
+        for _ in range(threshold):
+            assert rate_limiter.is_allowed()
+
+        # 进入下一个窗口，但上一窗口的请求仍有 80% 计入滑动窗口
+        mocked_time.return_value = 1012.0
+        assert not rate_limiter.is_allowed()
+
+        # 上一窗口的权重衰减至 25%，仅相当于 1 次请求
+        mocked_time.return_value = 1017.5
+        for _ in range(threshold - 1):
+            assert rate_limiter.is_allowed()
+        assert not rate_limiter.is_allowed()
+
+
+@pytest.mark.parametrize(
+    'RateLimiter',
+    [UserActionTokenBucketRateLimiter, UserActionFixedWindowRateLimiter, UserActionSlidingWindowRateLimiter],
+)
+@pytest.mark.parametrize('window_size, threshold', [(3, 0), (0, 2)])
+def test_invalid_limits(RateLimiter, window_size, threshold):
+    with pytest.raises(ValueError):
+        RateLimiter(get_default_redis(), 'foo', UserAction.WATCH_PROCESS, window_size, threshold)
+
+
+@pytest.mark.parametrize(
+    'decorator, retry_after',
+    [
+        # 固定窗口：等待当前窗口 [3000, 3003) 结束
+        (rate_limits_by_user, '2'),
+        (sliding_rate_limits_by_user, '4'),
+    ],
+)
+def test_rate_limits_on_view_func(decorator, retry_after):
     window_size, threshold = 3, 2
     fake_request = HttpRequest()
     fake_request.user = create_user()
@@ -56,15 +119,20 @@ def test_rate_limits_on_view_func():
     class FakeViewSet:
         request = fake_request
 
-        @rate_limits_by_user(UserAction.WATCH_PROCESS, window_size, threshold)
+        @decorator(UserAction.WATCH_PROCESS, window_size, threshold)
         def fake_view_func(self):
             return Response("ok")
 
     viewset = FakeViewSet()
 
-    for _ in range(threshold):
-        assert viewset.fake_view_func().status_code == HTTP_200_OK
+    with mock.patch('time.time') as mocked_time:
+        mocked_time.return_value = 3001.0
+        for _ in range(threshold):
+            assert viewset.fake_view_func().status_code == HTTP_200_OK
 
-    assert viewset.fake_view_func().status_code == HTTP_429_TOO_MANY_REQUESTS
-    time.sleep(window_size)
-    assert viewset.fake_view_func().status_code == HTTP_200_OK
+        resp = viewset.fake_view_func()
+        assert resp.status_code == HTTP_429_TOO_MANY_REQUESTS
+        assert resp['Retry-After'] == retry_after
+
+        mocked_time.return_value = 3001.0 + int(resp['Retry-After'])
+        assert viewset.fake_view_func().status_code == HTTP_200_OK